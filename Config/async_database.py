@@ -0,0 +1,71 @@
+from contextlib import asynccontextmanager
+
+import aiomysql
+
+"""
+Version asynchrone (asyncio) de Config/database.py.
+Pour un front-end réseau (API, websockets...), on ne veut pas qu'une requête SQL
+"bloque" tout le programme pendant qu'elle attend MySQL. Avec asyncio, pendant
+qu'une requête attend la réponse du serveur, les autres sessions continuent.
+Le driver 'aiomysql' fournit des connexions et un pool compatibles asyncio.
+"""
+
+
+class AsyncDatabaseConnection:
+    """
+    Singleton qui garde le pool aiomysql partagé par tous les DAOs asynchrones.
+    Chaque opération emprunte une connexion avec 'async with db.acquire() as connection'.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        # Pas besoin de verrou ici : toutes les tâches asyncio tournent dans le même thread
+        if cls._instance is None:
+            cls._instance = super(AsyncDatabaseConnection, cls).__new__(cls)
+            cls._instance.pool = None
+        return cls._instance
+
+    async def connect(self, host, user, password, database, minsize=1, maxsize=10):
+        """Crée le pool de connexions asynchrones (une seule fois)."""
+        if self.pool is not None:
+            return
+        try:
+            self.pool = await aiomysql.create_pool(
+                host=host, user=user, password=password, db=database,
+                minsize=minsize, maxsize=maxsize, autocommit=False
+            )
+            print(f"Pool asynchrone MySQL prêt ({minsize}-{maxsize}).")
+        except Exception as erreur:
+            print(f"Erreur lors de la connexion asynchrone à MySQL : {erreur}")
+            self.pool = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Emprunte une connexion du pool le temps d'un bloc 'async with'.
+        Renvoie None si le pool n'est pas initialisé (comme get_connection()).
+        """
+        if self.pool is None:
+            yield None
+            return
+
+        connection = await self.pool.acquire()
+        try:
+            yield connection
+        finally:
+            # On referme proprement une éventuelle transaction de lecture restée ouverte
+            try:
+                await connection.rollback()
+            except Exception:
+                pass
+            self.pool.release(connection)
+
+    async def close(self):
+        """Ferme toutes les connexions du pool."""
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+            print("Pool asynchrone MySQL fermé.")
+
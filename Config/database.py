@@ -1,16 +1,396 @@
-import mysql.connector
-from mysql.connector import Error
+import re
+import time
+import sqlite3
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+
+
+class PoolExhaustedError(Exception):
+    """Levée quand aucune connexion ne se libère avant la fin du délai d'attente."""
+    pass
+
+
+class ConnectionPool:
+    """
+    Un "Pool" (réservoir) de connexions, borné entre un minimum et un maximum.
+    Au lieu de partager UNE seule connexion pour tout le programme, chaque opération
+    "emprunte" (checkout) une connexion libre puis la "rend" (checkin) une fois terminée.
+    Si toutes les connexions sont occupées et que le maximum est atteint, on attend
+    qu'une connexion soit rendue (avec un délai maximum 'timeout').
+    """
+
+    def __init__(self, factory, min_size=1, max_size=5, timeout=10.0):
+        # 'factory' est une fonction sans argument qui ouvre une nouvelle connexion
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.timeout = timeout
+
+        # Les connexions libres, prêtes à être empruntées
+        self._idle = []
+        # Nombre total de connexions ouvertes (libres + empruntées)
+        self._size = 0
+        # La 'Condition' protège les attributs ci-dessus et permet d'attendre une connexion libre
+        self._cond = threading.Condition()
+
+        # Compteurs de surveillance (métriques)
+        self._metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'discarded': 0,
+        }
+
+        # On ouvre tout de suite le nombre minimum de connexions
+        for _ in range(self.min_size):
+            self._idle.append(self._create())
+            self._size += 1
+
+    def _create(self):
+        """Ouvre une nouvelle connexion via la 'factory'."""
+        connection = self._factory()
+        with self._cond:
+            self._metrics['created'] += 1
+        return connection
+
+    def _is_valid(self, connection):
+        """
+        Validation à l'emprunt : is_connected() envoie un 'ping' au serveur.
+        Une connexion coupée (timeout serveur, redémarrage MySQL...) est ainsi détectée
+        avant d'être donnée à un DAO.
+        """
+        try:
+            return connection.is_connected()
+        except Exception:
+            return False
+
+    def checkout(self):
+        """Emprunte une connexion (en attendant si le pool est plein)."""
+        debut = time.perf_counter()
+        deadline = debut + self.timeout
+        a_attendu = False
+        connection = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # On réserve la place tout de suite, la connexion sera ouverte hors du verrou
+                    self._size += 1
+                    break
+
+                a_attendu = True
+                restant = deadline - time.perf_counter()
+                if restant <= 0 or not self._cond.wait(restant):
+                    if self._idle or self._size < self.max_size:
+                        continue
+                    self._metrics['timeouts'] += 1
+                    raise PoolExhaustedError(
+                        f"Aucune connexion libre après {self.timeout}s (max={self.max_size})."
+                    )
+
+        # Ouverture ou validation en dehors du verrou (ce sont des appels réseau)
+        try:
+            if connection is None:
+                connection = self._create()
+            elif not self._is_valid(connection):
+                with self._cond:
+                    self._metrics['discarded'] += 1
+                self._close_quietly(connection)
+                connection = self._create()
+        except Exception:
+            # La place réservée est libérée pour ne pas "perdre" une connexion du pool
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        attente_ms = (time.perf_counter() - debut) * 1000
+        with self._cond:
+            self._metrics['checkouts'] += 1
+            if a_attendu:
+                self._metrics['waits'] += 1
+            self._metrics['total_wait_ms'] += attente_ms
+            self._metrics['max_wait_ms'] = max(self._metrics['max_wait_ms'], attente_ms)
+
+        return connection
+
+    def checkin(self, connection):
+        """Rend une connexion au pool pour qu'une autre opération puisse la réutiliser."""
+        try:
+            # On annule toute transaction restée ouverte (ex: simple SELECT) pour que
+            # le prochain emprunteur parte d'un état propre.
+            if connection.in_transaction:
+                connection.rollback()
+            reutilisable = True
+        except Exception:
+            reutilisable = False
+
+        with self._cond:
+            if reutilisable:
+                self._idle.append(connection)
+            else:
+                self._size -= 1
+                self._metrics['discarded'] += 1
+            self._cond.notify()
+
+        if not reutilisable:
+            self._close_quietly(connection)
+
+    def get_metrics(self):
+        """Retourne une copie des métriques (utile pour un dashboard ou les logs)."""
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics['size'] = self._size
+            metrics['idle'] = len(self._idle)
+            metrics['in_use'] = self._size - len(self._idle)
+            metrics['min_size'] = self.min_size
+            metrics['max_size'] = self.max_size
+        checkouts = metrics['checkouts']
+        metrics['avg_wait_ms'] = metrics['total_wait_ms'] / checkouts if checkouts else 0.0
+        return metrics
+
+    def close_all(self):
+        """Ferme toutes les connexions libres (les empruntées seront fermées au checkin)."""
+        with self._cond:
+            connexions = self._idle
+            self._idle = []
+            self._size -= len(connexions)
+        for connection in connexions:
+            self._close_quietly(connection)
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class MySQLBackend:
+    """
+    "Backend" = le moteur de base de données réellement utilisé.
+    Celui-ci ouvre des connexions vers un serveur MySQL (le mode de production).
+    """
+    name = 'mysql'
+
+    def __init__(self, host, user, password, database):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+
+    def connect(self):
+        # Import ici (et pas en haut du fichier) : le mode SQLite n'a pas besoin du driver MySQL
+        import mysql.connector
+        return mysql.connector.connect(host=self.host, user=self.user, password=self.password, database=self.database)
+
+    def describe(self):
+        return f"MySQL {self.user}@{self.host}/{self.database}"
+
+
+# Quelques traductions MySQL -> SQLite (les DAOs écrivent du SQL MySQL)
+_DATE_ADD = re.compile(r"DATE_ADD\((.+?),\s*INTERVAL\s+(%s|\d+)\s+DAY\)", re.IGNORECASE)
+_CURDATE = re.compile(r"\bCURDATE\(\)", re.IGNORECASE)
+_NOW = re.compile(r"\bNOW\(\)", re.IGNORECASE)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_COLONNE = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def translate_to_sqlite(sql):
+    """
+    Petit "shim" de dialecte : réécrit une requête MySQL pour SQLite.
+    - CURDATE() / NOW()                  -> date('now', 'localtime') / datetime(...)
+    - DATE_ADD(x, INTERVAL n DAY)        -> date(x, '+n days')
+    - ON DUPLICATE KEY UPDATE c = VALUES(c) -> ON CONFLICT DO UPDATE SET c = excluded.c
+      ("upsert" : si la clé existe déjà, on met à jour la ligne au lieu d'en insérer une autre)
+    - les paramètres %s                  -> ?
+    Le résultat est mis en cache : chaque requête n'est traduite qu'une seule fois.
+    """
+    def date_add(match):
+        base, jours = match.group(1).strip(), match.group(2)
+        if jours == '%s':
+            return f"date({base}, '+' || %s || ' days')"
+        return f"date({base}, '+{jours} days')"
+
+    sql = _CURDATE.sub("date('now', 'localtime')", sql)
+    sql = _NOW.sub("datetime('now', 'localtime')", sql)
+    sql = _DATE_ADD.sub(date_add, sql)
+    doublon = _ON_DUPLICATE.search(sql)
+    if doublon:
+        # VALUES(c) n'est remplacé qu'APRÈS la clause (avant, c'est le VALUES (...) de l'INSERT)
+        suite = _VALUES_COLONNE.sub(r"excluded.\1", sql[doublon.end():])
+        sql = sql[:doublon.start()] + "ON CONFLICT DO UPDATE SET" + suite
+    return sql.replace('%s', '?')
+
+
+class SQLiteCursor:
+    """
+    Curseur SQLite qui se comporte comme un curseur mysql.connector :
+    paramètres en %s, et lignes sous forme de dictionnaire avec cursor(dictionary=True).
+    """
+
+    def __init__(self, raw_cursor, dictionary=False):
+        self._cursor = raw_cursor
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(translate_to_sqlite(sql), tuple(params) if params else ())
+        return self
+
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(translate_to_sqlite(sql), [tuple(p) for p in seq_params])
+        return self
+
+    def _convertir(self, row):
+        if row is None or not self._dictionary:
+            return row
+        colonnes = [d[0] for d in self._cursor.description]
+        return dict(zip(colonnes, row))
+
+    def fetchone(self):
+        return self._convertir(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._convertir(r) for r in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._convertir(r) for r in self._cursor.fetchall()]
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Enveloppe une connexion sqlite3 pour offrir la même interface que mysql.connector."""
+
+    def __init__(self, raw_connection):
+        self._connection = raw_connection
+        self._open = True
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self._connection.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def executescript(self, script):
+        """Exécute un script SQL complet (plusieurs requêtes séparées par des ';')."""
+        self._connection.executescript(script)
+
+    def rollback(self):
+        self._connection.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def is_connected(self):
+        if not self._open:
+            return False
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._open = False
+        self._connection.close()
+
+
+# Les dates Python sont stockées en texte ISO (comme MySQL les renvoie en chaîne)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(sep=' '))
+
+
+class SQLiteBackend:
+    """
+    Backend SQLite "embarqué" : pas de serveur à installer, idéal pour les tests et benchmarks.
+    path peut être un fichier ('optivolt.db') ou ':memory:' (base en RAM).
+    """
+    name = 'sqlite'
+    _compteur_memoire = 0
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._keeper = None
+
+        if path == ':memory:':
+            # Plusieurs connexions (pool, threads) doivent voir la MÊME base en RAM :
+            # on utilise une base mémoire "partagée", gardée en vie par une connexion témoin.
+            SQLiteBackend._compteur_memoire += 1
+            self._uri = f"file:optivolt_mem_{SQLiteBackend._compteur_memoire}?mode=memory&cache=shared"
+            self._keeper = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        else:
+            self._uri = None
+
+    def connect(self):
+        if self._uri:
+            raw = sqlite3.connect(self._uri, uri=True, timeout=30, check_same_thread=False)
+        else:
+            raw = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            # WAL : les lectures ne bloquent pas pendant une écriture
+            raw.execute("PRAGMA journal_mode = WAL")
+        # Comme MySQL/InnoDB, on fait respecter les clés étrangères (ON DELETE CASCADE...)
+        raw.execute("PRAGMA foreign_keys = ON")
+        return SQLiteConnection(raw)
+
+    def describe(self):
+        return f"SQLite {self.path}"
+
+
+# Connexion "épinglée" au thread (ou à la tâche asyncio) en cours pendant un borrow().
+# Un ContextVar est propre à chaque thread ET à chaque tâche asyncio : deux sessions
+# concurrentes ne verront jamais la connexion l'une de l'autre.
+_connexion_courante = contextvars.ContextVar('optivolt_connexion_courante', default=None)
+# Vrai pendant un bloc "with db.transaction()" : les DAOs ne valident plus eux-mêmes.
+_transaction_courante = contextvars.ContextVar('optivolt_transaction_courante', default=False)
+# Fonctions à appeler une fois la transaction en cours validée (voir DatabaseConnection.after_commit)
+_apres_validation = contextvars.ContextVar('optivolt_apres_validation', default=None)
+
 
 class DatabaseConnection:
     """
-    Cette classe gère la connexion à la base de données MySQL.
+    Cette classe gère la connexion à la base de données (MySQL, ou SQLite pour les tests).
     Elle utilise le design pattern (patron de conception) "Singleton".
     Le but du Singleton est de s'assurer qu'il n'y a qu'une seule connexion active
     partagée dans tout le programme, pour éviter d'ouvrir 50 connexions différentes.
+    En mode "pool" (pool_max > 0), le Singleton garde un ConnectionPool et chaque DAO
+    emprunte une connexion le temps d'une opération via borrow().
+    Plusieurs sessions (threads) peuvent cohabiter : chaque thread a sa propre connexion.
     """
-    
+
     # Cet attribut de classe va stocker l'unique instance de notre connexion
     _instance = None
+    # Verrou qui empêche deux threads de créer chacun "leur" Singleton en même temps
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         """
@@ -19,53 +399,307 @@ class DatabaseConnection:
         Si elle existe déjà, on renvoie simplement celle qui existe.
         """
         if cls._instance is None:
-            # Création de la seule et unique instance
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
-            # Initialisation de notre variable de connexion à None
-            cls._instance.connection = None
-        
+            # Double vérification : on re-teste sous le verrou, car un autre thread
+            # a peut-être créé l'instance pendant qu'on attendait.
+            with cls._instance_lock:
+                if cls._instance is None:
+                    # Création de la seule et unique instance
+                    instance = super(DatabaseConnection, cls).__new__(cls)
+                    # Initialisation de notre variable de connexion à None
+                    instance.connection = None
+                    # Pas de pool tant que connect() n'a pas été appelé avec pool_max > 0
+                    instance.pool = None
+                    # Backend utilisé (MySQL ou SQLite), pour ouvrir une connexion par thread sans pool
+                    instance.backend = None
+                    instance._owner_thread = None
+                    instance._local = threading.local()
+                    instance._thread_connections = []
+                    instance._lock = threading.Lock()
+                    # Nombre de COMMIT réellement envoyés à la base (utile pour les benchmarks)
+                    instance.commit_count = 0
+                    # Instrumentation des requêtes (None = désactivée, aucun surcoût)
+                    instance.instrumentation = None
+                    # On ne publie l'instance qu'une fois entièrement initialisée
+                    cls._instance = instance
+
         # On retourne toujours la même instance
         return cls._instance
 
-    def connect(self, host, user, password, database):
+    def connect(self, host, user, password, database, pool_min=0, pool_max=0, pool_timeout=10.0):
         """
         Cette méthode établit la vraie connexion au serveur MySQL.
+        Si pool_max > 0, on crée un pool borné [pool_min, pool_max] au lieu d'une connexion unique.
         """
+        self.use_backend(MySQLBackend(host, user, password, database), pool_min, pool_max, pool_timeout)
+
+    def connect_sqlite(self, path=':memory:', pool_min=0, pool_max=0, pool_timeout=10.0):
+        """Même chose que connect(), mais avec une base SQLite (fichier ou ':memory:')."""
+        self.use_backend(SQLiteBackend(path), pool_min, pool_max, pool_timeout)
+
+    def connect_from_config(self, config):
+        """
+        Ouvre la connexion décrite par la configuration (Config.settings.Config) :
+        DB_BACKEND ('mysql' par défaut ou 'sqlite'), DB_SQLITE_PATH, et les réglages du pool.
+        """
+        pool_min = getattr(config, 'DB_POOL_MIN', 0)
+        pool_max = getattr(config, 'DB_POOL_MAX', 0)
+        pool_timeout = getattr(config, 'DB_POOL_TIMEOUT', 10.0)
+
+        if getattr(config, 'DB_INSTRUMENTATION', False):
+            self.enable_instrumentation(getattr(config, 'DB_SLOW_QUERY_MS', 200.0))
+
+        if getattr(config, 'DB_BACKEND', 'mysql') == 'sqlite':
+            self.connect_sqlite(getattr(config, 'DB_SQLITE_PATH', 'optivolt.db'), pool_min, pool_max, pool_timeout)
+        else:
+            self.connect(config.DB_HOST, config.DB_USER, config.DB_PASSWORD, config.DB_NAME, pool_min, pool_max, pool_timeout)
+
+    def use_backend(self, backend, pool_min=0, pool_max=0, pool_timeout=10.0):
+        """Branche le Singleton sur un backend (MySQLBackend ou SQLiteBackend)."""
+        with self._lock:
+            self.backend = backend
+            self._owner_thread = threading.get_ident()
+
+        if pool_max:
+            if self.pool is not None:
+                return
+
+            try:
+                self.pool = ConnectionPool(backend.connect, pool_min, pool_max, pool_timeout)
+                print(f"Pool de connexions prêt ({backend.describe()}, {pool_min}-{self.pool.max_size}).")
+            except Exception as error_message:
+                print(f"Erreur lors de la création du pool ({backend.describe()}) : {error_message}")
+                self.pool = None
+            return
+
         # On vérifie d'abord si on n'est pas déjà connecté
         is_already_connected = self.connection is not None and self.connection.is_connected()
-        
+
         if not is_already_connected:
             try:
                 # On essaie de se connecter avec les informations fournies
-                self.connection = mysql.connector.connect(
-                    host=host,
-                    user=user,
-                    password=password,
-                    database=database
-                )
-                
+                self.connection = backend.connect()
+
                 # Si ça marche, on affiche un message de succès
                 if self.connection.is_connected():
                     print("Connexion à la base de données réussie.")
-                    
-            except Error as error_message:
+
+            except Exception as error_message:
                 # Si une erreur survient, on l'attrape (try/except) et on l'affiche
-                print(f"Erreur lors de la connexion à MySQL : {error_message}")
+                print(f"Erreur lors de la connexion ({backend.describe()}) : {error_message}")
                 self.connection = None
 
+    def enable_instrumentation(self, slow_query_ms=200.0, slow_log_path=None):
+        """
+        Active la mesure de chaque requête (latence par méthode de DAO, lignes, octets)
+        et le journal des requêtes lentes (voir utils/query_instrumentation.py).
+        """
+        from utils.query_instrumentation import QueryInstrumentation
+        if self.instrumentation is None:
+            self.instrumentation = QueryInstrumentation(slow_query_ms, slow_log_path)
+        else:
+            self.instrumentation.slow_query_ms = slow_query_ms
+
+    def disable_instrumentation(self):
+        self.instrumentation = None
+
+    def get_query_report(self):
+        """Statistiques par méthode de DAO, ou {} si l'instrumentation est désactivée."""
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.get_report()
+
+    @property
+    def dialect(self):
+        """'mysql' ou 'sqlite' : utile quand une requête doit s'écrire différemment selon le moteur."""
+        return self.backend.name if self.backend is not None else MySQLBackend.name
+
     def get_connection(self):
         """
         Une méthode simple (un "getter") pour récupérer la connexion active
         afin de l'utiliser dans d'autres fichiers (les DAOs).
+        Chaque thread reçoit sa propre connexion (jamais celle d'un autre thread).
+        En mode pool, préférez borrow() : cette méthode renvoie la connexion empruntée
+        par le thread en cours, sinon la connexion unique (ou None).
         """
-        return self.connection
+        epinglee = _connexion_courante.get()
+        if epinglee is not None:
+            return epinglee
+        if self.pool is not None:
+            return self.connection
+        return self._thread_connection()
+
+    def _thread_connection(self):
+        """
+        Sans pool : le thread qui a appelé connect() utilise la connexion historique,
+        les autres threads ouvrent (une seule fois) leur propre connexion.
+        """
+        if self.backend is None or threading.get_ident() == self._owner_thread:
+            return self.connection
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            try:
+                connection = self.backend.connect()
+            except Exception as error_message:
+                print(f"Erreur lors de la connexion ({self.backend.describe()}) : {error_message}")
+                return None
+            self._local.connection = connection
+            with self._lock:
+                self._thread_connections.append(connection)
+        return connection
+
+    @contextmanager
+    def borrow(self):
+        """
+        Emprunte une connexion le temps d'un bloc 'with', puis la rend automatiquement :
+
+            with self.db.borrow() as connection:
+                ...
+
+        Sans pool, on renvoie la connexion du thread en cours (voir get_connection()).
+        Si aucune connexion n'est disponible, on renvoie None (comme get_connection()).
+        Les emprunts imbriqués dans un même thread (ou une même tâche) réutilisent
+        la connexion déjà empruntée au lieu d'en prendre une deuxième.
+        """
+        deja_empruntee = _connexion_courante.get()
+        if deja_empruntee is not None:
+            yield deja_empruntee
+            return
+
+        if self.pool is None:
+            connection = self._instrumenter(self._thread_connection())
+            jeton = _connexion_courante.set(connection)
+            try:
+                yield connection
+            finally:
+                _connexion_courante.reset(jeton)
+            return
+
+        try:
+            connection = self.pool.checkout()
+        except Exception as erreur:
+            print(f"Erreur lors de l'emprunt d'une connexion : {erreur}")
+            yield None
+            return
+
+        # Les DAOs reçoivent (éventuellement) la version instrumentée, le pool récupère la vraie connexion
+        vue = self._instrumenter(connection)
+        jeton = _connexion_courante.set(vue)
+        try:
+            yield vue
+        finally:
+            _connexion_courante.reset(jeton)
+            self.pool.checkin(connection)
+
+    def _instrumenter(self, connection):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return connection
+        return instrumentation.wrap(connection)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unité de travail ("unit of work") : toutes les écritures faites par les DAOs
+        dans le bloc 'with' partagent la même connexion et sont validées UNE seule fois :
+
+            with self.db.transaction():
+                booking_id = self.booking_dao.create_booking(...)
+                self.booking_dao.update_status(booking_id, 'PAYEE')
+
+        Si une exception sort du bloc, tout est annulé (rollback) puis l'exception est relancée.
+        Les DAOs renvoient None/False en cas d'échec : c'est au service de lever une exception
+        pour annuler l'ensemble. Une transaction imbriquée rejoint simplement celle en cours.
+        """
+        if _transaction_courante.get():
+            with self.borrow() as connection:
+                yield connection
+            return
+
+        a_prevenir = {}
+        with self.borrow() as connection:
+            jeton = _transaction_courante.set(True)
+            jeton_prevenir = _apres_validation.set(a_prevenir)
+            try:
+                yield connection
+            except BaseException:
+                if connection is not None:
+                    try:
+                        connection.rollback()
+                    except Exception as erreur:
+                        print(f"Erreur lors de l'annulation de la transaction : {erreur}")
+                raise
+            finally:
+                _apres_validation.reset(jeton_prevenir)
+                _transaction_courante.reset(jeton)
+
+            if connection is None:
+                return
+            self._commit(connection)
+
+        # Seulement maintenant (écritures validées et visibles par les autres connexions) :
+        # si on avait annulé, ces fonctions n'auraient jamais été appelées
+        for callback, args in a_prevenir:
+            callback(*args)
+
+    @property
+    def in_transaction(self):
+        """Vrai pendant un bloc transaction() : une erreur doit alors remonter pour que tout soit annulé."""
+        return _transaction_courante.get()
+
+    def after_commit(self, callback, *args):
+        """
+        Appelle callback(*args) une fois les écritures validées : tout de suite hors d'un bloc transaction(),
+        sinon après le COMMIT de la transaction (jamais si elle est annulée).
+        Un même appel demandé plusieurs fois dans la transaction n'est fait qu'une fois.
+        """
+        a_prevenir = _apres_validation.get()
+        if a_prevenir is None:
+            callback(*args)
+        else:
+            a_prevenir.setdefault((callback, args), None)
+
+    def commit(self, connection):
+        """
+        Valide les écritures d'un DAO... sauf dans un bloc transaction() :
+        dans ce cas, c'est la transaction qui validera tout à la fin.
+        """
+        if _transaction_courante.get():
+            return
+        self._commit(connection)
+
+    def _commit(self, connection):
+        connection.commit()
+        with self._lock:
+            self.commit_count += 1
+
+    def get_pool_metrics(self):
+        """Métriques du pool (attentes, emprunts, timeouts...), ou {} sans pool."""
+        if self.pool is None:
+            return {}
+        return self.pool.get_metrics()
 
     def close(self):
         """
         Ferme la connexion proprement quand on n'en a plus besoin (ex: à la fin du programme).
         """
+        if self.pool is not None:
+            self.pool.close_all()
+            self.pool = None
+            print("Pool de connexions fermé.")
+
+        # Connexions ouvertes par les autres threads (mode sans pool)
+        with self._lock:
+            connexions = self._thread_connections
+            self._thread_connections = []
+        for connection in connexions:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
         # Si on a une connexion et qu'elle est bien active...
         if self.connection is not None and self.connection.is_connected():
             # ... on la ferme
             self.connection.close()
-            print("Connexion MySQL fermée.")
+            print("Connexion à la base de données fermée.")
@@ -0,0 +1,275 @@
+import aiomysql
+
+from Config.async_database import AsyncDatabaseConnection
+from DAO.async_company_dao import compute_offer_scores_async
+from DAO.booking_dao import (COLONNES_RESUME, STATUTS_FINAUX, STATUTS_LIBERES, SQL_NOTE_ENTREPRISE, SQL_NOTE_OFFRE,
+                             TRANSITIONS, SlotAlreadyBookedError, is_duplicate_key_error, rating_params)
+
+"""
+AsyncBookingDAO : même surface que BookingDAO, mais chaque méthode est une coroutine
+(à appeler avec 'await'). Les requêtes SQL sont identiques à la version synchrone.
+"""
+
+class AsyncBookingDAO:
+    def __init__(self):
+        # Pool asynchrone partagé (Singleton)
+        self.db = AsyncDatabaseConnection()
+
+    async def create_booking(self, client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement='ONLINE', creneaux=None):
+        """
+        Insère une nouvelle réservation ('EN_ATTENTE') et réclame ses créneaux dans booking_slots
+        (même transaction ; 'creneaux' = toutes les heures occupées, par défaut l'heure du RDV).
+        Lève SlotAlreadyBookedError si un créneau vient d'être pris.
+        """
+        async with self.db.acquire() as connection:
+            if not connection:
+                return None
+
+            async with connection.cursor() as cursor:
+                try:
+                    query = """
+                        INSERT INTO bookings
+                        (client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description_client, rdv_date, rdv_heure, mode_paiement, statut)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'EN_ATTENTE')
+                    """
+                    valeurs = (client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement)
+                    await cursor.execute(query, valeurs)
+                    booking_id = cursor.lastrowid
+                    if rdv_date and rdv_heure:
+                        await cursor.executemany(
+                            "INSERT INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id) VALUES (%s, %s, %s, %s)",
+                            [(company_id, jour, heure, booking_id) for jour, heure in (creneaux or [(rdv_date, rdv_heure)])]
+                        )
+                    await connection.commit()
+                    return booking_id
+
+                except Exception as erreur:
+                    if is_duplicate_key_error(erreur):
+                        raise SlotAlreadyBookedError(f"Créneau {rdv_date} {rdv_heure} déjà réservé pour l'entreprise {company_id}") from erreur
+                    print(f" Erreur lors de la création de la réservation : {erreur}")
+                    return None
+
+    async def confirm_booking(self, booking_id, supervisor_contact):
+        """
+        L'entreprise confirme la réservation (statut 'CONFIRMEE' + date de début prévue),
+        seulement depuis les statuts autorisés (TRANSITIONS, comme BookingDAO.confirm_bookings).
+        Retourne False si la réservation n'existe pas ou n'est plus confirmable (ex: REFUSEE, ANNULEE).
+        """
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False
+
+            async with connection.cursor() as cursor:
+                try:
+                    depart = TRANSITIONS['CONFIRMEE']
+                    sql = f"""
+                        UPDATE bookings
+                        SET statut = 'CONFIRMEE',
+                            date_debut_prevue = CONCAT(rdv_date, ' ', COALESCE(rdv_heure, '08:00'), ':00'),
+                            technician_superior_contact = %s
+                        WHERE id = %s AND statut IN ({', '.join(['%s'] * len(depart))})
+                    """
+                    await cursor.execute(sql, (supervisor_contact, booking_id) + depart)
+                    confirmee = cursor.rowcount > 0
+                    await connection.commit()
+                    return confirmee
+
+                except Exception as erreur:
+                    print(f" Erreur lors de la confirmation : {erreur}")
+                    return False
+
+    async def cancel_booking(self, booking_id, client_id):
+        """Le client annule sa réservation (uniquement si 'EN_ATTENTE' ou 'PAYEE')."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False
+
+            async with connection.cursor() as cursor:
+                try:
+                    sql = "UPDATE bookings SET statut = 'ANNULEE_CLIENT' WHERE id = %s AND client_id = %s AND statut IN ('EN_ATTENTE', 'PAYEE')"
+                    await cursor.execute(sql, (booking_id, client_id))
+                    annulee = cursor.rowcount > 0
+                    if annulee:
+                        # Le créneau redevient disponible
+                        await cursor.execute("DELETE FROM booking_slots WHERE booking_id = %s", (booking_id,))
+                    await connection.commit()
+                    return annulee
+
+                except Exception as erreur:
+                    print(f" Erreur lors de l'annulation : {erreur}")
+                    return False
+
+    async def submit_report(self, booking_id, rapport_avant, rapport_apres, rapport_details):
+        """
+        L'entreprise soumet un rapport de fin d'intervention. Le statut passe à 'TERMINEE',
+        seulement depuis 'CONFIRMEE' (TRANSITIONS, comme BookingDAO.complete_bookings).
+        Le score de classement des offres de l'entreprise est recalculé dans le même COMMIT.
+        """
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False
+
+            async with connection.cursor() as cursor:
+                try:
+                    depart = TRANSITIONS['TERMINEE']
+                    sql = f"""
+                        UPDATE bookings
+                        SET statut = 'TERMINEE', rapport_avant = %s, rapport_apres = %s, rapport_details = %s
+                        WHERE id = %s AND statut IN ({', '.join(['%s'] * len(depart))})
+                    """
+                    await cursor.execute(sql, (rapport_avant, rapport_apres, rapport_details, booking_id) + depart)
+                    terminee = cursor.rowcount > 0
+                    if terminee:
+                        await self._recalculer_scores(cursor, booking_id)
+                    await connection.commit()
+                    return terminee
+
+                except Exception as erreur:
+                    print(f" Erreur lors de la soumission du rapport : {erreur}")
+                    return False
+
+    async def update_status(self, booking_id, new_status):
+        """
+        Mise à jour générique du statut d'une réservation.
+        Statut final (STATUTS_FINAUX) : le score des offres de l'entreprise est recalculé dans le même COMMIT.
+        """
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False
+
+            async with connection.cursor() as cursor:
+                try:
+                    await cursor.execute("UPDATE bookings SET statut = %s WHERE id = %s", (new_status, booking_id))
+                    if new_status in STATUTS_LIBERES:
+                        await cursor.execute("DELETE FROM booking_slots WHERE booking_id = %s", (booking_id,))
+                    if new_status in STATUTS_FINAUX:
+                        await self._recalculer_scores(cursor, booking_id)
+                    await connection.commit()
+                    return True
+                except Exception:
+                    return False
+
+    async def get_client_bookings(self, client_id):
+        """Historique des réservations d'un client (avec nom d'entreprise et de service)."""
+        sql = f"""
+            SELECT {COLONNES_RESUME}, c.nom_entreprise, s.nom_service
+            FROM bookings b
+            JOIN companies c ON b.company_id = c.id
+            JOIN service_types s ON b.service_type_id = s.id
+            WHERE b.client_id = %s
+            ORDER BY b.date_demande DESC
+        """
+        return await self._fetch_all(sql, (client_id,))
+
+    async def get_company_bookings(self, company_id):
+        """Même principe que get_client_bookings, mais pour l'historique de l'entreprise."""
+        sql = f"""
+            SELECT {COLONNES_RESUME}, u.nom as client_nom, u.telephone as client_tel, u.ville as client_ville, s.nom_service
+            FROM bookings b
+            JOIN users u ON b.client_id = u.id
+            JOIN service_types s ON b.service_type_id = s.id
+            WHERE b.company_id = %s
+            ORDER BY b.date_demande DESC
+        """
+        return await self._fetch_all(sql, (company_id,))
+
+    async def get_all_bookings(self):
+        """Admin : voit toutes les réservations du système."""
+        sql = f"""
+            SELECT {COLONNES_RESUME}, u.nom as client_nom, c.nom_entreprise, s.nom_service
+            FROM bookings b
+            JOIN users u ON b.client_id = u.id
+            JOIN companies c ON b.company_id = c.id
+            JOIN service_types s ON b.service_type_id = s.id
+            ORDER BY b.date_demande DESC
+        """
+        return await self._fetch_all(sql)
+
+    async def get_stats(self):
+        """Statistiques globales pour le Dashboard Administrateur (une seule requête)."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return {}
+
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute("""
+                    SELECT
+                        COUNT(*) as total_demandes,
+                        SUM(CASE WHEN statut = 'TERMINEE' THEN 1 ELSE 0 END) as terminees,
+                        SUM(CASE WHEN statut = 'EN_ATTENTE' THEN 1 ELSE 0 END) as en_attente,
+                        SUM(CASE WHEN statut = 'CONFIRMEE' THEN 1 ELSE 0 END) as confirmees,
+                        SUM(CASE WHEN statut = 'REFUSEE' THEN 1 ELSE 0 END) as refusees,
+                        SUM(CASE WHEN statut = 'ANNULEE_CLIENT' THEN 1 ELSE 0 END) as annulees_client,
+                        COALESCE(SUM(CASE WHEN statut = 'TERMINEE' THEN prix_total ELSE 0 END), 0) as chiffre_affaires
+                    FROM bookings
+                """)
+                return await cursor.fetchone()
+
+    async def add_review(self, booking_id, client_id, rating, comment):
+        """
+        Enregistre l'avis d'un client et met à jour les compteurs de notes (entreprise, offre)
+        et le score de classement de ses offres dans le même COMMIT. Renvoie un tuple (Réussite, Message).
+        """
+        if rating not in (1, 2, 3, 4, 5):
+            return False, "La note doit être comprise entre 1 et 5."
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False, "Connexion indisponible."
+
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                try:
+                    await cursor.execute("SELECT id, statut, company_id, catalog_id FROM bookings WHERE id = %s AND client_id = %s", (booking_id, client_id))
+                    booking = await cursor.fetchone()
+                    if not booking:
+                        return False, "Réservation introuvable ou ne vous appartient pas."
+
+                    if booking['statut'] != 'TERMINEE':
+                        return False, f"Impossible de noter (statut : {booking['statut']}). Le service doit être TERMINÉ."
+
+                    await cursor.execute("SELECT id FROM reviews WHERE booking_id = %s", (booking_id,))
+                    if await cursor.fetchone():
+                        return False, "Vous avez déjà noté ce service."
+
+                    await cursor.execute("INSERT INTO reviews (booking_id, client_id, rating, comment) VALUES (%s, %s, %s, %s)",
+                                         (booking_id, client_id, rating, comment))
+                    await cursor.execute(SQL_NOTE_ENTREPRISE, (booking['company_id'],) + rating_params(rating))
+                    if booking['catalog_id'] is not None:
+                        await cursor.execute(SQL_NOTE_OFFRE, (booking['catalog_id'], booking['company_id']) + rating_params(rating))
+                    # compute_offer_scores_async lit des tuples : curseur simple, même connexion (même COMMIT)
+                    async with connection.cursor() as curseur_scores:
+                        await compute_offer_scores_async(curseur_scores, [booking['company_id']])
+                    await connection.commit()
+                    return True, "Merci pour votre avis !"
+
+                except Exception as erreur:
+                    await connection.rollback()
+                    # Deux envois simultanés : UNIQUE (booking_id) refuse le second (comme BookingDAO.add_review)
+                    if is_duplicate_key_error(erreur):
+                        return False, "Vous avez déjà noté ce service."
+                    return False, f"Erreur : {erreur}"
+
+    async def _recalculer_scores(self, cursor, booking_id):
+        """Recalcule (avant le COMMIT) le score des offres de l'entreprise de cette réservation."""
+        await cursor.execute("SELECT company_id FROM bookings WHERE id = %s", (booking_id,))
+        ligne = await cursor.fetchone()
+        if ligne:
+            await compute_offer_scores_async(cursor, [ligne[0]])
+
+    async def get_booked_slots(self, company_id, date):
+        """Heures déjà réservées pour une entreprise à une date donnée (ex: ['10:00', '14:00'])."""
+        sql = """
+            SELECT rdv_heure FROM booking_slots
+            WHERE company_id = %s AND rdv_date = %s
+        """
+        lignes = await self._fetch_all(sql, (company_id, date))
+        return [row['rdv_heure'] for row in lignes]
+
+    async def _fetch_all(self, sql, params=()):
+        """Méthode utilitaire interne : exécute un SELECT et renvoie toutes les lignes (dictionnaires)."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return []
+
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
@@ -0,0 +1,236 @@
+import aiomysql
+
+from Config.async_database import AsyncDatabaseConnection
+from DAO.company_dao import CompanyDAO, COLONNES_NOTES_CARTE, JOINTURES_NOTES, SQL_SCORE_OFFRE, offer_score_queries
+from models.company import Company, CatalogItem, ServiceType
+
+"""
+AsyncCompanyDAO : version asynchrone de CompanyDAO (entreprises + catalogue).
+Même surface, mêmes requêtes SQL ; les objets métier (Company, CatalogItem...) sont
+construits avec les mêmes méthodes de conversion que la version synchrone.
+"""
+
+
+async def compute_offer_scores_async(cursor, company_ids=None, prix_moyens=None):
+    """
+    Même calcul que DAO.company_dao.compute_offer_scores (offer_score_queries), avec un curseur
+    aiomysql SIMPLE (tuples, pas DictCursor). Se place avant le COMMIT de l'écriture qui change le score.
+    Retourne le nombre d'offres mises à jour.
+    """
+    calcul = offer_score_queries(company_ids, prix_moyens)
+    try:
+        sql, params = next(calcul)
+        while True:
+            await cursor.execute(sql, params)
+            sql, params = calcul.send(await cursor.fetchall())
+    except StopIteration as fin:
+        scores = fin.value
+    if scores:
+        await cursor.executemany(SQL_SCORE_OFFRE, scores)
+    return len(scores)
+
+class AsyncCompanyDAO:
+    # On réutilise la conversion "ligne MySQL -> objet Company" de la version synchrone
+    _map_company = CompanyDAO._map_company
+
+    def __init__(self):
+        self.db = AsyncDatabaseConnection()
+
+    async def create_company(self, company: Company):
+        """Ajoute une nouvelle entreprise (abonnement de 30 jours à partir d'aujourd'hui)."""
+        query = """
+            INSERT INTO companies
+            (user_id, nom_entreprise, description, ville, contact_phone, contact_email, is_verified, subscription_plan_id, subscription_start, subscription_expires_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 30 DAY))
+        """
+        valeurs = (
+            company.user_id, company.nom_entreprise, company.description,
+            company.ville, company.contact_phone, company.contact_email,
+            company.is_verified, company.subscription_plan_id
+        )
+        ok, lastrowid, _ = await self._write(query, valeurs, "Erreur lors de la création de l'entreprise")
+        if not ok:
+            return None
+        company.id = lastrowid
+        return company
+
+    async def update_company(self, company_id, nom=None, description=None, ville=None, contact_phone=None, contact_email=None):
+        """Met à jour les informations d'une entreprise (uniquement les champs fournis)."""
+        champs = {
+            'nom_entreprise': nom, 'description': description, 'ville': ville,
+            'contact_phone': contact_phone, 'contact_email': contact_email,
+        }
+        fields = [f"{colonne} = %s" for colonne, valeur in champs.items() if valeur is not None]
+        params = [valeur for valeur in champs.values() if valeur is not None]
+        if len(fields) == 0:
+            return False
+
+        params.append(company_id)
+        sql = f"UPDATE companies SET {', '.join(fields)} WHERE id = %s"
+        ok, _, _ = await self._write(sql, tuple(params), "Erreur lors de la mise à jour de l'entreprise")
+        return ok
+
+    async def delete_company(self, company_id):
+        """Supprime une entreprise."""
+        ok, _, _ = await self._write("DELETE FROM companies WHERE id = %s", (company_id,), "Erreur lors de la suppression de l'entreprise")
+        return ok
+
+    async def verify_company(self, company_id, verified=True):
+        """Valide (ou invalide) une entreprise par un administrateur."""
+        ok, _, _ = await self._write("UPDATE companies SET is_verified = %s WHERE id = %s", (verified, company_id))
+        return ok
+
+    async def add_service_to_catalog(self, catalog_item: CatalogItem):
+        """Ajoute une nouvelle offre (prestation) dans le catalogue d'une entreprise."""
+        query = """
+            INSERT INTO catalog
+            (company_id, service_type_id, prix_base, prix_par_unite, unite_nom, description_offre, produits_inclus, duree_estimee, duree_heures)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        valeurs = (
+            catalog_item.company_id, catalog_item.service_type.id, catalog_item.prix_base,
+            catalog_item.prix_par_unite, catalog_item.unite_nom, catalog_item.description_offre,
+            catalog_item.produits_inclus, catalog_item.duree_estimee, catalog_item.duree_heures
+        )
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False
+            async with connection.cursor() as cursor:
+                try:
+                    await cursor.execute(query, valeurs)
+                    catalog_item.id = cursor.lastrowid
+                    # Score de classement de la nouvelle offre (et des autres offres de l'entreprise), même COMMIT
+                    await compute_offer_scores_async(cursor, [catalog_item.company_id])
+                    await connection.commit()
+                    return True
+                except Exception as erreur:
+                    await connection.rollback()
+                    print(f"Erreur d'ajout au catalogue : {erreur}")
+                    return False
+
+    async def remove_from_catalog(self, catalog_id):
+        """Supprime une offre du catalogue."""
+        ok, _, _ = await self._write("DELETE FROM catalog WHERE id = %s", (catalog_id,))
+        return ok
+
+    async def get_all_companies(self, ville_filter=None):
+        """Entreprises VÉRIFIÉES avec un abonnement ACTIF (ce que voient les clients)."""
+        sql = """
+            SELECT c.*, sp.nom as plan_nom, sp.prix_mensuel
+            FROM companies c
+            LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+            WHERE c.is_verified = TRUE AND c.subscription_expires_at >= CURDATE()
+        """
+        params = []
+        if ville_filter is not None:
+            sql = sql + " AND c.ville = %s"
+            params.append(ville_filter)
+
+        lignes = await self._fetch_all(sql, tuple(params))
+        return [self._map_company(ligne) for ligne in lignes]
+
+    async def get_all_companies_admin(self):
+        """L'Administrateur voit TOUTES les entreprises (même non vérifiées ou expirées)."""
+        sql = """
+            SELECT c.*, sp.nom as plan_nom, sp.prix_mensuel, u.email as user_email
+            FROM companies c
+            LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+            LEFT JOIN users u ON c.user_id = u.id
+            ORDER BY c.id
+        """
+        return await self._fetch_all(sql)
+
+    async def get_companies_by_service(self, service_type_id, limit=None):
+        """Trouve les entreprises proposant un type de service précis, de la mieux classée à la moins bien classée."""
+        sql = f"""
+            SELECT c.*, cat.id as catalog_id, cat.prix_base, cat.prix_par_unite, cat.unite_nom,
+                   cat.description_offre, cat.produits_inclus, cat.duree_estimee, cat.duree_heures, cat.score,
+                   sp.nom as plan_nom,
+                   c.horaire_debut, c.horaire_fin, c.jours_travail,
+                   {COLONNES_NOTES_CARTE}
+            FROM companies c
+            JOIN catalog cat ON c.id = cat.company_id
+            LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+            {JOINTURES_NOTES}
+            WHERE cat.service_type_id = %s
+              AND c.is_verified = TRUE
+              AND c.subscription_expires_at >= CURDATE()
+            ORDER BY cat.score DESC, cat.id DESC
+        """
+        if limit:
+            return await self._fetch_all(sql + " LIMIT %s", (service_type_id, limit))
+        return await self._fetch_all(sql, (service_type_id,))
+
+    async def get_catalog(self, company_id):
+        """Récupère toutes les offres du catalogue d'une entreprise spécifique."""
+        sql = """
+            SELECT c.*, s.nom_service, s.description as type_desc, s.category
+            FROM catalog c
+            JOIN service_types s ON c.service_type_id = s.id
+            WHERE c.company_id = %s
+        """
+        liste_offres = []
+        for row in await self._fetch_all(sql, (company_id,)):
+            st = ServiceType(id=row['service_type_id'], nom_service=row['nom_service'], description=row['type_desc'], category=row.get('category'))
+            liste_offres.append(CatalogItem(
+                id=row['id'], company_id=row['company_id'], service_type=st,
+                prix_base=row['prix_base'], prix_par_unite=row['prix_par_unite'],
+                unite_nom=row['unite_nom'], description_offre=row['description_offre'],
+                produits_inclus=row.get('produits_inclus'), duree_estimee=row.get('duree_estimee'),
+                duree_heures=row.get('duree_heures'), score=row.get('score') or 0.0
+            ))
+        return liste_offres
+
+    async def get_company_by_user_id(self, user_id):
+        """Récupère le profil entreprise complet via l'ID de l'utilisateur."""
+        sql = """
+            SELECT c.*, sp.nom as plan_nom, sp.has_scheduling, sp.has_analytics, sp.has_priority_support, sp.max_services
+            FROM companies c
+            LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+            WHERE c.user_id = %s
+        """
+        lignes = await self._fetch_all(sql, (user_id,))
+        return self._map_company(lignes[0]) if lignes else None
+
+    async def get_service_types(self):
+        """Récupère toutes les catégories de services disponibles globalement."""
+        lignes = await self._fetch_all("SELECT * FROM service_types ORDER BY category, nom_service")
+        return [
+            ServiceType(id=r['id'], nom_service=r['nom_service'], description=r['description'], category=r.get('category'))
+            for r in lignes
+        ]
+
+    async def add_service_type(self, nom, description, category):
+        """Permet à l'Admin d'ajouter une nouvelle catégorie de service globale."""
+        ok, lastrowid, _ = await self._write(
+            "INSERT INTO service_types (nom_service, description, category) VALUES (%s, %s, %s)",
+            (nom, description, category), "Erreur lors de l'ajout d'une catégorie"
+        )
+        return lastrowid if ok else None
+
+    async def _fetch_all(self, sql, params=()):
+        """Méthode utilitaire interne : exécute un SELECT et renvoie toutes les lignes (dictionnaires)."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return []
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+
+    async def _write(self, sql, params, message_erreur=None):
+        """
+        Méthode utilitaire interne : exécute une écriture puis 'commit'.
+        Renvoie un tuple (Réussite, lastrowid, rowcount).
+        """
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False, None, 0
+            async with connection.cursor() as cursor:
+                try:
+                    await cursor.execute(sql, params)
+                    await connection.commit()
+                    return True, cursor.lastrowid, cursor.rowcount
+                except Exception as erreur:
+                    if message_erreur:
+                        print(f"{message_erreur} : {erreur}")
+                    return False, None, 0
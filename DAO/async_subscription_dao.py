@@ -0,0 +1,73 @@
+import aiomysql
+
+from Config.async_database import AsyncDatabaseConnection
+from DAO.async_company_dao import compute_offer_scores_async
+from DAO.subscription_dao import SubscriptionDAO
+
+"""
+AsyncSubscriptionDAO : version asynchrone de SubscriptionDAO (plans et abonnements).
+"""
+
+class AsyncSubscriptionDAO:
+    # Même conversion "ligne MySQL -> SubscriptionPlan" que la version synchrone
+    _map_plan = SubscriptionDAO._map_plan
+
+    def __init__(self):
+        self.db = AsyncDatabaseConnection()
+
+    async def get_all_plans(self):
+        """Récupère tous les forfaits d'abonnement disponibles, triés par prix croissant."""
+        lignes = await self._fetch_all("SELECT * FROM subscription_plans ORDER BY prix_mensuel ASC")
+        return [self._map_plan(ligne) for ligne in lignes]
+
+    async def get_plan_by_id(self, plan_id):
+        """Récupère un forfait spécifique en utilisant son ID."""
+        lignes = await self._fetch_all("SELECT * FROM subscription_plans WHERE id = %s", (plan_id,))
+        return self._map_plan(lignes[0]) if lignes else None
+
+    async def subscribe_company(self, company_id, plan_id, duree_jours=30):
+        """Met à jour l'abonnement d'une entreprise."""
+        sql = """
+            UPDATE companies
+            SET subscription_plan_id = %s,
+                subscription_start = CURDATE(),
+                subscription_expires_at = DATE_ADD(CURDATE(), INTERVAL %s DAY)
+            WHERE id = %s
+        """
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False
+            async with connection.cursor() as cursor:
+                try:
+                    await cursor.execute(sql, (plan_id, duree_jours, company_id))
+                    # Le forfait compte dans le score de classement des offres : recalculé dans le même COMMIT
+                    await compute_offer_scores_async(cursor, [company_id])
+                    await connection.commit()
+                    return True
+                except Exception as erreur:
+                    await connection.rollback()
+                    print(f"Erreur lors de l'abonnement : {erreur}")
+                    return False
+
+    async def get_subscription_revenue(self):
+        """Revenus générés par les abonnements ACTIFS, regroupés par forfait."""
+        sql = """
+            SELECT
+                COUNT(c.id) as nb_abonnes,
+                COALESCE(SUM(sp.prix_mensuel), 0) as revenu_mensuel,
+                sp.nom as plan_nom
+            FROM companies c
+            JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+            WHERE c.subscription_expires_at >= CURDATE()
+            GROUP BY sp.id, sp.nom
+        """
+        return await self._fetch_all(sql)
+
+    async def _fetch_all(self, sql, params=()):
+        """Méthode utilitaire interne : exécute un SELECT et renvoie toutes les lignes (dictionnaires)."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return []
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
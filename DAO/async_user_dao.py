@@ -0,0 +1,97 @@
+import aiomysql
+
+from Config.async_database import AsyncDatabaseConnection
+from models.user import UserFactory
+
+"""
+AsyncUserDAO : version asynchrone de UserDAO (comptes utilisateurs).
+Chaque méthode est une coroutine : 'user = await user_dao.find_by_login(login)'.
+"""
+
+class AsyncUserDAO:
+    def __init__(self):
+        self.db = AsyncDatabaseConnection()
+
+    async def create(self, user):
+        """Insère un nouvel utilisateur dans la base de données."""
+        query = """
+        INSERT INTO users (nom, email, password_hash, role, telephone, ville, adresse)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        values = (user.nom, user.email, user.password, user.role, user.telephone, user.ville, user.adresse)
+
+        async with self.db.acquire() as connection:
+            if not connection:
+                return None
+            async with connection.cursor() as cursor:
+                try:
+                    await cursor.execute(query, values)
+                    await connection.commit()
+                    user.id = cursor.lastrowid
+                    return user
+                except Exception as erreur:
+                    print(f" Erreur lors de la création de l'utilisateur : {erreur}")
+                    return None
+
+    async def find_by_login(self, login):
+        """Recherche un utilisateur par son email OU son numéro de téléphone."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return None
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                try:
+                    await cursor.execute("SELECT * FROM users WHERE email = %s OR telephone = %s", (login, login))
+                    row = await cursor.fetchone()
+                    if not row:
+                        return None
+
+                    user = UserFactory.create_user(
+                        role=row['role'],
+                        nom=row['nom'],
+                        email=row['email'],
+                        password=row['password_hash'],
+                        telephone=row['telephone'],
+                        ville=row.get('ville'),
+                        adresse=row.get('adresse'),
+                        is_banned=bool(row.get('is_banned', False))
+                    )
+                    user.id = row['id']
+                    return user
+
+                except Exception as erreur:
+                    print(f" Erreur lors de la recherche du login : {erreur}")
+                    return None
+
+    async def get_all_users(self):
+        """Récupère la liste de tous les utilisateurs (utile pour l'Admin)."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return []
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute("SELECT id, nom, email, role, telephone, ville, is_banned, created_at FROM users ORDER BY created_at DESC")
+                return await cursor.fetchall()
+
+    async def ban_user(self, user_id):
+        """Bannit un utilisateur (met son statut is_banned à Vrai)."""
+        return await self._write("UPDATE users SET is_banned = TRUE WHERE id = %s", (user_id,))
+
+    async def unban_user(self, user_id):
+        """Débannit un utilisateur (met son statut is_banned à Faux)."""
+        return await self._write("UPDATE users SET is_banned = FALSE WHERE id = %s", (user_id,))
+
+    async def delete_user(self, user_id):
+        """Supprime définitivement un utilisateur de la base."""
+        return await self._write("DELETE FROM users WHERE id = %s", (user_id,))
+
+    async def _write(self, sql, params):
+        """Méthode utilitaire interne : exécute une écriture puis 'commit'. Renvoie True/False."""
+        async with self.db.acquire() as connection:
+            if not connection:
+                return False
+            async with connection.cursor() as cursor:
+                try:
+                    await cursor.execute(sql, params)
+                    await connection.commit()
+                    return True
+                except Exception:
+                    return False
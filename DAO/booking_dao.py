@@ -1,137 +1,371 @@
+from datetime import timedelta
+
 from Config.database import DatabaseConnection
+from DAO.company_dao import CompanyDAO
 
 """
 BookingDAO (Data Access Object pour les Réservations).
 Gère toutes les requêtes SQL liées aux interventions (création, confirmation, annulation, rapports).
+Chaque réservation "réclame" son créneau dans la table booking_slots, dont la clé primaire
+(company_id, rdv_date, rdv_heure) est unique : deux clients ne peuvent pas obtenir le même créneau,
+même s'ils valident exactement au même moment (c'est la base de données qui tranche).
+Une intervention de plusieurs heures réclame UNE ligne par heure occupée.
+"""
+
+# Statuts pour lesquels la réservation n'occupe plus l'agenda (le créneau est libéré)
+STATUTS_LIBERES = ('REFUSEE', 'ANNULEE', 'ANNULEE_CLIENT')
+
+# Statuts "finis" qui comptent dans le taux de réalisation de l'entreprise (score de classement du catalogue)
+STATUTS_FINAUX = ('TERMINEE', 'REFUSEE', 'ANNULEE')
+
+# Colonnes affichées dans les LISTES de réservations (résumé) : on ne ramène pas les champs TEXT
+# potentiellement longs (description_client, rapport_avant, rapport_apres, rapport_details),
+# qui ne sont lus que dans la fiche détaillée (get_booking_detail)
+COLONNES_RESUME = (
+    "b.id, b.client_id, b.company_id, b.service_type_id, b.catalog_id, b.date_demande, b.rdv_date, b.rdv_heure, "
+    "b.mode_paiement, b.date_debut_prevue, b.technician_superior_contact, b.statut, b.quantite, b.prix_total"
+)
+
+# Colonnes de l'export comptable (registre complet), dans l'ordre du fichier produit
+COLONNES_EXPORT = (
+    'id', 'date_demande', 'client_id', 'client_nom', 'company_id', 'nom_entreprise', 'service_type_id',
+    'nom_service', 'quantite', 'prix_total', 'mode_paiement', 'statut', 'rdv_date', 'rdv_heure',
+    'date_debut_prevue', 'import_ref'
+)
+
+# Transitions autorisées pour les traitements groupés : statut visé -> statuts de départ acceptés
+TRANSITIONS = {
+    'CONFIRMEE': ('EN_ATTENTE', 'PAYEE'),
+    'REFUSEE': ('EN_ATTENTE', 'PAYEE'),
+    'ANNULEE': ('EN_ATTENTE', 'PAYEE', 'CONFIRMEE'),
+    'TERMINEE': ('CONFIRMEE',),
+}
+
+
+# Notes des avis, tenues à jour à chaque avis (compteurs "courants") : nombre, somme et histogramme 1 à 5 étoiles,
+# par entreprise (company_ratings) et par offre du catalogue (catalog_ratings).
+# La note moyenne d'une carte = somme_notes / nb_avis, sans relire tous les avis.
+COLONNES_NOTES = "nb_avis, somme_notes, note_1, note_2, note_3, note_4, note_5"
+MISE_A_JOUR_NOTES = """
+    ON DUPLICATE KEY UPDATE nb_avis = nb_avis + 1, somme_notes = somme_notes + VALUES(somme_notes),
+        note_1 = note_1 + VALUES(note_1), note_2 = note_2 + VALUES(note_2), note_3 = note_3 + VALUES(note_3),
+        note_4 = note_4 + VALUES(note_4), note_5 = note_5 + VALUES(note_5)
 """
+SQL_NOTE_ENTREPRISE = f"""
+    INSERT INTO company_ratings (company_id, {COLONNES_NOTES}) VALUES (%s, 1, %s, %s, %s, %s, %s, %s)
+""" + MISE_A_JOUR_NOTES
+SQL_NOTE_OFFRE = f"""
+    INSERT INTO catalog_ratings (catalog_id, company_id, {COLONNES_NOTES}) VALUES (%s, %s, 1, %s, %s, %s, %s, %s, %s)
+""" + MISE_A_JOUR_NOTES
+# Recalcul complet à partir de la table reviews (rattrapage, voir rebuild_rating_aggregates)
+_AGREGATS_AVIS = ", ".join(["COUNT(*)", "SUM(r.rating)"] + [f"SUM(CASE WHEN r.rating = {n} THEN 1 ELSE 0 END)" for n in range(1, 6)])
+
+
+def rating_params(rating):
+    """Paramètres (somme, note_1..note_5) d'un nouvel avis pour SQL_NOTE_ENTREPRISE / SQL_NOTE_OFFRE."""
+    return (rating,) + tuple(1 if rating == n else 0 for n in range(1, 6))
+
+
+def rebuild_rating_aggregates(cursor, company_ids=None):
+    """
+    Recalcule company_ratings et catalog_ratings à partir des avis (toutes les entreprises, ou seulement
+    celles de company_ids) : on efface puis on réinsère avec un INSERT ... SELECT ... GROUP BY.
+    Sert au rattrapage (avis importés, base existante) et à la migration qui crée les tables.
+    Retourne (nombre d'entreprises, nombre d'offres) ayant au moins un avis.
+    """
+    filtre, params = "", ()
+    if company_ids is not None:
+        company_ids = list(dict.fromkeys(company_ids))
+        if not company_ids:
+            return 0, 0
+        filtre, params = f" IN ({', '.join(['%s'] * len(company_ids))})", tuple(company_ids)
+
+    cursor.execute("DELETE FROM company_ratings" + (" WHERE company_id" + filtre if filtre else ""), params)
+    cursor.execute("DELETE FROM catalog_ratings" + (" WHERE company_id" + filtre if filtre else ""), params)
+    cursor.execute(f"""
+        INSERT INTO company_ratings (company_id, {COLONNES_NOTES})
+        SELECT b.company_id, {_AGREGATS_AVIS}
+        FROM reviews r JOIN bookings b ON b.id = r.booking_id
+        {"WHERE b.company_id" + filtre if filtre else ""}
+        GROUP BY b.company_id
+    """, params)
+    nb_entreprises = cursor.rowcount
+    cursor.execute(f"""
+        INSERT INTO catalog_ratings (catalog_id, company_id, {COLONNES_NOTES})
+        SELECT b.catalog_id, b.company_id, {_AGREGATS_AVIS}
+        FROM reviews r JOIN bookings b ON b.id = r.booking_id
+        JOIN catalog cat ON cat.id = b.catalog_id
+        WHERE b.catalog_id IS NOT NULL {"AND b.company_id" + filtre if filtre else ""}
+        GROUP BY b.catalog_id, b.company_id
+    """, params)
+    return nb_entreprises, cursor.rowcount
+
+
+class SlotAlreadyBookedError(Exception):
+    """Levée quand le créneau (entreprise, date, heure) vient d'être pris par une autre réservation."""
+    pass
+
+
+def is_duplicate_key_error(erreur):
+    """Vrai si l'erreur vient d'une clé unique déjà utilisée (MySQL : code 1062, SQLite : 'UNIQUE constraint failed')."""
+    # mysql-connector range le code dans 'errno', aiomysql/PyMySQL dans args[0]
+    code = getattr(erreur, 'errno', None) or (erreur.args[0] if erreur.args else None)
+    return code == 1062 or 'UNIQUE constraint failed' in str(erreur)
+
 
 class BookingDAO:
     def __init__(self):
         # Initialisation de la connexion à la base de données
         self.db = DatabaseConnection()
+        # Pour recalculer le score de classement des offres (avis, interventions terminées...)
+        self.company_dao = CompanyDAO()
 
-    def create_booking(self, client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement='ONLINE'):
-        """Insère une nouvelle réservation dans la base, avec le statut par défaut 'EN_ATTENTE'."""
-        connection = self.db.get_connection()
-        if not connection: 
-            return None
-            
-        cursor = connection.cursor()
+    def create_booking(self, client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement='ONLINE', creneaux=None):
+        """
+        Insère une nouvelle réservation dans la base, avec le statut par défaut 'EN_ATTENTE'.
+        Dans la même transaction, on réclame le créneau dans booking_slots (INSERT sur une clé unique) :
+        si un autre client l'a pris entre-temps, l'INSERT échoue, tout est annulé et on lève
+        SlotAlreadyBookedError. Pas de verrou global : un seul aller-retour suffit pour trancher.
+        'creneaux' : toutes les heures occupées [('YYYY-MM-DD', 'HH:00'), ...] pour une intervention
+        de plusieurs heures (voir availability_service.occupied_slots) ; par défaut, l'heure du RDV.
+        """
         try:
-            query = """
-                INSERT INTO bookings 
-                (client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description_client, rdv_date, rdv_heure, mode_paiement, statut)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'EN_ATTENTE')
-            """
-            valeurs = (client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement)
-            
-            cursor.execute(query, valeurs)
-            connection.commit()
-            
-            # On retourne l'ID de la réservation nouvellement créée
-            return cursor.lastrowid
-            
+            with self.db.transaction() as connection:
+                if not connection: 
+                    return None
+                    
+                cursor = connection.cursor()
+                try:
+                    query = """
+                        INSERT INTO bookings 
+                        (client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description_client, rdv_date, rdv_heure, mode_paiement, statut)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'EN_ATTENTE')
+                    """
+                    valeurs = (client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement)
+                    
+                    cursor.execute(query, valeurs)
+                    booking_id = cursor.lastrowid
+
+                    # On "réclame" chaque heure occupée : échoue si (entreprise, date, heure) est déjà pris
+                    if rdv_date and rdv_heure:
+                        cursor.executemany(
+                            "INSERT INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id) VALUES (%s, %s, %s, %s)",
+                            [(company_id, jour, heure, booking_id) for jour, heure in (creneaux or [(rdv_date, rdv_heure)])]
+                        )
+                    
+                    # On retourne l'ID de la réservation nouvellement créée
+                    return booking_id
+                    
+                finally: 
+                    cursor.close()
+
         except Exception as erreur:
+            if is_duplicate_key_error(erreur):
+                raise SlotAlreadyBookedError(f"Créneau {rdv_date} {rdv_heure} déjà réservé pour l'entreprise {company_id}") from erreur
             print(f" Erreur lors de la création de la réservation : {erreur}")
             return None
-            
-        finally: 
-            cursor.close()
 
     def confirm_booking(self, booking_id, supervisor_contact):
         """
         L'entreprise confirme la réservation. 
-        On récupère la date et l'heure déjà choisies par le client pour créer la 'date_debut_prevue',
-        et on passe le statut à 'CONFIRMEE'.
+        La date et l'heure déjà choisies par le client deviennent la 'date_debut_prevue',
+        et le statut passe à 'CONFIRMEE' (voir confirm_bookings, ici pour une seule réservation).
         """
-        connection = self.db.get_connection()
-        cursor = connection.cursor(dictionary=True)
-        try:
-            # 1. On récupère la date et l'heure du RDV depuis la base
-            cursor.execute("SELECT rdv_date, rdv_heure FROM bookings WHERE id = %s", (booking_id,))
-            booking = cursor.fetchone()
-            
-            if not booking:
-                return False
-                
-            # 2. On construit la chaîne de caractères finale (YYYY-MM-DD HH:MM:00)
-            rdv_date = str(booking['rdv_date'])
-            rdv_heure = booking['rdv_heure'] or '08:00'
-            date_debut = f"{rdv_date} {rdv_heure}:00"
-            
-            # 3. On met à jour la réservation
-            sql = """
-                UPDATE bookings 
-                SET statut = 'CONFIRMEE', date_debut_prevue = %s, technician_superior_contact = %s 
-                WHERE id = %s
-            """
-            cursor.execute(sql, (date_debut, supervisor_contact, booking_id))
-            connection.commit()
-            return True
-            
-        except Exception as erreur:
-            print(f" Erreur lors de la confirmation : {erreur}")
-            return False
-            
-        finally: 
-            cursor.close()
+        return self.confirm_bookings([booking_id], supervisor_contact)[booking_id][0]
 
     def cancel_booking(self, booking_id, client_id):
         """
         Le client annule sa réservation. 
         Possible UNIQUEMENT si le statut est 'EN_ATTENTE' ou 'PAYEE'.
+        Le créneau est libéré dans la même transaction.
         """
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
         try:
-            sql = "UPDATE bookings SET statut = 'ANNULEE_CLIENT' WHERE id = %s AND client_id = %s AND statut IN ('EN_ATTENTE', 'PAYEE')"
-            cursor.execute(sql, (booking_id, client_id))
-            connection.commit()
-            
-            # rowcount indique combien de lignes ont été modifiées. 
-            # Si c'est > 0, l'annulation a marché. Si c'est 0, ça veut dire que la condition (statut ou client_id) n'était pas remplie.
-            return cursor.rowcount > 0
-            
+            with self.db.transaction() as connection:
+                cursor = connection.cursor()
+                try:
+                    sql = "UPDATE bookings SET statut = 'ANNULEE_CLIENT' WHERE id = %s AND client_id = %s AND statut IN ('EN_ATTENTE', 'PAYEE')"
+                    cursor.execute(sql, (booking_id, client_id))
+                    
+                    # rowcount indique combien de lignes ont été modifiées. 
+                    # Si c'est > 0, l'annulation a marché. Si c'est 0, ça veut dire que la condition (statut ou client_id) n'était pas remplie.
+                    annulee = cursor.rowcount > 0
+                    if annulee:
+                        # Le créneau redevient disponible pour les autres clients
+                        cursor.execute("DELETE FROM booking_slots WHERE booking_id = %s", (booking_id,))
+                    return annulee
+                    
+                finally: 
+                    cursor.close()
+
         except Exception as erreur:
             print(f" Erreur lors de l'annulation : {erreur}")
             return False
-            
-        finally: 
-            cursor.close()
 
     def submit_report(self, booking_id, rapport_avant, rapport_apres, rapport_details):
         """L'entreprise soumet un rapport de fin d'intervention. Le statut passe à 'TERMINEE'."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
-        try:
-            sql = """
-                UPDATE bookings 
-                SET statut = 'TERMINEE', rapport_avant = %s, rapport_apres = %s, rapport_details = %s 
-                WHERE id = %s
-            """
-            cursor.execute(sql, (rapport_avant, rapport_apres, rapport_details, booking_id))
-            connection.commit()
-            return True
-            
-        except Exception as erreur:
-            print(f" Erreur lors de la soumission du rapport : {erreur}")
-            return False
-            
-        finally: 
-            cursor.close()
+        return self.complete_bookings([booking_id], rapport_avant, rapport_apres, rapport_details)[booking_id][0]
 
     def update_status(self, booking_id, new_status):
-        """Mise à jour générique du statut d'une réservation."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
+        """
+        Mise à jour générique du statut d'une réservation.
+        Si la réservation est refusée ou annulée, son créneau est libéré dans la même transaction.
+        Si elle est finie (STATUTS_FINAUX), le score des offres de l'entreprise est recalculé.
+        """
         try:
-            cursor.execute("UPDATE bookings SET statut = %s WHERE id = %s", (new_status, booking_id))
-            connection.commit()
-            return True
+            with self.db.transaction() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("UPDATE bookings SET statut = %s WHERE id = %s", (new_status, booking_id))
+                    if new_status in STATUTS_LIBERES:
+                        cursor.execute("DELETE FROM booking_slots WHERE booking_id = %s", (booking_id,))
+                    if new_status in STATUTS_FINAUX:
+                        cursor.execute("SELECT company_id FROM bookings WHERE id = %s", (booking_id,))
+                        ligne = cursor.fetchone()
+                        if ligne:
+                            self.company_dao.refresh_scores([ligne[0]])
+                    return True
+                finally: 
+                    cursor.close()
         except Exception: 
             return False
-        finally: 
-            cursor.close()
+
+    def transition_bookings(self, booking_ids, new_status, company_id=None, set_sql="", set_params=(),
+                            departs=None, where_sql=""):
+        """
+        Change le statut de PLUSIEURS réservations d'un coup ("set-based"), dans UNE transaction :
+          1. un seul UPDATE ... WHERE id IN (...) AND statut IN (statuts de départ autorisés) :
+             la règle de transition est vérifiée par la base, dans la requête elle-même ;
+          2. on retient les réservations que cet UPDATE a VRAIMENT modifiées (voir _changer_statut) ;
+          3. si le nouveau statut libère l'agenda, un seul DELETE libère leurs créneaux (et seulement les leurs) ;
+          4. si le nouveau statut est final, le score des offres de leurs entreprises est recalculé.
+        company_id (optionnel) limite le traitement aux réservations de cette entreprise.
+        set_sql / set_params : colonnes supplémentaires à modifier (ex: ", technician_superior_contact = %s").
+        departs / where_sql (optionnels) : statuts de départ plus stricts que TRANSITIONS[new_status],
+        et condition SQL de plus (ex: " AND rdv_date < CURDATE()"), vérifiés eux aussi par l'UPDATE.
+        Retourne un résultat PAR réservation : {booking_id: (True, 'CONFIRMEE') ou (False, 'raison')}.
+        """
+        ids = list(dict.fromkeys(booking_ids))
+        if not ids:
+            return {}
+        departs = tuple(departs) if departs is not None else TRANSITIONS.get(new_status)
+        if not departs:
+            return {bid: (False, f"transition vers {new_status} non autorisée") for bid in ids}
+
+        marqueurs = ", ".join(["%s"] * len(ids))
+        filtre_entreprise = (" AND company_id = %s" if company_id is not None else "") + where_sql
+        params_filtre = tuple(ids) + ((company_id,) if company_id is not None else ())
+        selection = f"SELECT id, statut, company_id FROM bookings WHERE id IN ({marqueurs}){filtre_entreprise}"
+        marqueurs_departs = ", ".join(["%s"] * len(departs))
+        update = f"""
+            UPDATE bookings SET statut = %s{set_sql}
+            WHERE id IN ({marqueurs}){filtre_entreprise} AND statut IN ({marqueurs_departs})
+        """
+        params_update = (new_status,) + tuple(set_params) + params_filtre + tuple(departs)
+
+        try:
+            with self.db.transaction() as connection:
+                cursor = connection.cursor()
+                try:
+                    actuels, modifies = self._changer_statut(cursor, selection, params_filtre, update, params_update, departs)
+                    if modifies and new_status in STATUTS_LIBERES:
+                        marqueurs_modifies = ", ".join(["%s"] * len(modifies))
+                        cursor.execute(f"DELETE FROM booking_slots WHERE booking_id IN ({marqueurs_modifies})", tuple(modifies))
+                    if modifies and new_status in STATUTS_FINAUX:
+                        self.company_dao.refresh_scores(sorted(set(modifies.values())))
+                finally:
+                    cursor.close()
+
+        except Exception as erreur:
+            print(f" Erreur lors du traitement groupé ({new_status}) : {erreur}")
+            return {bid: (False, f"Erreur : {erreur}") for bid in ids}
+
+        resultats = {}
+        for bid in ids:
+            if bid in modifies:
+                resultats[bid] = (True, new_status)
+            elif bid not in actuels:
+                resultats[bid] = (False, "réservation introuvable")
+            else:
+                resultats[bid] = (False, f"statut actuel {actuels[bid]}")
+        return resultats
+
+    def _changer_statut(self, cursor, selection, params_selection, update, params_update, departs):
+        """
+        Lance l'UPDATE de transition_bookings et renvoie ({id: statut lu}, {id modifié: company_id}).
+        Le résultat ne doit venir que des lignes que l'UPDATE a réellement changées :
+          - MySQL : la lecture SELECT ... FOR UPDATE verrouille les lignes AVANT l'UPDATE, personne
+            ne peut changer leur statut entre les deux, la lecture dit donc exactement ce qui sera modifié ;
+          - SQLite : une lecture ne verrouille rien. C'est l'UPDATE qui dit lui-même quelles lignes
+            il a changées (RETURNING) ; il a pris le verrou d'écriture de la base jusqu'au COMMIT,
+            la relecture des statuts qui suit est donc exacte elle aussi.
+        """
+        if self.db.dialect == 'mysql':
+            cursor.execute(selection + " FOR UPDATE", params_selection)
+            lignes = cursor.fetchall()
+            cursor.execute(update, params_update)
+            modifies = {bid: cid for bid, statut, cid in lignes if statut in departs}
+        else:
+            cursor.execute(update + " RETURNING id, company_id", params_update)
+            modifies = dict(cursor.fetchall())
+            cursor.execute(selection, params_selection)
+            lignes = cursor.fetchall()
+        return {bid: statut for bid, statut, _ in lignes}, modifies
+
+    def cancel_stale_bookings(self, booking_ids):
+        """
+        Annule les réservations (balayage périodique) restées EN_ATTENTE alors que la date du RDV est passée.
+        L'UPDATE lui-même ne touche que statut = 'EN_ATTENTE' AND rdv_date < CURDATE() : une réservation
+        payée ou confirmée entre la lecture des IDs (get_stale_booking_ids) et ce lot garde son statut et son créneau.
+        Retourne {booking_id: (True, 'ANNULEE') ou (False, 'raison')}, comme transition_bookings.
+        """
+        return self.transition_bookings(booking_ids, 'ANNULEE', departs=('EN_ATTENTE',), where_sql=" AND rdv_date < CURDATE()")
+
+    def get_stale_booking_ids(self, after_id, limit):
+        """
+        IDs des réservations restées 'EN_ATTENTE' alors que la date du RDV est passée,
+        à partir de after_id (exclu), dans l'ordre, au plus 'limit' (balayage par lots).
+        """
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""
+                    SELECT id FROM bookings
+                    WHERE statut = 'EN_ATTENTE' AND id > %s AND rdv_date < CURDATE()
+                    ORDER BY id LIMIT %s
+                """, (after_id, limit))
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    def confirm_bookings(self, booking_ids, supervisor_contact, company_id=None):
+        """
+        Confirme plusieurs réservations (EN_ATTENTE ou PAYEE) avec le même superviseur.
+        La date_debut_prevue de chaque réservation est calculée par la base à partir de SON rdv_date / rdv_heure.
+        """
+        if self.db.dialect == 'mysql':
+            debut = "CONCAT(rdv_date, ' ', COALESCE(rdv_heure, '08:00'), ':00')"
+        else:
+            debut = "rdv_date || ' ' || COALESCE(rdv_heure, '08:00') || ':00'"
+        return self.transition_bookings(
+            booking_ids, 'CONFIRMEE', company_id,
+            f", date_debut_prevue = {debut}, technician_superior_contact = %s", (supervisor_contact,)
+        )
+
+    def refuse_bookings(self, booking_ids, company_id=None):
+        """Refuse plusieurs demandes (EN_ATTENTE ou PAYEE) et libère leurs créneaux."""
+        return self.transition_bookings(booking_ids, 'REFUSEE', company_id)
+
+    def cancel_bookings(self, booking_ids):
+        """Annulation par l'administrateur (modération) : les créneaux sont libérés."""
+        return self.transition_bookings(booking_ids, 'ANNULEE')
+
+    def complete_bookings(self, booking_ids, rapport_avant, rapport_apres, rapport_details, company_id=None):
+        """Clôture plusieurs interventions CONFIRMEE avec le même rapport (statut 'TERMINEE')."""
+        return self.transition_bookings(
+            booking_ids, 'TERMINEE', company_id,
+            ", rapport_avant = %s, rapport_apres = %s, rapport_details = %s", (rapport_avant, rapport_apres, rapport_details)
+        )
 
     def get_client_bookings(self, client_id):
         """
@@ -139,140 +373,497 @@ class BookingDAO:
         Utilise des 'JOIN' pour récupérer aussi le nom de l'entreprise et le nom du service 
         plutôt que de n'avoir que leurs IDs.
         """
-        connection = self.db.get_connection()
-        if not connection: return []
-        cursor = connection.cursor(dictionary=True)
-        try:
-            sql = """
-                SELECT b.*, c.nom_entreprise, s.nom_service
-                FROM bookings b
-                JOIN companies c ON b.company_id = c.id
-                JOIN service_types s ON b.service_type_id = s.id
-                WHERE b.client_id = %s 
-                ORDER BY b.date_demande DESC
-            """
-            cursor.execute(sql, (client_id,))
-            return cursor.fetchall()
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = f"""
+                    SELECT {COLONNES_RESUME}, c.nom_entreprise, s.nom_service
+                    FROM bookings b
+                    JOIN companies c ON b.company_id = c.id
+                    JOIN service_types s ON b.service_type_id = s.id
+                    WHERE b.client_id = %s 
+                    ORDER BY b.date_demande DESC
+                """
+                cursor.execute(sql, (client_id,))
+                return cursor.fetchall()
+            finally: 
+                cursor.close()
 
     def get_company_bookings(self, company_id):
         """Même principe que get_client_bookings, mais pour l'historique de l'entreprise."""
-        connection = self.db.get_connection()
-        if not connection: return []
-        cursor = connection.cursor(dictionary=True)
-        try:
-            sql = """
-                SELECT b.*, u.nom as client_nom, u.telephone as client_tel, u.ville as client_ville, s.nom_service
-                FROM bookings b
-                JOIN users u ON b.client_id = u.id
-                JOIN service_types s ON b.service_type_id = s.id
-                WHERE b.company_id = %s 
-                ORDER BY b.date_demande DESC
-            """
-            cursor.execute(sql, (company_id,))
-            return cursor.fetchall()
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = f"""
+                    SELECT {COLONNES_RESUME}, u.nom as client_nom, u.telephone as client_tel, u.ville as client_ville, s.nom_service
+                    FROM bookings b
+                    JOIN users u ON b.client_id = u.id
+                    JOIN service_types s ON b.service_type_id = s.id
+                    WHERE b.company_id = %s 
+                    ORDER BY b.date_demande DESC
+                """
+                cursor.execute(sql, (company_id,))
+                return cursor.fetchall()
+            finally: 
+                cursor.close()
 
     def get_all_bookings(self):
         """Admin : voit toutes les réservations du système."""
-        connection = self.db.get_connection()
-        if not connection: return []
-        cursor = connection.cursor(dictionary=True)
-        try:
-            sql = """
-                SELECT b.*, u.nom as client_nom, c.nom_entreprise, s.nom_service
-                FROM bookings b
-                JOIN users u ON b.client_id = u.id
-                JOIN companies c ON b.company_id = c.id
-                JOIN service_types s ON b.service_type_id = s.id
-                ORDER BY b.date_demande DESC
-            """
-            cursor.execute(sql)
-            return cursor.fetchall()
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = f"""
+                    SELECT {COLONNES_RESUME}, u.nom as client_nom, c.nom_entreprise, s.nom_service
+                    FROM bookings b
+                    JOIN users u ON b.client_id = u.id
+                    JOIN companies c ON b.company_id = c.id
+                    JOIN service_types s ON b.service_type_id = s.id
+                    ORDER BY b.date_demande DESC
+                """
+                cursor.execute(sql)
+                return cursor.fetchall()
+            finally: 
+                cursor.close()
+
+    def iter_bookings_export(self, date_from=None, date_to=None, statut=None, company_id=None, chunk_size=1000):
+        """
+        Parcourt TOUTES les réservations (filtres optionnels : date de demande, statut, entreprise)
+        et les renvoie par paquets de chunk_size lignes, au fur et à mesure (générateur).
+        Le curseur n'est pas "bufferisé" : MySQL envoie les lignes au fil de la lecture au lieu de
+        tout charger en mémoire, donc la mémoire utilisée ne dépend pas de la taille de la table.
+        date_to est inclusive (toute la journée). Une erreur SQL n'est PAS avalée : elle remonte à
+        l'appelant, pour qu'un export incomplet ne passe jamais pour un export terminé.
+        """
+        conditions = []
+        params = []
+        if date_from:
+            conditions.append("b.date_demande >= %s")
+            params.append(str(date_from))
+        if date_to:
+            # "< lendemain" : inclut toute la journée date_to et garde l'index sur date_demande utilisable
+            conditions.append("b.date_demande < %s")
+            params.append((date_to + timedelta(days=1)).strftime('%Y-%m-%d'))
+        if statut:
+            conditions.append("b.statut = %s")
+            params.append(statut)
+        if company_id:
+            conditions.append("b.company_id = %s")
+            params.append(company_id)
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+        with self.db.borrow() as connection:
+            if not connection: return
+            # buffered=False : lecture en flux côté serveur (sans effet sur SQLite, qui lit déjà au fil de l'eau)
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            try:
+                sql = f"""
+                    SELECT b.id, b.date_demande, b.client_id, u.nom as client_nom, b.company_id, c.nom_entreprise,
+                           b.service_type_id, s.nom_service, b.quantite, b.prix_total, b.mode_paiement, b.statut,
+                           b.rdv_date, b.rdv_heure, b.date_debut_prevue, b.import_ref
+                    FROM bookings b
+                    JOIN users u ON b.client_id = u.id
+                    JOIN companies c ON b.company_id = c.id
+                    JOIN service_types s ON b.service_type_id = s.id
+                    {where}
+                    ORDER BY b.id
+                """
+                cursor.execute(sql, tuple(params))
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                # Parcours interrompu avant la fin : MySQL exige de lire (jeter) les lignes restantes
+                if getattr(connection, 'unread_result', False):
+                    connection.consume_results()
+                cursor.close()
+
+    def get_booking_detail(self, booking_id, client_id=None, company_id=None):
+        """
+        Fiche complète d'UNE réservation, AVEC les champs longs (description du client et rapports),
+        que les listes ne chargent pas. client_id / company_id (optionnels) vérifient que la
+        réservation appartient bien à ce client / cette entreprise. Retourne un dictionnaire ou None.
+        """
+        with self.db.borrow() as connection:
+            if not connection: return None
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = """
+                    SELECT b.*, u.nom as client_nom, u.telephone as client_tel, u.ville as client_ville,
+                           c.nom_entreprise, s.nom_service
+                    FROM bookings b
+                    JOIN users u ON b.client_id = u.id
+                    JOIN companies c ON b.company_id = c.id
+                    JOIN service_types s ON b.service_type_id = s.id
+                    WHERE b.id = %s
+                """
+                params = [booking_id]
+                if client_id is not None:
+                    sql = sql + " AND b.client_id = %s"
+                    params.append(client_id)
+                if company_id is not None:
+                    sql = sql + " AND b.company_id = %s"
+                    params.append(company_id)
+                cursor.execute(sql, tuple(params))
+                return cursor.fetchone()
+            finally:
+                cursor.close()
+
+    def _get_bookings_page(self, select_sql, filtre_sql, filtre_params, page_size, cursor_key, direction):
+        """
+        Pagination "par curseur" (keyset) sur (date_demande, id), du plus récent au plus ancien.
+        Au lieu de "OFFSET 5000" (la base lirait puis jetterait 5000 lignes), on repart de la
+        dernière ligne affichée : WHERE (date_demande, id) < (celle de la dernière ligne) -> l'index
+        amène directement à la bonne position, quelle que soit la page.
+          cursor_key : (date_demande, id) de la ligne de référence, ou None pour la première page
+          direction  : 'next' (plus anciennes que le curseur) ou 'prev' (plus récentes)
+        Retourne {'rows', 'has_next', 'has_prev', 'cursor_first', 'cursor_last'}.
+        """
+        conditions = [filtre_sql] if filtre_sql else []
+        params = list(filtre_params)
+        if cursor_key is not None:
+            date_ref, id_ref = cursor_key
+            signe = "<" if direction == 'next' else ">"
+            # La 1re partie (date <= ...) permet à l'index de sauter directement au curseur,
+            # la 2e départage les réservations faites à la même seconde grâce à l'id
+            conditions.append(f"b.date_demande {signe}= %s AND (b.date_demande {signe} %s OR b.id {signe} %s)")
+            params.extend([date_ref, date_ref, id_ref])
+
+        ordre = "DESC" if direction == 'next' else "ASC"
+        sql = select_sql
+        if conditions:
+            sql = sql + " WHERE " + " AND ".join(conditions)
+        # On demande UNE ligne de plus que la page : si elle existe, il y a une page après
+        sql = sql + f" ORDER BY b.date_demande {ordre}, b.id {ordre} LIMIT %s"
+        params.append(page_size + 1)
+
+        with self.db.borrow() as connection:
+            if not connection:
+                return {'rows': [], 'has_next': False, 'has_prev': False, 'cursor_first': None, 'cursor_last': None}
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, tuple(params))
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+
+        encore = len(rows) > page_size
+        rows = rows[:page_size]
+        if direction == 'next':
+            has_next, has_prev = encore, cursor_key is not None
+        else:
+            # En remontant, les lignes arrivent de la plus ancienne à la plus récente : on les remet dans l'ordre
+            rows.reverse()
+            has_next, has_prev = True, encore
+
+        return {
+            'rows': rows,
+            'has_next': has_next and bool(rows),
+            'has_prev': has_prev and bool(rows),
+            'cursor_first': (rows[0]['date_demande'], rows[0]['id']) if rows else None,
+            'cursor_last': (rows[-1]['date_demande'], rows[-1]['id']) if rows else None,
+        }
+
+    def get_client_bookings_page(self, client_id, page_size=10, cursor_key=None, direction='next'):
+        """Une page de l'historique d'un client (voir _get_bookings_page)."""
+        return self._get_bookings_page(f"""
+            SELECT {COLONNES_RESUME}, c.nom_entreprise, s.nom_service
+            FROM bookings b
+            JOIN companies c ON b.company_id = c.id
+            JOIN service_types s ON b.service_type_id = s.id
+        """, "b.client_id = %s", (client_id,), page_size, cursor_key, direction)
+
+    def get_company_bookings_page(self, company_id, page_size=10, cursor_key=None, direction='next'):
+        """Une page des demandes reçues par une entreprise (voir _get_bookings_page)."""
+        return self._get_bookings_page(f"""
+            SELECT {COLONNES_RESUME}, u.nom as client_nom, u.telephone as client_tel, u.ville as client_ville, s.nom_service
+            FROM bookings b
+            JOIN users u ON b.client_id = u.id
+            JOIN service_types s ON b.service_type_id = s.id
+        """, "b.company_id = %s", (company_id,), page_size, cursor_key, direction)
+
+    def get_all_bookings_page(self, page_size=20, cursor_key=None, direction='next'):
+        """Admin : une page de toutes les réservations du système (voir _get_bookings_page)."""
+        return self._get_bookings_page(f"""
+            SELECT {COLONNES_RESUME}, u.nom as client_nom, c.nom_entreprise, s.nom_service
+            FROM bookings b
+            JOIN users u ON b.client_id = u.id
+            JOIN companies c ON b.company_id = c.id
+            JOIN service_types s ON b.service_type_id = s.id
+        """, "", (), page_size, cursor_key, direction)
 
     def get_stats(self):
         """
         Récupère des statistiques globales pour le Dashboard Administrateur.
         Utilise des fonctions SQL (COUNT, SUM, CASE WHEN) pour tout calculer en une seule requête optimisée.
         """
-        connection = self.db.get_connection()
-        if not connection: return {}
-        cursor = connection.cursor(dictionary=True)
-        try:
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total_demandes,
-                    SUM(CASE WHEN statut = 'TERMINEE' THEN 1 ELSE 0 END) as terminees,
-                    SUM(CASE WHEN statut = 'EN_ATTENTE' THEN 1 ELSE 0 END) as en_attente,
-                    SUM(CASE WHEN statut = 'CONFIRMEE' THEN 1 ELSE 0 END) as confirmees,
-                    SUM(CASE WHEN statut = 'REFUSEE' THEN 1 ELSE 0 END) as refusees,
-                    SUM(CASE WHEN statut = 'ANNULEE_CLIENT' THEN 1 ELSE 0 END) as annulees_client,
-                    COALESCE(SUM(CASE WHEN statut = 'TERMINEE' THEN prix_total ELSE 0 END), 0) as chiffre_affaires
-                FROM bookings
-            """)
-            return cursor.fetchone()
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: return {}
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute("""
+                    SELECT 
+                        COUNT(*) as total_demandes,
+                        SUM(CASE WHEN statut = 'TERMINEE' THEN 1 ELSE 0 END) as terminees,
+                        SUM(CASE WHEN statut = 'EN_ATTENTE' THEN 1 ELSE 0 END) as en_attente,
+                        SUM(CASE WHEN statut = 'CONFIRMEE' THEN 1 ELSE 0 END) as confirmees,
+                        SUM(CASE WHEN statut = 'REFUSEE' THEN 1 ELSE 0 END) as refusees,
+                        SUM(CASE WHEN statut = 'ANNULEE_CLIENT' THEN 1 ELSE 0 END) as annulees_client,
+                        COALESCE(SUM(CASE WHEN statut = 'TERMINEE' THEN prix_total ELSE 0 END), 0) as chiffre_affaires
+                    FROM bookings
+                """)
+                return cursor.fetchone()
+            finally: 
+                cursor.close()
 
     def add_review(self, booking_id, client_id, rating, comment):
-        """Prend en compte l'avis d'un client et lui attribue une note."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor(dictionary=True)
+        """
+        Prend en compte l'avis d'un client et lui attribue une note.
+        Dans la même transaction : les compteurs de notes de l'entreprise et de l'offre
+        (company_ratings, catalog_ratings) et le score de classement de ses offres.
+        """
+        if rating not in (1, 2, 3, 4, 5):
+            return False, "La note doit être comprise entre 1 et 5."
         try:
-            # 1. Vérifie que la réservation existe et appartient au client
-            cursor.execute("SELECT id, statut FROM bookings WHERE id = %s AND client_id = %s", (booking_id, client_id))
-            booking = cursor.fetchone()
-            
-            if not booking:
-                return False, "Réservation introuvable ou ne vous appartient pas."
-                
-            # 2. Vérifie que le statut est bien 'TERMINEE'
-            if booking['statut'] != 'TERMINEE':
-                return False, f"Impossible de noter (statut : {booking['statut']}). Le service doit être TERMINÉ."
-                
-            # 3. Vérifie que le client n'a pas déjà noté cette intervention
-            cursor.execute("SELECT id FROM reviews WHERE booking_id = %s", (booking_id,))
-            if cursor.fetchone():
-                return False, "Vous avez déjà noté ce service."
-                
-            # 4. Insertion de la note
-            cursor.execute("INSERT INTO reviews (booking_id, client_id, rating, comment) VALUES (%s, %s, %s, %s)", 
-                          (booking_id, client_id, rating, comment))
-            connection.commit()
-            
-            # On renvoie un Tuple (Réussite: True/False, Message)
-            return True, "Merci pour votre avis !"
-            
+            with self.db.transaction() as connection:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    # 1. Vérifie que la réservation existe et appartient au client
+                    cursor.execute("SELECT id, statut, company_id, catalog_id FROM bookings WHERE id = %s AND client_id = %s", (booking_id, client_id))
+                    booking = cursor.fetchone()
+
+                    if not booking:
+                        return False, "Réservation introuvable ou ne vous appartient pas."
+
+                    # 2. Vérifie que le statut est bien 'TERMINEE'
+                    if booking['statut'] != 'TERMINEE':
+                        return False, f"Impossible de noter (statut : {booking['statut']}). Le service doit être TERMINÉ."
+
+                    # 3. Vérifie que le client n'a pas déjà noté cette intervention
+                    #    (deux envois simultanés passent tous les deux ici : c'est alors UNIQUE (booking_id) qui refuse le second)
+                    cursor.execute("SELECT id FROM reviews WHERE booking_id = %s", (booking_id,))
+                    if cursor.fetchone():
+                        return False, "Vous avez déjà noté ce service."
+
+                    # 4. Insertion de la note, puis mise à jour des compteurs (un "upsert" par table)
+                    cursor.execute("INSERT INTO reviews (booking_id, client_id, rating, comment) VALUES (%s, %s, %s, %s)",
+                                  (booking_id, client_id, rating, comment))
+                    cursor.execute(SQL_NOTE_ENTREPRISE, (booking['company_id'],) + rating_params(rating))
+                    if booking['catalog_id'] is not None:
+                        cursor.execute(SQL_NOTE_OFFRE, (booking['catalog_id'], booking['company_id']) + rating_params(rating))
+                    self.company_dao.refresh_scores([booking['company_id']])
+
+                    # On renvoie un Tuple (Réussite: True/False, Message)
+                    return True, "Merci pour votre avis !"
+
+                finally:
+                    cursor.close()
+
         except Exception as erreur:
+            # La transaction est annulée : ni l'avis en double, ni les compteurs ne sont gardés
+            if is_duplicate_key_error(erreur):
+                return False, "Vous avez déjà noté ce service."
             return False, f"Erreur : {erreur}"
-            
-        finally: 
-            cursor.close()
+
+    def get_rating_summary(self, company_id, catalog_id=None):
+        """
+        Notes d'une entreprise (ou d'une de ses offres) lues dans les compteurs, sans parcourir les avis :
+        {'nb_avis', 'note_moyenne', 'histogramme': [nb de 1 étoile, ..., nb de 5 étoiles]}.
+        """
+        with self.db.borrow() as connection:
+            if not connection: return None
+            cursor = connection.cursor()
+            try:
+                if catalog_id is None:
+                    cursor.execute(f"SELECT {COLONNES_NOTES} FROM company_ratings WHERE company_id = %s", (company_id,))
+                else:
+                    cursor.execute(f"SELECT {COLONNES_NOTES} FROM catalog_ratings WHERE catalog_id = %s", (catalog_id,))
+                ligne = cursor.fetchone() or (0, 0, 0, 0, 0, 0, 0)
+                nb_avis, somme = ligne[0], ligne[1]
+                return {
+                    'nb_avis': nb_avis,
+                    'note_moyenne': round(somme / nb_avis, 1) if nb_avis else None,
+                    'histogramme': list(ligne[2:]),
+                }
+            finally:
+                cursor.close()
+
+    def rebuild_ratings(self, company_ids=None):
+        """
+        Recalcule les compteurs de notes depuis la table reviews (voir rebuild_rating_aggregates),
+        en une transaction. Retourne (entreprises, offres) notées, ou None en cas d'erreur.
+        """
+        try:
+            with self.db.transaction() as connection:
+                if not connection: return None
+                cursor = connection.cursor()
+                try:
+                    resultat = rebuild_rating_aggregates(cursor, company_ids)
+                finally:
+                    cursor.close()
+        except Exception as erreur:
+            print(f" Erreur lors du recalcul des notes : {erreur}")
+            return None
+
+        # Les cartes du catalogue affichent ces notes : l'index en mémoire relit ce qui a changé
+        if company_ids is None:
+            CompanyDAO.notify('all')
+        else:
+            for company_id in dict.fromkeys(company_ids):
+                CompanyDAO.notify('company', company_id)
+        return resultat
 
     def get_booked_slots(self, company_id, date):
         """
         Vérifie tous les créneaux déjà réservés pour une entreprise donnée à une date précise.
         Cela permet à OptiVolt de ne pas proposer ces mêmes créneaux aux futurs clients.
+        (Lus dans booking_slots : une intervention de 3 h y occupe ses 3 heures, pas seulement la première.)
+        """
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = """
+                    SELECT rdv_heure FROM booking_slots 
+                    WHERE company_id = %s AND rdv_date = %s
+                """
+                cursor.execute(sql, (company_id, date))
+                
+                # On transforme la liste de dictionnaires en une liste simple d'heures (ex: ['10:00', '14:00'])
+                return [row['rdv_heure'] for row in cursor.fetchall()]
+                
+            finally: 
+                cursor.close()
+
+    def get_booked_slots_range(self, company_id, date_from, date_to):
         """
-        connection = self.db.get_connection()
-        if not connection: return []
-        cursor = connection.cursor(dictionary=True)
+        Même chose que get_booked_slots, mais pour toute une période [date_from, date_to] en UNE requête.
+        Retourne un dictionnaire {'YYYY-MM-DD': ['10:00', '14:00'], ...} (les jours sans réservation sont absents).
+        """
+        with self.db.borrow() as connection:
+            if not connection: return {}
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = """
+                    SELECT rdv_date, rdv_heure FROM booking_slots 
+                    WHERE company_id = %s AND rdv_date BETWEEN %s AND %s
+                """
+                cursor.execute(sql, (company_id, date_from, date_to))
+
+                occupes = {}
+                for row in cursor.fetchall():
+                    # MySQL renvoie un objet date, SQLite une chaîne : on harmonise en 'YYYY-MM-DD'
+                    occupes.setdefault(str(row['rdv_date'])[:10], []).append(row['rdv_heure'])
+                return occupes
+
+            finally: 
+                cursor.close()
+
+    def get_booked_slots_for_service(self, service_type_id, date_from, date_to):
+        """
+        Tous les créneaux occupés sur la période, chez toutes les entreprises qui proposent
+        ce type de service, en UNE requête (lue dans booking_slots, qui ne contient que les créneaux actifs).
+        Retourne une liste de tuples (company_id, 'YYYY-MM-DD', 'HH:MM').
+        """
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor()
+            try:
+                sql = """
+                    SELECT DISTINCT bs.company_id, bs.rdv_date, bs.rdv_heure
+                    FROM booking_slots bs
+                    JOIN catalog cat ON cat.company_id = bs.company_id
+                    WHERE cat.service_type_id = %s AND bs.rdv_date BETWEEN %s AND %s
+                """
+                cursor.execute(sql, (service_type_id, date_from, date_to))
+                return [(row[0], str(row[1])[:10], row[2]) for row in cursor.fetchall()]
+
+            finally: 
+                cursor.close()
+
+    def get_existing_import_refs(self, refs):
+        """Parmi les références d'import données, renvoie (set) celles qui existent déjà en base."""
+        if not refs:
+            return set()
+        with self.db.borrow() as connection:
+            if not connection: return set()
+            cursor = connection.cursor()
+            try:
+                marqueurs = ", ".join(["%s"] * len(refs))
+                cursor.execute(f"SELECT import_ref FROM bookings WHERE import_ref IN ({marqueurs})", tuple(refs))
+                return {row[0] for row in cursor.fetchall()}
+            finally:
+                cursor.close()
+
+    def get_claimed_slots(self, company_ids, date_from, date_to):
+        """
+        Créneaux actifs (lus dans booking_slots) de plusieurs entreprises sur une période, en UNE requête.
+        Retourne un set de tuples (company_id, 'YYYY-MM-DD', 'HH:MM').
+        """
+        if not company_ids:
+            return set()
+        with self.db.borrow() as connection:
+            if not connection: return set()
+            cursor = connection.cursor()
+            try:
+                marqueurs = ", ".join(["%s"] * len(company_ids))
+                sql = f"""
+                    SELECT company_id, rdv_date, rdv_heure FROM booking_slots
+                    WHERE company_id IN ({marqueurs}) AND rdv_date BETWEEN %s AND %s
+                """
+                cursor.execute(sql, tuple(company_ids) + (date_from, date_to))
+                return {(row[0], str(row[1])[:10], row[2]) for row in cursor.fetchall()}
+            finally:
+                cursor.close()
+
+    def insert_bookings_batch(self, bookings):
+        """
+        Insère un lot de réservations déjà validées (import en masse) dans UNE transaction :
+          1. executemany sur bookings (chaque ligne porte sa référence unique import_ref)
+          2. on relit les IDs attribués grâce à import_ref
+          3. executemany sur booking_slots pour réclamer tous les créneaux (toutes les heures occupées)
+        'bookings' est une liste de dictionnaires (clés = colonnes de la table + import_ref,
+        et 'creneaux' optionnel : [('YYYY-MM-DD', 'HH:00'), ...], par défaut l'heure du RDV).
+        Retourne {import_ref: booking_id}. Si un créneau (ou une référence) est déjà pris,
+        tout le lot est annulé et SlotAlreadyBookedError est levée.
+        """
+        if not bookings:
+            return {}
         try:
-            sql = """
-                SELECT rdv_heure FROM bookings 
-                WHERE company_id = %s AND rdv_date = %s 
-                AND statut NOT IN ('REFUSEE', 'ANNULEE', 'ANNULEE_CLIENT')
-            """
-            cursor.execute(sql, (company_id, date))
-            
-            # On transforme la liste de dictionnaires en une liste simple d'heures (ex: ['10:00', '14:00'])
-            return [row['rdv_heure'] for row in cursor.fetchall()]
-            
-        finally: 
-            cursor.close()
+            with self.db.transaction() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.executemany("""
+                        INSERT INTO bookings
+                        (client_id, company_id, service_type_id, catalog_id, quantite, prix_total, description_client, rdv_date, rdv_heure, mode_paiement, statut, import_ref)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """, [
+                        (b['client_id'], b['company_id'], b['service_type_id'], b['catalog_id'], b['quantite'], b['prix_total'],
+                         b['description_client'], b['rdv_date'], b['rdv_heure'], b['mode_paiement'], b['statut'], b['import_ref'])
+                        for b in bookings
+                    ])
 
+                    # executemany ne renvoie pas les IDs un par un : on les relit via la référence unique
+                    refs = [b['import_ref'] for b in bookings]
+                    marqueurs = ", ".join(["%s"] * len(refs))
+                    cursor.execute(f"SELECT import_ref, id FROM bookings WHERE import_ref IN ({marqueurs})", tuple(refs))
+                    ids = dict(cursor.fetchall())
 
+                    cursor.executemany(
+                        "INSERT INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id) VALUES (%s, %s, %s, %s)",
+                        [(b['company_id'], jour, heure, ids[b['import_ref']])
+                         for b in bookings for jour, heure in (b.get('creneaux') or [(b['rdv_date'], b['rdv_heure'])])]
+                    )
+                    return ids
+                finally:
+                    cursor.close()
+
+        except Exception as erreur:
+            if is_duplicate_key_error(erreur):
+                raise SlotAlreadyBookedError(f"Conflit pendant l'import d'un lot de {len(bookings)} réservations : {erreur}") from erreur
+            print(f" Erreur lors de l'import du lot de réservations : {erreur}")
+            return None
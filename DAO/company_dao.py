@@ -1,5 +1,9 @@
+from datetime import date, timedelta
+
 from Config.database import DatabaseConnection
-from models.company import Company, CatalogItem, ServiceType, SubscriptionPlan
+from models.company import (Company, CatalogItem, ServiceType, SubscriptionPlan,
+                            JOURS_REALISATION, forfait_niveau, offer_score)
+from utils.cache import cached
 
 """
 CompanyDAO (Data Access Object pour les Entreprises).
@@ -7,352 +11,671 @@ Cette classe regroupe toutes les requêtes SQL (CRUD) liées aux entreprises
 et à leur catalogue de services.
 """
 
+# Notes des avis affichées sur les cartes (compteurs tenus à jour par BookingDAO.add_review) :
+# celles de l'entreprise et celles de l'offre elle-même
+COLONNES_NOTES_CARTE = (
+    "COALESCE(cr.nb_avis, 0) as nb_avis, COALESCE(cr.somme_notes, 0) as somme_notes, "
+    "COALESCE(ocr.nb_avis, 0) as offre_nb_avis, COALESCE(ocr.somme_notes, 0) as offre_somme_notes"
+)
+JOINTURES_NOTES = (
+    "LEFT JOIN company_ratings cr ON cr.company_id = c.id "
+    "LEFT JOIN catalog_ratings ocr ON ocr.catalog_id = cat.id"
+)
+
+
+# Écriture des scores calculés : un seul executemany pour toutes les offres
+SQL_SCORE_OFFRE = "UPDATE catalog SET score = %s WHERE id = %s"
+
+
+def offer_score_queries(company_ids=None, prix_moyens=None):
+    """
+    Le calcul de compute_offer_scores, sans curseur : un générateur qui "demande" chaque requête
+    (yield (sql, params)), reçoit ses lignes par send(lignes), puis se termine en renvoyant la liste
+    [(score, catalog_id)] à écrire avec SQL_SCORE_OFFRE. Le même calcul sert ainsi au curseur simple
+    (compute_offer_scores) et au curseur asynchrone (DAO/async_company_dao.py, compute_offer_scores_async).
+    Les lignes reçues sont des tuples (pas de curseur "dictionnaire").
+    """
+    filtre, params = "", ()
+    if company_ids is not None:
+        company_ids = list(dict.fromkeys(company_ids))
+        if not company_ids:
+            return []
+        filtre, params = f" IN ({', '.join(['%s'] * len(company_ids))})", tuple(company_ids)
+
+    # 1. Les offres à noter, avec les options du forfait de leur entreprise
+    offres = yield f"""
+        SELECT cat.id, cat.company_id, cat.service_type_id, cat.prix_base, sp.has_priority_support, sp.has_analytics
+        FROM catalog cat
+        JOIN companies c ON c.id = cat.company_id
+        LEFT JOIN subscription_plans sp ON sp.id = c.subscription_plan_id
+        {"WHERE cat.company_id" + filtre if filtre else ""}
+    """, params
+    if not offres:
+        return []
+
+    # 2. Prix moyen de chaque type de service concerné (sur TOUT le catalogue : c'est la requête la plus lourde)
+    prix_moyens = dict(prix_moyens or {})
+    types = sorted({offre[2] for offre in offres} - prix_moyens.keys())
+    if types:
+        prix_moyens.update((yield f"""
+            SELECT service_type_id, AVG(prix_base) FROM catalog
+            WHERE service_type_id IN ({', '.join(['%s'] * len(types))})
+            GROUP BY service_type_id
+        """, tuple(types)))
+
+    # 3. Avis reçus par chaque entreprise (note moyenne, nombre), lus dans les compteurs company_ratings
+    #    (tenus à jour par BookingDAO.add_review) au lieu d'un AVG() sur tous les avis
+    lignes = yield f"""
+        SELECT company_id, somme_notes, nb_avis
+        FROM company_ratings
+        {"WHERE company_id" + filtre if filtre else ""}
+    """, params
+    avis = {company_id: (somme / nombre if nombre else 0.0, nombre) for company_id, somme, nombre in lignes}
+
+    # 4. Interventions finies récemment : terminées / (terminées + refusées + annulées par la modération)
+    depuis = (date.today() - timedelta(days=JOURS_REALISATION)).isoformat()
+    lignes = yield f"""
+        SELECT company_id, SUM(CASE WHEN statut = 'TERMINEE' THEN 1 ELSE 0 END), COUNT(*)
+        FROM bookings
+        WHERE statut IN ('TERMINEE', 'REFUSEE', 'ANNULEE') AND date_demande >= %s
+        {"AND company_id" + filtre if filtre else ""}
+        GROUP BY company_id
+    """, (depuis,) + params
+    realisations = {company_id: (int(terminees or 0), finies) for company_id, terminees, finies in lignes}
+
+    scores = []
+    for catalog_id, company_id, service_type_id, prix, has_priority_support, has_analytics in offres:
+        note, nb_avis = avis.get(company_id, (0.0, 0))
+        terminees, finies = realisations.get(company_id, (0, 0))
+        score = offer_score(forfait_niveau(has_priority_support, has_analytics), note, nb_avis,
+                            prix, prix_moyens.get(service_type_id), terminees, finies)
+        scores.append((score, catalog_id))
+    return scores
+
+
+def compute_offer_scores(cursor, company_ids=None, prix_moyens=None):
+    """
+    Recalcule et enregistre catalog.score (voir models.company.offer_score) pour les offres des
+    entreprises données (toutes si company_ids vaut None). 'cursor' est un curseur simple (tuples) :
+    cette fonction sert aussi à la migration qui crée la colonne.
+    prix_moyens (optionnel) : {service_type_id: prix moyen} déjà connus (ex: CompanyDAO.get_average_prices,
+    en cache) ; les types absents sont calculés ici.
+    Les moyennes (prix, interventions) sont calculées par la base avec GROUP BY, les notes lues dans
+    company_ratings (la table doit exister : voir la migration 9), le mélange
+    des critères en Python (offer_score_queries), puis un seul executemany écrit tous les scores.
+    Retourne le nombre d'offres mises à jour.
+    """
+    calcul = offer_score_queries(company_ids, prix_moyens)
+    try:
+        sql, params = next(calcul)
+        while True:
+            cursor.execute(sql, params)
+            sql, params = calcul.send(cursor.fetchall())
+    except StopIteration as fin:
+        scores = fin.value
+    if scores:
+        cursor.executemany(SQL_SCORE_OFFRE, scores)
+    return len(scores)
+
+
 class CompanyDAO:
+    # Fonctions prévenues après chaque écriture réussie sur les entreprises ou le catalogue
+    # (ex: l'index du catalogue en mémoire, services/catalog_index.py).
+    # Attribut de CLASSE : partagé par tous les CompanyDAO créés dans le programme.
+    _listeners = []
+
     def __init__(self):
         # On instancie la connexion (Singleton)
         self.db = DatabaseConnection()
 
+    @classmethod
+    def add_listener(cls, callback):
+        """
+        Enregistre une fonction appelée après chaque écriture : callback(evenement, identifiant) avec
+          ('company', company_id)    : l'entreprise (profil, validation, abonnement, offres) a changé
+          ('catalog', catalog_id)    : cette offre a été supprimée
+          ('service_types', None)    : une catégorie de service a été ajoutée
+          ('all', None)              : TOUT le catalogue a été recalculé (scores de classement, notes des avis)
+        """
+        if callback not in cls._listeners:
+            cls._listeners.append(callback)
+
+    @classmethod
+    def remove_listener(cls, callback):
+        if callback in cls._listeners:
+            cls._listeners.remove(callback)
+
+    @classmethod
+    def notify(cls, evenement, identifiant=None):
+        """
+        Prévient les fonctions enregistrées. Une erreur chez l'une d'elles n'annule pas l'écriture.
+        Dans un bloc transaction(), elles ne sont prévenues qu'après le COMMIT (et jamais si la transaction
+        est annulée) : sinon l'index relirait des lignes pas encore validées, peut-être annulées ensuite.
+        """
+        DatabaseConnection().after_commit(cls._prevenir, evenement, identifiant)
+
+    @classmethod
+    def _prevenir(cls, evenement, identifiant):
+        for callback in list(cls._listeners):
+            try:
+                callback(evenement, identifiant)
+            except Exception as erreur:
+                print(f"Erreur lors de la mise à jour après écriture ({evenement}) : {erreur}")
+
     def create_company(self, company: Company):
         """Ajoute une nouvelle entreprise dans la base de données."""
-        connection = self.db.get_connection()
-        if not connection: 
-            return None
-            
-        cursor = connection.cursor()
-        try:
-            # CURDATE() donne la date d'aujourd'hui. 
-            # DATE_ADD permet d'ajouter 30 jours pour l'expiration de l'abonnement.
-            query = """
-                INSERT INTO companies 
-                (user_id, nom_entreprise, description, ville, contact_phone, contact_email, is_verified, subscription_plan_id, subscription_start, subscription_expires_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 30 DAY))
-            """
-            valeurs = (
-                company.user_id, company.nom_entreprise, company.description, 
-                company.ville, company.contact_phone, company.contact_email, 
-                company.is_verified, company.subscription_plan_id
-            )
-            
-            cursor.execute(query, valeurs)
-            connection.commit()
-            
-            # On récupère l'ID généré et on le met dans l'objet
-            company.id = cursor.lastrowid
-            return company
-            
-        except Exception as erreur:
-            print(f"Erreur lors de la création de l'entreprise : {erreur}")
-            return None
-            
-        finally:
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: 
+                return None
+                
+            cursor = connection.cursor()
+            try:
+                # CURDATE() donne la date d'aujourd'hui. 
+                # DATE_ADD permet d'ajouter 30 jours pour l'expiration de l'abonnement.
+                query = """
+                    INSERT INTO companies 
+                    (user_id, nom_entreprise, description, ville, contact_phone, contact_email, is_verified, subscription_plan_id, subscription_start, subscription_expires_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 30 DAY))
+                """
+                valeurs = (
+                    company.user_id, company.nom_entreprise, company.description, 
+                    company.ville, company.contact_phone, company.contact_email, 
+                    company.is_verified, company.subscription_plan_id
+                )
+                
+                cursor.execute(query, valeurs)
+                self.db.commit(connection)
+                
+                # On récupère l'ID généré et on le met dans l'objet
+                company.id = cursor.lastrowid
+                return company
+                
+            except Exception as erreur:
+                print(f"Erreur lors de la création de l'entreprise : {erreur}")
+                return None
+                
+            finally:
+                cursor.close()
 
     def update_company(self, company_id, nom=None, description=None, ville=None, contact_phone=None, contact_email=None):
         """Met à jour les informations d'une entreprise (uniquement les champs fournis)."""
-        connection = self.db.get_connection()
-        if not connection: 
-            return False
-            
-        cursor = connection.cursor()
-        try:
-            fields = []
-            params = []
-            
-            # On construit la requête de mise à jour de manière dynamique
-            if nom is not None: 
-                fields.append("nom_entreprise = %s")
-                params.append(nom)
-            if description is not None: 
-                fields.append("description = %s")
-                params.append(description)
-            if ville is not None: 
-                fields.append("ville = %s")
-                params.append(ville)
-            if contact_phone is not None: 
-                fields.append("contact_phone = %s")
-                params.append(contact_phone)
-            if contact_email is not None: 
-                fields.append("contact_email = %s")
-                params.append(contact_email)
+        with self.db.borrow() as connection:
+            if not connection: 
+                return False
+                
+            cursor = connection.cursor()
+            try:
+                fields = []
+                params = []
                 
-            # Si aucun champ n'a été fourni, on s'arrête là
-            if len(fields) == 0: 
+                # On construit la requête de mise à jour de manière dynamique
+                if nom is not None: 
+                    fields.append("nom_entreprise = %s")
+                    params.append(nom)
+                if description is not None: 
+                    fields.append("description = %s")
+                    params.append(description)
+                if ville is not None: 
+                    fields.append("ville = %s")
+                    params.append(ville)
+                if contact_phone is not None: 
+                    fields.append("contact_phone = %s")
+                    params.append(contact_phone)
+                if contact_email is not None: 
+                    fields.append("contact_email = %s")
+                    params.append(contact_email)
+                    
+                # Si aucun champ n'a été fourni, on s'arrête là
+                if len(fields) == 0: 
+                    return False
+                    
+                # On ajoute l'ID à la fin des paramètres pour la clause WHERE
+                params.append(company_id)
+                
+                # Assemblage de la requête finale (ex: UPDATE companies SET ville = %s WHERE id = %s)
+                sql = f"UPDATE companies SET {', '.join(fields)} WHERE id = %s"
+                
+                cursor.execute(sql, tuple(params))
+                self.db.commit(connection)
+                self.notify('company', company_id)
+                return True
+                
+            except Exception as erreur:
+                print(f"Erreur lors de la mise à jour de l'entreprise : {erreur}")
                 return False
                 
-            # On ajoute l'ID à la fin des paramètres pour la clause WHERE
-            params.append(company_id)
-            
-            # Assemblage de la requête finale (ex: UPDATE companies SET ville = %s WHERE id = %s)
-            sql = f"UPDATE companies SET {', '.join(fields)} WHERE id = %s"
-            
-            cursor.execute(sql, tuple(params))
-            connection.commit()
-            return True
-            
-        except Exception as erreur:
-            print(f"Erreur lors de la mise à jour de l'entreprise : {erreur}")
-            return False
-            
-        finally: 
-            cursor.close()
+            finally: 
+                cursor.close()
 
     def delete_company(self, company_id):
         """Supprime une entreprise."""
-        connection = self.db.get_connection()
-        if not connection: return False
-        cursor = connection.cursor()
-        try:
-            cursor.execute("DELETE FROM companies WHERE id = %s", (company_id,))
-            connection.commit()
-            return True
-        except Exception as erreur:
-            print(f"Erreur lors de la suppression de l'entreprise : {erreur}")
-            return False
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: return False
+            cursor = connection.cursor()
+            try:
+                cursor.execute("DELETE FROM companies WHERE id = %s", (company_id,))
+                self.db.commit(connection)
+                self.notify('company', company_id)
+                return True
+            except Exception as erreur:
+                print(f"Erreur lors de la suppression de l'entreprise : {erreur}")
+                return False
+            finally: 
+                cursor.close()
 
     def verify_company(self, company_id, verified=True):
         """Valide (ou invalide) une entreprise par un administrateur."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
-        try:
-            cursor.execute("UPDATE companies SET is_verified = %s WHERE id = %s", (verified, company_id))
-            connection.commit()
-            return True
-        except Exception: 
-            return False
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("UPDATE companies SET is_verified = %s WHERE id = %s", (verified, company_id))
+                self.db.commit(connection)
+                self.notify('company', company_id)
+                return True
+            except Exception: 
+                return False
+            finally: 
+                cursor.close()
 
     def add_service_to_catalog(self, catalog_item: CatalogItem):
         """Ajoute une nouvelle offre (prestation) dans le catalogue d'une entreprise."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
-        try:
-            query = """
-                INSERT INTO catalog 
-                (company_id, service_type_id, prix_base, prix_par_unite, unite_nom, description_offre, produits_inclus, duree_estimee)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            valeurs = (
-                catalog_item.company_id, 
-                catalog_item.service_type.id, 
-                catalog_item.prix_base,
-                catalog_item.prix_par_unite, 
-                catalog_item.unite_nom, 
-                catalog_item.description_offre,
-                catalog_item.produits_inclus, 
-                catalog_item.duree_estimee
-            )
-            cursor.execute(query, valeurs)
-            connection.commit()
-            
-            # On sauvegarde l'ID généré
-            catalog_item.id = cursor.lastrowid
-            return True
-            
-        except Exception as erreur:
-            print(f"Erreur d'ajout au catalogue : {erreur}")
-            return False
-            
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            cursor = connection.cursor()
+            try:
+                query = """
+                    INSERT INTO catalog 
+                    (company_id, service_type_id, prix_base, prix_par_unite, unite_nom, description_offre, produits_inclus, duree_estimee, duree_heures)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+                valeurs = (
+                    catalog_item.company_id, 
+                    catalog_item.service_type.id, 
+                    catalog_item.prix_base,
+                    catalog_item.prix_par_unite, 
+                    catalog_item.unite_nom, 
+                    catalog_item.description_offre,
+                    catalog_item.produits_inclus, 
+                    catalog_item.duree_estimee,
+                    catalog_item.duree_heures
+                )
+                cursor.execute(query, valeurs)
+                # On sauvegarde l'ID généré
+                catalog_item.id = cursor.lastrowid
+                # La nouvelle offre reçoit son score de classement avant d'être visible
+                compute_offer_scores(cursor, [catalog_item.company_id], self.get_average_prices())
+                self.db.commit(connection)
+                
+                self.notify('company', catalog_item.company_id)
+                return True
+                
+            except Exception as erreur:
+                print(f"Erreur d'ajout au catalogue : {erreur}")
+                return False
+                
+            finally: 
+                cursor.close()
 
     def remove_from_catalog(self, catalog_id):
         """Supprime une offre du catalogue."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
-        try:
-            cursor.execute("DELETE FROM catalog WHERE id = %s", (catalog_id,))
-            connection.commit()
-            return True
-        except Exception: 
-            return False
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("DELETE FROM catalog WHERE id = %s", (catalog_id,))
+                self.db.commit(connection)
+                self.notify('catalog', catalog_id)
+                return True
+            except Exception: 
+                return False
+            finally: 
+                cursor.close()
 
     def get_all_companies(self, ville_filter=None):
         """
         Récupère toutes les entreprises VÉRIFIÉES ayant un abonnement ACTIF.
         (C'est ce que les clients voient).
         """
-        connection = self.db.get_connection()
-        if not connection: 
-            return []
-            
-        cursor = connection.cursor(dictionary=True)
-        try:
-            # On utilise un LEFT JOIN pour combiner la table companies avec la table subscription_plans
-            # Cela permet de récupérer le nom du plan (ex: "Premium") en une seule requête.
-            sql = """
-                SELECT c.*, sp.nom as plan_nom, sp.prix_mensuel 
-                FROM companies c 
-                LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
-                WHERE c.is_verified = TRUE AND c.subscription_expires_at >= CURDATE()
-            """
-            params = []
-            
-            # Filtre optionnel par ville
-            if ville_filter is not None:
-                sql = sql + " AND c.ville = %s"
-                params.append(ville_filter)
+        with self.db.borrow() as connection:
+            if not connection: 
+                return []
                 
-            cursor.execute(sql, tuple(params))
-            
-            # On transforme chaque ligne retournée par la base de données en objet Company (via _map_company)
-            lignes = cursor.fetchall()
-            entreprises = []
-            for ligne_db in lignes:
-                entreprise_obj = self._map_company(ligne_db)
-                entreprises.append(entreprise_obj)
+            cursor = connection.cursor(dictionary=True)
+            try:
+                # On utilise un LEFT JOIN pour combiner la table companies avec la table subscription_plans
+                # Cela permet de récupérer le nom du plan (ex: "Premium") en une seule requête.
+                sql = """
+                    SELECT c.*, sp.nom as plan_nom, sp.prix_mensuel 
+                    FROM companies c 
+                    LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+                    WHERE c.is_verified = TRUE AND c.subscription_expires_at >= CURDATE()
+                """
+                params = []
                 
-            return entreprises
-            
-        finally: 
-            cursor.close()
+                # Filtre optionnel par ville
+                if ville_filter is not None:
+                    sql = sql + " AND c.ville = %s"
+                    params.append(ville_filter)
+                    
+                cursor.execute(sql, tuple(params))
+                
+                # On transforme chaque ligne retournée par la base de données en objet Company (via _map_company)
+                lignes = cursor.fetchall()
+                entreprises = []
+                for ligne_db in lignes:
+                    entreprise_obj = self._map_company(ligne_db)
+                    entreprises.append(entreprise_obj)
+                    
+                return entreprises
+                
+            finally: 
+                cursor.close()
 
     def get_all_companies_admin(self):
         """L'Administrateur peut voir TOUTES les entreprises (même non vérifiées ou expirées)."""
-        connection = self.db.get_connection()
-        if not connection: return []
-        cursor = connection.cursor(dictionary=True)
-        try:
-            sql = """
-                SELECT c.*, sp.nom as plan_nom, sp.prix_mensuel, u.email as user_email
-                FROM companies c
-                LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
-                LEFT JOIN users u ON c.user_id = u.id
-                ORDER BY c.id
-            """
-            cursor.execute(sql)
-            return cursor.fetchall()  # On renvoie directement les dictionnaires pour l'admin
-        finally: 
-            cursor.close()
-
-    def get_companies_by_service(self, service_type_id):
-        """Trouve les entreprises proposant un type de service précis."""
-        connection = self.db.get_connection()
-        if not connection: return []
-        cursor = connection.cursor(dictionary=True)
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = """
+                    SELECT c.*, sp.nom as plan_nom, sp.prix_mensuel, u.email as user_email
+                    FROM companies c
+                    LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+                    LEFT JOIN users u ON c.user_id = u.id
+                    ORDER BY c.id
+                """
+                cursor.execute(sql)
+                return cursor.fetchall()  # On renvoie directement les dictionnaires pour l'admin
+            finally: 
+                cursor.close()
+
+    def get_expired_company_ids(self, after_id, limit):
+        """
+        IDs des entreprises dont l'abonnement est dépassé mais pas encore marqué 'is_expired',
+        à partir de after_id (exclu), dans l'ordre, au plus 'limit' (balayage par lots).
+        """
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""
+                    SELECT id FROM companies
+                    WHERE id > %s AND is_expired = FALSE AND subscription_expires_at < CURDATE()
+                    ORDER BY id LIMIT %s
+                """, (after_id, limit))
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    def flag_expired_companies(self, company_ids):
+        """
+        Marque plusieurs entreprises comme expirées en UNE requête.
+        La condition est revérifiée dans l'UPDATE (un renouvellement entre-temps n'est pas écrasé).
+        Retourne le nombre d'entreprises marquées, ou None en cas d'erreur.
+        """
+        if not company_ids:
+            return 0
+        with self.db.borrow() as connection:
+            if not connection: return None
+            cursor = connection.cursor()
+            try:
+                marqueurs = ", ".join(["%s"] * len(company_ids))
+                cursor.execute(f"""
+                    UPDATE companies SET is_expired = TRUE
+                    WHERE id IN ({marqueurs}) AND is_expired = FALSE AND subscription_expires_at < CURDATE()
+                """, tuple(company_ids))
+                self.db.commit(connection)
+                return cursor.rowcount
+            except Exception as erreur:
+                print(f"Erreur lors du marquage des abonnements expirés : {erreur}")
+                return None
+            finally:
+                cursor.close()
+
+    def get_company_ids(self, after_id, limit):
+        """IDs des entreprises à partir de after_id (exclu), dans l'ordre, au plus 'limit' (balayage par lots)."""
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT id FROM companies WHERE id > %s ORDER BY id LIMIT %s", (after_id, limit))
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+    def refresh_scores(self, company_ids=None):
+        """
+        Recalcule le score de classement des offres de ces entreprises (de tout le catalogue si None),
+        après un avis, une intervention terminée / refusée / annulée ou un changement d'abonnement.
+        Appelée dans une transaction en cours, elle la rejoint (le score change en même temps que la donnée).
+        Pour quelques entreprises, les prix moyens viennent du cache (get_average_prices) ;
+        un recalcul complet les relit (et rafraîchit le cache).
+        Retourne le nombre d'offres mises à jour, ou None en cas d'erreur.
+        Dans une transaction en cours, l'erreur est relancée : la donnée ne doit pas être validée avec un score faux.
+        """
+        if company_ids is None:
+            self.get_average_prices.invalidate()
+        jointe = self.db.in_transaction
         try:
-            # On doit faire la jointure entre companies, le catalogue (pour savoir si elles l'offrent), et les abonnements.
-            sql = """
-                SELECT c.*, cat.id as catalog_id, cat.prix_base, cat.prix_par_unite, cat.unite_nom,
-                       cat.description_offre, cat.produits_inclus, cat.duree_estimee,
-                       sp.nom as plan_nom,
-                       c.horaire_debut, c.horaire_fin, c.jours_travail
-                FROM companies c
-                JOIN catalog cat ON c.id = cat.company_id
-                LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
-                WHERE cat.service_type_id = %s 
-                  AND c.is_verified = TRUE 
-                  AND c.subscription_expires_at >= CURDATE()
-            """
-            cursor.execute(sql, (service_type_id,))
-            return cursor.fetchall()
-        finally: 
-            cursor.close()
+            prix_moyens = self.get_average_prices()
+            with self.db.transaction() as connection:
+                if not connection: return None
+                cursor = connection.cursor()
+                try:
+                    nombre = compute_offer_scores(cursor, company_ids, prix_moyens)
+                finally:
+                    cursor.close()
+        except Exception as erreur:
+            print(f"Erreur lors du calcul des scores de classement : {erreur}")
+            if jointe:
+                # L'appelant (update_status, transition_bookings, add_review...) annule toute son unité de travail
+                raise
+            return None
+
+        if company_ids is None:
+            self.notify('all')
+        else:
+            for company_id in dict.fromkeys(company_ids):
+                self.notify('company', company_id)
+        return nombre
+
+    @cached(ttl=600, maxsize=1)
+    def get_average_prices(self):
+        """
+        Prix de base moyen de chaque type de service {service_type_id: prix moyen} (pour le score de classement).
+        Toute la table est lue : le résultat est gardé 10 minutes (une offre de plus ou de moins ne le change presque pas).
+        """
+        with self.db.borrow() as connection:
+            if not connection: return {}
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT service_type_id, AVG(prix_base) FROM catalog GROUP BY service_type_id")
+                return dict(cursor.fetchall())
+            finally:
+                cursor.close()
+
+    def get_companies_by_service(self, service_type_id, ville=None, limit=None):
+        """
+        Trouve les entreprises proposant un type de service précis (filtre optionnel par ville),
+        de la mieux classée à la moins bien classée (catalog.score), au plus 'limit' si demandé.
+        L'index (service_type_id, score) donne les offres déjà dans l'ordre : avec LIMIT, la base
+        s'arrête aux k premières au lieu de tout lire puis trier.
+        """
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor(dictionary=True)
+            try:
+                # On doit faire la jointure entre companies, le catalogue (pour savoir si elles l'offrent), et les abonnements.
+                sql = f"""
+                    SELECT c.*, cat.id as catalog_id, cat.prix_base, cat.prix_par_unite, cat.unite_nom,
+                           cat.description_offre, cat.produits_inclus, cat.duree_estimee, cat.duree_heures, cat.score,
+                           sp.nom as plan_nom,
+                           c.horaire_debut, c.horaire_fin, c.jours_travail,
+                           {COLONNES_NOTES_CARTE}
+                    FROM companies c
+                    JOIN catalog cat ON c.id = cat.company_id
+                    LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+                    {JOINTURES_NOTES}
+                    WHERE cat.service_type_id = %s 
+                      AND c.is_verified = TRUE 
+                      AND c.subscription_expires_at >= CURDATE()
+                """
+                params = [service_type_id]
+                if ville:
+                    sql = sql + " AND c.ville = %s"
+                    params.append(ville)
+                # À score égal, la plus récente d'abord (même sens que le score : l'index se lit à l'envers, sans tri)
+                sql = sql + " ORDER BY cat.score DESC, cat.id DESC"
+                if limit:
+                    sql = sql + " LIMIT %s"
+                    params.append(limit)
+                cursor.execute(sql, tuple(params))
+                return cursor.fetchall()
+            finally: 
+                cursor.close()
+
+    def get_catalog_index_rows(self, company_id=None, catalog_id=None):
+        """
+        Lignes de l'index du catalogue en mémoire : une par offre, avec les mêmes colonnes que
+        get_companies_by_service (plus cat.service_type_id et le nom du service), SANS filtre de visibilité
+        (c'est l'index qui vérifie la validation et l'abonnement au moment de la recherche).
+        Filtre optionnel sur une entreprise ou une offre. Retourne None si la base est injoignable.
+        """
+        with self.db.borrow() as connection:
+            if not connection: return None
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = f"""
+                    SELECT c.*, cat.id as catalog_id, cat.service_type_id, cat.prix_base, cat.prix_par_unite, cat.unite_nom,
+                           cat.description_offre, cat.produits_inclus, cat.duree_estimee, cat.duree_heures, cat.score,
+                           sp.nom as plan_nom, s.nom_service, {COLONNES_NOTES_CARTE}
+                    FROM companies c
+                    JOIN catalog cat ON c.id = cat.company_id
+                    JOIN service_types s ON cat.service_type_id = s.id
+                    LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+                    {JOINTURES_NOTES}
+                """
+                params = []
+                if company_id is not None:
+                    sql = sql + " WHERE c.id = %s"
+                    params.append(company_id)
+                elif catalog_id is not None:
+                    sql = sql + " WHERE cat.id = %s"
+                    params.append(catalog_id)
+                cursor.execute(sql, tuple(params))
+                return cursor.fetchall()
+            except Exception as erreur:
+                print(f"Erreur lors du chargement du catalogue : {erreur}")
+                return None
+            finally:
+                cursor.close()
 
     def get_catalog(self, company_id):
         """Récupère toutes les offres du catalogue d'une entreprise spécifique."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor(dictionary=True)
-        try:
-            sql = """
-                SELECT c.*, s.nom_service, s.description as type_desc, s.category
-                FROM catalog c 
-                JOIN service_types s ON c.service_type_id = s.id
-                WHERE c.company_id = %s
-            """
-            cursor.execute(sql, (company_id,))
-            
-            liste_offres = []
-            for row in cursor.fetchall():
-                # On recrée d'abord l'objet ServiceType
-                st = ServiceType(
-                    id=row['service_type_id'], 
-                    nom_service=row['nom_service'], 
-                    description=row['type_desc'], 
-                    category=row.get('category')
-                )
+        with self.db.borrow() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = """
+                    SELECT c.*, s.nom_service, s.description as type_desc, s.category
+                    FROM catalog c 
+                    JOIN service_types s ON c.service_type_id = s.id
+                    WHERE c.company_id = %s
+                """
+                cursor.execute(sql, (company_id,))
                 
-                # Puis on recrée l'objet CatalogItem qui contient notre ServiceType
-                item = CatalogItem(
-                    id=row['id'], 
-                    company_id=row['company_id'], 
-                    service_type=st,
-                    prix_base=row['prix_base'], 
-                    prix_par_unite=row['prix_par_unite'],
-                    unite_nom=row['unite_nom'], 
-                    description_offre=row['description_offre'],
-                    produits_inclus=row.get('produits_inclus'), 
-                    duree_estimee=row.get('duree_estimee')
-                )
-                liste_offres.append(item)
+                liste_offres = []
+                for row in cursor.fetchall():
+                    # On recrée d'abord l'objet ServiceType
+                    st = ServiceType(
+                        id=row['service_type_id'], 
+                        nom_service=row['nom_service'], 
+                        description=row['type_desc'], 
+                        category=row.get('category')
+                    )
+                    
+                    # Puis on recrée l'objet CatalogItem qui contient notre ServiceType
+                    item = CatalogItem(
+                        id=row['id'], 
+                        company_id=row['company_id'], 
+                        service_type=st,
+                        prix_base=row['prix_base'], 
+                        prix_par_unite=row['prix_par_unite'],
+                        unite_nom=row['unite_nom'], 
+                        description_offre=row['description_offre'],
+                        produits_inclus=row.get('produits_inclus'), 
+                        duree_estimee=row.get('duree_estimee'),
+                        duree_heures=row.get('duree_heures'),
+                        score=row.get('score') or 0.0
+                    )
+                    liste_offres.append(item)
+                    
+                return liste_offres
                 
-            return liste_offres
-            
-        finally: 
-            cursor.close()
+            finally: 
+                cursor.close()
 
     def get_company_by_user_id(self, user_id):
         """Récupère le profil entreprise complet via l'ID de l'utilisateur."""
-        connection = self.db.get_connection()
-        if not connection: return None
-        cursor = connection.cursor(dictionary=True)
-        try:
-            sql = """
-                SELECT c.*, sp.nom as plan_nom, sp.has_scheduling, sp.has_analytics, sp.has_priority_support, sp.max_services
-                FROM companies c
-                LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
-                WHERE c.user_id = %s
-            """
-            cursor.execute(sql, (user_id,))
-            row = cursor.fetchone()
-            
-            if row: 
-                # On convertit le résultat de la BD en objet métier
-                return self._map_company(row)
+        with self.db.borrow() as connection:
+            if not connection: return None
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = """
+                    SELECT c.*, sp.nom as plan_nom, sp.has_scheduling, sp.has_analytics, sp.has_priority_support, sp.max_services
+                    FROM companies c
+                    LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+                    WHERE c.user_id = %s
+                """
+                cursor.execute(sql, (user_id,))
+                row = cursor.fetchone()
                 
-            return None
-        finally: 
-            cursor.close()
+                if row: 
+                    # On convertit le résultat de la BD en objet métier
+                    return self._map_company(row)
+                    
+                return None
+            finally: 
+                cursor.close()
 
+    @cached(ttl=600, maxsize=4)
     def get_service_types(self):
-        """Récupère toutes les catégories de services disponibles globalement."""
-        connection = self.db.get_connection()
-        if not connection: return []
-        cursor = connection.cursor(dictionary=True)
-        try:
-            cursor.execute("SELECT * FROM service_types ORDER BY category, nom_service")
-            
-            liste_services = []
-            for r in cursor.fetchall():
-                service = ServiceType(
-                    id=r['id'], 
-                    nom_service=r['nom_service'], 
-                    description=r['description'], 
-                    category=r.get('category')
-                )
-                liste_services.append(service)
+        """
+        Récupère toutes les catégories de services disponibles globalement.
+        Gardées en cache 10 minutes : seul add_service_type les modifie (et vide ce cache).
+        """
+        with self.db.borrow() as connection:
+            if not connection: return []
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute("SELECT * FROM service_types ORDER BY category, nom_service")
                 
-            return liste_services
-        finally: 
-            cursor.close()
+                liste_services = []
+                for r in cursor.fetchall():
+                    service = ServiceType(
+                        id=r['id'], 
+                        nom_service=r['nom_service'], 
+                        description=r['description'], 
+                        category=r.get('category')
+                    )
+                    liste_services.append(service)
+                    
+                return liste_services
+            finally: 
+                cursor.close()
 
     def add_service_type(self, nom, description, category):
         """Permet à l'Admin d'ajouter une nouvelle catégorie de service globale."""
-        connection = self.db.get_connection()
-        cursor = connection.cursor()
-        try:
-            cursor.execute("INSERT INTO service_types (nom_service, description, category) VALUES (%s, %s, %s)", (nom, description, category))
-            connection.commit()
-            return cursor.lastrowid
-        except Exception as e:
-            print(f"Erreur lors de l'ajout d'une catégorie : {e}")
-            return None
-        finally: 
-            cursor.close()
+        with self.db.borrow() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("INSERT INTO service_types (nom_service, description, category) VALUES (%s, %s, %s)", (nom, description, category))
+                self.db.commit(connection)
+                self.get_service_types.invalidate()
+                self.notify('service_types')
+                return cursor.lastrowid
+            except Exception as e:
+                print(f"Erreur lors de l'ajout d'une catégorie : {e}")
+                return None
+            finally: 
+                cursor.close()
 
     def _map_company(self, row):
         """
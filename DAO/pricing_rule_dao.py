@@ -0,0 +1,131 @@
+from Config.database import DatabaseConnection
+
+"""
+PricingRuleDAO (Data Access Object pour les Règles de Prix).
+Les règles de prix (ex: "Rabat : TVA 20 %", "Casablanca : +50 DH de déplacement") ne sont plus
+écrites en dur dans le code : ce sont des lignes de la table 'pricing_rules', modifiables sans
+redémarrer l'application (voir services/pricing_strategy.py : PricingRulesEngine).
+Une règle s'applique si TOUS ses critères renseignés correspondent au devis (un critère vide = tous) :
+  - ville (sans tenir compte des majuscules ni des espaces autour), catégorie de service (service_types.category),
+    quantité minimum, période (date_debut / date_fin) ;
+et donne le prix final : prix de base x multiplicateur + supplément.
+"""
+
+# Colonnes d'une règle, dans l'ordre des INSERT
+COLONNES_REGLE = ("nom", "ville", "category", "quantite_min", "date_debut", "date_fin",
+                  "multiplicateur", "supplement", "priorite", "is_active")
+
+# Les deux anciennes stratégies écrites en dur, devenues des règles (mêmes prix, mêmes libellés).
+# Elles sont insérées par les migrations, et servent aussi tant que la table est illisible.
+# La ville d'une règle est comparée comme avant (sans majuscules ni espaces autour, orthographe exacte) :
+# l'ancienne stratégie de Casablanca acceptait aussi "casa", d'où sa deuxième ligne.
+REGLES_PAR_DEFAUT = (
+    {'id': 0, 'nom': "Tarif Rabat (TVA 20% incluse)", 'ville': "Rabat", 'category': None, 'quantite_min': 1,
+     'date_debut': None, 'date_fin': None, 'multiplicateur': 1.20, 'supplement': 0.0, 'priorite': 0, 'is_active': True},
+    {'id': 0, 'nom': "Tarif Casa (+50 DH Déplacement)", 'ville': "Casablanca", 'category': None, 'quantite_min': 1,
+     'date_debut': None, 'date_fin': None, 'multiplicateur': 1.0, 'supplement': 50.0, 'priorite': 0, 'is_active': True},
+    {'id': 0, 'nom': "Tarif Casa (+50 DH Déplacement)", 'ville': "casa", 'category': None, 'quantite_min': 1,
+     'date_debut': None, 'date_fin': None, 'multiplicateur': 1.0, 'supplement': 50.0, 'priorite': 0, 'is_active': True},
+)
+
+
+INSERT_REGLE = f"INSERT INTO pricing_rules ({', '.join(COLONNES_REGLE)}) VALUES ({', '.join(['%s'] * len(COLONNES_REGLE))})"
+
+
+def insert_rules(cursor, regles):
+    """Insère des règles (dictionnaires avec les clés de COLONNES_REGLE). Sert aussi à la migration."""
+    cursor.executemany(INSERT_REGLE, [tuple(regle[c] for c in COLONNES_REGLE) for regle in regles])
+
+
+class PricingRuleDAO:
+    # Fonctions prévenues après chaque modification des règles (ex: le moteur de prix, qui se recompile)
+    _listeners = []
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+
+    @classmethod
+    def add_listener(cls, callback):
+        """Enregistre une fonction callback() appelée après chaque ajout / modification / suppression de règle."""
+        if callback not in cls._listeners:
+            cls._listeners.append(callback)
+
+    @classmethod
+    def notify(cls):
+        # Après le COMMIT si on est dans une transaction (voir DatabaseConnection.after_commit)
+        DatabaseConnection().after_commit(cls._prevenir)
+
+    @classmethod
+    def _prevenir(cls):
+        for callback in list(cls._listeners):
+            try:
+                callback()
+            except Exception as erreur:
+                print(f"Erreur lors de la mise à jour des règles de prix : {erreur}")
+
+    def get_rules(self, active_only=True):
+        """
+        Toutes les règles de prix (par défaut, seulement les actives), dans l'ordre des IDs.
+        Retourne None si la base est injoignable ou la table absente (le moteur garde alors ses règles).
+        """
+        with self.db.borrow() as connection:
+            if not connection: return None
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = f"SELECT id, {', '.join(COLONNES_REGLE)} FROM pricing_rules"
+                if active_only:
+                    sql = sql + " WHERE is_active = TRUE"
+                cursor.execute(sql + " ORDER BY id")
+                return cursor.fetchall()
+            except Exception as erreur:
+                print(f"Erreur lors de la lecture des règles de prix : {erreur}")
+                return None
+            finally:
+                cursor.close()
+
+    def add_rule(self, nom, multiplicateur=1.0, supplement=0.0, ville=None, category=None, quantite_min=1,
+                 date_debut=None, date_fin=None, priorite=0):
+        """Ajoute une règle de prix active. Retourne son ID, ou None en cas d'erreur."""
+        regle = {'nom': nom, 'ville': ville or None, 'category': category or None, 'quantite_min': quantite_min or 1,
+                 'date_debut': date_debut or None, 'date_fin': date_fin or None, 'multiplicateur': multiplicateur,
+                 'supplement': supplement, 'priorite': priorite, 'is_active': True}
+        try:
+            with self.db.transaction() as connection:
+                if not connection: return None
+                cursor = connection.cursor()
+                try:
+                    # execute (et pas executemany) : lastrowid n'est garanti qu'après un INSERT simple
+                    cursor.execute(INSERT_REGLE, tuple(regle[c] for c in COLONNES_REGLE))
+                    rule_id = cursor.lastrowid
+                finally:
+                    cursor.close()
+        except Exception as erreur:
+            print(f"Erreur lors de l'ajout de la règle de prix : {erreur}")
+            return None
+        self.notify()
+        return rule_id
+
+    def set_rule_active(self, rule_id, actif):
+        """Active ou désactive une règle (sans la supprimer). Retourne True si la règle existe."""
+        return self._modifier("UPDATE pricing_rules SET is_active = %s WHERE id = %s", (bool(actif), rule_id))
+
+    def delete_rule(self, rule_id):
+        """Supprime définitivement une règle. Retourne True si la règle existait."""
+        return self._modifier("DELETE FROM pricing_rules WHERE id = %s", (rule_id,))
+
+    def _modifier(self, sql, params):
+        try:
+            with self.db.transaction() as connection:
+                if not connection: return False
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(sql, params)
+                    trouvee = cursor.rowcount > 0
+                finally:
+                    cursor.close()
+        except Exception as erreur:
+            print(f"Erreur lors de la modification de la règle de prix : {erreur}")
+            return False
+        if trouvee:
+            self.notify()
+        return trouvee
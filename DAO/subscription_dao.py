@@ -1,5 +1,7 @@
 from Config.database import DatabaseConnection
+from DAO.company_dao import CompanyDAO, compute_offer_scores
 from models.company import SubscriptionPlan
+from utils.cache import cached
 
 """
 SubscriptionDAO (Data Access Object pour les Abonnements).
@@ -11,74 +13,82 @@ class SubscriptionDAO:
         # Initialisation de la connexion à la base de données
         self.db = DatabaseConnection()
 
+    @cached(ttl=600, maxsize=4)
     def get_all_plans(self):
-        """Récupère tous les forfaits d'abonnement disponibles, triés par prix croissant."""
-        connection = self.db.get_connection()
-        if not connection: 
-            return []
-            
-        cursor = connection.cursor(dictionary=True)
-        try:
-            cursor.execute("SELECT * FROM subscription_plans ORDER BY prix_mensuel ASC")
-            
-            # On transforme chaque ligne de résultat (Dictionnaire) en un objet Python "SubscriptionPlan"
-            lignes = cursor.fetchall()
-            liste_plans = []
-            for ligne_db in lignes:
-                plan_obj = self._map_plan(ligne_db)
-                liste_plans.append(plan_obj)
+        """Récupère tous les forfaits d'abonnement disponibles, triés par prix croissant (en cache 10 minutes)."""
+        with self.db.borrow() as connection:
+            if not connection: 
+                return []
                 
-            return liste_plans
-            
-        finally:
-            cursor.close()
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute("SELECT * FROM subscription_plans ORDER BY prix_mensuel ASC")
+                
+                # On transforme chaque ligne de résultat (Dictionnaire) en un objet Python "SubscriptionPlan"
+                lignes = cursor.fetchall()
+                liste_plans = []
+                for ligne_db in lignes:
+                    plan_obj = self._map_plan(ligne_db)
+                    liste_plans.append(plan_obj)
+                    
+                return liste_plans
+                
+            finally:
+                cursor.close()
 
+    @cached(ttl=600, maxsize=32)
     def get_plan_by_id(self, plan_id):
-        """Récupère un forfait spécifique en utilisant son ID."""
-        connection = self.db.get_connection()
-        if not connection: 
-            return None
-            
-        cursor = connection.cursor(dictionary=True)
-        try:
-            cursor.execute("SELECT * FROM subscription_plans WHERE id = %s", (plan_id,))
-            row = cursor.fetchone()
-            
-            # Si on a trouvé le plan, on le transforme en objet, sinon on renvoie None
-            if row is not None:
-                return self._map_plan(row)
-            else:
+        """Récupère un forfait spécifique en utilisant son ID (en cache 10 minutes, un résultat par forfait)."""
+        with self.db.borrow() as connection:
+            if not connection: 
                 return None
                 
-        finally:
-            cursor.close()
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute("SELECT * FROM subscription_plans WHERE id = %s", (plan_id,))
+                row = cursor.fetchone()
+                
+                # Si on a trouvé le plan, on le transforme en objet, sinon on renvoie None
+                if row is not None:
+                    return self._map_plan(row)
+                else:
+                    return None
+                    
+            finally:
+                cursor.close()
 
     def subscribe_company(self, company_id, plan_id, duree_jours=30):
         """Met à jour l'abonnement d'une entreprise."""
-        connection = self.db.get_connection()
-        if not connection: 
-            return False
-            
-        cursor = connection.cursor()
-        try:
-            # CURDATE() = Aujourd'hui. DATE_ADD(...) = Aujourd'hui + duree_jours
-            sql = """
-                UPDATE companies 
-                SET subscription_plan_id = %s, 
-                    subscription_start = CURDATE(),
-                    subscription_expires_at = DATE_ADD(CURDATE(), INTERVAL %s DAY)
-                WHERE id = %s
-            """
-            cursor.execute(sql, (plan_id, duree_jours, company_id))
-            connection.commit()
-            return True
-            
-        except Exception as erreur:
-            print(f"Erreur lors de l'abonnement : {erreur}")
-            return False
-            
-        finally:
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: 
+                return False
+                
+            cursor = connection.cursor()
+            try:
+                # CURDATE() = Aujourd'hui. DATE_ADD(...) = Aujourd'hui + duree_jours
+                sql = """
+                    UPDATE companies 
+                    SET subscription_plan_id = %s, 
+                        subscription_start = CURDATE(),
+                        subscription_expires_at = DATE_ADD(CURDATE(), INTERVAL %s DAY),
+                        is_expired = FALSE
+                    WHERE id = %s
+                """
+                cursor.execute(sql, (plan_id, duree_jours, company_id))
+                # Le forfait compte dans le score de classement des offres : recalculé dans le même COMMIT
+                compute_offer_scores(cursor, [company_id], CompanyDAO().get_average_prices())
+                self.db.commit(connection)
+                # Plan, date d'expiration et scores changent ce que les clients voient de l'entreprise
+                CompanyDAO.notify('company', company_id)
+                # Rien à oublier dans le cache des forfaits : seule la table companies a été modifiée
+                return True
+                
+            except Exception as erreur:
+                print(f"Erreur lors de l'abonnement : {erreur}")
+                return False
+                
+            finally:
+                cursor.close()
 
     def get_subscription_revenue(self):
         """
@@ -86,27 +96,27 @@ class SubscriptionDAO:
         Utilise COUNT pour compter les abonnés, et SUM pour additionner les prix.
         Le GROUP BY permet d'avoir le total PAR type de forfait (ex: Basic, Pro, Premium).
         """
-        connection = self.db.get_connection()
-        if not connection: 
-            return {}
-            
-        cursor = connection.cursor(dictionary=True)
-        try:
-            sql = """
-                SELECT 
-                    COUNT(c.id) as nb_abonnes,
-                    COALESCE(SUM(sp.prix_mensuel), 0) as revenu_mensuel,
-                    sp.nom as plan_nom
-                FROM companies c
-                JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
-                WHERE c.subscription_expires_at >= CURDATE()
-                GROUP BY sp.id, sp.nom
-            """
-            cursor.execute(sql)
-            return cursor.fetchall()
-            
-        finally:
-            cursor.close()
+        with self.db.borrow() as connection:
+            if not connection: 
+                return {}
+                
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sql = """
+                    SELECT 
+                        COUNT(c.id) as nb_abonnes,
+                        COALESCE(SUM(sp.prix_mensuel), 0) as revenu_mensuel,
+                        sp.nom as plan_nom
+                    FROM companies c
+                    JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+                    WHERE c.subscription_expires_at >= CURDATE()
+                    GROUP BY sp.id, sp.nom
+                """
+                cursor.execute(sql)
+                return cursor.fetchall()
+                
+            finally:
+                cursor.close()
 
     def _map_plan(self, row):
         """Méthode utilitaire interne pour transformer un dictionnaire MySQL en objet Python."""
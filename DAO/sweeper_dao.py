@@ -0,0 +1,44 @@
+from Config.database import DatabaseConnection
+
+"""
+SweeperDAO : progression des tâches de nettoyage en arrière-plan (table sweeper_progress).
+Chaque tâche ("job") mémorise le dernier ID traité : si le programme s'arrête au milieu
+d'un balayage, le suivant reprend juste après au lieu de tout recommencer.
+"""
+
+class SweeperDAO:
+    def __init__(self):
+        self.db = DatabaseConnection()
+
+    def get_progress(self, job):
+        """Renvoie la progression d'une tâche {'last_id', 'rows_total', 'passes', ...} ou None."""
+        with self.db.borrow() as connection:
+            if not connection: return None
+            cursor = connection.cursor(dictionary=True)
+            try:
+                cursor.execute("SELECT * FROM sweeper_progress WHERE job = %s", (job,))
+                return cursor.fetchone()
+            finally:
+                cursor.close()
+
+    def save_progress(self, job, last_id, rows, pass_done=False):
+        """
+        Enregistre le dernier ID traité et ajoute 'rows' au total.
+        pass_done=True : le balayage est arrivé au bout de la table, le prochain repartira de 0.
+        """
+        with self.db.borrow() as connection:
+            if not connection: return False
+            cursor = connection.cursor()
+            try:
+                cursor.execute("""
+                    UPDATE sweeper_progress
+                    SET last_id = %s, rows_total = rows_total + %s, passes = passes + %s, updated_at = NOW()
+                    WHERE job = %s
+                """, (0 if pass_done else last_id, rows, 1 if pass_done else 0, job))
+                self.db.commit(connection)
+                return cursor.rowcount > 0
+            except Exception as erreur:
+                print(f"Erreur lors de l'enregistrement de la progression ({job}) : {erreur}")
+                return False
+            finally:
+                cursor.close()
@@ -0,0 +1,120 @@
+import sys
+import time
+import random
+import asyncio
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from Config.database import DatabaseConnection
+from Config.async_database import AsyncDatabaseConnection
+from Config.settings import Config
+from DAO.user_dao import UserDAO
+from DAO.company_dao import CompanyDAO
+from DAO.booking_dao import BookingDAO
+from DAO.subscription_dao import SubscriptionDAO
+from DAO.async_user_dao import AsyncUserDAO
+from DAO.async_company_dao import AsyncCompanyDAO
+from DAO.async_booking_dao import AsyncBookingDAO
+from services.dashboard_service import AsyncDashboardService
+
+"""
+Benchmark : DAOs synchrones vs DAOs asyncio avec N utilisateurs simulés en parallèle.
+Chaque utilisateur simulé fait un parcours de lecture typique :
+  find_by_login -> get_companies_by_service -> get_booked_slots (sur 3 dates)
+On compare :
+  1. sync séquentiel (un utilisateur après l'autre, la situation actuelle de la CLI)
+  2. sync + threads (ThreadPoolExecutor, pool de connexions borné)
+  3. asyncio (une tâche par utilisateur, pool aiomysql de même taille)
+Et, pour le dashboard admin : les 3 requêtes en séquence vs asyncio.gather.
+
+Lancement : python3 -m benchmarks.async_vs_sync [nb_utilisateurs] [taille_pool]
+"""
+
+
+def parcours_sync(user_dao, company_dao, booking_dao, login, service_id, jours):
+    user_dao.find_by_login(login)
+    offres = company_dao.get_companies_by_service(service_id)
+    for offre in offres[:1]:
+        for jour in jours:
+            booking_dao.get_booked_slots(offre['id'], jour)
+
+
+async def parcours_async(user_dao, company_dao, booking_dao, login, service_id, jours):
+    await user_dao.find_by_login(login)
+    offres = await company_dao.get_companies_by_service(service_id)
+    for offre in offres[:1]:
+        # Les 3 dates sont indépendantes : on les interroge en parallèle
+        await asyncio.gather(*(booking_dao.get_booked_slots(offre['id'], jour) for jour in jours))
+
+
+def preparer_scenarios(nb_users):
+    """Tire au hasard un (login, service) par utilisateur simulé à partir des données existantes."""
+    users = UserDAO().get_all_users()
+    services = CompanyDAO().get_service_types()
+    if not users or not services:
+        print("Base vide : lancez d'abord python3 -m utils.seed_data")
+        sys.exit(1)
+    return [(random.choice(users)['email'], random.choice(services).id) for _ in range(nb_users)]
+
+
+async def bench_async(scenarios, jours, taille_pool):
+    db = AsyncDatabaseConnection()
+    await db.connect(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME, minsize=1, maxsize=taille_pool)
+    user_dao, company_dao, booking_dao = AsyncUserDAO(), AsyncCompanyDAO(), AsyncBookingDAO()
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(parcours_async(user_dao, company_dao, booking_dao, login, sid, jours) for login, sid in scenarios))
+    duree_parcours = time.perf_counter() - debut
+
+    dashboard = AsyncDashboardService()
+    debut = time.perf_counter()
+    await dashboard.get_dashboard_data()
+    duree_dashboard = time.perf_counter() - debut
+
+    await db.close()
+    return duree_parcours, duree_dashboard
+
+
+def main():
+    nb_users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    taille_pool = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    db = DatabaseConnection()
+    db.connect(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME, pool_min=1, pool_max=taille_pool)
+    user_dao, company_dao, booking_dao = UserDAO(), CompanyDAO(), BookingDAO()
+
+    scenarios = preparer_scenarios(nb_users)
+    jours = [(date.today() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 4)]
+
+    # 1. Synchrone, un utilisateur après l'autre
+    debut = time.perf_counter()
+    for login, sid in scenarios:
+        parcours_sync(user_dao, company_dao, booking_dao, login, sid, jours)
+    duree_seq = time.perf_counter() - debut
+
+    # 2. Synchrone avec des threads (autant de threads que d'utilisateurs simulés)
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=nb_users) as executor:
+        list(executor.map(lambda s: parcours_sync(user_dao, company_dao, booking_dao, s[0], s[1], jours), scenarios))
+    duree_threads = time.perf_counter() - debut
+
+    # Dashboard synchrone : les 3 requêtes l'une après l'autre
+    debut = time.perf_counter()
+    booking_dao.get_stats()
+    SubscriptionDAO().get_subscription_revenue()
+    user_dao.get_all_users()
+    duree_dashboard_sync = time.perf_counter() - debut
+    db.close()
+
+    # 3. asyncio
+    duree_async, duree_dashboard_async = asyncio.run(bench_async(scenarios, jours, taille_pool))
+
+    print(f"{nb_users} utilisateurs simulés, pool de {taille_pool} connexions")
+    print(f"{'Mode':<22} | {'Durée (s)':>9} | {'Utilisateurs/s':>14}")
+    for nom, duree in (("sync séquentiel", duree_seq), ("sync + threads", duree_threads), ("asyncio", duree_async)):
+        print(f"{nom:<22} | {duree:>9.3f} | {nb_users / duree:>14.1f}")
+    print(f"Dashboard admin : séquentiel {duree_dashboard_sync * 1000:.1f} ms | asyncio.gather {duree_dashboard_async * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import time
+import random
+from datetime import date, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from DAO.booking_dao import SlotAlreadyBookedError
+from services.booking_import_service import BookingImportService
+from services.catalog_service import CatalogService
+
+"""
+Benchmark : import en masse de réservations (JSONL) vs création une par une.
+On génère N lignes (20000 par défaut ; une partie est invalide : JSON, horaires, jour non travaillé, conflit) puis :
+  1. import par lots (BookingImportService : validation groupée + executemany, 1 transaction par lot)
+  2. second passage sur le même fichier (tout doit être "DEJA_IMPORTEE")
+  3. pour comparaison, CatalogService.create_booking_request ligne par ligne sur un échantillon
+
+Lancement : python3 -m benchmarks.bulk_ingestion [nb_lignes] [taille_lot]
+"""
+
+
+def generer_fichier(path, donnees, nb, seed=7):
+    """Écrit nb demandes de réservation ; quelques-unes sont invalides (heure, client, JSON...)."""
+    rng = random.Random(seed)
+    jours = [(date.today() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 91)]
+    offres = donnees['catalog']
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(nb):
+            company_id, service_type_id = offres[rng.randrange(len(offres))][:2]
+            ligne = {
+                'ref': f"BENCH-{i}", 'client_id': rng.choice(donnees['clients']), 'company_id': company_id,
+                'service_type_id': service_type_id, 'quantite': rng.randint(1, 30),
+                'rdv_date': rng.choice(jours), 'rdv_heure': f"{rng.randint(9, 15):02d}:00",
+                'mode_paiement': rng.choice(['ONLINE', 'CASH']), 'description': f"Import {i}",
+            }
+            tirage = rng.random()
+            if tirage < 0.01:
+                f.write("{ceci n'est pas du JSON\n")
+                continue
+            if tirage < 0.02:
+                ligne['rdv_heure'] = "23:00"
+            elif tirage < 0.03:
+                ligne['client_id'] = company_id  # un compte ENTREPRISE, pas un client
+            f.write(json.dumps(ligne) + "\n")
+
+
+def un_par_un(path, nb_max):
+    """Ancien parcours : une réservation = une transaction (et pas de validation groupée)."""
+    catalog_service = CatalogService()
+    nb = 0
+    debut = time.perf_counter()
+    with open(path, encoding='utf-8') as f:
+        for texte in f:
+            if nb >= nb_max:
+                break
+            try:
+                d = json.loads(texte)
+                catalog_service.create_booking_request(d['client_id'], d['company_id'], d['service_type_id'], None, d['quantite'],
+                                                       d['description'], 100, d['rdv_date'], d['rdv_heure'], d['mode_paiement'])
+            except (ValueError, SlotAlreadyBookedError):
+                pass
+            nb += 1
+    return nb / (time.perf_counter() - debut)
+
+
+def main():
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    taille_lot = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    db, path = sqlite_database()
+    donnees = seed_marketplace(nb_companies=300, nb_clients=1000)
+    dossier = os.path.dirname(path)
+    entree = os.path.join(dossier, "reservations.jsonl")
+    generer_fichier(entree, donnees, nb)
+
+    service = BookingImportService()
+    stats = service.import_file(entree, os.path.join(dossier, "resultats.jsonl"), chunk_size=taille_lot)
+    print(f"{nb} lignes, lots de {taille_lot}")
+    print(f"Import par lots          : {stats['duree_s']:6.2f} s | {stats['par_seconde']:8.0f} lignes/s | "
+          f"{stats['importees']} importées, {stats['rejetees']} rejetées")
+
+    stats = BookingImportService().import_file(entree, os.path.join(dossier, "resultats_2.jsonl"), chunk_size=taille_lot)
+    print(f"Second passage (idempot.) : {stats['duree_s']:6.2f} s | {stats['par_seconde']:8.0f} lignes/s | "
+          f"{stats['deja_importees']} déjà importées, {stats['importees']} importées")
+
+    # Même générateur, autre graine : des créneaux en grande partie différents
+    entree_2 = os.path.join(dossier, "reservations_2.jsonl")
+    generer_fichier(entree_2, donnees, 1000, seed=8)
+    print(f"Une par une (échantillon) :        | {un_par_un(entree_2, 1000):8.0f} lignes/s")
+    print(f"Résultats : {dossier}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import sys
+import time
+import random
+
+import numpy as np
+
+from models.company import CatalogItem
+from services.catalog_service import CatalogService
+from services.gazetteer import VILLES_MAROC
+
+"""
+Benchmark : devis en masse (simulations de l'admin, comparaisons d'offres).
+Pour chaque offre x quantité x ville, on compare :
+  1. CatalogService.calculate_price appelé devis par devis (une stratégie par appel)
+  2. CatalogService.quote_matrix : toute la matrice en une fois avec NumPy (une opération par stratégie)
+On vérifie que les deux donnent EXACTEMENT les mêmes prix (au bit près), puis on mesure le débit (devis/s).
+Aucune base de données n'est nécessaire.
+
+Lancement : python3 -m benchmarks.bulk_pricing [nb_offres] [nb_quantites]
+"""
+
+
+def offres_aleatoires(nb, seed=21):
+    rng = random.Random(seed)
+    return [CatalogItem(id=i, company_id=i, prix_base=float(rng.randint(100, 800)), prix_par_unite=rng.choice([0.0, 12.5, 15.0, 37.9, 80.0]))
+            for i in range(nb)]
+
+
+def main():
+    nb_offres = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    nb_quantites = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    service = CatalogService()
+    offres = offres_aleatoires(nb_offres)
+    quantites = list(range(1, nb_quantites + 1))
+    # Toutes les villes de l'annuaire, plus les écritures qui changent de règle ("casa", " RABAT ", ville vide)
+    villes = [v[0] for v in VILLES_MAROC] + ["casa", " RABAT ", "", None]
+    nb_devis = len(offres) * len(quantites) * len(villes)
+
+    debut = time.perf_counter()
+    prix, descriptions = service.quote_matrix(offres, quantites, villes)
+    duree_matrice = time.perf_counter() - debut
+    print(f"{len(offres)} offres x {len(quantites)} quantités x {len(villes)} villes = {nb_devis} devis")
+
+    # Devis un par un (sur une partie des offres si la matrice est très grande)
+    echantillon = offres[:max(1, min(len(offres), 200_000 // (len(quantites) * len(villes))))]
+    debut = time.perf_counter()
+    un_par_un = np.array([[[service.calculate_price(offre, q, ville)[0] for ville in villes] for q in quantites] for offre in echantillon])
+    duree_unitaire = time.perf_counter() - debut
+    identiques = np.array_equal(un_par_un, prix[:len(echantillon)])
+    memes_regles = descriptions == [service.calculate_price(offres[0], 1, ville)[1] for ville in villes]
+
+    print(f"\nPrix identiques au calcul devis par devis ({un_par_un.size} devis comparés) : {'oui' if identiques and memes_regles else 'NON'}")
+    print(f"{'Méthode':<32} | {'devis':>10} | {'durée (s)':>9} | {'devis/s':>12}")
+    print(f"{'calculate_price (un par un)':<32} | {un_par_un.size:>10} | {duree_unitaire:>9.3f} | {un_par_un.size / duree_unitaire:>12,.0f}")
+    print(f"{'quote_matrix (NumPy)':<32} | {nb_devis:>10} | {duree_matrice:>9.3f} | {nb_devis / duree_matrice:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import sys
+import time
+import random
+import statistics
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace, VILLES
+from DAO.company_dao import CompanyDAO
+from DAO.subscription_dao import SubscriptionDAO
+from models.company import CatalogItem, ServiceType
+from services.catalog_index import CatalogIndex, LIMITES_TRANCHES, price_band
+
+"""
+Benchmark : navigation du catalogue (browse_services) avec ~10 000 offres.
+Pour les mêmes recherches (service seul, service + ville, service + ville + tranche de prix), on compare :
+  1. la requête SQL directe (CompanyDAO.get_companies_by_service, jointure à chaque visite)
+  2. l'index en mémoire (CatalogIndex.companies_for_service)
+On vérifie que les deux donnent les mêmes offres, y compris après des écritures
+(ajout / suppression d'offre, changement de ville, dé-validation, abonnement) qui mettent
+l'index à jour sans le recharger. On mesure aussi le chargement initial et le coût d'une mise à jour.
+
+Lancement : python3 -m benchmarks.catalog_browse [nb_offres]
+"""
+
+
+def sql_direct(dao, service_type_id, ville=None, tranche=None):
+    lignes = dao.get_companies_by_service(service_type_id, ville)
+    if tranche is not None:
+        lignes = [l for l in lignes if price_band(l['prix_base']) == tranche]
+    return lignes
+
+
+def memes_offres(dao, index, recherches):
+    """Vrai si l'index et le SQL renvoient exactement les mêmes offres pour chaque recherche."""
+    for recherche in recherches:
+        attendu = sorted(l['catalog_id'] for l in sql_direct(dao, *recherche))
+        obtenu = sorted(l['catalog_id'] for l in index.companies_for_service(*recherche))
+        if attendu != obtenu:
+            print(f"  Différence pour {recherche} : SQL {len(attendu)} offres, index {len(obtenu)}")
+            return False
+    return True
+
+
+def latences(fonction, recherches, tours=3):
+    durees = []
+    for _ in range(tours):
+        for recherche in recherches:
+            debut = time.perf_counter()
+            fonction(*recherche)
+            durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return statistics.median(durees), durees[int(len(durees) * 0.95)]
+
+
+def main():
+    nb_offres = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=-(-nb_offres // 7), nb_clients=10, offres_par_entreprise=7)
+    dao = CompanyDAO()
+    index = CatalogIndex()
+    index.invalidate()
+
+    rng = random.Random(7)
+    services = donnees['service_types']
+    tranches = range(len(LIMITES_TRANCHES) + 1)
+    recherches = (
+        [(st,) for st in services]
+        + [(st, v) for st in services for v in VILLES]
+        + [(st, rng.choice(VILLES), rng.choice(tranches)) for st in services for _ in range(10)]
+    )
+
+    debut = time.perf_counter()
+    index.companies_for_service(services[0])
+    print(f"{len(donnees['catalog'])} offres, {len(services)} services - chargement initial de l'index : "
+          f"{(time.perf_counter() - debut) * 1000:.0f} ms")
+    assert memes_offres(dao, index, recherches), "l'index ne correspond pas au SQL"
+
+    print(f"\n{'Recherche':<28} | {'SQL p50':>9} | {'SQL p95':>9} | {'Index p50':>9} | {'Index p95':>9}")
+    groupes = [
+        ("Service (toutes villes)", [r for r in recherches if len(r) == 1]),
+        ("Service + ville", [r for r in recherches if len(r) == 2]),
+        ("Service + ville + tranche", [r for r in recherches if len(r) == 3]),
+    ]
+    for nom, groupe in groupes:
+        s50, s95 = latences(lambda *r: sql_direct(dao, *r), groupe)
+        i50, i95 = latences(index.companies_for_service, groupe)
+        print(f"{nom:<28} | {s50:>7.2f}ms | {s95:>7.2f}ms | {i50:>7.3f}ms | {i95:>7.3f}ms")
+
+    # Écritures : chacune prévient l'index, qui ne relit que l'entreprise (ou l'offre) concernée
+    company_id = donnees['companies'][0]
+    ecritures = [
+        ("ajout d'offre", lambda: dao.add_service_to_catalog(CatalogItem(
+            id=None, company_id=company_id, service_type=ServiceType(id=services[0], nom_service="", description=""),
+            prix_base=950, prix_par_unite=10, unite_nom="panneau", description_offre="Nouvelle offre",
+            duree_estimee="2h"))),
+        ("suppression d'offre", lambda: dao.remove_from_catalog(dao.get_catalog(company_id)[-1].id)),
+        ("changement de ville", lambda: dao.update_company(company_id, ville=rng.choice(VILLES))),
+        ("dé-validation", lambda: dao.verify_company(donnees['companies'][1], False)),
+        ("re-validation", lambda: dao.verify_company(donnees['companies'][1], True)),
+        ("abonnement", lambda: SubscriptionDAO().subscribe_company(donnees['companies'][2], 3, 60)),
+    ]
+    print(f"\n{'Écriture':<22} | {'Durée (ms)':>10} | Index = SQL")
+    for nom, ecrire in ecritures:
+        debut = time.perf_counter()
+        ecrire()
+        duree = (time.perf_counter() - debut) * 1000
+        print(f"{nom:<22} | {duree:>10.2f} | {'oui' if memes_offres(dao, index, recherches) else 'NON'}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
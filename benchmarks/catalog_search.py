@@ -0,0 +1,120 @@
+import sys
+import time
+import random
+import statistics
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from services.catalog_index import CatalogIndex
+
+"""
+Benchmark : recherche plein texte dans le catalogue (~50 000 offres).
+Les descriptions des offres sont réécrites avec un vocabulaire varié (accents compris),
+puis on mesure la latence (p50 / p95 / p99) de CatalogIndex.search pour des recherches :
+  - exactes ("onduleur SMA", "Kärcher"), sans accents ("karcher", "demineralisee"),
+  - avec fautes de frappe ("ondulleur", "thermiqe"), début de mot ("enph"), nom d'entreprise ("Solar 1234"),
+et on vérifie que la première réponse contient bien le mot voulu.
+Pour comparaison : une recherche SQL LIKE '%mot%' sur les mêmes colonnes (sans classement ni fautes).
+
+Lancement : python3 -m benchmarks.catalog_search [nb_offres] [nb_recherches]
+"""
+
+MOTS_DESCRIPTION = (
+    "nettoyage complet des panneaux photovoltaïques avec eau déminéralisée et brosses rotatives "
+    "inspection thermique détection de points chauds micro-fissures vérification du câblage "
+    "remplacement onduleur défectueux mise en service garantie décennale intervention rapide "
+    "toiture inclinée terrasse hangar agricole fixation étanchéité rendement optimisé rapport détaillé "
+    "techniciens certifiés matériel professionnel sécurité harnais nacelle devis gratuit"
+).split()
+
+# (recherche, mot qui doit apparaître dans la première réponse)
+RECHERCHES = [
+    ("onduleur SMA", "sma"), ("Kärcher", "kärcher"), ("karcher", "kärcher"), ("caméra thermique FLIR", "flir"),
+    ("eau demineralisee", "déminéralisée"), ("micro-onduleurs Enphase", "enphase"),
+    ("ondulleur", "onduleur"), ("thermiqe", "thermique"), ("enphse", "enphase"), ("netoyage panneaux", "nettoyage"),
+    ("enph", "enphase"), ("karch", "kärcher"), ("multim", "multimètre"),
+    ("garantie décennale", "décennale"), ("nacelle harnais", "nacelle"), ("points chauds", "chauds"),
+    ("Solar 42", "solar 42"),
+]
+
+
+def reecrire_descriptions(nb, seed=11):
+    rng = random.Random(seed)
+    db = DatabaseConnection()
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT id FROM catalog")
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany(
+            "UPDATE catalog SET description_offre = %s WHERE id = %s",
+            [(" ".join(rng.sample(MOTS_DESCRIPTION, 8)).capitalize(), i) for i in ids]
+        )
+        cursor.close()
+
+
+def recherche_like(db, mot):
+    with db.borrow() as connection:
+        cursor = connection.cursor(dictionary=True)
+        motif = f"%{mot}%"
+        cursor.execute("""
+            SELECT cat.id FROM catalog cat JOIN companies c ON c.id = cat.company_id
+            WHERE c.nom_entreprise LIKE %s OR cat.produits_inclus LIKE %s OR cat.description_offre LIKE %s
+            LIMIT 20
+        """, (motif, motif, motif))
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def percentiles(durees):
+    durees = sorted(durees)
+    return statistics.median(durees), durees[int(len(durees) * 0.95)], durees[int(len(durees) * 0.99)]
+
+
+def main():
+    nb_offres = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    nb_recherches = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=-(-nb_offres // 7), nb_clients=10, offres_par_entreprise=7)
+    reecrire_descriptions(len(donnees['catalog']))
+    index = CatalogIndex()
+    index.invalidate()
+
+    debut = time.perf_counter()
+    index.search("onduleur")
+    print(f"{len(donnees['catalog'])} offres - chargement et indexation : {time.perf_counter() - debut:.2f} s")
+
+    # Pertinence : la première réponse contient-elle le mot voulu ?
+    print(f"\n{'Recherche':<26} | {'Résultats':>9} | 1re réponse")
+    for texte, attendu in RECHERCHES:
+        resultats = index.search(texte)
+        premier = resultats[0] if resultats else {}
+        contenu = " ".join(str(premier.get(c) or '') for c in ('nom_entreprise', 'nom_service', 'produits_inclus', 'description_offre'))
+        ok = attendu.lower() in contenu.lower()
+        print(f"{texte:<26} | {len(resultats):>9} | {'ok' if ok else 'NON'} ({premier.get('nom_entreprise', '-')}, pertinence {premier.get('pertinence', 0)})")
+
+    # Latence sur un mélange de recherches (dont des noms d'entreprise)
+    rng = random.Random(3)
+    melange = [rng.choice(RECHERCHES)[0] for _ in range(nb_recherches)]
+    melange += [f"Solar {rng.randrange(len(donnees['companies']))}" for _ in range(nb_recherches // 10)]
+    durees = []
+    for texte in melange:
+        debut = time.perf_counter()
+        index.search(texte)
+        durees.append((time.perf_counter() - debut) * 1000)
+    p50, p95, p99 = percentiles(durees)
+    print(f"\nIndex inversé  ({len(melange)} recherches) : p50 {p50:.2f} ms | p95 {p95:.2f} ms | p99 {p99:.2f} ms")
+
+    durees = []
+    for texte, _ in RECHERCHES[:6]:
+        mot = texte.split()[0]
+        debut = time.perf_counter()
+        recherche_like(db, mot)
+        durees.append((time.perf_counter() - debut) * 1000)
+    p50, p95, _ = percentiles(durees)
+    print(f"SQL LIKE '%mot%' (sans classement)  : p50 {p50:.2f} ms | max {max(durees):.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
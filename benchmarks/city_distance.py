@@ -0,0 +1,147 @@
+import math
+import sys
+import time
+import random
+import statistics
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from DAO.company_dao import CompanyDAO
+from services.catalog_index import CatalogIndex
+from services.catalog_service import CatalogService
+from services.gazetteer import VILLES_MAROC, RAYON_TERRE_KM, city_key
+
+"""
+Benchmark : recherche des entreprises autour d'une ville (~10 000 offres, toutes les villes de l'annuaire).
+Les villes des entreprises sont redistribuées sur l'annuaire (avec des variantes d'écriture : "Fes", "casa",
+"SALE"... et quelques villes inconnues), puis on compare, pour des recherches "à moins de R km" et
+"les k plus proches" :
+  1. la méthode naïve : distance haversine calculée en Python pour CHAQUE offre du service, puis tri
+  2. CatalogIndex : une ligne de la matrice des distances (NumPy) + lecture des cases ville par ville
+On vérifie que les deux donnent les mêmes offres dans le même ordre, puis on mesure la liste des
+entreprises (CatalogService.list_companies) autour d'une ville, distances calculées d'un coup avec NumPy.
+
+Lancement : python3 -m benchmarks.city_distance [nb_offres]
+"""
+
+RAYONS = (0, 30, 100)
+K = 12
+VILLES_INCONNUES = ["Bouskoura", "Had Soualem", "Skhirat"]
+
+
+def redistribuer_villes(donnees, seed=17):
+    """Chaque entreprise reçoit une ville de l'annuaire (parfois mal écrite) ou, rarement, une ville inconnue."""
+    rng = random.Random(seed)
+    noms = [v[0] for v in VILLES_MAROC]
+    variantes = {"Fès": "Fes", "Casablanca": "casa", "Salé": "SALE", "Tanger": "Tangier", "Meknès": "meknes"}
+    villes = []
+    for company_id in donnees['companies']:
+        if rng.random() < 0.03:
+            ville = rng.choice(VILLES_INCONNUES)
+        else:
+            ville = rng.choice(noms)
+            if ville in variantes and rng.random() < 0.3:
+                ville = variantes[ville]
+        villes.append((ville, company_id))
+    db = DatabaseConnection()
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.executemany("UPDATE companies SET ville = %s WHERE id = %s", villes)
+        cursor.close()
+
+
+COORDONNEES = {city_key(nom): (lat, lon) for nom, lat, lon, _ in VILLES_MAROC}
+COORDONNEES.update({city_key(a): (lat, lon) for _, lat, lon, alias in VILLES_MAROC for a in alias})
+
+
+def haversine(a, b):
+    """Distance (km) entre deux villes, en Python pur (None si l'une est inconnue)."""
+    if city_key(a) == city_key(b):
+        return 0.0
+    if city_key(a) not in COORDONNEES or city_key(b) not in COORDONNEES:
+        return None
+    (lat1, lon1), (lat2, lon2) = COORDONNEES[city_key(a)], COORDONNEES[city_key(b)]
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    h = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * RAYON_TERRE_KM * math.asin(math.sqrt(min(1.0, h)))
+
+
+def recherche_naive(offres, ville, rayon_km=None, k=None):
+    """Distance de chaque offre en Python, filtre sur le rayon, tri (distance, classement)."""
+    trouvees = []
+    for offre in offres:
+        km = haversine(ville, offre['ville'])
+        if km is not None and (rayon_km is None or km <= rayon_km):
+            trouvees.append((round(km, 6), -(offre.get('score') or 0), -offre['catalog_id'], offre))
+    trouvees.sort(key=lambda t: t[:3])
+    return [t[3] for t in trouvees[:k]]
+
+
+def percentiles(durees):
+    durees = sorted(durees)
+    return statistics.median(durees), durees[int(len(durees) * 0.95)]
+
+
+def main():
+    nb_offres = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=-(-nb_offres // 5), nb_clients=10, offres_par_entreprise=5)
+    redistribuer_villes(donnees)
+    dao, index, catalog_service = CompanyDAO(), CatalogIndex(), CatalogService()
+    index.invalidate()
+    services = donnees['service_types']
+    offres_par_service = {st: dao.get_companies_by_service(st) for st in services}
+    print(f"{len(donnees['catalog'])} offres, {len(donnees['companies'])} entreprises, {len(VILLES_MAROC)} villes dans l'annuaire")
+
+    exacte = index.companies_for_service(services[0], "Salé")
+    autour = index.companies_for_service(services[0], "Salé", rayon_km=30)
+    print(f"Service {services[0]}, client à Salé : {len(exacte)} offres (ville exacte) -> {len(autour)} à moins de 30 km "
+          f"({', '.join(sorted({o['ville'] for o in autour}))})")
+
+    # 1. Mêmes résultats que la méthode naïve, puis latences
+    rng = random.Random(4)
+    requetes = [(st, rng.choice(VILLES_MAROC)[0], rayon, None) for st in services for rayon in RAYONS for _ in range(5)]
+    requetes += [(st, rng.choice(VILLES_MAROC + tuple((v,) for v in VILLES_INCONNUES))[0], None, K) for st in services for _ in range(5)]
+    identiques = all(
+        [o['catalog_id'] for o in recherche_naive(offres_par_service[st], ville, rayon, k)]
+        == [o['catalog_id'] for o in index.companies_for_service(st, ville, rayon_km=rayon, plus_proches=k)]
+        for st, ville, rayon, k in requetes
+    )
+    print(f"\nRayons {RAYONS} km et {K} plus proches : mêmes offres dans le même ordre : {'oui' if identiques else 'NON'}")
+    print(f"{'Méthode':<40} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    for nom, fonction in (
+        ("Haversine offre par offre (Python)", lambda st, ville, rayon, k: recherche_naive(offres_par_service[st], ville, rayon, k)),
+        ("Matrice NumPy + cases de l'index", lambda st, ville, rayon, k: index.companies_for_service(st, ville, rayon_km=rayon, plus_proches=k)),
+    ):
+        durees = []
+        for st, ville, rayon, k in requetes:
+            debut = time.perf_counter()
+            fonction(st, ville, rayon, k)
+            durees.append((time.perf_counter() - debut) * 1000)
+        p50, p95 = percentiles(durees)
+        print(f"{nom:<40} | {p50:>9.3f} | {p95:>9.3f}")
+
+    # 2. Recherche plein texte autour d'une ville
+    resultats = catalog_service.search_offers("nettoyage", "Rabat", rayon_km=50)
+    print(f"\nRecherche « nettoyage » à moins de 50 km de Rabat : {len(resultats)} offres, "
+          f"triées par distance : {'oui' if [r['distance_km'] for r in resultats] == sorted(r['distance_km'] for r in resultats) else 'NON'}")
+
+    # 3. Liste des entreprises autour d'une ville (distances de toutes les entreprises en un calcul NumPy)
+    entreprises = dao.get_all_companies()
+    durees = []
+    for ville in [v[0] for v in VILLES_MAROC]:
+        debut = time.perf_counter()
+        proches = catalog_service.list_companies(ville, rayon_km=50)
+        durees.append((time.perf_counter() - debut) * 1000)
+    p50, p95 = percentiles(durees)
+    distances = ((haversine("Rabat", c.ville), c.id) for c in entreprises)
+    naives = sorted((km, i) for km, i in distances if km is not None and km <= 50)
+    proches = catalog_service.list_companies("Rabat", rayon_km=50)
+    ok = [c.id for c in proches] == [i for _, i in naives]
+    print(f"list_companies à moins de 50 km ({len(entreprises)} entreprises, SQL compris) : p50 {p50:.2f} ms | p95 {p95:.2f} ms"
+          f" | identique au calcul Python : {'oui' if ok else 'NON'}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import sys
+import time
+import random
+import statistics
+from collections import Counter
+from datetime import date, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from DAO.company_dao import CompanyDAO
+from DAO.booking_dao import BookingDAO, SlotAlreadyBookedError
+from services.availability_service import AvailabilityService, CompanyAgenda, occupied_slots
+from services.catalog_service import CatalogService
+
+"""
+Benchmark : planification qui tient compte de la durée des interventions (catalog.duree_heures).
+Sur un marketplace à l'échelle du seed (50 entreprises, 7 offres chacune, durées de "1h" à "2 jours"),
+des clients réservent au hasard parmi les créneaux proposés (get_available_days), puis on vérifie :
+  1. chaque réservation bloque exactement ses heures (une intervention "2 jours" déborde sur 2 à 3 jours ouvrés) ;
+  2. aucune heure n'est réservée deux fois ;
+et on mesure la question "une intervention de L heures tient-elle à T ?" :
+  - CompanyAgenda.fits (recherche dichotomique dans les plages libres)
+  - la vérification naïve heure par heure (coût proportionnel à L).
+
+Lancement : python3 -m benchmarks.duration_scheduling [nb_reservations]
+"""
+
+
+def reserver(offres, clients, nb, today, seed=9):
+    """Chaque client choisit une offre, puis un jour et une heure PARMI ceux proposés par la CLI."""
+    rng = random.Random(seed)
+    service = AvailabilityService()
+    catalog = CatalogService()
+    creees, complets, conflits = [], 0, 0
+    for _ in range(nb):
+        offre = rng.choice(offres)
+        duree = offre['duree_heures'] or 1
+        jours = service.get_available_days(offre, duree=duree, today=today)
+        if not jours:
+            # Agenda complet sur 3 semaines pour cette durée
+            complets += 1
+            continue
+        jour = rng.choice(jours)
+        heure = rng.choice(jour.start_hours)
+        creneaux = occupied_slots(offre, jour.date_str, heure, duree)
+        try:
+            booking_id, _ = catalog.create_booking_request(
+                rng.choice(clients), offre['id'], offre['service_type_id'], offre['catalog_id'],
+                1, "bench", 100, jour.date_str, heure, 'CASH', creneaux
+            )
+        except SlotAlreadyBookedError:
+            booking_id = None
+        if booking_id:
+            creees.append((booking_id, offre, creneaux))
+        else:
+            conflits += 1
+    return creees, complets, conflits
+
+
+def verifier(creees):
+    """Compare les heures enregistrées dans booking_slots avec celles attendues pour chaque réservation."""
+    db = DatabaseConnection()
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT booking_id, rdv_date, rdv_heure FROM booking_slots")
+        en_base = {}
+        for booking_id, jour, heure in cursor.fetchall():
+            en_base.setdefault(booking_id, set()).add((str(jour)[:10], heure))
+        cursor.execute("SELECT COUNT(*), COUNT(DISTINCT company_id || '|' || rdv_date || '|' || rdv_heure) FROM booking_slots")
+        total, distincts = cursor.fetchone()
+        cursor.close()
+    erreurs = sum(1 for booking_id, _, creneaux in creees if en_base.get(booking_id) != set(creneaux))
+    return erreurs, total, distincts
+
+
+def chronometrer(fonction, appels):
+    debut = time.perf_counter()
+    for args in appels:
+        fonction(*args)
+    return (time.perf_counter() - debut) * 1e6 / len(appels)
+
+
+def main():
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=50, nb_clients=200, offres_par_entreprise=7)
+    today = date.today()
+
+    dao = CompanyDAO()
+    offres = [dict(o, service_type_id=st) for st in donnees['service_types'] for o in dao.get_companies_by_service(st)]
+    print(f"{len(offres)} offres, durées : {dict(sorted(Counter(o['duree_estimee'] for o in offres).items()))}")
+
+    debut = time.perf_counter()
+    creees, complets, conflits = reserver(offres, donnees['clients'], nb, today)
+    duree_totale = time.perf_counter() - debut
+    print(f"{len(creees)} réservations créées en {duree_totale:.1f} s ({complets} demandes sans créneau libre, {conflits} conflits)")
+
+    erreurs, total, distincts = verifier(creees)
+    sur_plusieurs_jours = [c for _, _, c in creees if c[0][0] != c[-1][0]]
+    max_jours = max((len({j for j, _ in c}) for _, _, c in creees), default=0)
+    print(f"Heures bloquées : {total} (attendu {sum(len(c) for _, _, c in creees)}), doublons : {total - distincts}")
+    print(f"Réservations dont les heures ne correspondent pas : {erreurs}")
+    print(f"Interventions sur plusieurs jours : {len(sur_plusieurs_jours)} (jusqu'à {max_jours} jours ouvrés)")
+    # Les créneaux proposés tiennent toujours compte de la durée : aucun conflit possible ici
+    assert erreurs == 0 and total == distincts and conflits == 0, "planification incorrecte"
+
+    # "Une intervention de L heures tient-elle à T ?" sur l'agenda le plus chargé
+    booking_dao = BookingDAO()
+    rng = random.Random(4)
+    periode = [today + timedelta(days=i) for i in range(1, 36)]
+    occupation = {o['id']: booking_dao.get_booked_slots_range(o['id'], periode[0].strftime('%Y-%m-%d'), periode[-1].strftime('%Y-%m-%d'))
+                  for o in offres}
+    offre = max(offres, key=lambda o: sum(len(h) for h in occupation[o['id']].values()))
+    occupes = occupation[offre['id']]
+    agenda = CompanyAgenda(offre, periode, occupes)
+
+    def naif(jour, heure, duree):
+        return all(h not in occupes.get(j, []) for j, h in occupied_slots(offre, jour, heure, duree))
+
+    print(f"\nAgenda de {offre['nom_entreprise']} : {len(agenda.heures)} heures d'ouverture, {len(agenda.debuts)} plages libres")
+    print(f"{'Durée':>6} | {'fits (µs)':>9} | {'naïf (µs)':>9}")
+    for duree in (1, 4, 8, 16, 40):
+        appels = [(rng.choice(periode[:21]).strftime('%Y-%m-%d'), f"{rng.randint(8, 17):02d}:00", duree) for _ in range(5000)]
+        print(f"{duree:>5}h | {chronometrer(agenda.fits, appels):>9.2f} | {chronometrer(naif, appels):>9.2f}")
+
+    service = AvailabilityService()
+    durees = []
+    for st in donnees['service_types']:
+        debut = time.perf_counter()
+        service.find_earliest_slots(st, k=10, today=today)
+        durees.append((time.perf_counter() - debut) * 1000)
+    print(f"\nPremiers créneaux (toutes entreprises, durées comprises) : médiane {statistics.median(durees):.1f} ms par service")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
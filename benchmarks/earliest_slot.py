@@ -0,0 +1,94 @@
+import sys
+import time
+import random
+import statistics
+from datetime import date, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from DAO.company_dao import CompanyDAO
+from DAO.booking_dao import BookingDAO
+from services.availability_service import AvailabilityService, earliest_free_slots
+
+"""
+Benchmark : recherche "premier créneau libre" pour un type de service, toutes entreprises confondues.
+On remplit N entreprises (5000 par défaut) qui proposent toutes le service, avec des réservations
+aléatoires sur les 14 prochains jours, puis on mesure :
+  1. le calcul NumPy seul (earliest_free_slots), objectif < 50 ms
+  2. la recherche complète (2 requêtes SQL + calcul)
+  3. pour comparaison, l'approche "une entreprise à la fois" (get_available_days) sur un échantillon
+
+Lancement : python3 -m benchmarks.earliest_slot [nb_entreprises] [nb_reservations]
+"""
+
+
+def remplir_reservations(company_ids, client_ids, jours, nb, seed=3):
+    """Insère nb réservations aléatoires (et leurs créneaux) directement en base."""
+    rng = random.Random(seed)
+    lignes = {}
+    while len(lignes) < nb:
+        cle = (rng.choice(company_ids), rng.choice(jours), f"{rng.randint(7, 18):02d}:00")
+        lignes[cle] = (rng.choice(client_ids),) + cle
+
+    db = DatabaseConnection()
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.executemany("""
+            INSERT INTO bookings (client_id, company_id, service_type_id, prix_total, rdv_date, rdv_heure, statut)
+            VALUES (%s, %s, 1, 100, %s, %s, 'EN_ATTENTE')
+        """, list(lignes.values()))
+        cursor.execute("""
+            INSERT INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id)
+            SELECT company_id, rdv_date, rdv_heure, MIN(id) FROM bookings GROUP BY company_id, rdv_date, rdv_heure
+        """)
+        cursor.close()
+
+
+def chronometrer(fonction, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return resultat, statistics.median(durees), durees[int(len(durees) * 0.95) - 1]
+
+
+def main():
+    nb_entreprises = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    nb_reservations = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    db, _ = sqlite_database()
+    # 7 offres par entreprise = tous les types de services : chaque entreprise est candidate
+    donnees = seed_marketplace(nb_companies=nb_entreprises, nb_clients=100, offres_par_entreprise=7)
+    today = date.today()
+    jours = [(today + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 15)]
+    remplir_reservations(donnees['companies'], donnees['clients'], jours, nb_reservations)
+
+    service = AvailabilityService()
+    service_type_id = donnees['service_types'][0]
+    companies = CompanyDAO().get_companies_by_service(service_type_id)
+    days = [today + timedelta(days=i) for i in range(1, 15)]
+    booked = BookingDAO().get_booked_slots_for_service(service_type_id, jours[0], jours[-1])
+    print(f"{len(companies)} offres candidates, {len(booked)} créneaux occupés sur 14 jours")
+
+    suggestions, p50, p95 = chronometrer(lambda: earliest_free_slots(companies, booked, days, 10), 30)
+    print(f"Calcul NumPy (k=10)            : p50 {p50:7.2f} ms | p95 {p95:7.2f} ms")
+
+    _, p50, p95 = chronometrer(lambda: service.find_earliest_slots(service_type_id, k=10, today=today), 10)
+    print(f"Recherche complète (SQL + NumPy): p50 {p50:7.2f} ms | p95 {p95:7.2f} ms")
+
+    echantillon = companies[:200]
+    debut = time.perf_counter()
+    for c in echantillon:
+        service.get_available_days(c, nb_days=1, horizon=14, today=today)
+    par_entreprise = (time.perf_counter() - debut) * 1000 / len(echantillon)
+    print(f"Une entreprise à la fois        : {par_entreprise:.2f} ms/entreprise -> ~{par_entreprise * len(companies):.0f} ms pour {len(companies)}")
+
+    for s in suggestions[:5]:
+        print(f"  {s.rdv_date} {s.rdv_heure} - {s.company['nom_entreprise']} ({s.company['ville']}, {s.company['prix_base']} DH)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
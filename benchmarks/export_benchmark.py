@@ -0,0 +1,71 @@
+import csv
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from benchmarks.pagination_benchmark import remplir
+from DAO.booking_dao import BookingDAO, COLONNES_EXPORT
+from services.export_service import BookingExportService
+
+"""
+Benchmark : export du registre des réservations en CSV.
+On compare, pour des tables de plus en plus grandes :
+  1. l'approche naïve : get_all_bookings() (toutes les lignes en mémoire) puis écriture du fichier
+  2. BookingExportService.export (lecture et écriture par paquets de 5000 lignes)
+Mesures : débit (lignes/s) et pic mémoire Python (tracemalloc), qui doit rester constant pour l'export en flux.
+
+Lancement : python3 -m benchmarks.export_benchmark [nb_reservations_max]
+"""
+
+
+def export_naif(path):
+    rows = BookingDAO().get_all_bookings()
+    with open(path, 'w', newline='', encoding='utf-8') as fichier:
+        writer = csv.DictWriter(fichier, fieldnames=list(rows[0].keys()) if rows else COLONNES_EXPORT, delimiter=';')
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def export_flux(path):
+    return BookingExportService().export(path, 'csv')['lignes']
+
+
+def mesurer(fonction, path):
+    """Débit (lignes/s, sans tracemalloc qui ralentit tout) puis pic mémoire (Mo) sur un second passage."""
+    debut = time.perf_counter()
+    lignes = fonction(path)
+    debit = lignes / (time.perf_counter() - debut)
+    tracemalloc.start()
+    fonction(path)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lignes, debit, pic / 1024 / 1024
+
+
+def main():
+    nb_max = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=200, nb_clients=2000)
+    dossier = tempfile.mkdtemp(prefix="optivolt-export-")
+    path = os.path.join(dossier, "reservations.csv")
+
+    print(f"{'Lignes':>8} | {'Naïf (lignes/s)':>15} | {'Naïf (Mo)':>9} | {'Flux (lignes/s)':>15} | {'Flux (Mo)':>9}")
+    total = 0
+    for taille in (nb_max // 8, nb_max // 4, nb_max // 2, nb_max):
+        remplir(donnees, taille - total, seed=taille)
+        total = taille
+        lignes, debit_naif, mem_naif = mesurer(export_naif, path)
+        lignes_flux, debit_flux, mem_flux = mesurer(export_flux, path)
+        assert lignes == lignes_flux == total, "nombre de lignes exportées incorrect"
+        print(f"{total:>8} | {debit_naif:>15.0f} | {mem_naif:>9.1f} | {debit_flux:>15.0f} | {mem_flux:>9.1f}")
+
+    print(f"Dernier fichier : {path} ({os.path.getsize(path) / 1024 / 1024:.1f} Mo)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
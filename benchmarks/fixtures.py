@@ -0,0 +1,123 @@
+import logging
+import os
+import random
+import tempfile
+
+from Config.database import DatabaseConnection
+from models.company import parse_duree_heures
+from utils.db_init import create_sqlite_schema
+from utils.logger import Logger
+from utils.migrate_db import run_migrations
+
+"""
+Outils communs aux benchmarks : une base SQLite jetable (hermétique, sans serveur MySQL)
+et un remplissage rapide et reproductible du marketplace (executemany, sans Faker).
+"""
+
+VILLES = ["Casablanca", "Rabat", "Marrakech", "Tanger", "Fès", "Salé", "Agadir", "Meknès", "Oujda", "Kénitra"]
+DUREES = ["1h", "2h", "3h", "½ journée", "1 jour", "2 jours"]
+PRODUITS = [
+    "Eau déminéralisée, Raclettes pro, Chiffons microfibre",
+    "Nettoyeur haute pression Kärcher, Savon biodégradable",
+    "Onduleur SMA Sunny Boy 5.0, Câbles DC 6mm²",
+    "Multimètre Fluke, Caméra thermique FLIR",
+    "Panneaux JA Solar 550W, Rails K2, Micro-onduleurs Enphase",
+    "Kit de maintenance préventive, Graisse silicone, Connecteurs MC4",
+]
+
+
+def rediriger_journal(dossier):
+    """
+    Le journal de l'application (utils/logger.py) écrit dans dossier/optivolt.log au lieu de logs/optivolt.log :
+    un benchmark ajoute des milliers de lignes qui n'ont rien à faire dans le journal suivi par git.
+    """
+    journal = Logger().logger
+    for handler in list(journal.handlers):
+        journal.removeHandler(handler)
+        handler.close()
+    handler = logging.FileHandler(os.path.join(dossier, "optivolt.log"))
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    journal.addHandler(handler)
+
+
+def sqlite_database(path=None, pool_max=0):
+    """
+    Branche le Singleton sur une base SQLite neuve avec toutes les tables (et les migrations).
+    Sans 'path', on crée un fichier temporaire (les threads partagent ainsi la même base).
+    """
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="optivolt-bench-"), "bench.db")
+    rediriger_journal(os.path.dirname(os.path.abspath(path)))
+
+    db = DatabaseConnection()
+    db.connect_sqlite(path, pool_min=1 if pool_max else 0, pool_max=pool_max)
+    with db.borrow() as connection:
+        create_sqlite_schema(connection)
+    run_migrations(db)
+    return db, path
+
+
+def seed_marketplace(nb_companies=100, nb_clients=100, offres_par_entreprise=3, seed=42):
+    """
+    Insère des entreprises vérifiées (avec abonnement actif), leurs offres et des clients.
+    Retourne un dictionnaire {'clients': [...ids], 'companies': [...ids], 'catalog': [...lignes]}.
+    """
+    rng = random.Random(seed)
+    db = DatabaseConnection()
+
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM users")
+        premier_user = cursor.fetchone()[0] + 1
+
+        # 1. Comptes : d'abord les entreprises, puis les clients
+        comptes = []
+        for i in range(nb_companies):
+            comptes.append(("ENTREPRISE", f"Entreprise {i}", f"pro{premier_user + i}@bench.ma", "x", f"05{premier_user + i:08d}", rng.choice(VILLES)))
+        for i in range(nb_clients):
+            comptes.append(("CLIENT", f"Client {i}", f"client{premier_user + nb_companies + i}@bench.ma", "x", f"06{premier_user + nb_companies + i:08d}", rng.choice(VILLES)))
+        cursor.executemany(
+            "INSERT INTO users (role, nom, email, password_hash, telephone, ville) VALUES (%s, %s, %s, %s, %s, %s)", comptes
+        )
+        user_ids = list(range(premier_user, premier_user + len(comptes)))
+
+        # 2. Profils entreprises (vérifiés, abonnement de 30 jours)
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM companies")
+        premiere_company = cursor.fetchone()[0] + 1
+        entreprises = []
+        for i in range(nb_companies):
+            h_debut = rng.choice([7, 8, 9])
+            h_fin = rng.choice([16, 17, 18, 19])
+            jours = rng.choice(["Lun-Ven", "Lun-Sam", "Lun-Dim"])
+            entreprises.append((user_ids[i], f"Solar {i}", f"Pro du solaire n°{i}", comptes[i][5], f"{h_debut:02d}:00", f"{h_fin:02d}:00", jours, rng.choice([1, 2, 3])))
+        cursor.executemany("""
+            INSERT INTO companies (user_id, nom_entreprise, description, ville, horaire_debut, horaire_fin, jours_travail,
+                                   is_verified, subscription_plan_id, subscription_start, subscription_expires_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, TRUE, %s, CURDATE(), DATE_ADD(CURDATE(), INTERVAL 30 DAY))
+        """, entreprises)
+        company_ids = list(range(premiere_company, premiere_company + nb_companies))
+
+        # 3. Catalogue
+        cursor.execute("SELECT id FROM service_types")
+        service_ids = [row[0] for row in cursor.fetchall()]
+        offres = []
+        for company_id in company_ids:
+            for st in rng.sample(service_ids, min(offres_par_entreprise, len(service_ids))):
+                duree = rng.choice(DUREES)
+                offres.append((company_id, st, rng.randint(100, 800), rng.randint(15, 80), "panneau",
+                               f"Offre {st} de l'entreprise {company_id}", rng.choice(PRODUITS), duree, parse_duree_heures(duree)))
+        cursor.executemany("""
+            INSERT INTO catalog (company_id, service_type_id, prix_base, prix_par_unite, unite_nom, description_offre, produits_inclus, duree_estimee, duree_heures)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, offres)
+
+        connection.commit()
+        cursor.close()
+
+    return {
+        'clients': user_ids[nb_companies:],
+        'companies': company_ids,
+        'service_types': service_ids,
+        'catalog': offres,
+    }
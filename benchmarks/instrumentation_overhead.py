@@ -0,0 +1,101 @@
+import sys
+import time
+import random
+import statistics
+import tempfile
+import os
+from datetime import date, timedelta
+
+from benchmarks.earliest_slot import remplir_reservations
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from DAO.company_dao import CompanyDAO
+from DAO.booking_dao import BookingDAO
+
+"""
+Benchmark : coût de l'instrumentation des requêtes (DB_INSTRUMENTATION).
+On rejoue les mêmes lectures, méthode de DAO par méthode de DAO :
+  - get_booked_slots sur des jours qui ONT des réservations (requête courte : le surcoût se voit) ;
+  - get_companies_by_service (beaucoup de lignes : les fetch et le comptage lignes / octets travaillent).
+Pour chaque méthode, de courts passages "désactivée" / "activée" sont alternés (l'ordre change à chaque tour)
+et on garde la médiane des écarts activée - désactivée d'un même tour : un seul passage de chaque mode
+mesure surtout le bruit de la machine (cache, fréquence du processeur), qui dépasse ici le surcoût lui-même.
+On affiche le surcoût par execute() enveloppé, puis le rapport par méthode de DAO du dernier tour.
+
+Lancement : python3 -m benchmarks.instrumentation_overhead [nb_appels_par_tour] [nb_tours]
+"""
+
+
+def jours_reserves(db):
+    """Couples (entreprise, jour) qui ont au moins un créneau réservé."""
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT DISTINCT company_id, rdv_date FROM booking_slots ORDER BY company_id, rdv_date")
+        lignes = cursor.fetchall()
+        cursor.close()
+    return lignes
+
+
+def rejouer(appel, nb, seed):
+    rng = random.Random(seed)
+    debut = time.perf_counter()
+    for _ in range(nb):
+        appel(rng)
+    return time.perf_counter() - debut
+
+
+def comparer(db, appel, nb, nb_tours, journal):
+    """Durées (désactivée, activée) de chaque tour, et rapport de l'instrumentation du dernier tour."""
+    durees, rapport = [], {}
+    rejouer(appel, nb, seed=0)  # échauffement (cache SQLite)
+    for tour in range(nb_tours):
+        mesures = {}
+        # Un tour sur deux, l'instrumentation passe en premier
+        for active in ((False, True) if tour % 2 == 0 else (True, False)):
+            if active:
+                db.enable_instrumentation(slow_query_ms=5.0, slow_log_path=journal)
+            mesures[active] = rejouer(appel, nb, seed=tour + 1)
+            if active:
+                rapport = db.get_query_report()
+                db.disable_instrumentation()
+        durees.append((mesures[False], mesures[True]))
+    return durees, rapport
+
+
+def main():
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    nb_tours = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=300, nb_clients=50)
+    jours = [(date.today() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 6)]
+    remplir_reservations(donnees['companies'], donnees['clients'], jours, 6000)
+    company_dao, booking_dao = CompanyDAO(), BookingDAO()
+    reserves, services = jours_reserves(db), donnees['service_types']
+    journal = os.path.join(tempfile.mkdtemp(prefix="optivolt-slow-"), "slow_queries.log")
+
+    methodes = (
+        ("BookingDAO.get_booked_slots", lambda rng: booking_dao.get_booked_slots(*rng.choice(reserves))),
+        ("CompanyDAO.get_companies_by_service", lambda rng: company_dao.get_companies_by_service(rng.choice(services))),
+    )
+    print(f"{nb} appels par mode et par tour, {nb_tours} tours alternés (médianes)")
+    print(f"{'Méthode':<36} | {'désactivée (µs)':>15} | {'activée (µs)':>12} | {'surcoût µs/execute':>18} | {'lignes/execute':>14}")
+    rapports = {}
+    for nom, appel in methodes:
+        durees, rapport = comparer(db, appel, nb, nb_tours, journal)
+        rapports.update(rapport)
+        stats = rapport.get(nom) or {'calls': nb, 'rows': 0}
+        # Nombre réel d'execute() d'un tour (une méthode de DAO peut lancer plusieurs requêtes)
+        nb_execute = sum(s['calls'] for s in rapport.values()) or nb
+        off = statistics.median(d[0] for d in durees) / nb * 1e6
+        on = statistics.median(d[1] for d in durees) / nb * 1e6
+        surcout = statistics.median(d[1] - d[0] for d in durees) / nb_execute * 1e6
+        print(f"{nom:<36} | {off:>15.1f} | {on:>12.1f} | {surcout:>18.1f} | {stats['rows'] / stats['calls']:>14.1f}")
+
+    print("\nRapport de l'instrumentation (dernier tour de chaque méthode) :")
+    for methode, stats in rapports.items():
+        print(f"  {methode:<36} {stats['calls']:>6} appels | moy {stats['avg_ms']:.3f} ms | p95 {stats['p95_ms']:.1f} ms | {stats['rows']} lignes | {stats['bytes']} octets")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
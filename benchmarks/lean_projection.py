@@ -0,0 +1,106 @@
+import sys
+import time
+import random
+import statistics
+import tracemalloc
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from DAO.booking_dao import BookingDAO
+
+"""
+Benchmark : liste des réservations d'UNE entreprise qui a un long historique avec des rapports.
+On insère N réservations terminées (10000 par défaut) pour la même entreprise, chacune avec une
+description et trois rapports de plusieurs Ko, puis on compare :
+  1. l'ancienne requête "SELECT b.*" (tous les textes longs sont lus et gardés en mémoire)
+  2. BookingDAO.get_company_bookings (projection résumée : colonnes affichées dans la liste)
+  3. BookingDAO.get_booking_detail (la fiche complète, chargée seulement quand on l'ouvre)
+Mesures : durée médiane et pic mémoire Python (tracemalloc) du résultat.
+
+Lancement : python3 -m benchmarks.lean_projection [nb_reservations] [taille_rapport]
+"""
+
+SQL_ANCIEN = """
+    SELECT b.*, u.nom as client_nom, u.telephone as client_tel, u.ville as client_ville, s.nom_service
+    FROM bookings b
+    JOIN users u ON b.client_id = u.id
+    JOIN service_types s ON b.service_type_id = s.id
+    WHERE b.company_id = %s
+    ORDER BY b.date_demande DESC
+"""
+
+
+def remplir(donnees, company_id, nb, taille, seed=5):
+    rng = random.Random(seed)
+    mots = "panneau onduleur câble nettoyage rendement toiture fixation inspection soudure micro-fissure".split()
+
+    def texte():
+        return " ".join(rng.choice(mots) for _ in range(taille // 8))[:taille]
+
+    lignes = [
+        (rng.choice(donnees['clients']), company_id, texte(), texte(), texte(), texte())
+        for _ in range(nb)
+    ]
+    db = DatabaseConnection()
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.executemany("""
+            INSERT INTO bookings (client_id, company_id, service_type_id, prix_total, statut,
+                                  description_client, rapport_avant, rapport_apres, rapport_details)
+            VALUES (%s, %s, 1, 100, 'TERMINEE', %s, %s, %s, %s)
+        """, lignes)
+        cursor.close()
+
+
+def ancienne_liste(db, company_id):
+    with db.borrow() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(SQL_ANCIEN, (company_id,))
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def mesurer(fonction, repetitions=5):
+    """Durée médiane (ms) et pic mémoire (Mo) pendant la construction du résultat."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    tracemalloc.start()
+    resultat = fonction()
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, statistics.median(durees), pic / 1024 / 1024
+
+
+def main():
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    taille = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=5, nb_clients=200)
+
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT id FROM companies ORDER BY id LIMIT 1")
+        company_id = cursor.fetchone()[0]
+        cursor.close()
+    remplir(donnees, company_id, nb, taille)
+    dao = BookingDAO()
+
+    print(f"{nb} réservations pour l'entreprise #{company_id}, 4 textes de ~{taille} caractères chacune")
+    ancien, t_ancien, m_ancien = mesurer(lambda: ancienne_liste(db, company_id))
+    lean, t_lean, m_lean = mesurer(lambda: dao.get_company_bookings(company_id))
+    assert [r['id'] for r in ancien] == [r['id'] for r in lean], "les deux listes diffèrent"
+    _, t_detail, m_detail = mesurer(lambda: dao.get_booking_detail(lean[0]['id'], company_id=company_id), 20)
+
+    print(f"{'Requête':<32} | {'Durée (ms)':>10} | {'Mémoire (Mo)':>12}")
+    print(f"{'Ancienne liste (SELECT b.*)':<32} | {t_ancien:>10.1f} | {m_ancien:>12.1f}")
+    print(f"{'get_company_bookings (résumé)':<32} | {t_lean:>10.1f} | {m_lean:>12.1f}")
+    print(f"{'get_booking_detail (1 fiche)':<32} | {t_detail:>10.2f} | {m_detail:>12.3f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
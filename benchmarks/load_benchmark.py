@@ -0,0 +1,78 @@
+import sys
+import time
+import random
+from datetime import date, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from DAO.company_dao import CompanyDAO
+from DAO.booking_dao import BookingDAO
+from services.catalog_service import CatalogService
+
+"""
+Benchmark de charge hermétique : tout tourne sur SQLite (aucun serveur MySQL requis).
+On remplit un marketplace puis on rejoue le parcours client de la CLI :
+  get_service_types -> get_companies_by_service -> get_booked_slots -> create_booking_request
+et on affiche le débit et la latence moyenne de chaque étape.
+
+Lancement : python3 -m benchmarks.load_benchmark [nb_parcours] [nb_entreprises]
+"""
+
+
+def main():
+    nb_parcours = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    nb_entreprises = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    db, path = sqlite_database()
+    donnees = seed_marketplace(nb_companies=nb_entreprises, nb_clients=200)
+    print(f"Base SQLite : {path} ({nb_entreprises} entreprises, {len(donnees['catalog'])} offres)")
+
+    company_dao = CompanyDAO()
+    booking_dao = BookingDAO()
+    catalog_service = CatalogService()
+    rng = random.Random(7)
+    jours = [(date.today() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 15)]
+
+    durees = {'get_service_types': 0.0, 'get_companies_by_service': 0.0, 'get_booked_slots': 0.0, 'create_booking_request': 0.0}
+    reservations = 0
+
+    debut_total = time.perf_counter()
+    for _ in range(nb_parcours):
+        t = time.perf_counter()
+        types = company_dao.get_service_types()
+        durees['get_service_types'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        offres = company_dao.get_companies_by_service(rng.choice(types).id)
+        durees['get_companies_by_service'] += time.perf_counter() - t
+        if not offres:
+            continue
+        offre = rng.choice(offres)
+        jour = rng.choice(jours)
+
+        t = time.perf_counter()
+        occupes = booking_dao.get_booked_slots(offre['id'], jour)
+        durees['get_booked_slots'] += time.perf_counter() - t
+
+        libres = [f"{h:02d}:00" for h in range(8, 18) if f"{h:02d}:00" not in occupes]
+        if not libres:
+            continue
+
+        t = time.perf_counter()
+        bid, _ = catalog_service.create_booking_request(
+            rng.choice(donnees['clients']), offre['id'], 1, offre['catalog_id'], 1, "bench",
+            offre['prix_base'], jour, rng.choice(libres), rng.choice(['ONLINE', 'CASH'])
+        )
+        durees['create_booking_request'] += time.perf_counter() - t
+        if bid:
+            reservations += 1
+    duree_totale = time.perf_counter() - debut_total
+
+    print(f"{nb_parcours} parcours en {duree_totale:.2f}s ({nb_parcours / duree_totale:.0f} parcours/s, {reservations} réservations)")
+    print(f"{'Étape':<26} | {'Total (s)':>9} | {'Moyenne (ms)':>12}")
+    for etape, duree in durees.items():
+        print(f"{etape:<26} | {duree:>9.3f} | {duree / nb_parcours * 1000:>12.3f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import sys
+import time
+import random
+import statistics
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from DAO.booking_dao import BookingDAO
+from DAO.company_dao import CompanyDAO
+from DAO.subscription_dao import SubscriptionDAO
+from services.catalog_index import CatalogIndex
+
+"""
+Benchmark : classement du marketplace (catalog.score) avec ~20 000 offres.
+On remplit l'historique (interventions terminées / refusées, avis), on calcule tous les scores,
+puis, pour afficher les k offres les mieux classées d'un service, on compare :
+  1. l'ancienne méthode : lire TOUTES les offres du service, puis trier en Python (tri après lecture)
+  2. la requête indexée : ORDER BY score DESC LIMIT k, lue dans l'index (service_type_id, score)
+On vérifie que les deux donnent les mêmes offres dans le même ordre, puis on mesure le recalcul
+incrémental (un avis, une intervention terminée, un abonnement) et on vérifie que l'index en mémoire
+(CatalogIndex) suit le nouveau classement sans être rechargé.
+
+Lancement : python3 -m benchmarks.marketplace_ranking [nb_offres]
+"""
+
+K = 12
+
+
+def remplir_historique(donnees, nb_reservations, seed=5):
+    """Interventions finies (90 derniers jours) et avis, insérées en masse (executemany)."""
+    rng = random.Random(seed)
+    db = DatabaseConnection()
+    offres = [(company_id, st) for company_id, st, *_ in donnees['catalog']]
+    # Quelques entreprises "bien notées" et d'autres "mal notées", pour un classement contrasté
+    qualite = {company_id: rng.random() for company_id in donnees['companies']}
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        reservations = []
+        for _ in range(nb_reservations):
+            company_id, st = rng.choice(offres)
+            statut = 'TERMINEE' if rng.random() < 0.5 + qualite[company_id] / 2 else 'REFUSEE'
+            reservations.append((rng.choice(donnees['clients']), company_id, st, 300, statut, f"-{rng.randrange(120)} days"))
+        cursor.executemany("""
+            INSERT INTO bookings (client_id, company_id, service_type_id, prix_total, statut, date_demande)
+            VALUES (%s, %s, %s, %s, %s, datetime('now', %s))
+        """, reservations)
+        cursor.execute("SELECT id, client_id, company_id FROM bookings WHERE statut = 'TERMINEE'")
+        avis = [(bid, client_id, max(1, min(5, round(1 + 4 * qualite[company_id] + rng.gauss(0, 0.7)))), "ok")
+                for bid, client_id, company_id in cursor.fetchall() if rng.random() < 0.6]
+        cursor.executemany("INSERT INTO reviews (booking_id, client_id, rating, comment) VALUES (%s, %s, %s, %s)", avis)
+        cursor.close()
+    return len(reservations), len(avis)
+
+
+def tri_apres_lecture(db, service_type_id, k):
+    """Ancienne méthode : toutes les offres visibles du service, puis tri en Python."""
+    with db.borrow() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT c.*, cat.id as catalog_id, cat.prix_base, cat.prix_par_unite, cat.unite_nom,
+                   cat.description_offre, cat.produits_inclus, cat.duree_estimee, cat.duree_heures, cat.score,
+                   sp.nom as plan_nom
+            FROM companies c
+            JOIN catalog cat ON c.id = cat.company_id
+            LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+            WHERE cat.service_type_id = %s AND c.is_verified = TRUE AND c.subscription_expires_at >= CURDATE()
+        """, (service_type_id,))
+        lignes = cursor.fetchall()
+        cursor.close()
+    lignes.sort(key=lambda l: (-l['score'], -l['catalog_id']))
+    return lignes[:k]
+
+
+def latences(fonction, services, tours=20):
+    durees = []
+    for _ in range(tours):
+        for st in services:
+            debut = time.perf_counter()
+            fonction(st)
+            durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return statistics.median(durees), durees[int(len(durees) * 0.95)]
+
+
+def ordre(lignes):
+    return [l['catalog_id'] for l in lignes]
+
+
+def index_a_jour(dao, index, services):
+    """Vrai si l'index en mémoire donne le même top k, dans le même ordre, que la requête SQL."""
+    return all(ordre(index.companies_for_service(st, limit=K)) == ordre(dao.get_companies_by_service(st, limit=K))
+               for st in services)
+
+
+def mesurer(action):
+    debut = time.perf_counter()
+    action()
+    return (time.perf_counter() - debut) * 1000
+
+
+def main():
+    nb_offres = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=-(-nb_offres // 5), nb_clients=200, offres_par_entreprise=5)
+    nb_resa, nb_avis = remplir_historique(donnees, nb_offres * 2)
+    dao, booking_dao, subscription_dao = CompanyDAO(), BookingDAO(), SubscriptionDAO()
+    services = donnees['service_types']
+
+    # Les avis sont insérés directement en SQL : on remplit les compteurs de notes lus par le score
+    booking_dao.rebuild_ratings()
+    debut = time.perf_counter()
+    nombre = dao.refresh_scores()
+    print(f"{len(donnees['catalog'])} offres, {nb_resa} interventions, {nb_avis} avis - "
+          f"calcul complet des scores : {nombre} offres en {time.perf_counter() - debut:.2f} s")
+
+    # 1. Top k par service : tri après lecture vs ORDER BY score LIMIT k (index)
+    identiques = all(ordre(tri_apres_lecture(db, st, K)) == ordre(dao.get_companies_by_service(st, limit=K)) for st in services)
+    print(f"\nTop {K} par service : mêmes offres dans le même ordre : {'oui' if identiques else 'NON'}")
+    print(f"{'Méthode':<34} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    for nom, fonction in (("Tri après lecture (tout le service)", lambda st: tri_apres_lecture(db, st, K)),
+                          (f"ORDER BY score LIMIT {K} (index)", lambda st: dao.get_companies_by_service(st, limit=K))):
+        p50, p95 = latences(fonction, services)
+        print(f"{nom:<34} | {p50:>9.3f} | {p95:>9.3f}")
+
+    # 2. Recalcul incrémental après chaque type d'écriture (et suivi par l'index en mémoire)
+    index = CatalogIndex()
+    index.invalidate()
+    index.companies_for_service(services[0])
+    offres_service = dao.get_companies_by_service(services[0])
+    company_id = offres_service[-1]['id']   # la dernière du classement
+    client_id = donnees['clients'][0]
+    print(f"\nEntreprise {company_id} : rang {len(offres_service)} / {len(offres_service)} pour le service {services[0]}")
+
+    def nouvelle_intervention():
+        with db.transaction() as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT INTO bookings (client_id, company_id, service_type_id, prix_total, statut)
+                VALUES (%s, %s, %s, 300, 'CONFIRMEE')
+            """, (client_id, company_id, services[0]))
+            booking_id = cursor.lastrowid
+            cursor.close()
+        return booking_id
+
+    resultats = []
+    for _ in range(5):
+        booking_id = nouvelle_intervention()
+        resultats.append(("Intervention terminée", mesurer(lambda: booking_dao.complete_bookings([booking_id], "", "", ""))))
+        resultats.append(("Avis 5/5", mesurer(lambda: booking_dao.add_review(booking_id, client_id, 5, "Parfait"))))
+    resultats.append(("Abonnement Premium", mesurer(lambda: subscription_dao.subscribe_company(company_id, 3))))
+
+    print(f"{'Écriture (+ recalcul + index)':<30} | {'ms':>7}")
+    for nom, duree in resultats:
+        print(f"{nom:<30} | {duree:>7.2f}")
+    offres_service = dao.get_companies_by_service(services[0])
+    rang = next(i for i, l in enumerate(offres_service, 1) if l['id'] == company_id)
+    print(f"Rang de l'entreprise {company_id} après 5 interventions réussies, 5 avis 5/5 et Premium : {rang} / {len(offres_service)}")
+    print(f"Index en mémoire à jour (même top {K} que SQL, sans rechargement) : {'oui' if index_a_jour(dao, index, services) else 'NON'}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import sys
+import time
+import random
+import statistics
+from datetime import datetime, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from DAO.booking_dao import BookingDAO, COLONNES_RESUME
+
+"""
+Benchmark : historique des réservations de l'admin, page par page.
+On insère N réservations (200000 par défaut) puis on compare, pour des pages de plus en plus profondes :
+  1. OFFSET  : ORDER BY date_demande DESC, id DESC LIMIT 20 OFFSET k (la base parcourt les k lignes sautées)
+  2. curseur : BookingDAO.get_all_bookings_page (keyset sur (date_demande, id), coût constant)
+et le chargement complet de l'ancien get_all_bookings (toutes les lignes en mémoire).
+
+Lancement : python3 -m benchmarks.pagination_benchmark [nb_reservations]
+"""
+
+TAILLE_PAGE = 20
+
+SQL_OFFSET = f"""
+    SELECT {COLONNES_RESUME}, u.nom as client_nom, c.nom_entreprise, s.nom_service
+    FROM bookings b
+    JOIN users u ON b.client_id = u.id
+    JOIN companies c ON b.company_id = c.id
+    JOIN service_types s ON b.service_type_id = s.id
+    ORDER BY b.date_demande DESC, b.id DESC LIMIT %s OFFSET %s
+"""
+
+
+def remplir(donnees, nb, seed=11):
+    rng = random.Random(seed)
+    debut = datetime(2024, 1, 1)
+    lignes = [
+        (rng.choice(donnees['clients']), rng.choice(donnees['companies']),
+         (debut + timedelta(seconds=rng.randint(0, 86400 * 600))).strftime('%Y-%m-%d %H:%M:%S'))
+        for _ in range(nb)
+    ]
+    db = DatabaseConnection()
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.executemany("""
+            INSERT INTO bookings (client_id, company_id, service_type_id, prix_total, statut, date_demande)
+            VALUES (%s, %s, 1, 100, 'TERMINEE', %s)
+        """, lignes)
+        cursor.close()
+
+
+def chronometrer(fonction, repetitions=5):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees)
+
+
+def page_offset(db, offset):
+    with db.borrow() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(SQL_OFFSET, (TAILLE_PAGE, offset))
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def main():
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=200, nb_clients=2000)
+    remplir(donnees, nb)
+    dao = BookingDAO()
+
+    print(f"{nb} réservations, pages de {TAILLE_PAGE}")
+    print(f"{'Page':>6} | {'OFFSET (ms)':>11} | {'Curseur (ms)':>12}")
+    for numero in (1, 10, 100, 1000, nb // TAILLE_PAGE - 1):
+        offset = (numero - 1) * TAILLE_PAGE
+        # Le curseur d'une page = la dernière ligne de la page précédente (ce que la CLI garde en mémoire)
+        curseur = None
+        if offset:
+            precedente = page_offset(db, offset - 1)[0]
+            curseur = (precedente['date_demande'], precedente['id'])
+        attendu = [r['id'] for r in page_offset(db, offset)]
+        obtenu = [r['id'] for r in dao.get_all_bookings_page(TAILLE_PAGE, curseur)['rows']]
+        assert attendu == obtenu, f"page {numero} différente"
+
+        t_offset = chronometrer(lambda: page_offset(db, offset))
+        t_curseur = chronometrer(lambda: dao.get_all_bookings_page(TAILLE_PAGE, curseur))
+        print(f"{numero:>6} | {t_offset:>11.2f} | {t_curseur:>12.2f}")
+
+    debut = time.perf_counter()
+    tout = dao.get_all_bookings()
+    print(f"Ancien get_all_bookings : {len(tout)} lignes chargées en {(time.perf_counter() - debut) * 1000:.0f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import sys
+import time
+import random
+
+from benchmarks.fixtures import sqlite_database
+from Config.database import DatabaseConnection
+from DAO.company_dao import CompanyDAO
+from DAO.pricing_rule_dao import PricingRuleDAO, insert_rules
+from models.company import CatalogItem, ServiceType
+from services import pricing_strategy
+from services.catalog_service import CatalogService
+from services.gazetteer import VILLES_MAROC
+from services.pricing_strategy import PricingFactory, PricingRulesEngine
+
+"""
+Benchmark : moteur de règles de prix (table pricing_rules compilée en dictionnaire).
+  1. Les anciennes stratégies écrites en dur (Rabat x 1.20, Casablanca + 50 DH, sinon prix de base)
+     sont devenues des règles : on vérifie que les prix sont EXACTEMENT les mêmes qu'avant.
+  2. Choix de la règle d'un devis : le dictionnaire compilé vs un parcours de toutes les règles à chaque devis,
+     avec 2 puis plusieurs centaines de règles (le dictionnaire ne ralentit pas quand les règles s'ajoutent).
+  3. Rechargement à chaud : une règle ajoutée par l'application s'applique au devis suivant, une règle
+     ajoutée directement en SQL (autre programme) s'applique après le délai de relecture.
+  4. Paliers de quantité, catégories de service et périodes.
+
+Lancement : python3 -m benchmarks.pricing_rules [nb_regles]
+"""
+
+
+def ancien_prix(base, ville):
+    """Les anciennes classes RabatPricingStrategy / CasablancaPricingStrategy, recopiées telles quelles."""
+    ville_propre = ville.lower().strip()
+    if ville_propre == "rabat":
+        return base * 1.20
+    elif ville_propre == "casablanca" or ville_propre == "casa":
+        return base + 50
+    return base
+
+
+def regle_naive(regles, categories, ville, service_type_id, quantite, jour):
+    """Sans compilation : on teste toutes les règles actives à chaque devis et on garde la plus précise."""
+    meilleure, meilleure_cle = None, None
+    ville = ville.lower().strip()
+    for r in regles:
+        if r['ville'] and r['ville'].lower().strip() != ville:
+            continue
+        if r['category'] and categories.get(service_type_id) != r['category']:
+            continue
+        debut, fin = r['date_debut'] and str(r['date_debut']), r['date_fin'] and str(r['date_fin'])
+        if quantite < r['quantite_min'] or (debut and jour < debut) or (fin and jour > fin):
+            continue
+        cle = (not r['ville'], not r['category'], -r['quantite_min'], not (debut or fin), -r['priorite'], r['id'])
+        if meilleure_cle is None or cle < meilleure_cle:
+            meilleure, meilleure_cle = r, cle
+    return meilleure
+
+
+def regles_aleatoires(nb, categories, seed=8):
+    rng = random.Random(seed)
+    villes = [v[0] for v in VILLES_MAROC] + [None] * 5
+    regles = []
+    for i in range(nb):
+        debut = rng.choice([None, None, "2030-06-01"])
+        regles.append({'nom': f"Règle {i}", 'ville': rng.choice(villes), 'category': rng.choice(categories + [None] * 3),
+                       'quantite_min': rng.choice([1, 1, 10, 20, 50]), 'date_debut': debut,
+                       'date_fin': "2030-08-31" if debut else None, 'multiplicateur': rng.choice([0.9, 0.95, 1.05, 1.1]),
+                       'supplement': float(rng.choice([0, 0, 20, 80])), 'priorite': rng.randint(0, 3), 'is_active': True})
+    return regles
+
+
+def inserer_en_sql(regles):
+    """Écrit des règles directement dans la table, sans passer par PricingRuleDAO (comme un autre programme)."""
+    with DatabaseConnection().transaction() as connection:
+        cursor = connection.cursor()
+        insert_rules(cursor, regles)
+        cursor.close()
+
+
+def mesurer(fonction, devis):
+    debut = time.perf_counter()
+    for d in devis:
+        fonction(*d)
+    return (time.perf_counter() - debut) / len(devis) * 1e6
+
+
+def main():
+    nb_regles = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    db, _ = sqlite_database()
+    engine, rule_dao, catalog_service = PricingRulesEngine(), PricingRuleDAO(), CatalogService()
+    types = CompanyDAO().get_service_types()
+    categories = {t.id: t.category for t in types}
+    rng = random.Random(3)
+
+    # 1. Mêmes prix que les anciennes stratégies (règles créées par la migration)
+    print(f"Règles en base après migration : {', '.join(r['nom'] for r in rule_dao.get_rules())}")
+    # + les alias et fautes de frappe que l'annuaire des villes reconnaît, mais pas les anciennes stratégies
+    villes = [v[0] for v in VILLES_MAROC] + ["casa", "CASA", " RABAT ", "rabat", "Bouskoura", "Dar Bouazza", "dar el beida",
+                                             "Rabat.", "Râbat", "Rabat-", "Casablanca!", "Salé", "Sale", ""]
+    offres = [CatalogItem(id=i, prix_base=float(rng.randint(100, 800)), prix_par_unite=rng.choice([0.0, 12.5, 37.9]),
+                          service_type=rng.choice(types)) for i in range(200)]
+    identiques = all(
+        catalog_service.calculate_price(offre, q, ville)[0] == ancien_prix(offre.prix_base + offre.prix_par_unite * q, ville)
+        for offre in offres for q in (1, 7, 40) for ville in villes
+    )
+    print(f"Prix identiques aux anciennes stratégies ({len(offres) * 3 * len(villes)} devis) : {'oui' if identiques else 'NON'}")
+
+    # 2. Choix de la règle : dictionnaire compilé vs parcours de toutes les règles
+    devis = [(rng.choice(villes), rng.choice(types).id, rng.choice([1, 5, 10, 30, 60]), rng.choice(["2030-01-15", "2030-07-14"]))
+             for _ in range(20000)]
+    print(f"\n{'Règles actives':>14} | {'parcours (µs/devis)':>20} | {'compilé (µs/devis)':>19} | même règle")
+    for ajout in ([], regles_aleatoires(nb_regles, sorted(set(categories.values())))):
+        if ajout:
+            inserer_en_sql(ajout)
+            engine.invalidate()
+        regles = rule_dao.get_rules()
+        PricingFactory.get_strategy("")   # compilation (une fois, hors mesure)
+        meme_regle = all(
+            PricingFactory.get_strategy(*d).get_description() == ((regle_naive(regles, categories, *d) or {}).get('nom') or "Tarif Standard (Sans frais supp.)")
+            for d in devis[:2000]
+        )
+        naif = mesurer(lambda *d: regle_naive(regles, categories, *d), devis[:2000])
+        compile = mesurer(PricingFactory.get_strategy, devis)
+        print(f"{len(regles):>14} | {naif:>20.2f} | {compile:>19.2f} | {'oui' if meme_regle else 'NON'}")
+
+    # 3. Rechargement à chaud
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM pricing_rules WHERE nom LIKE 'Règle %'")
+        cursor.close()
+    engine.invalidate()
+    item = CatalogItem(prix_base=1000.0, prix_par_unite=0.0, service_type=types[0])
+    avant = catalog_service.calculate_price(item, 1, "Marrakech")
+    rule_id = rule_dao.add_rule("Marrakech -10 %", multiplicateur=0.9, ville="Marrakech")
+    apres = catalog_service.calculate_price(item, 1, "Marrakech")
+    print(f"\nRègle ajoutée par l'application : Marrakech {avant[0]:.2f} -> {apres[0]:.2f} DH ({apres[1]}) au devis suivant")
+
+    pricing_strategy.DELAI_RECHARGEMENT_S = 0.2
+    engine.invalidate()
+    PricingFactory.get_strategy("Agadir")   # recharge maintenant, prochaine relecture dans 0.2 s
+    inserer_en_sql([{'nom': "Agadir +100 DH", 'ville': "Agadir", 'category': None, 'quantite_min': 1, 'date_debut': None,
+                     'date_fin': None, 'multiplicateur': 1.0, 'supplement': 100.0, 'priorite': 0, 'is_active': True}])
+    tout_de_suite = catalog_service.calculate_price(item, 1, "Agadir")[0]
+    time.sleep(0.25)
+    plus_tard = catalog_service.calculate_price(item, 1, "Agadir")[0]
+    print(f"Règle ajoutée en SQL par un autre programme : Agadir {tout_de_suite:.2f} DH tout de suite, "
+          f"{plus_tard:.2f} DH après le délai de relecture")
+    rule_dao.set_rule_active(rule_id, False)
+    print(f"Règle désactivée : Marrakech {catalog_service.calculate_price(item, 1, 'Marrakech')[0]:.2f} DH")
+
+    # 4. Paliers, catégories et périodes
+    categorie = types[0].category
+    rule_dao.add_rule("Rabat, 20 panneaux et plus", multiplicateur=1.08, ville="Rabat", quantite_min=20)
+    rule_dao.add_rule(f"{categorie} : été", multiplicateur=1.1, category=categorie, date_debut="2030-06-01", date_fin="2030-08-31")
+    autre = next((t for t in types if t.category != categorie), None)
+    print(f"\nRabat, 10 vs 20 unités : {catalog_service.calculate_price(item, 10, 'Rabat')[1]} | "
+          f"{catalog_service.calculate_price(item, 20, 'Rabat')[1]}")
+    print(f"{categorie}, Tanger, janvier vs juillet : {catalog_service.calculate_price(item, 1, 'Tanger', '2030-01-10')[1]} | "
+          f"{catalog_service.calculate_price(item, 1, 'Tanger', '2030-07-10')[1]}")
+    if autre:
+        item_autre = CatalogItem(prix_base=1000.0, prix_par_unite=0.0, service_type=ServiceType(id=autre.id))
+        print(f"{autre.category}, Tanger, juillet : {catalog_service.calculate_price(item_autre, 1, 'Tanger', '2030-07-10')[1]}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import sys
+import time
+import random
+import statistics
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from benchmarks.marketplace_ranking import remplir_historique, latences, K
+from DAO.booking_dao import BookingDAO, COLONNES_NOTES
+from DAO.company_dao import CompanyDAO
+from services.catalog_index import CatalogIndex
+
+"""
+Benchmark : notes affichées sur les cartes du catalogue (~100 000 avis).
+Pour les k premières offres d'un service, on compare :
+  1. l'ancienne méthode : AVG() et COUNT() sur tous les avis de chaque entreprise, à chaque affichage
+  2. les compteurs (company_ratings, catalog_ratings) tenus à jour par BookingDAO.add_review
+Puis on mesure le coût d'un nouvel avis (compteurs + score, dans la même transaction), on vérifie
+que les compteurs sont identiques à un recalcul complet (rebuild_ratings) et que l'index en mémoire
+affiche la nouvelle note sans être rechargé.
+
+Lancement : python3 -m benchmarks.rating_aggregates [nb_avis]
+"""
+
+
+def notes_en_direct(db, service_type_id, k):
+    """Ancienne méthode : la moyenne de chaque entreprise est recalculée sur tous ses avis."""
+    with db.borrow() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT c.*, cat.id as catalog_id, cat.prix_base, cat.score, sp.nom as plan_nom,
+                   (SELECT COUNT(*) FROM reviews r JOIN bookings b ON b.id = r.booking_id
+                    WHERE b.company_id = c.id) as nb_avis,
+                   (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r JOIN bookings b ON b.id = r.booking_id
+                    WHERE b.company_id = c.id) as somme_notes
+            FROM companies c
+            JOIN catalog cat ON c.id = cat.company_id
+            LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+            WHERE cat.service_type_id = %s AND c.is_verified = TRUE AND c.subscription_expires_at >= CURDATE()
+            ORDER BY cat.score DESC, cat.id DESC LIMIT %s
+        """, (service_type_id, k))
+        lignes = cursor.fetchall()
+        cursor.close()
+    return lignes
+
+
+def relier_offres(db):
+    """Les interventions générées n'ont pas de catalog_id : on les relie à l'offre (entreprise, service)."""
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            UPDATE bookings SET catalog_id = (
+                SELECT cat.id FROM catalog cat
+                WHERE cat.company_id = bookings.company_id AND cat.service_type_id = bookings.service_type_id
+            ) WHERE catalog_id IS NULL
+        """)
+        cursor.close()
+
+
+def notes(lignes):
+    return [(l['catalog_id'], l['nb_avis'], l['somme_notes']) for l in lignes]
+
+
+def photo_compteurs(db):
+    """Contenu des deux tables de compteurs (pour comparer avec un recalcul complet)."""
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT company_id, {COLONNES_NOTES} FROM company_ratings ORDER BY company_id")
+        entreprises = cursor.fetchall()
+        cursor.execute(f"SELECT catalog_id, company_id, {COLONNES_NOTES} FROM catalog_ratings ORDER BY catalog_id")
+        offres = cursor.fetchall()
+        cursor.close()
+    return entreprises, offres
+
+
+def main():
+    nb_avis_vise = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=2000, nb_clients=200, offres_par_entreprise=5)
+    # ~45 % des interventions reçoivent un avis (voir remplir_historique)
+    nb_resa, nb_avis = remplir_historique(donnees, int(nb_avis_vise / 0.45))
+    relier_offres(db)
+    dao, booking_dao = CompanyDAO(), BookingDAO()
+    services = donnees['service_types']
+
+    debut = time.perf_counter()
+    entreprises, offres = booking_dao.rebuild_ratings()
+    dao.refresh_scores()
+    print(f"{len(donnees['catalog'])} offres, {nb_resa} interventions, {nb_avis} avis - "
+          f"compteurs recalculés ({entreprises} entreprises, {offres} offres) en {time.perf_counter() - debut:.2f} s")
+
+    # 1. Cartes du top k : AVG() à chaque affichage vs compteurs
+    identiques = all(notes(notes_en_direct(db, st, K)) == notes(dao.get_companies_by_service(st, limit=K)) for st in services)
+    print(f"\nTop {K} par service : mêmes notes avec les deux méthodes : {'oui' if identiques else 'NON'}")
+    print(f"{'Méthode':<34} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    for nom, fonction in (("AVG() sur tous les avis", lambda st: notes_en_direct(db, st, K)),
+                          ("Compteurs company_ratings", lambda st: dao.get_companies_by_service(st, limit=K))):
+        p50, p95 = latences(fonction, services)
+        print(f"{nom:<34} | {p50:>9.3f} | {p95:>9.3f}")
+
+    # 2. Nouveaux avis : compteurs + score dans la même transaction, index en mémoire tenu à jour
+    index = CatalogIndex()
+    index.invalidate()
+    index.companies_for_service(services[0])
+    rng = random.Random(8)
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        reservations = []
+        for _ in range(200):
+            company_id, st, *_ = rng.choice(donnees['catalog'])
+            reservations.append((rng.choice(donnees['clients']), company_id, st, 300))
+        cursor.executemany("""
+            INSERT INTO bookings (client_id, company_id, service_type_id, prix_total, statut)
+            VALUES (%s, %s, %s, %s, 'TERMINEE')
+        """, reservations)
+        cursor.close()
+    relier_offres(db)
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT id, client_id, company_id FROM bookings ORDER BY id DESC LIMIT 200")
+        a_noter = cursor.fetchall()
+        cursor.close()
+
+    durees = []
+    for booking_id, client_id, _ in a_noter:
+        debut = time.perf_counter()
+        ok, message = booking_dao.add_review(booking_id, client_id, rng.randint(1, 5), "ok")
+        durees.append((time.perf_counter() - debut) * 1000)
+        if not ok:
+            print(f" Avis refusé : {message}")
+    durees.sort()
+    print(f"\nadd_review (avis + compteurs + score) : p50 {statistics.median(durees):.2f} ms | p95 {durees[int(len(durees) * 0.95)]:.2f} ms")
+
+    # 3. Les compteurs tenus à jour avis par avis = un recalcul complet
+    avant = photo_compteurs(db)
+    booking_dao.rebuild_ratings()
+    print(f"Compteurs identiques à un recalcul complet après {len(a_noter)} avis : {'oui' if photo_compteurs(db) == avant else 'NON'}")
+
+    company_id = a_noter[0][2]
+    resume = booking_dao.get_rating_summary(company_id)
+    print(f"Entreprise {company_id} : {resume['note_moyenne']}/5 sur {resume['nb_avis']} avis, répartition {resume['histogramme']}")
+    service = next(st for cid, st, *_ in donnees['catalog'] if cid == company_id)
+    carte = next((l for l in index.companies_for_service(service) if l['id'] == company_id), None)
+    print(f"Index en mémoire à jour (même nombre d'avis, sans rechargement) : {'oui' if carte and carte['nb_avis'] == resume['nb_avis'] else 'NON'}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
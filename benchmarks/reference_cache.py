@@ -0,0 +1,87 @@
+import sys
+import time
+import statistics
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from DAO.company_dao import CompanyDAO
+from DAO.subscription_dao import SubscriptionDAO
+from utils.cache import TTLCache, cache_stats
+
+"""
+Benchmark : données de référence lues à chaque affichage de menu (catégories de services, forfaits).
+On compare, pour N "affichages" (get_service_types + get_all_plans + get_plan_by_id) :
+  1. la lecture SQL à chaque fois (méthode d'origine, sans le décorateur @cached)
+  2. la lecture avec le cache TTL + LRU (utils/cache.py)
+Puis on vérifie l'invalidation : une catégorie ajoutée par add_service_type est visible
+immédiatement, et subscribe_company (qui n'écrit que dans companies) garde les forfaits en cache.
+Enfin, on affiche les compteurs (hits / misses) tels que la surveillance les voit (cache_stats()).
+
+Lancement : python3 -m benchmarks.reference_cache [nb_affichages]
+"""
+
+
+def affichage(company_dao, subscription_dao, sans_cache):
+    if sans_cache:
+        # __wrapped__ : la méthode d'origine, avant le décorateur
+        types = CompanyDAO.get_service_types.__wrapped__(company_dao)
+        plans = SubscriptionDAO.get_all_plans.__wrapped__(subscription_dao)
+        plan = SubscriptionDAO.get_plan_by_id.__wrapped__(subscription_dao, plans[0].id)
+    else:
+        types = company_dao.get_service_types()
+        plans = subscription_dao.get_all_plans()
+        plan = subscription_dao.get_plan_by_id(plans[0].id)
+    return types, plans, plan
+
+
+def mesurer(fonction, n):
+    durees = []
+    for _ in range(n):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return statistics.median(durees), durees[int(n * 0.95)], sum(durees)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=3, nb_clients=1)
+    company_dao, subscription_dao = CompanyDAO(), SubscriptionDAO()
+
+    print(f"{n} affichages de menu (catégories + forfaits + forfait courant)")
+    print(f"{'Lecture':<14} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'Total (ms)':>10}")
+    for nom, sans_cache in (("SQL", True), ("Cache", False)):
+        p50, p95, total = mesurer(lambda: affichage(company_dao, subscription_dao, sans_cache), n)
+        print(f"{nom:<14} | {p50:>9.4f} | {p95:>9.4f} | {total:>10.1f}")
+
+    # Invalidation après écriture
+    avant = len(company_dao.get_service_types())
+    company_dao.add_service_type("Bench Catégorie", "Ajoutée par le benchmark", "Autre")
+    apres = len(company_dao.get_service_types())
+    print(f"\nadd_service_type : {avant} -> {apres} catégories (visible sans attendre le TTL : {'oui' if apres == avant + 1 else 'NON'})")
+
+    plans = subscription_dao.get_all_plans()
+    for plan in plans:
+        subscription_dao.get_plan_by_id(plan.id)
+    taille_avant = subscription_dao.get_plan_by_id.cache.stats()['size']
+    subscription_dao.subscribe_company(donnees['companies'][0], plans[-1].id)
+    taille_apres = subscription_dao.get_plan_by_id.cache.stats()['size']
+    print(f"subscribe_company : forfaits en cache {taille_avant} -> {taille_apres} (les forfaits eux-mêmes n'ont pas changé)")
+
+    # TTL et LRU sur un petit cache
+    cache = TTLCache("test", ttl=0.05, maxsize=2)
+    cache.put("a", 1); cache.put("b", 2); cache.get("a"); cache.put("c", 3)
+    lru_ok = cache.get("b") == (False, None) and cache.get("a") == (True, 1)
+    time.sleep(0.06)
+    ttl_ok = cache.get("a") == (False, None)
+    print(f"LRU (la moins récemment utilisée part) : {'ok' if lru_ok else 'NON'} | expiration TTL : {'ok' if ttl_ok else 'NON'}")
+
+    print(f"\n{'Cache':<32} | {'Hits':>6} | {'Misses':>6} | {'Taux':>5} | {'Invalidations':>13}")
+    for nom, stats in cache_stats().items():
+        print(f"{nom:<32} | {stats['hits']:>6} | {stats['misses']:>6} | {stats['hit_rate']:>5.0%} | {stats['invalidations']:>13}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import sys
+import time
+import random
+import threading
+from datetime import date, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from DAO.booking_dao import BookingDAO, SlotAlreadyBookedError, STATUTS_LIBERES
+
+"""
+Benchmark de concurrence : N clients (50 par défaut) réservent EN MÊME TEMPS chez la même entreprise.
+Chaque client fait comme la CLI : il lit les créneaux occupés, en choisit un libre, puis réserve.
+  1. naïf     : lecture puis INSERT simple dans bookings (l'ancien create_booking)
+  2. atomique : BookingDAO.create_booking (réclamation du créneau sur la clé unique de booking_slots)
+On compte les réservations réussies, les conflits détectés, les DOUBLES réservations restées
+en base (doit être 0 en mode atomique) et le débit (tentatives/s).
+
+Lancement : python3 -m benchmarks.slot_contention [nb_clients] [essais_par_client] [--mysql]
+"""
+
+HEURES = [f"{h:02d}:00" for h in range(8, 18)]
+
+
+def doubles_reservations(db, company_id):
+    """Nombre de créneaux occupés par plus d'une réservation active."""
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM (
+                SELECT rdv_date, rdv_heure FROM bookings
+                WHERE company_id = %s AND statut NOT IN {STATUTS_LIBERES}
+                GROUP BY rdv_date, rdv_heure HAVING COUNT(*) > 1
+            ) doublons
+        """, (company_id,))
+        nombre = cursor.fetchone()[0]
+        cursor.close()
+    return nombre
+
+
+def reserver_naif(db, booking_dao, client_id, company_id, jour, heure):
+    """Ancien comportement : on fait confiance à la lecture faite juste avant."""
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            INSERT INTO bookings (client_id, company_id, service_type_id, quantite, prix_total, description_client, rdv_date, rdv_heure, mode_paiement, statut)
+            VALUES (%s, %s, 1, 1, 100, 'contention', %s, %s, 'CASH', 'EN_ATTENTE')
+        """, (client_id, company_id, jour, heure))
+        db.commit(connection)
+        cursor.close()
+    return True
+
+
+def reserver_atomique(db, booking_dao, client_id, company_id, jour, heure):
+    try:
+        return booking_dao.create_booking(client_id, company_id, 1, None, 1, 100, 'contention', jour, heure, 'CASH') is not None
+    except SlotAlreadyBookedError:
+        return False
+
+
+def client(reserver, db, client_id, company_id, jours, nb_essais, depart, compteurs, rng):
+    booking_dao = BookingDAO()
+    depart.wait()
+    for _ in range(nb_essais):
+        jour = rng.choice(jours)
+        libres = [h for h in HEURES if h not in booking_dao.get_booked_slots(company_id, jour)]
+        if not libres:
+            continue
+        ok = reserver(db, booking_dao, client_id, company_id, jour, rng.choice(libres))
+        with compteurs['lock']:
+            compteurs['essais'] += 1
+            compteurs['succes' if ok else 'conflits'] += 1
+
+
+def lancer(nom, reserver, db, clients, company_id, jours, nb_essais):
+    compteurs = {'lock': threading.Lock(), 'essais': 0, 'succes': 0, 'conflits': 0}
+    depart = threading.Barrier(len(clients) + 1)
+    threads = [
+        threading.Thread(target=client, args=(reserver, db, c, company_id, jours, nb_essais, depart, compteurs, random.Random(i)))
+        for i, c in enumerate(clients)
+    ]
+    for t in threads:
+        t.start()
+    # Tous les clients démarrent au même instant
+    depart.wait()
+    debut = time.perf_counter()
+    for t in threads:
+        t.join()
+    duree = time.perf_counter() - debut
+    return nom, compteurs, duree, doubles_reservations(db, company_id)
+
+
+def main():
+    arguments = [a for a in sys.argv[1:] if not a.startswith('--')]
+    nb_clients = int(arguments[0]) if arguments else 50
+    nb_essais = int(arguments[1]) if len(arguments) > 1 else 5
+
+    if '--mysql' in sys.argv:
+        from Config.settings import Config
+        from utils.migrate_db import run_migrations
+        db = DatabaseConnection()
+        db.connect(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME, pool_min=1, pool_max=nb_clients)
+        run_migrations(db)
+    else:
+        db, _ = sqlite_database(pool_max=nb_clients)
+
+    donnees = seed_marketplace(nb_companies=2, nb_clients=nb_clients)
+    # 3 jours x 10 heures = 30 créneaux pour nb_clients x nb_essais tentatives : forte contention
+    jours = [(date(2099, 1, 1) + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(3)]
+
+    resultats = [
+        lancer("naïf (lecture puis INSERT)", reserver_naif, db, donnees['clients'], donnees['companies'][0], jours, nb_essais),
+        lancer("atomique (booking_slots)", reserver_atomique, db, donnees['clients'], donnees['companies'][1], jours, nb_essais),
+    ]
+
+    print(f"{nb_clients} clients en parallèle sur la même entreprise, {len(jours) * len(HEURES)} créneaux")
+    print(f"{'Mode':<28} | {'Essais':>6} | {'Réussies':>8} | {'Conflits':>8} | {'Doublons':>8} | {'Essais/s':>8}")
+    for nom, c, duree, doublons in resultats:
+        print(f"{nom:<28} | {c['essais']:>6} | {c['succes']:>8} | {c['conflits']:>8} | {doublons:>8} | {c['essais'] / duree:>8.1f}")
+    print(f"Pool : {db.get_pool_metrics()}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
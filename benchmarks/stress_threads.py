@@ -0,0 +1,149 @@
+import sys
+import time
+import uuid
+import threading
+from datetime import date, timedelta
+
+from Config.database import DatabaseConnection
+from models.user import UserFactory
+from models.company import Company
+from DAO.user_dao import UserDAO
+from DAO.company_dao import CompanyDAO
+from DAO.booking_dao import BookingDAO
+from benchmarks.fixtures import sqlite_database
+
+"""
+Test de charge multi-threads de la couche DAO.
+Chaque thread simule une session client qui enchaîne create_booking / get_booked_slots
+sur SA propre date (réservée à ce thread). Si deux sessions se "mélangent" (cross-talk :
+mauvais lastrowid, créneaux d'un autre thread, connexion partagée...), on le détecte.
+Le débit (opérations/s) est affiché pour chaque nombre de threads.
+
+Lancement : python3 -m benchmarks.stress_threads [ops_par_thread] [--sqlite]
+(--sqlite : base SQLite jetable au lieu du serveur MySQL configuré)
+"""
+
+NB_THREADS = [1, 2, 4, 8, 16]
+HEURES = [f"{h:02d}:00" for h in range(24)]
+
+
+def preparer_donnees(nb_clients):
+    """Crée une entreprise et des clients dédiés au test (supprimés à la fin)."""
+    user_dao = UserDAO()
+    company_dao = CompanyDAO()
+    tag = uuid.uuid4().hex[:8]
+
+    proprio = user_dao.create(UserFactory.create_user("ENTREPRISE", f"Stress {tag}", f"stress-{tag}@optivolt.test", "x", "0600000000"))
+    entreprise = company_dao.create_company(Company(user_id=proprio.id, nom_entreprise=f"Stress {tag}", is_verified=True, subscription_plan_id=1))
+
+    clients = []
+    for i in range(nb_clients):
+        client = UserFactory.create_user("CLIENT", f"Client {tag}-{i}", f"stress-{tag}-{i}@optivolt.test", "x", f"07{i:08d}")
+        clients.append(user_dao.create(client))
+
+    return tag, proprio, entreprise, clients
+
+
+def nettoyer(tag, proprio, clients):
+    """Supprime les réservations puis les comptes créés par le test."""
+    db = DatabaseConnection()
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM bookings WHERE description_client LIKE %s", (f"stress-{tag}-%",))
+        connection.commit()
+        cursor.close()
+    user_dao = UserDAO()
+    for client in clients:
+        user_dao.delete_user(client.id)
+    user_dao.delete_user(proprio.id)
+
+
+def session(index, tag, client, company_id, jour, nb_ops, erreurs):
+    """Une session client : réserve nb_ops heures sur 'jour' et vérifie chaque réponse."""
+    booking_dao = BookingDAO()
+    db = DatabaseConnection()
+    date_str = jour.strftime('%Y-%m-%d')
+    mes_heures = []
+
+    for i in range(nb_ops):
+        heure = HEURES[i % len(HEURES)]
+        marque = f"stress-{tag}-{index}-{i}"
+        booking_id = booking_dao.create_booking(client.id, company_id, 1, None, 1, 100.0, marque, date_str, heure, 'CASH')
+        if not booking_id:
+            erreurs.append(f"thread {index}: création #{i} échouée")
+            continue
+        mes_heures.append(heure)
+
+        # 1. L'ID renvoyé doit pointer sur NOTRE ligne (pas celle d'un autre thread)
+        with db.borrow() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT client_id, description_client FROM bookings WHERE id = %s", (booking_id,))
+            ligne = cursor.fetchone()
+            cursor.close()
+        if not ligne or ligne['client_id'] != client.id or ligne['description_client'] != marque:
+            erreurs.append(f"thread {index}: lastrowid {booking_id} ne correspond pas ({ligne})")
+
+        # 2. Les créneaux de 'jour' ne doivent contenir que nos propres heures
+        occupes = booking_dao.get_booked_slots(company_id, date_str)
+        if sorted(occupes) != sorted(mes_heures):
+            erreurs.append(f"thread {index}: créneaux inattendus {occupes} (attendu {mes_heures})")
+
+
+def lancer(nb_threads, tag, clients, company_id, nb_ops, premier_jour):
+    """Lance nb_threads sessions en parallèle et retourne (durée, erreurs)."""
+    erreurs = []
+    threads = []
+    for i in range(nb_threads):
+        jour = premier_jour + timedelta(days=i)
+        t = threading.Thread(target=session, args=(i, tag, clients[i], company_id, jour, nb_ops, erreurs))
+        threads.append(t)
+
+    debut = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - debut, erreurs
+
+
+def main():
+    arguments = [a for a in sys.argv[1:] if not a.startswith('--')]
+    nb_ops = int(arguments[0]) if arguments else 20
+    max_threads = max(NB_THREADS)
+
+    if '--sqlite' in sys.argv:
+        db, _ = sqlite_database(pool_max=max_threads)
+    else:
+        from Config.settings import Config
+        db = DatabaseConnection()
+        db.connect(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME, pool_min=1, pool_max=max_threads)
+
+    tag, proprio, entreprise, clients = preparer_donnees(max_threads)
+    # Dates lointaines pour ne jamais croiser de vraies réservations
+    premier_jour = date(2099, 1, 1)
+    total_erreurs = 0
+
+    try:
+        print(f"{'Threads':>8} | {'Ops':>6} | {'Durée (s)':>9} | {'Ops/s':>8} | Erreurs")
+        for n in NB_THREADS:
+            duree, erreurs = lancer(n, tag, clients, entreprise.id, nb_ops, premier_jour)
+            # Chaque opération = 1 insert + 1 lecture de contrôle + 1 get_booked_slots
+            ops = n * nb_ops * 3
+            print(f"{n:>8} | {ops:>6} | {duree:>9.3f} | {ops / duree:>8.1f} | {len(erreurs)}")
+            for e in erreurs[:5]:
+                print(f"    ! {e}")
+            total_erreurs += len(erreurs)
+            premier_jour += timedelta(days=n)
+    finally:
+        nettoyer(tag, proprio, clients)
+        print(f"Pool : {db.get_pool_metrics()}")
+        db.close()
+
+    if total_erreurs:
+        print(f"ÉCHEC : {total_erreurs} incohérence(s) détectée(s).")
+        sys.exit(1)
+    print("OK : aucune interférence entre sessions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import sys
+import random
+from datetime import date, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from Config.database import DatabaseConnection
+from services.sweeper_service import SweeperService
+
+"""
+Benchmark du nettoyage périodique (services/sweeper_service.py).
+On crée N réservations (50000 par défaut) dont la moitié est restée EN_ATTENTE avec une date passée,
+et 1000 entreprises dont un tiers a un abonnement expiré, puis :
+  1. balayage interrompu (max 5 lots) puis repris : la reprise continue après le dernier ID traité ;
+  2. balayages complets avec différentes tailles de lot : lignes/s et durée du plus long lot
+     (= durée maximale pendant laquelle les lignes sont verrouillées).
+
+Lancement : python3 -m benchmarks.sweeper_benchmark [nb_reservations]
+"""
+
+
+def remplir(donnees, nb, seed=5):
+    """Insère nb réservations (moitié périmées EN_ATTENTE) et expire un tiers des entreprises."""
+    rng = random.Random(seed)
+    aujourd_hui = date.today()
+    lignes = {}
+    while len(lignes) < nb:
+        perimee = rng.random() < 0.5
+        jour = aujourd_hui + timedelta(days=rng.randint(-60, -1) if perimee else rng.randint(1, 60))
+        statut = 'EN_ATTENTE' if perimee else rng.choice(['EN_ATTENTE', 'PAYEE', 'CONFIRMEE'])
+        cle = (rng.choice(donnees['companies']), jour.strftime('%Y-%m-%d'), f"{rng.randint(7, 18):02d}:00")
+        lignes[cle] = (rng.choice(donnees['clients']),) + cle + (statut,)
+
+    db = DatabaseConnection()
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.executemany("""
+            INSERT INTO bookings (client_id, company_id, service_type_id, prix_total, rdv_date, rdv_heure, statut)
+            VALUES (%s, %s, 1, 100, %s, %s, %s)
+        """, list(lignes.values()))
+        cursor.execute("""
+            INSERT INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id)
+            SELECT company_id, rdv_date, rdv_heure, id FROM bookings
+        """)
+        expirees = donnees['companies'][::3]
+        cursor.executemany(
+            "UPDATE companies SET subscription_expires_at = %s WHERE id = %s",
+            [((aujourd_hui - timedelta(days=5)).strftime('%Y-%m-%d'), c) for c in expirees]
+        )
+        cursor.close()
+
+
+def restaurer(db):
+    """Remet les réservations annulées par le balayage précédent à EN_ATTENTE (pour rejouer)."""
+    with db.transaction() as connection:
+        cursor = connection.cursor()
+        cursor.execute("UPDATE bookings SET statut = 'EN_ATTENTE' WHERE statut = 'ANNULEE'")
+        cursor.execute("DELETE FROM booking_slots")
+        cursor.execute("INSERT INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id) SELECT company_id, rdv_date, rdv_heure, id FROM bookings")
+        cursor.execute("UPDATE companies SET is_expired = FALSE")
+        cursor.close()
+
+
+def main():
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    db, _ = sqlite_database()
+    donnees = seed_marketplace(nb_companies=1000, nb_clients=500)
+    remplir(donnees, nb)
+    sweeper = SweeperService()
+
+    print(f"{nb} réservations, 1000 entreprises")
+    interrompu = sweeper.sweep_stale_bookings(chunk_size=200, pause_s=0, max_chunks=5)
+    reprise = sweeper.sweep_stale_bookings(chunk_size=200, pause_s=0)
+    print(f"Interruption après {interrompu['chunks']} lots ({interrompu['rows']} lignes), "
+          f"reprise après l'ID {reprise['reprise_apres_id']} : {reprise['rows']} lignes, terminé={reprise['termine']}")
+
+    print(f"{'Tâche':<18} | {'Lot':>5} | {'Lignes':>7} | {'Durée (s)':>9} | {'Lignes/s':>8} | {'Lot max (ms)':>12}")
+    for taille in (50, 200, 1000, 5000):
+        restaurer(db)
+        for r in sweeper.run_once(chunk_size=taille, pause_s=0):
+            print(f"{r['job']:<18} | {taille:>5} | {r['rows']:>7} | {r['duree_s']:>9.2f} | {r['rows_per_s']:>8.0f} | {r['max_lot_ms']:>12.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
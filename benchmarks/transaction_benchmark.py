@@ -0,0 +1,95 @@
+import sys
+import time
+import random
+from datetime import date, timedelta
+
+from benchmarks.fixtures import sqlite_database, seed_marketplace
+from DAO.booking_dao import BookingDAO, SlotAlreadyBookedError
+from services.catalog_service import CatalogService
+from utils.logger import Logger
+
+"""
+Benchmark : un COMMIT par requête (ancien comportement) vs une unité de travail par réservation.
+Une réservation payée en ligne = INSERT de la réservation + UPDATE du statut à 'PAYEE'.
+  1. avant : chaque DAO valide lui-même (2 COMMIT par réservation)
+  2. après : CatalogService.create_booking_request() regroupe tout dans db.transaction() (1 COMMIT)
+On affiche le nombre de COMMIT par réservation et le débit (réservations/s).
+La base SQLite est un vrai fichier (synchronous=FULL) : chaque COMMIT coûte une écriture disque.
+Le journal (utils/logger.py) est coupé pendant les mesures : CatalogService y écrit deux lignes par
+réservation, que l'ancien parcours n'écrit pas ; on ne compare ainsi que le travail fait en base.
+
+Lancement : python3 -m benchmarks.transaction_benchmark [nb_reservations]
+"""
+
+
+def tirer_reservations(donnees, nb, seed):
+    """Prépare nb réservations (client, entreprise, offre, date, heure) reproductibles."""
+    rng = random.Random(seed)
+    offres = donnees['catalog']
+    jours = [(date.today() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 366)]
+    reservations = []
+    for _ in range(nb):
+        company_id, service_type_id, prix_base = offres[rng.randrange(len(offres))][:3]
+        reservations.append((rng.choice(donnees['clients']), company_id, service_type_id, prix_base,
+                             rng.choice(jours), f"{rng.randint(8, 17):02d}:00"))
+    return reservations
+
+
+def avant(booking_dao, reservations):
+    """Ancien parcours : chaque écriture est validée immédiatement par le DAO."""
+    for client_id, company_id, service_type_id, prix, jour, heure in reservations:
+        try:
+            booking_id = booking_dao.create_booking(client_id, company_id, service_type_id, None, 1, prix, "bench", jour, heure, 'ONLINE')
+        except SlotAlreadyBookedError:
+            continue
+        if booking_id:
+            booking_dao.update_status(booking_id, 'PAYEE')
+
+
+def apres(catalog_service, reservations):
+    """Nouveau parcours : une transaction (un seul COMMIT) par réservation."""
+    for client_id, company_id, service_type_id, prix, jour, heure in reservations:
+        try:
+            catalog_service.create_booking_request(client_id, company_id, service_type_id, None, 1, "bench", prix, jour, heure, 'ONLINE')
+        except SlotAlreadyBookedError:
+            continue
+
+
+def mesurer(db, nom, fonction, *args):
+    journal = Logger().logger
+    journal.disabled = True
+    try:
+        commits_avant = db.commit_count
+        debut = time.perf_counter()
+        fonction(*args)
+        duree = time.perf_counter() - debut
+    finally:
+        journal.disabled = False
+    return nom, duree, db.commit_count - commits_avant
+
+
+def main():
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    db, path = sqlite_database()
+    with db.borrow() as connection:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA synchronous = FULL")
+        cursor.close()
+    donnees = seed_marketplace(nb_companies=200, nb_clients=200)
+    print(f"Base SQLite : {path}")
+
+    resultats = [
+        mesurer(db, "avant (commit par requête)", avant, BookingDAO(), tirer_reservations(donnees, nb, 1)),
+        mesurer(db, "après (unité de travail)", apres, CatalogService(), tirer_reservations(donnees, nb, 2)),
+    ]
+
+    print(f"{nb} réservations payées en ligne par mode")
+    print(f"{'Mode':<28} | {'Durée (s)':>9} | {'Commits/résa':>12} | {'Résa/s':>8}")
+    for nom, duree, commits in resultats:
+        print(f"{nom:<28} | {duree:>9.3f} | {commits / nb:>12.2f} | {nb / duree:>8.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
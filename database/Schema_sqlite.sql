@@ -0,0 +1,139 @@
+-- Traduction SQLite de database/Schema.sql (mêmes tables, mêmes données initiales).
+-- Différences avec MySQL :
+--   INT AUTO_INCREMENT PRIMARY KEY -> INTEGER PRIMARY KEY AUTOINCREMENT
+--   ENUM(...)                      -> TEXT + CHECK (... IN (...))
+--   BOOLEAN / FLOAT / DATE         -> stockés en INTEGER / REAL / TEXT ISO par SQLite
+PRAGMA foreign_keys = ON;
+
+-- Utilisateurs (Client, Entreprise, Admin)
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    role TEXT NOT NULL CHECK (role IN ('CLIENT', 'ENTREPRISE', 'ADMIN')),
+    nom VARCHAR(100) NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    telephone VARCHAR(20),
+    password_hash VARCHAR(255) NOT NULL,
+    ville VARCHAR(50),
+    adresse TEXT,
+    is_banned BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Plans d'abonnement
+CREATE TABLE subscription_plans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom VARCHAR(50) NOT NULL,
+    prix_mensuel FLOAT NOT NULL,
+    duree_jours INT DEFAULT 30,
+    max_services INT DEFAULT 5,
+    has_scheduling BOOLEAN DEFAULT FALSE,
+    has_priority_support BOOLEAN DEFAULT FALSE,
+    has_analytics BOOLEAN DEFAULT FALSE,
+    description TEXT
+);
+
+-- Entreprises
+CREATE TABLE companies (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL,
+    nom_entreprise VARCHAR(100) NOT NULL,
+    description TEXT,
+    ville VARCHAR(50),
+    contact_phone VARCHAR(20),
+    contact_email VARCHAR(100),
+    horaire_debut VARCHAR(5) DEFAULT '08:00',
+    horaire_fin VARCHAR(5) DEFAULT '18:00',
+    jours_travail VARCHAR(50) DEFAULT 'Lun-Sam',
+    is_verified BOOLEAN DEFAULT FALSE,
+    subscription_plan_id INT,
+    subscription_start DATE,
+    subscription_expires_at DATE,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY (subscription_plan_id) REFERENCES subscription_plans (id)
+);
+
+-- Types de Services (Catégories)
+CREATE TABLE service_types (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nom_service VARCHAR(100) NOT NULL,
+    description TEXT,
+    category TEXT DEFAULT 'Autre' CHECK (
+        category IN ('Maintenance', 'Installation', 'Nettoyage', 'Diagnostic', 'Autre')
+    )
+);
+
+-- Catalogue (Offres des entreprises)
+CREATE TABLE catalog (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_id INT NOT NULL,
+    service_type_id INT NOT NULL,
+    prix_base FLOAT NOT NULL,
+    prix_par_unite FLOAT DEFAULT 0,
+    unite_nom VARCHAR(50) DEFAULT 'panneau',
+    description_offre TEXT,
+    produits_inclus TEXT,
+    duree_estimee VARCHAR(50),
+    FOREIGN KEY (company_id) REFERENCES companies (id) ON DELETE CASCADE,
+    FOREIGN KEY (service_type_id) REFERENCES service_types (id)
+);
+
+-- Réservations
+CREATE TABLE bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INT NOT NULL,
+    company_id INT NOT NULL,
+    service_type_id INT NOT NULL,
+    catalog_id INT,
+    date_demande TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    rdv_date DATE,
+    rdv_heure VARCHAR(10),
+    mode_paiement TEXT DEFAULT 'ONLINE' CHECK (mode_paiement IN ('ONLINE', 'CASH')),
+    date_debut_prevue DATETIME NULL,
+    technician_superior_contact VARCHAR(100),
+    statut TEXT DEFAULT 'EN_ATTENTE' CHECK (
+        statut IN ('EN_ATTENTE', 'PAYEE', 'CONFIRMEE', 'REFUSEE', 'TERMINEE', 'ANNULEE', 'ANNULEE_CLIENT')
+    ),
+    quantite INT DEFAULT 1,
+    prix_total FLOAT NOT NULL,
+    description_client TEXT,
+    rapport_avant TEXT,
+    rapport_apres TEXT,
+    rapport_details TEXT,
+    FOREIGN KEY (client_id) REFERENCES users (id),
+    FOREIGN KEY (company_id) REFERENCES companies (id),
+    FOREIGN KEY (service_type_id) REFERENCES service_types (id)
+);
+
+-- Avis / Reviews
+CREATE TABLE reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    booking_id INT NOT NULL,
+    client_id INT NOT NULL,
+    rating INT CHECK (rating BETWEEN 1 AND 5),
+    comment TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (booking_id) REFERENCES bookings (id),
+    FOREIGN KEY (client_id) REFERENCES users (id)
+);
+
+-- =============================================
+-- Données initiales
+-- =============================================
+
+-- Plans d'abonnement
+INSERT INTO subscription_plans (nom, prix_mensuel, duree_jours, max_services, has_scheduling, has_priority_support, has_analytics, description)
+VALUES
+    ('Basic', 299, 30, 5, FALSE, FALSE, FALSE, 'Visibilité de base. 5 services max.'),
+    ('Pro', 599, 30, 15, TRUE, TRUE, FALSE, 'Planning avancé + Support prioritaire. 15 services.'),
+    ('Premium', 999, 30, 50, TRUE, TRUE, TRUE, 'Tout inclus + Analytics + Services illimités.');
+
+-- Types de services
+INSERT INTO service_types (nom_service, description, category)
+VALUES
+    ('Nettoyage Standard', 'Lavage simple des panneaux', 'Nettoyage'),
+    ('Nettoyage Haute Pression', 'Nettoyage professionnel haute pression', 'Nettoyage'),
+    ('Maintenance Préventive', 'Vérification câblage et onduleur', 'Maintenance'),
+    ('Remplacement Onduleur', 'Changement matériel défectueux', 'Maintenance'),
+    ('Diagnostic Performance', 'Audit complet de rendement + rapport détaillé', 'Diagnostic'),
+    ('Installation Résidentielle', 'Pose complète sur toiture résidentielle', 'Installation'),
+    ('Installation Industrielle', 'Pose sur hangar ou sol industriel', 'Installation');
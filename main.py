@@ -9,6 +9,19 @@ if current_dir not in sys.path:
     sys.path.append(current_dir)
 
 if __name__ == "__main__":
+    # Commande non interactive : python3 main.py ingest-bookings reservations.jsonl
+    if len(sys.argv) > 1 and sys.argv[1] == "ingest-bookings":
+        from utils.ingest_bookings import main as ingest_bookings
+        sys.exit(ingest_bookings(sys.argv[2:]))
+    # Export comptable : python3 main.py export-bookings reservations.csv
+    if len(sys.argv) > 1 and sys.argv[1] == "export-bookings":
+        from utils.export_bookings import main as export_bookings
+        sys.exit(export_bookings(sys.argv[2:]))
+    # Rattrapage des compteurs de notes des avis : python3 main.py rebuild-ratings
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild-ratings":
+        from utils.rebuild_ratings import main as rebuild_ratings
+        sys.exit(rebuild_ratings(sys.argv[2:]))
+
     try:
         from optivolt.main import main
         main()
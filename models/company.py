@@ -1,3 +1,5 @@
+import math
+import re
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -9,6 +11,78 @@ Il suffit juste de lister les attributs avec leur type attendu (ex: str, int, fl
 C'est très utile pour les classes qui servent principalement à stocker des données.
 """
 
+# Une "journée" d'intervention = 8 heures de travail (½ journée = 4 h, 2 jours = 16 h)
+HEURES_PAR_JOUR = 8
+
+
+def parse_duree_heures(duree_estimee):
+    """
+    Traduit la durée saisie librement par l'entreprise en nombre d'heures de travail (entier) :
+      "1h" -> 1, "3h" -> 3, "1h30" -> 2 (une heure entamée est réservée), "90 min" -> 2,
+      "½ journée" -> 4, "1 jour" -> 8, "2 jours" -> 16.
+    Une durée absente ou illisible compte pour 1 heure (comme avant).
+    """
+    if not duree_estimee:
+        return 1
+    texte = str(duree_estimee).lower().replace('½', '0.5').replace('1/2', '0.5').replace('demi', '0.5 ').replace(',', '.')
+    nombre = re.search(r"\d+(?:\.\d+)?", texte)
+    valeur = float(nombre.group()) if nombre else 1.0
+
+    if 'semaine' in texte:
+        heures = valeur * 5 * HEURES_PAR_JOUR
+    elif 'jour' in texte:
+        heures = valeur * HEURES_PAR_JOUR
+    elif 'min' in texte:
+        heures = valeur / 60
+    else:
+        # "2h", "2 heures", "1h30"
+        heures_minutes = re.search(r"(\d+)\s*h\s*(\d+)", texte)
+        heures = int(heures_minutes.group(1)) + int(heures_minutes.group(2)) / 60 if heures_minutes else valeur
+    return max(1, math.ceil(heures))
+
+
+# Classement des offres dans le marketplace ("Visibilité Prioritaire") : score sur 100 points
+POINTS_FORFAIT = {'Premium': 25.0, 'Pro': 15.0, 'Basic': 0.0}
+POINTS_NOTE = 35.0          # note moyenne des avis (1 à 5 étoiles)
+POINTS_NB_AVIS = 10.0       # nombre d'avis (plafonné à AVIS_PLAFOND)
+POINTS_PRIX = 15.0          # prix par rapport à la moyenne du même type de service
+POINTS_REALISATION = 15.0   # part des interventions menées à terme (récentes)
+# "Avis fictifs" ajoutés à chaque entreprise : une seule note de 5/5 ne doit pas battre 40 notes de 4.8/5
+NOTE_A_PRIORI, POIDS_A_PRIORI = 3.5, 5
+AVIS_PLAFOND = 50
+TAUX_A_PRIORI, POIDS_TAUX_A_PRIORI = 0.8, 5
+JOURS_REALISATION = 90
+
+
+def forfait_niveau(has_priority_support, has_analytics):
+    """Niveau du forfait d'après ses options (Premium = analytics, Pro = support prioritaire, sinon Basic)."""
+    if has_analytics:
+        return 'Premium'
+    return 'Pro' if has_priority_support else 'Basic'
+
+
+def offer_score(niveau, note_moyenne, nb_avis, prix, prix_moyen, terminees, finies):
+    """
+    Score de classement d'une offre (0 à 100, arrondi à 2 décimales) :
+      - forfait        : Premium 25, Pro 15, Basic 0 ;
+      - note           : moyenne "bayésienne" (les avis réels + POIDS_A_PRIORI avis de NOTE_A_PRIORI),
+                         0 point pour 1/5, 35 points pour 5/5 ;
+      - nombre d'avis  : 10 points à partir de 50 avis (échelle logarithmique : les premiers comptent plus) ;
+      - prix           : 15 points à moitié prix de la moyenne du service, 7,5 au prix moyen, 0 à +50 % ;
+      - réalisation    : interventions TERMINEE sur toutes les interventions finies (terminées, refusées,
+                         annulées) des JOURS_REALISATION derniers jours, avec le même lissage que la note.
+    """
+    note = (NOTE_A_PRIORI * POIDS_A_PRIORI + (note_moyenne or 0) * nb_avis) / (POIDS_A_PRIORI + nb_avis)
+    points = POINTS_FORFAIT.get(niveau, 0.0)
+    points += POINTS_NOTE * (note - 1) / 4
+    points += POINTS_NB_AVIS * min(1.0, math.log1p(nb_avis) / math.log1p(AVIS_PLAFOND))
+    if prix_moyen:
+        points += POINTS_PRIX * min(1.0, max(0.0, 1.5 - (prix or 0) / prix_moyen))
+    taux = (TAUX_A_PRIORI * POIDS_TAUX_A_PRIORI + terminees) / (POIDS_TAUX_A_PRIORI + finies)
+    points += POINTS_REALISATION * taux
+    return round(points, 2)
+
+
 @dataclass
 class SubscriptionPlan:
     """Modèle représentant un plan d'abonnement (Basic, Pro, Premium)."""
@@ -42,6 +116,14 @@ class CatalogItem:
     description_offre: str = None
     produits_inclus: str = None
     duree_estimee: str = None
+    # Durée normalisée (en heures de travail), calculée à partir de duree_estimee si absente
+    duree_heures: int = None
+    # Score de classement dans le marketplace (0 à 100, voir offer_score), calculé par CompanyDAO
+    score: float = 0.0
+
+    def __post_init__(self):
+        if self.duree_heures is None:
+            self.duree_heures = parse_duree_heures(self.duree_estimee)
 
 @dataclass
 class Company:
@@ -69,6 +151,9 @@ class Company:
     
     # Cet attribut permet de relier l'objet Company à son plan d'abonnement (SubscriptionPlan)
     subscription_plan: SubscriptionPlan = None
+
+    # Distance (km) depuis la ville du client, renseignée seulement par les recherches "autour de" (voir services/gazetteer.py)
+    distance_km: float = None
     
     # 'field(default_factory=list)' demande à Python de créer une NOUVELLE liste vide []
     # pour chaque nouvelle entreprise créée, afin de stocker ses offres.
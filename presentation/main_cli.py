@@ -1,21 +1,26 @@
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
-from rich.prompt import Prompt, IntPrompt
+from rich.prompt import Prompt, IntPrompt, FloatPrompt
 from rich.columns import Columns
 from rich import print as rprint
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from Config.database import DatabaseConnection
 from models.user import UserFactory
 from DAO.user_dao import UserDAO
 from DAO.company_dao import CompanyDAO
-from DAO.booking_dao import BookingDAO
+from DAO.booking_dao import BookingDAO, SlotAlreadyBookedError
 from DAO.subscription_dao import SubscriptionDAO
+from DAO.pricing_rule_dao import PricingRuleDAO
 from services.catalog_service import CatalogService
+from services.catalog_index import LIMITES_TRANCHES, price_band_label
+from services.gazetteer import CityGazetteer
+from services.availability_service import AvailabilityService, JOUR_NOMS, occupied_slots
 from models.company import Company, CatalogItem
 from Config.settings import Config
 from utils.logger import Logger
+from utils.cache import cache_stats
 
 """
 ================================================================================
@@ -28,10 +33,93 @@ créer une interface en ligne de commande (CLI) colorée et interactive.
 console = Console()
 logger = Logger()
 
+# Nombre de réservations affichées par page dans les historiques
+PAGE_SIZE = getattr(Config, 'PAGE_SIZE', 10)
+# Nombre maximum de cartes d'entreprises affichées pour un service (les mieux classées)
+NB_CARTES = getattr(Config, 'NB_CARTES', 12)
+# Rayon proposé par défaut (km) autour de la ville du client (ex: Salé -> Rabat, Témara)
+RAYON_KM = getattr(Config, 'RAYON_KM', 30)
+# Nombre maximum d'IDs dans une sélection groupée (ex: "1-100000" ferait une requête IN (...) géante)
+MAX_SELECTION = 200
+
 def print_header():
     """Affiche le grand titre de l'application."""
     console.print(Panel.fit("[bold yellow]  OPTIVOLT — MARKETPLACE SOLAIRE  [/bold yellow]", border_style="bright_blue"))
 
+def parse_id_selection(texte):
+    """
+    Transforme une sélection tapée par l'utilisateur en liste d'IDs.
+    ex: "12, 15, 20-23" -> [12, 15, 20, 21, 22, 23]. Les morceaux invalides sont ignorés,
+    comme les intervalles de plus de MAX_SELECTION IDs ; au plus MAX_SELECTION IDs sont retournés.
+    """
+    ids = []
+    for morceau in texte.replace(' ', '').split(','):
+        debut, _, fin = morceau.partition('-')
+        if debut.isdigit() and fin.isdigit() and 0 <= int(fin) - int(debut) < MAX_SELECTION:
+            ids.extend(range(int(debut), int(fin) + 1))
+        elif debut.isdigit() and not fin:
+            ids.append(int(debut))
+    return list(dict.fromkeys(ids))[:MAX_SELECTION]
+
+
+def print_batch_results(resultats):
+    """Affiche le résultat de chaque réservation d'un traitement groupé (BookingDAO.transition_bookings)."""
+    table = Table(title="Résultat du traitement")
+    table.add_column("Demande", style="cyan")
+    table.add_column("Résultat")
+    for bid, (ok, message) in resultats.items():
+        table.add_row(f"#{bid}", f"[green]{message}[/green]" if ok else f"[red]Refusé : {message}[/red]")
+    console.print(table)
+    nb_ok = sum(1 for ok, _ in resultats.values() if ok)
+    console.print(f"[bold]{nb_ok}/{len(resultats)} demande(s) traitée(s).[/bold]")
+
+
+def print_page_navigation(page):
+    """Affiche les options pour changer de page et renvoie les choix possibles ('p', 's')."""
+    choix = []
+    if page['has_prev']:
+        # "\\[" : sinon rich prendrait [p] / [s] pour des balises de style
+        console.print("\\[p] ◀ Page précédente")
+        choix.append("p")
+    if page['has_next']:
+        console.print("\\[s] Page suivante ▶")
+        choix.append("s")
+    return choix
+
+
+def page_position(page, choix, position):
+    """
+    Position (curseur, direction) de la page à afficher après le choix de l'utilisateur.
+    On repart de la première ou de la dernière ligne affichée (pagination par curseur, sans OFFSET).
+    """
+    if choix == "s":
+        return page['cursor_last'], 'next'
+    if choix == "p":
+        return page['cursor_first'], 'prev'
+    return position
+
+
+def print_booking_detail(detail):
+    """Affiche la fiche complète d'une réservation (description du client et rapports d'intervention)."""
+    texte = (
+        f"Service: [bold]{detail['nom_service']}[/bold] | Entreprise: {detail['nom_entreprise']}\n"
+        f"Client: {detail['client_nom']} | Tel: {detail['client_tel']} | Ville: {detail.get('client_ville') or '—'}\n"
+        f"Statut: {detail['statut']} | Qté: {detail['quantite']} | Prix: {detail['prix_total']} DH ({detail.get('mode_paiement', 'N/A')})\n"
+        f"RDV: {detail.get('rdv_date') or '—'} à {detail.get('rdv_heure') or '—'}\n"
+        f"Superviseur: {detail.get('technician_superior_contact') or 'En attente'}\n"
+        f"Détails / Adresse: {detail.get('description_client') or '—'}"
+    )
+    # Les rapports n'existent qu'une fois l'intervention terminée
+    if detail.get('rapport_details') or detail.get('rapport_avant') or detail.get('rapport_apres'):
+        texte += (
+            f"\n\n[bold]Rapport d'intervention[/bold]\n"
+            f"Avant: {detail.get('rapport_avant') or '—'}\n"
+            f"Après: {detail.get('rapport_apres') or '—'}\n"
+            f"Travaux: {detail.get('rapport_details') or '—'}"
+        )
+    console.print(Panel(texte, title=f"Fiche Réservation #{detail['id']}", border_style="cyan"))
+
+
 # ═══════════════════════════════════════════
 #  MENU CLIENT
 # ═══════════════════════════════════════════
@@ -47,10 +135,11 @@ def client_menu(user, catalog_service, booking_dao):
         # Options disponibles
         console.print("[1] Parcourir les Services")
         console.print("[2] Mes Réservations")
+        console.print("[3] Rechercher une offre (produit, marque, entreprise...)")
         console.print("[0] Déconnexion")
         
-        # 'Prompt.ask' force l'utilisateur à choisir entre 1, 2 ou 0.
-        choice = Prompt.ask("Choix", choices=["1", "2", "0"])
+        # 'Prompt.ask' force l'utilisateur à choisir parmi les options affichées.
+        choice = Prompt.ask("Choix", choices=["1", "2", "3", "0"])
 
         if choice == "0":
             logger.log_info(f"Client {user.nom} déconnecté.")
@@ -62,6 +151,9 @@ def client_menu(user, catalog_service, booking_dao):
         elif choice == "2":
             my_reservations(user, booking_dao)
 
+        elif choice == "3":
+            search_offers(user, catalog_service, booking_dao)
+
 
 def browse_services(user, catalog_service, booking_dao):
     """Processus de réservation : Catégorie -> Entreprise -> RDV -> Paiement."""
@@ -99,59 +191,66 @@ def browse_services(user, catalog_service, booking_dao):
 
     logger.log_info(f"Client {user.nom} consulte service: {selected_service.nom_service}")
 
-    # Étape 2 : Afficher les entreprises (sous forme de Cartes)
-    companies = catalog_service.get_companies_for_service(sid)
-    if not companies:
-        console.print("[yellow]Aucune entreprise ne propose ce service actuellement.[/yellow]")
+    # Étape 2 : Deux façons de choisir -> parcourir les entreprises, ou laisser OptiVolt
+    # proposer les créneaux libres les plus proches chez TOUTES les entreprises
+    console.print("\n[1] Voir les entreprises")
+    console.print("[2] Premiers créneaux disponibles (toutes entreprises)")
+    mode_recherche = Prompt.ask("Choix", choices=["1", "2"], default="1")
+
+    rdv_date, rdv_heure = None, None
+    if mode_recherche == "2":
+        selected, rdv_date, rdv_heure = pick_earliest_slot(user, selected_service)
+    else:
+        selected = choose_company(catalog_service, selected_service)
+    if not selected: return
+
+    book_offer(user, catalog_service, booking_dao, selected_service, selected, rdv_date, rdv_heure)
+
+
+def search_offers(user, catalog_service, booking_dao):
+    """Recherche plein texte ("onduleur SMA", "Kärcher"...) puis réservation de l'offre choisie."""
+    texte = Prompt.ask(" Rechercher (ex: onduleur SMA, Kärcher, nettoyage)")
+    if not texte.strip():
+        return
+    ville = Prompt.ask(" Ville (laisser vide pour toutes)", default="").strip()
+    resultats = catalog_service.search_offers(texte, ville or None, rayon_km=ask_radius(ville))
+    if not resultats:
+        console.print("[yellow]Aucune offre ne correspond à cette recherche.[/yellow]")
         return
 
-    console.rule(f"[cyan] Entreprises proposant : {selected_service.nom_service}[/cyan]")
-    cards = []
-    comp_map = {}
-    
-    # Création visuelle d'une 'carte' par entreprise trouvée
-    for i, c in enumerate(companies, 1):
-        comp_map[i] = c
-        horaire = f"{c.get('horaire_debut','08:00')}-{c.get('horaire_fin','18:00')}"
-        
-        card_text = (
-            f"[bold]{c['nom_entreprise']}[/bold]\n"
-            f" {c['ville']}\n"
-            f" [green]{c['prix_base']} DH[/green] + {c['prix_par_unite']} DH/{c.get('unite_nom','unité')}\n"
-            f" {c.get('produits_inclus') or 'Non spécifié'}\n"
-            f" Durée: {c.get('duree_estimee') or 'Non spécifié'}\n"
-            f" Horaires: {horaire} ({c.get('jours_travail','Lun-Sam')})\n"
-            f" {c.get('description_offre') or ''}\n"
-            f" Abonnement: [cyan]{c.get('plan_nom', 'N/A')}[/cyan]"
-        )
-        
-        # 'Panel' dessine un joli carré autour du texte
-        cards.append(Panel(card_text, title=f"[{i}]", border_style="blue", width=45))
-    
-    # 'Columns' permet d'afficher les cartes côte à côte
-    console.print(Columns(cards, equal=True, expand=True))
-    console.print("\n[0] ⬅ Retour")
-    
-    cidx = IntPrompt.ask("Choisir une Entreprise (N°)")
-    if cidx == 0: return
-    
-    if cidx not in comp_map:
+    table = Table(title=f"Résultats pour « {texte} »")
+    for colonne in ("N°", "Entreprise", "Ville", "Service", "Prix", "Produits inclus"):
+        table.add_column(colonne)
+    for i, r in enumerate(resultats, 1):
+        table.add_row(str(i), r['nom_entreprise'], r['ville'] + format_distance(r.get('distance_km')), r.get('nom_service') or '',
+                      f"{r['prix_base']} DH", r.get('produits_inclus') or '—')
+    console.print(table)
+    console.print("[0] ⬅ Retour")
+
+    choix = IntPrompt.ask("Choisir une offre (N°)")
+    if choix == 0: return
+    if not 1 <= choix <= len(resultats):
         console.print("[red]Choix invalide.[/red]")
         return
 
-    selected = comp_map[cidx]
+    selected = resultats[choix - 1]
+    selected_service = next((s for s in catalog_service.get_service_types() if s.id == selected['service_type_id']), None)
+    if not selected_service:
+        console.print("[red]Service non trouvé.[/red]")
+        return
+    book_offer(user, catalog_service, booking_dao, selected_service, selected)
+
+
+def book_offer(user, catalog_service, booking_dao, selected_service, selected, rdv_date=None, rdv_heure=None):
+    """Fin du parcours de réservation d'une offre choisie : Quantité -> RDV -> Paiement -> Confirmation."""
     logger.log_info(f"Client {user.nom} sélectionne entreprise: {selected['nom_entreprise']}")
 
     # Étape 3 : Confirmation & Choix de la Quantité
     console.rule(f"[green] Réservation chez {selected['nom_entreprise']}[/green]")
     qty = IntPrompt.ask(f"Quantité ({selected.get('unite_nom', 'panneau')}s)", default=1)
     
-    # Calcul du prix via le 'Service' (qui utilise le pattern Stratégie)
-    from optivolt.services.pricing_strategy import PricingFactory
-    base = selected['prix_base'] + (selected['prix_par_unite'] * qty)
-    strategy = PricingFactory.get_strategy(user.ville or "")
-    prix_final = strategy.calculate_price(base)
-    desc_prix = strategy.get_description()
+    # Calcul du prix via le 'Service' (qui utilise le pattern Stratégie : les règles de prix)
+    prix_final, desc_prix = catalog_service.calculate_price(selected, qty, user.ville or "", rdv_date)
 
     # Petit récapitulatif visuel
     console.print(Panel(
@@ -164,20 +263,32 @@ def browse_services(user, catalog_service, booking_dao):
     ))
 
     # Étape 4 : Choix de la Date et de l'Heure (RDV)
-    # On fait appel à une fonction spéciale qui gère l'agenda
-    rdv_date, rdv_heure = pick_available_slot(selected, booking_dao)
+    # On fait appel à une fonction spéciale qui gère l'agenda (sauf si le créneau est déjà choisi)
+    if not rdv_date:
+        rdv_date, rdv_heure = pick_available_slot(selected, booking_dao)
     
     # Si le client annule au moment de choisir la date, la commande est abandonnée
     if not rdv_date:
         console.print("[yellow]Réservation annulée.[/yellow]")
         return
 
+    # Une règle de prix peut ne valoir que sur une période (ex: promotion d'été) : on recalcule pour la date choisie
+    prix_rdv, desc_rdv = catalog_service.calculate_price(selected, qty, user.ville or "", rdv_date)
+    if prix_rdv != prix_final:
+        console.print(f"[yellow]Prix pour le {rdv_date} : {prix_rdv:.2f} DH ({desc_rdv})[/yellow]")
+        prix_final, desc_prix = prix_rdv, desc_rdv
+
     desc = Prompt.ask(" Détails / Adresse précise", default=user.adresse or "")
     mode = Prompt.ask(" Mode de paiement", choices=["ONLINE", "CASH"], default="ONLINE")
 
+    # Toutes les heures bloquées par l'intervention (plusieurs jours pour "2 jours")
+    creneaux = occupied_slots(selected, rdv_date, rdv_heure, selected.get('duree_heures') or 1)
+    fin_jour, fin_heure = creneaux[-1] if creneaux else (rdv_date, rdv_heure)
+
     # Étape finale : Validation
     console.print(Panel(
         f" RDV: [bold]{rdv_date}[/bold] à [bold]{rdv_heure}[/bold]\n"
+        f" Fin prévue: {fin_jour} vers {int(fin_heure[:2]) + 1:02d}:00 ({len(creneaux) or 1} h de travail)\n"
         f" Paiement: {mode}\n"
         f" Total: [bold green]{prix_final:.2f} DH[/bold green]",
         title=" Confirmation Finale", border_style="cyan"
@@ -192,10 +303,15 @@ def browse_services(user, catalog_service, booking_dao):
         return
 
     # Si on arrive ici, on enregistre enfin en Base de Données !
-    bid, prix = catalog_service.create_booking_request(
-        user.id, selected['id'], selected_service.id, selected.get('catalog_id'),
-        qty, desc, prix_final, rdv_date, rdv_heure, mode
-    )
+    try:
+        bid, prix = catalog_service.create_booking_request(
+            user.id, selected['id'], selected_service.id, selected.get('catalog_id'),
+            qty, desc, prix_final, rdv_date, rdv_heure, mode, creneaux or None
+        )
+    except SlotAlreadyBookedError:
+        # Un autre client a validé ce créneau pendant que vous remplissiez le formulaire
+        console.print(f"[red]Désolé, le créneau du {rdv_date} à {rdv_heure} vient d'être réservé par un autre client. Choisissez-en un autre.[/red]")
+        return
     
     if bid:
         logger.log_info(f"Réservation #{bid} créée par Client {user.nom} - {prix_final} DH")
@@ -211,83 +327,176 @@ def browse_services(user, catalog_service, booking_dao):
         ))
 
 
+def ask_radius(ville):
+    """Rayon de recherche (km) autour de la ville saisie ; None si aucune ville (toutes les villes)."""
+    if not ville:
+        return None
+    if CityGazetteer().find(ville) is None:
+        console.print(f"[dim]Ville « {ville} » absente de l'annuaire : seules les entreprises de cette ville seront proposées.[/dim]")
+        return 0
+    return IntPrompt.ask(" Rayon autour de la ville (km, 0 = cette ville seulement)", default=RAYON_KM)
+
+
+def format_distance(distance_km):
+    """" · à 4 km" pour une entreprise d'une autre ville (rien pour la même ville ou sans recherche par distance)."""
+    return f" · à {distance_km:.0f} km" if distance_km else ""
+
+
+def city_name(ville):
+    """Nom officiel de la ville saisie ("fes" -> "Fès") : les recherches par distance la retrouveront."""
+    return CityGazetteer().canonical(ville) or ville.strip()
+
+
+def format_note(somme_notes, nb_avis):
+    """Note moyenne lisible à partir des compteurs (ex: "★ 4.3/5 (12 avis)")."""
+    if not nb_avis:
+        return "[dim]Pas encore d'avis[/dim]"
+    return f"[yellow]★ {somme_notes / nb_avis:.1f}/5[/yellow] ({nb_avis} avis)"
+
+
+def choose_company(catalog_service, selected_service):
+    """Affiche les entreprises proposant le service (cartes) et renvoie celle choisie (ou None)."""
+    # Filtres optionnels (la recherche se fait dans l'index en mémoire, sans requête SQL)
+    ville = Prompt.ask(" Ville (laisser vide pour toutes)", default="").strip()
+    rayon_km = ask_radius(ville)
+    tranches = {str(i + 1): i for i in range(len(LIMITES_TRANCHES) + 1)}
+    console.print("  ".join(f"[{n}] {price_band_label(t)}" for n, t in tranches.items()) + "  [0] Tous les prix")
+    budget = Prompt.ask(" Budget", choices=["0"] + list(tranches), default="0", show_choices=False)
+
+    # Afficher les entreprises (sous forme de Cartes), de la mieux classée à la moins bien classée
+    # (autour d'une ville : de la plus proche à la plus lointaine, puis par classement)
+    companies = catalog_service.get_companies_for_service(selected_service.id, ville or None, tranches.get(budget), NB_CARTES, rayon_km)
+    if not companies:
+        console.print("[yellow]Aucune entreprise ne propose ce service actuellement (avec ces filtres).[/yellow]")
+        return None
+
+    console.rule(f"[cyan] Entreprises proposant : {selected_service.nom_service}[/cyan]")
+    cards = []
+    comp_map = {}
+    
+    # Création visuelle d'une 'carte' par entreprise trouvée
+    for i, c in enumerate(companies, 1):
+        comp_map[i] = c
+        horaire = f"{c.get('horaire_debut','08:00')}-{c.get('horaire_fin','18:00')}"
+        # Notes lues dans les compteurs tenus à jour à chaque avis (pas de calcul sur tous les avis)
+        note = format_note(c.get('somme_notes'), c.get('nb_avis'))
+        if c.get('offre_nb_avis'):
+            note += f" · cette offre : {format_note(c['offre_somme_notes'], c['offre_nb_avis'])}"
+        
+        card_text = (
+            f"[bold]{c['nom_entreprise']}[/bold]\n"
+            f" {c['ville']}{format_distance(c.get('distance_km'))}\n"
+            f" [green]{c['prix_base']} DH[/green] + {c['prix_par_unite']} DH/{c.get('unite_nom','unité')}\n"
+            f" {c.get('produits_inclus') or 'Non spécifié'}\n"
+            f" Durée: {c.get('duree_estimee') or 'Non spécifié'}\n"
+            f" Horaires: {horaire} ({c.get('jours_travail','Lun-Sam')})\n"
+            f" {c.get('description_offre') or ''}\n"
+            f" {note}\n"
+            f" Abonnement: [cyan]{c.get('plan_nom', 'N/A')}[/cyan]  Classement: {c.get('score') or 0:.0f}/100"
+        )
+        
+        # 'Panel' dessine un joli carré autour du texte
+        cards.append(Panel(card_text, title=f"[{i}]", border_style="blue", width=45))
+    
+    # 'Columns' permet d'afficher les cartes côte à côte
+    console.print(Columns(cards, equal=True, expand=True))
+    if len(companies) == NB_CARTES:
+        console.print(f"[dim]Les {NB_CARTES} offres les mieux classées (ou les plus proches) sont affichées : précisez la ville ou le budget pour en voir d'autres.[/dim]")
+    console.print("\n[0] ⬅ Retour")
+    
+    cidx = IntPrompt.ask("Choisir une Entreprise (N°)")
+    if cidx == 0: return None
+    
+    if cidx not in comp_map:
+        console.print("[red]Choix invalide.[/red]")
+        return None
+
+    return comp_map[cidx]
+
+
+def pick_earliest_slot(user, selected_service):
+    """
+    Recherche "au plus tôt" : les 10 créneaux libres les plus proches, toutes entreprises confondues
+    (calcul groupé dans AvailabilityService.find_earliest_slots).
+    Retourne (entreprise, date, heure) choisis, ou (None, None, None).
+    """
+    ville = Prompt.ask(" Ville (laisser vide pour toutes)", default=user.ville or "")
+    suggestions = AvailabilityService().find_earliest_slots(selected_service.id, ville or None, k=10)
+    if not suggestions:
+        console.print("[yellow]Aucun créneau libre dans les 2 prochaines semaines pour ce service.[/yellow]")
+        return None, None, None
+
+    table = Table(title=f"Premiers créneaux — {selected_service.nom_service}")
+    table.add_column("N°", style="cyan")
+    table.add_column("Date")
+    table.add_column("Heure")
+    table.add_column("Entreprise")
+    table.add_column("Ville")
+    table.add_column("Durée")
+    table.add_column("Prix de base", style="green")
+    for idx, s in enumerate(suggestions, 1):
+        nom_jour = JOUR_NOMS[datetime.strptime(s.rdv_date, '%Y-%m-%d').weekday()]
+        table.add_row(str(idx), f"{nom_jour} {s.rdv_date}", s.rdv_heure, s.company['nom_entreprise'],
+                      s.company['ville'], s.company.get('duree_estimee') or "1h", f"{s.company['prix_base']} DH")
+    console.print(table)
+    console.print("[0] ⬅ Retour")
+
+    choix = IntPrompt.ask("Choisir un créneau (N°)")
+    if choix == 0: return None, None, None
+    if choix < 1 or choix > len(suggestions):
+        console.print("[red]Choix invalide.[/red]")
+        return None, None, None
+
+    chosen = suggestions[choix - 1]
+    return chosen.company, chosen.rdv_date, chosen.rdv_heure
+
+
 def pick_available_slot(company_data, booking_dao):
     """
     Fonction utilitaire pour proposer un choix de date/heure au client 
     en fonction des horaires de l'entreprise.
     Retourne la date (YYYY-MM-DD) et l'heure (HH:00) choisies.
+    Les disponibilités des prochains jours sont chargées en UNE requête (AvailabilityService) :
+    seules les dates et heures où TOUTE l'intervention tient (ex: 3 heures d'affilée pour "3h",
+    en continuant le lendemain si besoin) sont proposées.
     """
     h_debut = company_data.get('horaire_debut', '08:00')
     h_fin = company_data.get('horaire_fin', '18:00')
     jours = company_data.get('jours_travail', 'Lun-Sam')
-    company_id = company_data['id']
-
-    # On génère tous les créneaux horaire (ex: 08:00, 09:00, 10:00) 
-    # de l'heure de début à l'heure de fin
-    start_h = int(h_debut.split(':')[0])
-    end_h = int(h_fin.split(':')[0])
-    all_hours = [f"{h:02d}:00" for h in range(start_h, end_h)]
-
-    # Dictionnaire pour traduire le mot du jour en Numéro (0=Lundi, 6=Dimanche)
-    jour_map = {'Lun': 0, 'Mar': 1, 'Mer': 2, 'Jeu': 3, 'Ven': 4, 'Sam': 5, 'Dim': 6}
-    working_days = set()
-    
-    # Comprendre si l'entreprise demande "Lun-Sam" (Plage) ou "Lun,Mar,Jeu" (Liste)
-    if '-' in jours:
-        parts = jours.split('-')
-        start_day = jour_map.get(parts[0].strip(), 0)
-        end_day = jour_map.get(parts[1].strip(), 5)
-        working_days = set(range(start_day, end_day + 1))
-    else:
-        working_days = {jour_map.get(j.strip(), 0) for j in jours.split(',')}
+    duree = company_data.get('duree_heures') or 1
 
-    # 1. Montrer les dates disponibles (les 7 prochains jours ouvrés)
+    # 1. Montrer les dates disponibles (les 7 prochains jours ouvrés où l'intervention peut commencer)
     console.rule(f"[cyan]Créneaux Disponibles — {company_data['nom_entreprise']}[/cyan]")
-    console.print(f"[dim]Horaires: {h_debut} - {h_fin} | Jours: {jours}[/dim]\n")
+    console.print(f"[dim]Horaires: {h_debut} - {h_fin} | Jours: {jours} | Durée: {company_data.get('duree_estimee') or '1h'} ({duree} h de travail)[/dim]\n")
 
-    today = datetime.now().date()
-    available_dates = []
-    
-    # On cherche dans les 21 prochains jours pour trouver 7 jours de travail effectifs
-    for i in range(1, 22):  
-        d = today + timedelta(days=i)
-        # weekday() renvoie 0 pour Lundi, 6 pour Dimanche
-        if d.weekday() in working_days:
-            available_dates.append(d)
-        if len(available_dates) >= 7:
-            break
+    available_days = AvailabilityService(booking_dao).get_available_days(company_data, duree=duree)
+    if not available_days:
+        console.print("[yellow]Aucun créneau libre dans les 3 prochaines semaines pour cette entreprise.[/yellow]")
+        return None, None
 
-    jour_noms = ['Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim']
-    for idx, d in enumerate(available_dates, 1):
-        nom_jour = jour_noms[d.weekday()]
-        console.print(f"  [{idx}] {nom_jour} {d.strftime('%Y-%m-%d')}")
+    for idx, dispo in enumerate(available_days, 1):
+        nom_jour = JOUR_NOMS[dispo.jour.weekday()]
+        console.print(f"  [{idx}] {nom_jour} {dispo.date_str} [dim]({dispo.nb_starts} horaire(s) de début possible(s))[/dim]")
     console.print("  [0] ⬅ Retour")
 
     date_choice = IntPrompt.ask("Choisir une date (N°)")
     if date_choice == 0: return None, None
-    if date_choice < 1 or date_choice > len(available_dates):
+    if date_choice < 1 or date_choice > len(available_days):
         console.print("[red]Choix invalide.[/red]")
         return None, None
 
-    chosen_date = available_dates[date_choice - 1]
-    date_str = chosen_date.strftime('%Y-%m-%d')
-
-    # 2. Une fois la date choisie, afficher les HEURES Libres
-    # On demande au DAO les heures qui sont DÉJÀ RÉSERVÉES
-    booked = booking_dao.get_booked_slots(company_id, date_str)
-    
-    # Filtre magique en Python : Garder les heures qui ne sont PAS dans la liste des occupées
-    free_hours = [h for h in all_hours if h not in booked]
-
-    if not free_hours:
-        console.print(f"[yellow]Aucun créneau libre le {date_str}. Choisissez un autre jour.[/yellow]")
-        # S'il n'y a plus de place à date, on redemande (récursivité)
-        return pick_available_slot(company_data, booking_dao)
-
-    nom_jour = jour_noms[chosen_date.weekday()]
-    console.rule(f"[cyan]Heures libres — {nom_jour} {date_str}[/cyan]")
-    for idx, h in enumerate(free_hours, 1):
-        console.print(f"  [{idx}] {h}")
+    chosen = available_days[date_choice - 1]
+    start_hours = chosen.start_hours
+    booked = chosen.booked_hours
+
+    # 2. Une fois la date choisie, afficher les HEURES de début possibles (déjà calculées, pas de nouvelle requête)
+    nom_jour = JOUR_NOMS[chosen.jour.weekday()]
+    console.rule(f"[cyan]Heures de début — {nom_jour} {chosen.date_str}[/cyan]")
+    for idx, h in enumerate(start_hours, 1):
+        # Fin de l'intervention (peut être un autre jour pour les longues interventions)
+        fin_jour, fin_heure = occupied_slots(company_data, chosen.date_str, h, duree)[-1]
+        fin = f"{int(fin_heure[:2]) + 1:02d}:00" + ("" if fin_jour == chosen.date_str else f" le {fin_jour}")
+        console.print(f"  [{idx}] {h} [dim](fin vers {fin})[/dim]")
         
     if booked:
         console.print(f"\n  [dim]Créneaux occupés dans la journée : {', '.join(booked)}[/dim]")
@@ -296,17 +505,23 @@ def pick_available_slot(company_data, booking_dao):
 
     heure_choice = IntPrompt.ask("Choisir une heure (N°)")
     if heure_choice == 0: return None, None
-    if heure_choice < 1 or heure_choice > len(free_hours):
+    if heure_choice < 1 or heure_choice > len(start_hours):
         console.print("[red]Choix invalide.[/red]")
         return None, None
 
-    return date_str, free_hours[heure_choice - 1]
+    return chosen.date_str, start_hours[heure_choice - 1]
 
 
 def my_reservations(user, booking_dao):
-    """Permet au client de voir, annuler, et noter ses propres réservations."""
+    """Permet au client de voir, annuler, et noter ses propres réservations (page par page)."""
+    position = (None, 'next')
     while True:
-        bookings = booking_dao.get_client_bookings(user.id)
+        page = booking_dao.get_client_bookings_page(user.id, PAGE_SIZE, *position)
+        bookings = page['rows']
+        if not bookings and position[0] is not None:
+            # La page n'existe plus (ex: réservations supprimées) : retour au début
+            position = (None, 'next')
+            continue
         if not bookings:
             console.print("[yellow]Aucune réservation.[/yellow]")
             return
@@ -327,11 +542,24 @@ def my_reservations(user, booking_dao):
 
         console.print("\n[1] Annuler une réservation")
         console.print("[2] Noter un service terminé")
+        console.print("[3] Voir le détail (adresse, rapport d'intervention)")
+        navigation = print_page_navigation(page)
         console.print("[0] ⬅ Retour")
-        choice = Prompt.ask("Choix", choices=["1", "2", "0"])
+        choice = Prompt.ask("Choix", choices=["1", "2", "3", "0"] + navigation)
 
         if choice == "0": 
             return
+
+        elif choice in navigation:
+            position = page_position(page, choice, position)
+
+        elif choice == "3":
+            # Les textes longs ne sont chargés que pour la réservation demandée
+            detail = booking_dao.get_booking_detail(IntPrompt.ask("ID de la réservation"), client_id=user.id)
+            if detail:
+                print_booking_detail(detail)
+            else:
+                console.print("[red]Réservation introuvable.[/red]")
             
         elif choice == "1":
             bid = IntPrompt.ask("ID de la réservation à annuler")
@@ -407,8 +635,13 @@ def entreprise_menu(user, catalog_service, booking_dao, company_dao, subscriptio
 
 def manage_demands(company, booking_dao):
     """Permet à l'entreprise d'accepter une intervention et de nommer un responsable."""
+    position = (None, 'next')
     while True:
-        bookings = booking_dao.get_company_bookings(company.id)
+        page = booking_dao.get_company_bookings_page(company.id, PAGE_SIZE, *position)
+        bookings = page['rows']
+        if not bookings and position[0] is not None:
+            position = (None, 'next')
+            continue
         if not bookings:
             console.print("[yellow]Aucune demande reçue.[/yellow]")
             return
@@ -425,49 +658,67 @@ def manage_demands(company, booking_dao):
                 title=f"Demande #{b['id']}", border_style=style
             ))
 
-        console.print("\n[0] ⬅ Retour")
-        bid = IntPrompt.ask("ID à traiter (0 retour)")
-        if bid == 0: return
+        console.print()
+        navigation = print_page_navigation(page)
+        console.print("[0] ⬅ Retour")
+        selection = Prompt.ask("ID(s) à traiter (ex: 12 ou 12,15,18 ou 12-18 ; 0 retour)")
+        if selection.strip() == "0": return
+        if selection.strip().lower() in navigation:
+            position = page_position(page, selection.strip().lower(), position)
+            continue
 
-        # Recherche de la demande exacte dans la liste qu'on vient de télécharger
-        target = next((b for b in bookings if b['id'] == bid), None)
-        if not target:
+        # Recherche des demandes exactes dans la liste qu'on vient de télécharger
+        ids = parse_id_selection(selection)
+        targets = [b for b in bookings if b['id'] in ids]
+        if not targets:
             console.print("[red]Demande introuvable.[/red]")
             continue
-            
-        if target['statut'] not in ('EN_ATTENTE', 'PAYEE'):
-            console.print(f"[yellow]Cette demande est déjà {target['statut']}.[/yellow]")
+
+        en_cours = [b for b in targets if b['statut'] in ('EN_ATTENTE', 'PAYEE')]
+        for b in targets:
+            if b not in en_cours:
+                console.print(f"[yellow]La demande #{b['id']} est déjà {b['statut']} (ignorée).[/yellow]")
+        if not en_cours:
             continue
 
-        console.print(Panel(
-            f"Client: [bold]{target['client_nom']}[/bold]\n"
-            f"Service: {target['nom_service']} | Qté: {target['quantite']}\n"
-            f"RDV choisi par le client: [bold green]{target.get('rdv_date')} à {target.get('rdv_heure')}[/bold green]\n"
-            f"Prix: {target['prix_total']} DH | {target.get('mode_paiement')}",
-            title=f"Détails Demande #{bid}", border_style="cyan"
-        ))
+        if len(en_cours) == 1:
+            target = en_cours[0]
+            # La liste ne contient pas les textes longs : on charge la fiche de CETTE demande
+            detail = booking_dao.get_booking_detail(target['id'], company_id=company.id) or {}
+            console.print(Panel(
+                f"Client: [bold]{target['client_nom']}[/bold]\n"
+                f"Service: {target['nom_service']} | Qté: {target['quantite']}\n"
+                f"RDV choisi par le client: [bold green]{target.get('rdv_date')} à {target.get('rdv_heure')}[/bold green]\n"
+                f"Prix: {target['prix_total']} DH | {target.get('mode_paiement')}\n"
+                f"Détails / Adresse: {detail.get('description_client') or '—'}",
+                title=f"Détails Demande #{target['id']}", border_style="cyan"
+            ))
+        else:
+            table = Table(title=f"{len(en_cours)} demandes sélectionnées")
+            table.add_column("#", style="cyan"); table.add_column("Client"); table.add_column("Service"); table.add_column("RDV"); table.add_column("Prix")
+            for b in en_cours:
+                table.add_row(str(b['id']), b['client_nom'], b['nom_service'], f"{b.get('rdv_date')} {b.get('rdv_heure')}", f"{b['prix_total']} DH")
+            console.print(table)
 
         action = Prompt.ask("Action", choices=["accepter", "refuser", "retour"])
         if action == "retour": 
             continue
-            
-        elif action == "accepter":
+
+        # Un seul appel au DAO pour toute la sélection (une transaction, résultat par demande)
+        selection_ids = [b['id'] for b in en_cours]
+        if action == "accepter":
             contact = Prompt.ask("Contact superviseur (nom + tel)")
-            if booking_dao.confirm_booking(bid, contact):
-                logger.log_info(f"Entreprise {company.nom_entreprise} accepte demande #{bid}")
-                console.print(Panel(
-                    f"Demande acceptée !\n"
-                    f"Intervention: {target.get('rdv_date')} à {target.get('rdv_heure')}\n"
-                    f"Superviseur: {contact}",
-                    title="Confirmation", border_style="green"
-                ))
-            else:
-                console.print("[red]Erreur lors de la confirmation.[/red]")
-                
-        elif action == "refuser":
-            booking_dao.update_status(bid, 'REFUSEE')
-            logger.log_info(f"Entreprise {company.nom_entreprise} refuse demande #{bid}")
-            console.print("[red]Demande refusée.[/red]")
+            resultats = booking_dao.confirm_bookings(selection_ids, contact, company_id=company.id)
+        else:
+            resultats = booking_dao.refuse_bookings(selection_ids, company_id=company.id)
+
+        traitees = [bid for bid, (ok, _) in resultats.items() if ok]
+        if traitees:
+            verbe = "accepte" if action == "accepter" else "refuse"
+            logger.log_info(f"Entreprise {company.nom_entreprise} {verbe} demande(s) {', '.join(f'#{bid}' for bid in traitees)}")
+        print_batch_results(resultats)
+        if action == "accepter" and traitees:
+            console.print(f"[green]Superviseur: {contact}[/green]")
 
 
 def manage_catalog(company, company_dao, catalog_service):
@@ -571,7 +822,7 @@ def edit_company(company, company_dao):
     console.print("\n[dim](Appuyez simplement sur Entrée pour garder la valeur actuelle)[/dim]")
     nom = Prompt.ask("Nouveau nom", default=company.nom_entreprise)
     desc = Prompt.ask("Nouvelle description", default=company.description or "")
-    ville = Prompt.ask("Nouvelle ville", default=company.ville or "")
+    ville = city_name(Prompt.ask("Nouvelle ville", default=company.ville or ""))
     phone = Prompt.ask("Nouveau tel", default=company.contact_phone or "")
     email = Prompt.ask("Nouveau email", default=company.contact_email or "")
     
@@ -645,9 +896,11 @@ def admin_menu(user, user_dao, company_dao, booking_dao, subscription_dao, catal
         console.print("[3] Gérer les Comptes Utilisateurs (Bannir)")
         console.print("[4] Gérer les Entreprises (Validations)")
         console.print("[5] Gérer les Catégories de Services")
+        console.print("[6] Simulation de prix (offres x quantités x villes)")
+        console.print("[7] Règles de prix (villes, catégories, quantités, périodes)")
         console.print("[0] Déconnexion")
         
-        choice = Prompt.ask("Choix", choices=["0", "1", "2", "3", "4", "5"])
+        choice = Prompt.ask("Choix", choices=["0", "1", "2", "3", "4", "5", "6", "7"])
 
         if choice == "0":
             logger.log_info("Admin déconnecté.")
@@ -658,6 +911,8 @@ def admin_menu(user, user_dao, company_dao, booking_dao, subscription_dao, catal
         elif choice == "3": admin_users(user_dao)
         elif choice == "4": admin_companies(company_dao, subscription_dao)
         elif choice == "5": admin_categories(company_dao)
+        elif choice == "6": admin_price_simulation(catalog_service)
+        elif choice == "7": admin_pricing_rules(company_dao)
 
 
 def admin_dashboard(booking_dao, subscription_dao, user_dao):
@@ -690,21 +945,175 @@ def admin_dashboard(booking_dao, subscription_dao, user_dao):
             table.add_row(r['plan_nom'], str(r['nb_abonnes']), f"{r['revenu_mensuel']:.2f} DH")
         console.print(table)
 
+    # Surveillance des caches de données de référence (catégories, forfaits) : voir utils/cache.py
+    caches = cache_stats()
+    if caches:
+        table = Table(title="Caches (données de référence)")
+        for colonne in ("Méthode", "Entrées", "Hits", "Misses", "Taux de hit", "Invalidations"):
+            table.add_column(colonne)
+        for nom, c in caches.items():
+            table.add_row(nom, f"{c['size']}/{c['maxsize']}", str(c['hits']), str(c['misses']),
+                          f"{c['hit_rate']:.0%}", str(c['invalidations']))
+        console.print(table)
+
     logger.log_info(f"Admin consulte dashboard. CA: {stats.get('chiffre_affaires', 0)}, Rev Abo: {total_rev}")
     Prompt.ask("[0] ⬅ Retour", choices=["0"])
 
 
+def admin_price_simulation(catalog_service):
+    """
+    Simulation "et si ?" : prix de TOUTES les offres d'un service pour plusieurs quantités et plusieurs villes
+    (une seule matrice NumPy, voir CatalogService.quote_matrix), résumés en prix minimum / moyen / maximum.
+    """
+    console.rule("[cyan]Simulation de prix[/cyan]")
+    services = catalog_service.get_service_types()
+    for s in services:
+        console.print(f"[{s.id}] {s.nom_service}")
+    service_id = IntPrompt.ask("Service (N°)")
+    offres = catalog_service.get_companies_for_service(service_id)
+    if not offres:
+        console.print("[yellow]Aucune offre visible pour ce service.[/yellow]")
+        return
+    try:
+        quantites = [int(q) for q in Prompt.ask(" Quantités (séparées par des virgules)", default="1,10,20,50").split(",")]
+    except ValueError:
+        console.print("[red]Quantités invalides.[/red]")
+        return
+    villes = [v.strip() for v in Prompt.ask(" Villes", default="Rabat,Casablanca,Marrakech").split(",") if v.strip()]
+
+    prix, descriptions = catalog_service.quote_matrix(offres, quantites, villes)
+    table = Table(title=f"{len(offres)} offres x {len(quantites)} quantités x {len(villes)} villes = {prix.size} devis")
+    for colonne in ("Ville", "Règle de prix", "Quantité", "Min", "Moyen", "Max"):
+        table.add_column(colonne)
+    for v, ville in enumerate(villes):
+        for q, quantite in enumerate(quantites):
+            colonne = prix[:, q, v]
+            table.add_row(ville, descriptions[v], str(quantite), f"{colonne.min():.2f} DH",
+                          f"{colonne.mean():.2f} DH", f"{colonne.max():.2f} DH")
+    console.print(table)
+    logger.log_info(f"Admin simulation de prix : service {service_id}, {prix.size} devis.")
+    Prompt.ask("[0] ⬅ Retour", choices=["0"])
+
+
+def ask_rule_date(question):
+    """Date facultative d'une règle de prix (YYYY-MM-DD), None si laissée vide. Redemande si le format est faux."""
+    while True:
+        texte = Prompt.ask(question, default="").strip()
+        if not texte:
+            return None
+        try:
+            return datetime.strptime(texte, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            console.print("[red]Format attendu : YYYY-MM-DD (ex: 2030-07-01).[/red]")
+
+
+def admin_pricing_rules(company_dao):
+    """
+    Règles de prix (table pricing_rules) : prix final = prix de base x multiplicateur + supplément,
+    selon la ville, la catégorie de service, la quantité minimum et la période.
+    Les modifications s'appliquent aux devis suivants, sans redémarrer l'application.
+    """
+    rule_dao = PricingRuleDAO()
+    while True:
+        regles = rule_dao.get_rules(active_only=False)
+        if regles is None:
+            console.print("[red]Règles de prix illisibles (base injoignable ou migration manquante : python3 -m utils.migrate_db).[/red]")
+            return
+        console.rule("[cyan]Règles de prix[/cyan]")
+        table = Table()
+        for colonne in ("ID", "Nom", "Ville", "Catégorie", "Qté min", "Période", "Calcul", "Priorité", "Active"):
+            table.add_column(colonne)
+        for r in regles:
+            periode = f"{r['date_debut'] or '…'} → {r['date_fin'] or '…'}" if r['date_debut'] or r['date_fin'] else "Toujours"
+            table.add_row(str(r['id']), r['nom'], r['ville'] or "Toutes", r['category'] or "Toutes", str(r['quantite_min']), periode,
+                          f"x {r['multiplicateur']:g} + {r['supplement']:g} DH", str(r['priorite']), "✅" if r['is_active'] else "❌")
+        console.print(table)
+        console.print("[dim]La règle la plus précise l'emporte : ville + catégorie, puis ville, puis catégorie, puis toutes.[/dim]")
+        console.print("[1] Ajouter une règle")
+        console.print("[2] Activer / Désactiver une règle")
+        console.print("[3] Supprimer une règle")
+        console.print("[0] ⬅ Retour")
+        choice = Prompt.ask("Choix", choices=["0", "1", "2", "3"])
+
+        if choice == "0": return
+        elif choice == "1":
+            nom = Prompt.ask("Nom affiché au client (ex: 'Promo été -10%')")
+            ville = Prompt.ask("Ville (laisser vide pour toutes)", default="").strip()
+            categories = sorted({t.category for t in company_dao.get_service_types() if t.category})
+            category = Prompt.ask("Catégorie de service", choices=categories + ["Toutes"], default="Toutes")
+            quantite_min = IntPrompt.ask("Quantité minimum", default=1)
+            date_debut = ask_rule_date("Début (YYYY-MM-DD, vide = sans limite)")
+            date_fin = ask_rule_date("Fin (YYYY-MM-DD, vide = sans limite)")
+            multiplicateur = FloatPrompt.ask("Multiplicateur (ex: 1.20 = +20 %, 0.90 = -10 %)", default=1.0)
+            supplement = FloatPrompt.ask("Supplément fixe (DH)", default=0.0)
+            priorite = IntPrompt.ask("Priorité (départage deux règles aussi précises)", default=0)
+            rule_id = rule_dao.add_rule(nom, multiplicateur, supplement, city_name(ville) if ville else None,
+                                        None if category == "Toutes" else category,
+                                        quantite_min, date_debut, date_fin, priorite)
+            if rule_id:
+                logger.log_info(f"Admin ajoute règle de prix #{rule_id}: {nom}")
+                console.print(f"[green]Règle #{rule_id} ajoutée, appliquée dès le prochain devis.[/green]")
+        elif choice == "2":
+            rule_id = IntPrompt.ask("ID de la règle")
+            regle = next((r for r in regles if r['id'] == rule_id), None)
+            if regle and rule_dao.set_rule_active(rule_id, not regle['is_active']):
+                logger.log_info(f"Admin {'désactive' if regle['is_active'] else 'active'} règle de prix #{rule_id}")
+                console.print(f"[green]Règle #{rule_id} {'désactivée' if regle['is_active'] else 'activée'}.[/green]")
+            else:
+                console.print("[red]Règle introuvable.[/red]")
+        elif choice == "3":
+            rule_id = IntPrompt.ask("ID de la règle")
+            if rule_dao.delete_rule(rule_id):
+                logger.log_info(f"Admin supprime règle de prix #{rule_id}")
+                console.print(f"[green]Règle #{rule_id} supprimée.[/green]")
+            else:
+                console.print("[red]Règle introuvable.[/red]")
+
+
 def admin_demands(booking_dao):
+    position = (None, 'next')
     while True:
-        bookings = booking_dao.get_all_bookings()
+        page = booking_dao.get_all_bookings_page(PAGE_SIZE * 2, *position)
+        bookings = page['rows']
+        if not bookings and position[0] is not None:
+            position = (None, 'next')
+            continue
         console.rule("[cyan]Registre Complet des Opérations[/cyan]")
         table = Table()
         table.add_column("#"); table.add_column("Client"); table.add_column("Entreprise"); table.add_column("Service"); table.add_column("Statut"); table.add_column("Prix"); table.add_column("RDV")
         for b in bookings:
             table.add_row(str(b['id']), b['client_nom'], b['nom_entreprise'], b['nom_service'], b['statut'], f"{b['prix_total']} DH", str(b.get('rdv_date') or '—'))
         console.print(table)
+        console.print("[1]  Refuser des demandes")
+        console.print("[2]  Annuler des réservations (modération)")
+        navigation = print_page_navigation(page)
         console.print("[0] ⬅ Retour")
-        if Prompt.ask("Choix", choices=["0"]) == "0": return
+        choice = Prompt.ask("Choix", choices=["0", "1", "2"] + navigation)
+        if choice == "0": return
+        if choice in navigation:
+            position = page_position(page, choice, position)
+            continue
+
+        # Comme pour les entreprises : seulement les réservations de la page affichée
+        ids = parse_id_selection(Prompt.ask("ID(s) concernés (ex: 12,15,18 ou 12-18)"))
+        sur_la_page = {b['id'] for b in bookings}
+        hors_page = [bid for bid in ids if bid not in sur_la_page]
+        if hors_page:
+            console.print(f"[yellow]{len(hors_page)} ID(s) absent(s) de cette page, ignoré(s).[/yellow]")
+        ids = [bid for bid in ids if bid in sur_la_page]
+        if not ids:
+            console.print("[red]Aucun ID valide.[/red]")
+            continue
+
+        # Un seul appel groupé : la base vérifie elle-même que chaque statut de départ est autorisé
+        if choice == "1":
+            resultats = booking_dao.refuse_bookings(ids)
+        else:
+            resultats = booking_dao.cancel_bookings(ids)
+        traitees = [bid for bid, (ok, _) in resultats.items() if ok]
+        if traitees:
+            logger.log_info(f"Admin : {'refus' if choice == '1' else 'annulation'} des réservations {', '.join(f'#{bid}' for bid in traitees)}")
+        print_batch_results(resultats)
 
 
 def admin_users(user_dao):
@@ -751,7 +1160,11 @@ def admin_companies(company_dao, subscription_dao):
         table.add_column("ID", style="cyan"); table.add_column("Label"); table.add_column("Ville"); table.add_column("Compte Vérifié"); table.add_column("Forfait Actuel"); table.add_column("Expire")
         for c in companies:
             v = "[green] OUI[/green]" if c['is_verified'] else "[red] NON[/red]"
-            table.add_row(str(c['id']), c['nom_entreprise'], c.get('ville','—'), v, c.get('plan_nom','—'), str(c.get('subscription_expires_at','—')))
+            # is_expired est posé par le nettoyage périodique (utils/sweeper.py)
+            expire = str(c.get('subscription_expires_at','—'))
+            if c.get('is_expired'):
+                expire = f"[red]{expire} (expiré)[/red]"
+            table.add_row(str(c['id']), c['nom_entreprise'], c.get('ville','—'), v, c.get('plan_nom','—'), expire)
         console.print(table)
 
         console.print("\n[1] Marquer une entreprise comme VÉRIFIÉE (Elle apparaîtra pour les clients)")
@@ -866,7 +1279,7 @@ def login_register(user_dao, subscription_dao, company_dao):
                 email = Prompt.ask("Votre Adresse Email")
                 pwd = Prompt.ask("Créez un Mot de passe fort", password=True)
                 tel = Prompt.ask("Numéro de Téléphone Marocain")
-                ville = Prompt.ask("Votre Ville (Ex: Casablanca, Rabat...)")
+                ville = city_name(Prompt.ask("Votre Ville (Ex: Casablanca, Rabat...)"))
                 adresse = Prompt.ask("Adresse exacte ou Quartier")
                 try:
                     # On utilise la "Factory" de modèles pour construire le bon objet Python
@@ -884,7 +1297,7 @@ def login_register(user_dao, subscription_dao, company_dao):
                 email = Prompt.ask("Email professionnel de contact")
                 pwd = Prompt.ask("Créez votre mot de passe pour OptiVolt", password=True)
                 tel = Prompt.ask("Numéro de Téléphone central pour vous joindre")
-                ville = Prompt.ask("Ville de domiciliation ou d'opérations principales")
+                ville = city_name(Prompt.ask("Ville de domiciliation ou d'opérations principales"))
                 adresse = Prompt.ask("Siège social ou adresse locale")
                 description = Prompt.ask("Slogan ou petite description pour attirer les clients (Pitch)")
                 contact_phone = Prompt.ask("Numéro d'Urgence à communiquer aux clients confirmés (Le numéro du chef)")
@@ -916,20 +1329,24 @@ def login_register(user_dao, subscription_dao, company_dao):
                 console.print("[yellow] Interrogation de votre banque, veuillez patienter...[/yellow]")
 
                 try:
-                    # Transaction d'Insertion Globale réussie !
-                    user = UserFactory.create_user("ENTREPRISE", nom, email, pwd, tel, ville=ville, adresse=adresse)
-                    created_user = user_dao.create(user)
-                    if created_user:
+                    # Transaction d'Insertion Globale : compte + profil entreprise + abonnement
+                    # sont validés ensemble (un seul COMMIT), ou pas du tout.
+                    with DatabaseConnection().transaction():
+                        user = UserFactory.create_user("ENTREPRISE", nom, email, pwd, tel, ville=ville, adresse=adresse)
+                        created_user = user_dao.create(user)
+                        if not created_user:
+                            raise RuntimeError("création du compte impossible (email déjà utilisé ?)")
                         comp = Company(
                             user_id=created_user.id, nom_entreprise=nom, description=description,
                             ville=ville, contact_phone=contact_phone, contact_email=contact_email,
                             is_verified=False, subscription_plan_id=plan_id
                         )
-                        company_dao.create_company(comp)
-                        
-                        logger.log_info(f"Nouvelle entreprise inscrite: {nom} — Plan {selected_plan.nom}")
-                        console.print("[green] Paiement Validé ! Souscription actée avec succès ![/green]")
-                        console.print("[dim]Note de l'Administration : Votre fiche va être étudiée par nos services sous 48h afin de valider 'is_verified'.\nVous pouvez tout de même commencer à configurer votre catalogue ![/dim]")
+                        if not company_dao.create_company(comp):
+                            raise RuntimeError("création du profil entreprise impossible")
+
+                    logger.log_info(f"Nouvelle entreprise inscrite: {nom} — Plan {selected_plan.nom}")
+                    console.print("[green] Paiement Validé ! Souscription actée avec succès ![/green]")
+                    console.print("[dim]Note de l'Administration : Votre fiche va être étudiée par nos services sous 48h afin de valider 'is_verified'.\nVous pouvez tout de même commencer à configurer votre catalogue ![/dim]")
                 except Exception as e:
                     console.print(f"[red]La caisse a rencontré une erreur technique fatale: {e}[/red]")
 
@@ -941,16 +1358,11 @@ def main():
     """Initialise la base de données, lance l'application, et route les utilisateurs."""
     print_header()
 
-    # Paramètres importés depuis settings.py
-    HOST = Config.DB_HOST
-    USER = Config.DB_USER
-    PASSWORD = Config.DB_PASSWORD
-    DATABASE = Config.DB_NAME
-
     # Tentative d'ouverture du Singleton Base de Données
+    # (paramètres importés depuis settings.py : MySQL ou SQLite, taille du pool...)
     try:
         db = DatabaseConnection()
-        db.connect(HOST, USER, PASSWORD, DATABASE)
+        db.connect_from_config(Config)
     except Exception as e:
         console.print(f"[bold red]Alerte Critique : Échec du pont avec le serveur Base de Données => {e}[/bold red]")
         console.print("[dim]Avez-vous bien lancé WAMP/MAMP/XAMPP et le script de Seed (db_init) ?[/dim]")
@@ -974,6 +1386,13 @@ def main():
         if user is None:
             console.print("[bold]Au revoir et à bientôt sur OptiVolt ! ☀️[/bold]")
             logger.log_info("Fermeture Volontaire de l'Application.")
+            if db.pool is not None:
+                logger.log_info(f"Métriques du pool de connexions : {db.get_pool_metrics()}")
+            # Bilan des requêtes SQL par méthode de DAO (si DB_INSTRUMENTATION est activé)
+            for methode, stats in db.get_query_report().items():
+                logger.log_info(f"Requêtes {methode} : {stats['calls']} appels, moy {stats['avg_ms']:.2f} ms, p95 {stats['p95_ms']:.0f} ms, {stats['rows']} lignes, {stats['bytes']} octets")
+            for methode, stats in cache_stats().items():
+                logger.log_info(f"Cache {methode} : {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['evictions']} évictions, {stats['invalidations']} invalidations")
             break
 
         # S'il est connecté (Client, Entreprise, ou Admin), on le téléporte sur le bon espace !
@@ -0,0 +1,372 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import repeat
+
+import numpy as np
+
+from DAO.booking_dao import BookingDAO
+from DAO.company_dao import CompanyDAO
+
+"""
+Service de Disponibilités (agenda des entreprises).
+Au lieu d'interroger la base jour par jour (une requête par date essayée par le client),
+on récupère TOUTES les heures réservées d'une entreprise sur la période en une seule requête,
+puis on calcule en mémoire, pour chaque jour, une "bitmap" d'occupation :
+un simple entier où le bit n°h vaut 1 si l'heure h (0 à 23) est déjà prise.
+  ex: 10:00 et 14:00 réservées -> bits 10 et 14 -> 0b100010000000000 (= 17408)
+Pour chercher "le créneau le plus tôt" chez TOUTES les entreprises d'un service, on fait le même
+calcul en une seule fois avec NumPy, sur un tableau [entreprise x jour x heure] de booléens.
+Une intervention dure catalog.duree_heures heures de travail (ex: "2 jours" = 16 h) : elle occupe
+les heures d'ouverture qui se suivent à partir du RDV, en continuant le(s) jour(s) ouvré(s) suivant(s)
+si la journée ne suffit pas. CompanyAgenda répond "une intervention de L heures tient-elle à T ?".
+"""
+
+# Jours chargés en plus de la période proposée : une intervention qui commence à la fin
+# de la période peut déborder sur les jours suivants
+MARGE_JOURS = 14
+
+# Dictionnaire pour traduire le mot du jour en Numéro (0=Lundi, 6=Dimanche)
+JOUR_MAP = {'Lun': 0, 'Mar': 1, 'Mer': 2, 'Jeu': 3, 'Ven': 4, 'Sam': 5, 'Dim': 6}
+JOUR_NOMS = ['Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim']
+
+
+def parse_working_days(jours):
+    """Comprend "Lun-Sam" (Plage) ou "Lun,Mar,Jeu" (Liste) et renvoie les numéros de jours {0, 1, ...}."""
+    jours = jours or 'Lun-Sam'
+    if '-' in jours:
+        parts = jours.split('-')
+        start_day = JOUR_MAP.get(parts[0].strip(), 0)
+        end_day = JOUR_MAP.get(parts[1].strip(), 5)
+        return set(range(start_day, end_day + 1))
+    return {JOUR_MAP.get(j.strip(), 0) for j in jours.split(',')}
+
+
+def parse_opening_hours(h_debut, h_fin):
+    """'08:00', '18:00' -> (8, 18) : les créneaux vont de 08:00 à 17:00 inclus."""
+    return int((h_debut or '08:00').split(':')[0]), int((h_fin or '18:00').split(':')[0])
+
+
+def hours_mask(start_h, end_h):
+    """Bitmap avec les bits start_h ... end_h - 1 à 1 (toutes les heures d'ouverture)."""
+    return ((1 << end_h) - 1) & ~((1 << start_h) - 1)
+
+
+def occupancy_mask(heures):
+    """['10:00', '14:00'] -> bitmap avec les bits 10 et 14 à 1."""
+    mask = 0
+    for heure in heures:
+        if heure:
+            mask |= 1 << int(heure.split(':')[0])
+    return mask
+
+
+def occupied_slots(company_data, rdv_date, rdv_heure, duree=1):
+    """
+    Heures occupées par une intervention de 'duree' heures qui commence le rdv_date à rdv_heure :
+    [('YYYY-MM-DD', 'HH:00'), ...] en suivant les heures d'ouverture (la nuit et les jours fermés
+    sont sautés). ex: ouvert 08h-18h, "½ journée" (4 h) à 16:00 -> 16:00, 17:00, puis 08:00 et 09:00
+    le jour ouvré suivant. Liste vide si l'entreprise n'a aucune heure d'ouverture.
+    """
+    working_days = parse_working_days(company_data.get('jours_travail'))
+    start_h, end_h = parse_opening_hours(company_data.get('horaire_debut'), company_data.get('horaire_fin'))
+    if start_h >= end_h or not working_days:
+        return []
+
+    jour = datetime.strptime(str(rdv_date)[:10], '%Y-%m-%d').date()
+    heure = max(int(str(rdv_heure).split(':')[0]), start_h)
+    creneaux = []
+    while len(creneaux) < max(1, duree):
+        if jour.weekday() in working_days and heure < end_h:
+            creneaux.append((jour.strftime('%Y-%m-%d'), f"{heure:02d}:00"))
+            heure += 1
+        else:
+            jour += timedelta(days=1)
+            heure = start_h
+    return creneaux
+
+
+class CompanyAgenda:
+    """
+    Agenda d'UNE entreprise sur une période, pour répondre vite à :
+    "une intervention de L heures peut-elle commencer tel jour à telle heure ?"
+    Les heures d'ouverture sont mises bout à bout (position 0, 1, 2... ; la nuit et les jours fermés
+    n'existent pas), puis on range les plages LIBRES [début, fin[ dans l'ordre :
+      ex: 08h-18h, 10:00 et 11:00 réservées -> [08h, 10h[ et [12h, 18h[ + la suite du lendemain
+    Pour une heure T, la recherche dichotomique (bisect) trouve la plage qui contient T en O(log n) ;
+    l'intervention tient si cette plage dure encore au moins L heures après T.
+    """
+
+    def __init__(self, company_data, days, occupes):
+        """days : dates de la période (dans l'ordre) ; occupes : {'YYYY-MM-DD': ['10:00', ...]}."""
+        working_days = parse_working_days(company_data.get('jours_travail'))
+        start_h, end_h = parse_opening_hours(company_data.get('horaire_debut'), company_data.get('horaire_fin'))
+        self.start_h, self.end_h = start_h, end_h
+        self.heures = []      # position -> ('YYYY-MM-DD', 'HH:00')
+        self.positions = {}   # ('YYYY-MM-DD', 'HH:00') -> position
+        self.debuts = []      # début de chaque plage libre (positions croissantes)
+        self.fins = []        # fin (exclue) de chaque plage libre
+
+        for d in days:
+            if d.weekday() not in working_days:
+                continue
+            jour = d.strftime('%Y-%m-%d')
+            pris = {int(h.split(':')[0]) for h in occupes.get(jour, []) if h}
+            for h in range(start_h, end_h):
+                position = len(self.heures)
+                self.heures.append((jour, f"{h:02d}:00"))
+                self.positions[(jour, f"{h:02d}:00")] = position
+                if h in pris:
+                    continue
+                # Heure libre : elle prolonge la plage précédente si celle-ci finit juste avant
+                if self.fins and self.fins[-1] == position:
+                    self.fins[-1] = position + 1
+                else:
+                    self.debuts.append(position)
+                    self.fins.append(position + 1)
+
+    def free_run(self, rdv_date, rdv_heure):
+        """Nombre d'heures de travail libres d'affilée à partir de ce créneau (0 s'il est pris ou fermé)."""
+        position = self.positions.get((str(rdv_date)[:10], f"{int(str(rdv_heure).split(':')[0]):02d}:00"))
+        if position is None:
+            return 0
+        k = bisect_right(self.debuts, position) - 1
+        if k < 0 or position >= self.fins[k]:
+            return 0
+        return self.fins[k] - position
+
+    def fits(self, rdv_date, rdv_heure, duree=1):
+        """L'intervention de 'duree' heures tient-elle en commençant à ce créneau ?"""
+        return self.free_run(rdv_date, rdv_heure) >= duree
+
+    def start_hours(self, rdv_date, duree=1):
+        """Heures de ce jour où une intervention de 'duree' heures peut commencer."""
+        jour = str(rdv_date)[:10]
+        return [f"{h:02d}:00" for h in range(self.start_h, self.end_h) if self.fits(jour, f"{h:02d}:00", duree)]
+
+
+@dataclass
+class DayAvailability:
+    """Disponibilités d'une entreprise pour UN jour."""
+    jour: date
+    open_mask: int = 0      # heures d'ouverture
+    occupied_mask: int = 0  # heures déjà réservées
+    start_mask: int = None  # heures où l'intervention demandée peut commencer (None = toute heure libre)
+
+    @property
+    def date_str(self):
+        return self.jour.strftime('%Y-%m-%d')
+
+    @property
+    def free_mask(self):
+        return self.open_mask & ~self.occupied_mask
+
+    @property
+    def free_hours(self):
+        return _heures(self.free_mask)
+
+    @property
+    def booked_hours(self):
+        return _heures(self.occupied_mask & self.open_mask)
+
+    @property
+    def nb_free(self):
+        return bin(self.free_mask).count('1')
+
+    @property
+    def start_hours(self):
+        return _heures(self.free_mask if self.start_mask is None else self.start_mask)
+
+    @property
+    def nb_starts(self):
+        return len(self.start_hours)
+
+
+def _heures(mask):
+    return [f"{h:02d}:00" for h in range(24) if mask >> h & 1]
+
+
+@dataclass
+class SlotSuggestion:
+    """Un créneau libre proposé par la recherche "au plus tôt" (offre de l'entreprise + date + heure)."""
+    company: dict
+    rdv_date: str
+    rdv_heure: str
+
+
+def _parse_unique(values, fonction):
+    """Applique 'fonction' une seule fois par valeur DISTINCTE, puis redistribue le résultat (tableau NumPy)."""
+    uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return np.asarray([fonction(u) for u in uniques])[inverse.reshape(-1)]
+
+
+def _jours_en_ligne(jours):
+    """'Lun-Ven' -> [True, True, True, True, True, False, False]."""
+    working_days = parse_working_days(jours)
+    return [j in working_days for j in range(7)]
+
+
+def _intervention_tient(ouvert, libre, durees):
+    """
+    Pour chaque case [jour, heure, offre] : True si les durees[offre] heures d'ouverture qui suivent
+    (en continuant sur les jours suivants) sont toutes libres, donc si l'intervention peut commencer là.
+    On remonte le temps, de la dernière heure de la période vers la première, en calculant pour
+    TOUTES les offres à la fois (une ligne NumPy = une heure, une colonne = une offre) :
+      suite[h] = heures libres d'affilée à partir de h
+               = suite[h + 1] (+ 1 si h est une heure d'ouverture), remis à 0 si h est déjà réservée
+    La boucle porte sur les heures de la période (24 x jours), jamais sur les offres.
+    """
+    forme = ouvert.shape
+    total, n = forme[0] * forme[1], forme[2]
+    compteur = np.int16 if total < np.iinfo(np.int16).max else np.int32
+    # Vues (jour, heure, offre) -> (heure de la période, offre) : aucune copie
+    ouverte = ouvert.reshape(total, n)
+    pas_reservee = (libre | ~ouvert).reshape(total, n)
+
+    suite = np.zeros((total + 1, n), dtype=compteur)
+    for h in range(total - 1, -1, -1):
+        np.add(suite[h + 1], ouverte[h], out=suite[h])
+        suite[h] *= pas_reservee[h]
+    return (suite[:total] >= durees).reshape(forme)
+
+
+def earliest_free_slots(companies, booked_slots, days, k=10, nb_start_days=None):
+    """
+    Calcule les k premiers créneaux libres, toutes entreprises confondues.
+      companies     : lignes de CompanyDAO.get_companies_by_service (une par offre)
+      booked_slots  : [(company_id, 'YYYY-MM-DD', 'HH:MM'), ...] déjà réservés
+      days          : dates candidates, dans l'ordre
+      nb_start_days : seuls les nb_start_days premiers jours sont proposés comme début
+                      (les suivants servent aux interventions qui débordent ; None = tous)
+    Une offre de duree_heures > 1 n'est proposée que si toute l'intervention tient.
+    Aucune boucle par entreprise : tout est calculé sur des tableaux NumPy.
+    À date et heure égales, l'offre la moins chère passe en premier.
+    """
+    if not companies or not days or k <= 0:
+        return []
+
+    # 1. Colonnes utiles sous forme de tableaux (N = nombre d'offres), rangées de la moins chère à la plus chère :
+    #    à date et heure égales, le parcours final rencontre ainsi d'abord l'offre la moins chère
+    prix = np.fromiter((c.get('prix_base') or 0 for c in companies), dtype=np.float64, count=len(companies))
+    ordre = np.argsort(prix, kind='stable')
+    companies = [companies[i] for i in ordre]
+    company_ids = np.fromiter((c['id'] for c in companies), dtype=np.int64, count=len(companies))
+    start_h = _parse_unique([c.get('horaire_debut') or '08:00' for c in companies], lambda h: int(h.split(':')[0]))
+    end_h = _parse_unique([c.get('horaire_fin') or '18:00' for c in companies], lambda h: int(h.split(':')[0]))
+    work = _parse_unique([c.get('jours_travail') or 'Lun-Sam' for c in companies], _jours_en_ligne)  # (N, 7)
+    durees = np.fromiter((c.get('duree_heures') or 1 for c in companies), dtype=np.int64, count=len(companies))
+
+    # 2. Heures d'ouverture : ouvert[d, h, n] = jour travaillé ET start_h <= h < end_h
+    weekdays = np.array([d.weekday() for d in days])
+    heures = np.arange(24)
+    dans_horaires = (heures[:, None] >= start_h) & (heures[:, None] < end_h)        # (24, N)
+    ouvert = work.T[weekdays][:, None, :] & dans_horaires[None, :, :]              # (D, 24, N)
+    libre = ouvert.copy()
+
+    # 3. On retire les créneaux déjà réservés (une réservation occupe la case de TOUTES les offres de l'entreprise)
+    if booked_slots:
+        uniq_ids, ligne_vers_uniq = np.unique(company_ids, return_inverse=True)
+        b_ids, b_jours, b_heures = zip(*booked_slots)
+        b_ids = np.asarray(b_ids, dtype=np.int64)
+
+        # Date et heure -> numéro de case, via des dictionnaires (chaque valeur distincte n'est analysée qu'une fois)
+        index_jour = {d.strftime('%Y-%m-%d'): i for i, d in enumerate(days)}
+        index_heure = {h: int(h.split(':')[0]) for h in set(b_heures)}
+        pos_d = np.fromiter(map(index_jour.get, b_jours, repeat(-1)), dtype=np.int64, count=len(b_ids))
+        pos_h = np.fromiter(map(index_heure.__getitem__, b_heures), dtype=np.int64, count=len(b_ids))
+
+        pos_c = np.clip(np.searchsorted(uniq_ids, b_ids), 0, len(uniq_ids) - 1)
+        connus = (uniq_ids[pos_c] == b_ids) & (pos_d >= 0)
+
+        # Colonnes des offres de chaque entreprise, regroupées : offres_par_id[debut[u]:debut[u] + nb[u]]
+        ligne_vers_uniq = ligne_vers_uniq.reshape(-1)
+        offres_par_id = np.argsort(ligne_vers_uniq, kind='stable')
+        nb = np.bincount(ligne_vers_uniq, minlength=len(uniq_ids))
+        debut = np.cumsum(nb) - nb
+
+        # Chaque réservation est répétée une fois par offre de son entreprise, puis toutes les cases sont
+        # effacées d'un coup (le travail dépend du nombre de réservations, pas de la taille de la grille)
+        pos_c, case = pos_c[connus], pos_d[connus] * 24 + pos_h[connus]
+        repetitions = nb[pos_c]
+        rang = np.arange(repetitions.sum()) - np.repeat(np.cumsum(repetitions) - repetitions, repetitions)
+        colonnes = offres_par_id[np.repeat(debut[pos_c], repetitions) + rang]
+        libre.reshape(len(days) * 24, len(companies))[np.repeat(case, repetitions), colonnes] = False
+
+    # 4. Interventions de plusieurs heures : il faut assez d'heures libres d'affilée après le début
+    #    (pour une offre d'une heure, le test revient à "la case est libre" : on peut tout calculer d'un bloc)
+    if (durees > 1).any():
+        libre &= _intervention_tient(ouvert, libre, durees)
+    if nb_start_days is not None:
+        libre[nb_start_days:] = False
+
+    # 5. Ordre de parcours : jour, puis heure, puis offre la moins chère (ordre déjà celui des colonnes)
+    par_creneau = libre.reshape(len(days) * 24, len(companies))
+
+    # On ne cherche les offres que dans les premiers (jour, heure) nécessaires pour atteindre k
+    cumul = np.cumsum(par_creneau.sum(axis=1))
+    fin = int(np.searchsorted(cumul, k)) + 1
+    trouves = np.flatnonzero(par_creneau[:fin])[:k]
+    creneaux, rangs = np.divmod(trouves, len(companies))
+
+    return [
+        SlotSuggestion(companies[r], days[c // 24].strftime('%Y-%m-%d'), f"{c % 24:02d}:00")
+        for c, r in zip(creneaux.tolist(), rangs.tolist())
+    ]
+
+
+class AvailabilityService:
+    def __init__(self, booking_dao=None, company_dao=None):
+        self.booking_dao = booking_dao or BookingDAO()
+        self.company_dao = company_dao or CompanyDAO()
+
+    def find_earliest_slots(self, service_type_id, ville=None, k=10, horizon=14, today=None):
+        """
+        Les k créneaux libres les plus proches, toutes entreprises confondues, pour un type de service
+        (et éventuellement une ville). Deux requêtes SQL au total, quel que soit le nombre d'entreprises.
+        """
+        companies = self.company_dao.get_companies_by_service(service_type_id, ville)
+        if not companies:
+            return []
+
+        today = today or date.today()
+        # Quelques jours de plus pour vérifier les interventions qui débordent après la période
+        marge = MARGE_JOURS if any((c.get('duree_heures') or 1) > 1 for c in companies) else 0
+        days = [today + timedelta(days=i) for i in range(1, horizon + marge + 1)]
+        booked = self.booking_dao.get_booked_slots_for_service(
+            service_type_id, days[0].strftime('%Y-%m-%d'), days[-1].strftime('%Y-%m-%d')
+        )
+        return earliest_free_slots(companies, booked, days, k, nb_start_days=horizon)
+
+    def get_available_days(self, company_data, nb_days=7, horizon=21, today=None, duree=1):
+        """
+        Renvoie jusqu'à nb_days jours ouvrés (dans les 'horizon' prochains jours) où une intervention
+        de 'duree' heures peut ENCORE commencer, avec leur bitmap d'occupation. Une seule requête SQL.
+        """
+        today = today or date.today()
+        working_days = parse_working_days(company_data.get('jours_travail'))
+        start_h, end_h = parse_opening_hours(company_data.get('horaire_debut'), company_data.get('horaire_fin'))
+        open_mask = hours_mask(start_h, end_h)
+
+        candidats = [today + timedelta(days=i) for i in range(1, horizon + 1)]
+        candidats = [d for d in candidats if d.weekday() in working_days]
+        if not candidats or not open_mask:
+            return []
+
+        # Une intervention longue peut déborder après la période : on charge quelques jours de plus
+        fin = candidats[-1] + timedelta(days=MARGE_JOURS if duree > 1 else 0)
+        occupes = self.booking_dao.get_booked_slots_range(
+            company_data['id'], candidats[0].strftime('%Y-%m-%d'), fin.strftime('%Y-%m-%d')
+        )
+        periode = [candidats[0] + timedelta(days=i) for i in range((fin - candidats[0]).days + 1)]
+        agenda = CompanyAgenda(company_data, periode, occupes)
+
+        jours = []
+        for d in candidats:
+            dispo = DayAvailability(d, open_mask, occupancy_mask(occupes.get(d.strftime('%Y-%m-%d'), [])),
+                                    occupancy_mask(agenda.start_hours(d.strftime('%Y-%m-%d'), duree)))
+            # Les jours où l'intervention ne peut commencer nulle part ne sont même pas proposés
+            if dispo.start_mask:
+                jours.append(dispo)
+                if len(jours) >= nb_days:
+                    break
+        return jours
@@ -0,0 +1,245 @@
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from DAO.booking_dao import BookingDAO, SlotAlreadyBookedError
+from DAO.company_dao import CompanyDAO
+from DAO.user_dao import UserDAO
+from models.company import CatalogItem, ServiceType
+from services.availability_service import MARGE_JOURS, occupied_slots, parse_working_days, parse_opening_hours
+from services.catalog_service import CatalogService
+from utils.logger import Logger
+
+"""
+Service d'Import en masse des réservations (fichier JSONL : un objet JSON par ligne).
+Exemple de ligne :
+  {"ref": "CMD-0001", "client_id": 12, "company_id": 3, "service_type_id": 1, "quantite": 10,
+   "rdv_date": "2030-05-14", "rdv_heure": "10:00", "mode_paiement": "CASH", "description": "Villa, Agdal"}
+Le fichier est lu en flux, par lots (500 lignes par défaut). Pour chaque lot :
+  1. on valide chaque ligne (client, offre du catalogue, jour et heure d'ouverture, créneaux libres
+     pendant toute la durée de l'intervention) ;
+  2. on calcule le prix avec CatalogService.calculate_price (même règle que dans la CLI) ;
+  3. on insère tout le lot avec executemany, dans UNE transaction (BookingDAO.insert_bookings_batch).
+Chaque ligne reçoit un résultat (OK / REJETEE / DEJA_IMPORTEE) écrit dans un fichier JSONL de sortie.
+La référence 'ref' (ou, à défaut, "nom_du_fichier:numéro_de_ligne") est unique en base :
+relancer le même fichier n'importe rien deux fois.
+"""
+
+CHAMPS_OBLIGATOIRES = ('client_id', 'company_id', 'service_type_id', 'rdv_date', 'rdv_heure')
+MODES_PAIEMENT = ('ONLINE', 'CASH')
+
+# Nombre de tentatives pour un lot dont un créneau a été pris par quelqu'un d'autre pendant l'import
+ESSAIS_PAR_LOT = 3
+
+
+class LigneInvalide(Exception):
+    """Levée pendant la validation d'une ligne : le message est recopié dans le fichier de résultats."""
+    pass
+
+
+class BookingImportService:
+    def __init__(self, booking_dao=None, company_dao=None, user_dao=None, catalog_service=None):
+        self.booking_dao = booking_dao or BookingDAO()
+        self.company_dao = company_dao or CompanyDAO()
+        self.user_dao = user_dao or UserDAO()
+        self.catalog_service = catalog_service or CatalogService()
+        self.logger = Logger()
+        # Offres du catalogue déjà chargées : {service_type_id: {company_id: ligne}}
+        self._offres = {}
+        # Créneaux réclamés par les lignes déjà importées de CE fichier
+        self._creneaux_importes = set()
+
+    def import_file(self, input_path, output_path, chunk_size=500, today=None):
+        """
+        Importe toutes les réservations du fichier 'input_path' et écrit un résultat par ligne
+        dans 'output_path'. Retourne un dictionnaire de statistiques (compteurs, durée, débit).
+        """
+        today = today or date.today()
+        source = os.path.basename(input_path)
+        stats = {'lues': 0, 'importees': 0, 'rejetees': 0, 'deja_importees': 0}
+        debut = time.perf_counter()
+
+        with open(input_path, encoding='utf-8') as entree, open(output_path, 'w', encoding='utf-8') as sortie:
+            lot = []
+            for numero, texte in enumerate(entree, 1):
+                if not texte.strip():
+                    continue
+                lot.append((numero, texte))
+                if len(lot) >= chunk_size:
+                    self._traiter_lot(lot, source, today, stats, sortie)
+                    lot = []
+            if lot:
+                self._traiter_lot(lot, source, today, stats, sortie)
+
+        stats['duree_s'] = time.perf_counter() - debut
+        stats['par_seconde'] = stats['lues'] / stats['duree_s'] if stats['duree_s'] else 0.0
+        self.logger.log_info(
+            f"Import de {source} : {stats['importees']} importées, {stats['rejetees']} rejetées, "
+            f"{stats['deja_importees']} déjà importées ({stats['par_seconde']:.0f} lignes/s)"
+        )
+        return stats
+
+    def _traiter_lot(self, lot, source, today, stats, sortie):
+        """Valide, prix, insère un lot puis écrit ses résultats (dans l'ordre du fichier)."""
+        resultats = {}
+        demandes = []  # (numero, reservation validée)
+        for numero, texte in lot:
+            try:
+                demandes.append((numero, self._lire_ligne(texte, numero, source, today)))
+            except LigneInvalide as erreur:
+                resultats[numero] = {'ligne': numero, 'statut': 'REJETEE', 'erreur': str(erreur)}
+
+        self._charger_offres({d['service_type_id'] for _, d in demandes})
+        clients = self.user_dao.get_users_by_ids(list({d['client_id'] for _, d in demandes}))
+
+        # Contrôles qui demandent la base : une requête par lot (et non par ligne)
+        for _ in range(ESSAIS_PAR_LOT):
+            valides = self._valider_lot(demandes, clients, resultats)
+            try:
+                ids = self.booking_dao.insert_bookings_batch([b for _, b in valides])
+                break
+            except SlotAlreadyBookedError as erreur:
+                # Un client a réservé pendant l'import : on recontrôle le lot (le créneau pris sera rejeté)
+                self.logger.log_warning(f" Import {source} : conflit sur un lot, nouvel essai ({erreur})")
+        else:
+            ids = None
+
+        for numero, b in valides:
+            booking_id = (ids or {}).get(b['import_ref'])
+            if booking_id:
+                self._creneaux_importes.update((b['company_id'], jour, heure) for jour, heure in b['creneaux'])
+                resultats[numero] = {'ligne': numero, 'ref': b['import_ref'], 'statut': 'OK',
+                                     'booking_id': booking_id, 'prix_total': round(b['prix_total'], 2)}
+            else:
+                resultats[numero] = {'ligne': numero, 'ref': b['import_ref'], 'statut': 'REJETEE',
+                                     'erreur': "échec de l'insertion du lot"}
+
+        for numero, _ in lot:
+            resultat = resultats[numero]
+            stats['lues'] += 1
+            stats[{'OK': 'importees', 'REJETEE': 'rejetees', 'DEJA_IMPORTEE': 'deja_importees'}[resultat['statut']]] += 1
+            sortie.write(json.dumps(resultat, ensure_ascii=False) + "\n")
+
+    def _lire_ligne(self, texte, numero, source, today):
+        """Contrôles qui ne demandent pas la base : format JSON, champs, date et heure."""
+        try:
+            donnees = json.loads(texte)
+        except ValueError:
+            raise LigneInvalide("JSON invalide")
+        if not isinstance(donnees, dict):
+            raise LigneInvalide("la ligne doit être un objet JSON")
+
+        manquants = [champ for champ in CHAMPS_OBLIGATOIRES if donnees.get(champ) in (None, "")]
+        if manquants:
+            raise LigneInvalide(f"champ(s) manquant(s) : {', '.join(manquants)}")
+
+        try:
+            client_id = int(donnees['client_id'])
+            company_id = int(donnees['company_id'])
+            service_type_id = int(donnees['service_type_id'])
+            quantite = int(donnees.get('quantite') or 1)
+        except (TypeError, ValueError):
+            raise LigneInvalide("client_id, company_id, service_type_id et quantite doivent être des entiers")
+        if quantite < 1:
+            raise LigneInvalide("la quantité doit être au moins 1")
+
+        try:
+            rdv_date = datetime.strptime(str(donnees['rdv_date']), '%Y-%m-%d').date()
+            heure = datetime.strptime(str(donnees['rdv_heure']), '%H:%M')
+        except ValueError:
+            raise LigneInvalide("rdv_date doit être au format YYYY-MM-DD et rdv_heure au format HH:MM")
+        if rdv_date <= today:
+            raise LigneInvalide("la date du rendez-vous doit être dans le futur")
+        if heure.minute:
+            raise LigneInvalide("les rendez-vous commencent à l'heure pile (ex: 10:00)")
+
+        mode = str(donnees.get('mode_paiement') or 'ONLINE').upper()
+        if mode not in MODES_PAIEMENT:
+            raise LigneInvalide(f"mode de paiement inconnu : {mode}")
+
+        ref = str(donnees.get('ref') or f"{source}:{numero}")
+        if len(ref) > 64:
+            raise LigneInvalide("la référence dépasse 64 caractères")
+
+        return {
+            'import_ref': ref,
+            'client_id': client_id,
+            'company_id': company_id,
+            'service_type_id': service_type_id,
+            'quantite': quantite,
+            'description_client': str(donnees.get('description') or ''),
+            'rdv_date': rdv_date.strftime('%Y-%m-%d'),
+            'rdv_heure': f"{heure.hour:02d}:00",
+            'jour_semaine': rdv_date.weekday(),
+            'mode_paiement': mode,
+            # Comme dans la CLI : le paiement en ligne est simulé et accepté directement
+            'statut': 'PAYEE' if mode == 'ONLINE' else 'EN_ATTENTE',
+        }
+
+    def _charger_offres(self, service_type_ids):
+        """Charge (une seule fois par type de service) les offres des entreprises vérifiées et abonnées."""
+        for service_type_id in service_type_ids:
+            if service_type_id not in self._offres:
+                self._offres[service_type_id] = {
+                    c['id']: c for c in self.company_dao.get_companies_by_service(service_type_id)
+                }
+
+    def _valider_lot(self, demandes, clients, resultats):
+        """
+        Contrôles métier d'un lot : client, offre, horaires et créneau libre.
+        Remplit 'resultats' pour les lignes refusées et renvoie les lignes à insérer (avec leur prix).
+        """
+        refs_existantes = self.booking_dao.get_existing_import_refs([d['import_ref'] for _, d in demandes])
+        dates = [d['rdv_date'] for _, d in demandes]
+        # Une intervention longue peut déborder sur les jours suivants : on charge quelques jours de plus
+        fin = (datetime.strptime(max(dates), '%Y-%m-%d') + timedelta(days=MARGE_JOURS)).strftime('%Y-%m-%d') if dates else None
+        occupes = self.booking_dao.get_claimed_slots(
+            list({d['company_id'] for _, d in demandes}), min(dates, default=None), fin
+        )
+
+        valides = []
+        refs_du_lot = set()
+        creneaux_du_lot = set()
+        for numero, d in demandes:
+            try:
+                if d['import_ref'] in refs_existantes:
+                    resultats[numero] = {'ligne': numero, 'ref': d['import_ref'], 'statut': 'DEJA_IMPORTEE'}
+                    continue
+                if d['import_ref'] in refs_du_lot:
+                    raise LigneInvalide("référence présente deux fois dans le lot")
+
+                client = clients.get(d['client_id'])
+                if not client or client['role'] != 'CLIENT' or client['is_banned']:
+                    raise LigneInvalide(f"client {d['client_id']} introuvable ou non autorisé")
+
+                offre = self._offres[d['service_type_id']].get(d['company_id'])
+                if not offre:
+                    raise LigneInvalide(f"l'entreprise {d['company_id']} ne propose pas le service {d['service_type_id']} (ou n'est pas active)")
+
+                start_h, end_h = parse_opening_hours(offre.get('horaire_debut'), offre.get('horaire_fin'))
+                if d['jour_semaine'] not in parse_working_days(offre.get('jours_travail')):
+                    raise LigneInvalide(f"l'entreprise ne travaille pas ce jour-là ({offre.get('jours_travail') or 'Lun-Sam'})")
+                if not start_h <= int(d['rdv_heure'][:2]) < end_h:
+                    raise LigneInvalide(f"heure en dehors des horaires ({start_h:02d}:00 - {end_h:02d}:00)")
+
+                # Toutes les heures de l'intervention (ex: "½ journée" = 4 heures d'ouverture d'affilée)
+                heures = occupied_slots(offre, d['rdv_date'], d['rdv_heure'], offre.get('duree_heures') or 1)
+                creneaux = [(d['company_id'], jour, heure) for jour, heure in heures]
+                for creneau in creneaux:
+                    if creneau in occupes or creneau in self._creneaux_importes or creneau in creneaux_du_lot:
+                        raise LigneInvalide(f"créneau {creneau[1]} {creneau[2]} déjà réservé")
+
+            except LigneInvalide as erreur:
+                resultats[numero] = {'ligne': numero, 'ref': d['import_ref'], 'statut': 'REJETEE', 'erreur': str(erreur)}
+                continue
+
+            # Le prix est calculé exactement comme pour une réservation faite dans la CLI
+            item = CatalogItem(id=offre['catalog_id'], company_id=offre['id'], service_type=ServiceType(id=d['service_type_id']),
+                               prix_base=offre['prix_base'], prix_par_unite=offre['prix_par_unite'])
+            prix, _ = self.catalog_service.calculate_price(item, d['quantite'], client['ville'], d['rdv_date'])
+
+            refs_du_lot.add(d['import_ref'])
+            creneaux_du_lot.update(creneaux)
+            valides.append((numero, dict(d, catalog_id=offre['catalog_id'], prix_total=float(prix), creneaux=heures)))
+        return valides
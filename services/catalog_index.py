@@ -0,0 +1,275 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from itertools import groupby
+
+import numpy as np
+
+from DAO.company_dao import CompanyDAO
+from services.catalog_search import InvertedIndex, POIDS_CHAMPS
+from services.gazetteer import CityGazetteer, city_key
+
+"""
+Index du catalogue en mémoire, pour la navigation des clients (browse_services).
+Sans index, chaque visite relançait la jointure companies + catalog + subscription_plans.
+Ici, tout le catalogue est lu UNE fois, puis rangé dans des "cases" :
+    (type de service) -> (ville, tranche de prix) -> offres triées par classement (catalog.score)
+Une recherche ne fait plus que lire les cases qui correspondent aux filtres.
+Recherche autour d'une ville (rayon en km, ou les k offres les plus proches) : les distances entre
+la ville du client et les villes des cases sont lues dans la matrice de services/gazetteer.py,
+puis on lit les cases de la plus proche à la plus lointaine.
+Les mêmes offres alimentent aussi la recherche plein texte (services/catalog_search.py).
+L'index reste à jour sans tout relire : CompanyDAO le prévient après chaque écriture
+(ajout / suppression d'offre, modification ou validation d'une entreprise, abonnement,
+nouvel avis ou nouveau score de classement) et seule l'entreprise (ou l'offre) concernée est relue.
+Les écritures des AUTRES programmes (une autre session CLI, le balayage, un import...) ne passent pas
+par ce CompanyDAO : tout le catalogue est donc relu au plus tard DELAI_RECHARGEMENT_S secondes après le chargement.
+Comme la connexion, l'index est un Singleton : une seule copie partagée par tout le programme.
+"""
+
+# Bornes des tranches de prix (prix de base en DH) : tranche 0 = moins de 300 DH, ..., tranche 3 = 1000 DH et plus
+LIMITES_TRANCHES = (300, 600, 1000)
+
+# Secondes avant de relire tout le catalogue (pour voir les écritures faites par les autres programmes)
+DELAI_RECHARGEMENT_S = 30
+
+
+def price_band(prix):
+    """Numéro de la tranche de prix d'un prix de base."""
+    return bisect_right(LIMITES_TRANCHES, prix or 0)
+
+
+def price_band_label(tranche):
+    """Libellé lisible d'une tranche (ex: "300 - 599 DH")."""
+    if tranche == 0:
+        return f"Moins de {LIMITES_TRANCHES[0]} DH"
+    if tranche >= len(LIMITES_TRANCHES):
+        return f"{LIMITES_TRANCHES[-1]} DH et plus"
+    return f"{LIMITES_TRANCHES[tranche - 1]} - {LIMITES_TRANCHES[tranche] - 1} DH"
+
+
+def _cle_ville(ville):
+    # Comme MySQL (c.ville = %s en utf8mb4_general_ci), la comparaison ignore majuscules ET accents : "Fes" = "Fès"
+    return city_key(ville)
+
+
+class CatalogIndex:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        """Singleton (même principe que DatabaseConnection)."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(CatalogIndex, cls).__new__(cls)
+                    instance.company_dao = CompanyDAO()
+                    instance.gazetteer = CityGazetteer()
+                    # Un seul verrou pour lire et modifier l'index (plusieurs sessions en parallèle)
+                    instance._lock = threading.RLock()
+                    instance._vider()
+                    CompanyDAO.add_listener(instance._on_write)
+                    cls._instance = instance
+        return cls._instance
+
+    def _vider(self):
+        self._charge = False
+        self._prochain_rechargement = 0.0
+        self._base = None                 # backend de la base lue (si on se branche sur une autre base, on relit)
+        self._offres = {}                 # catalog_id -> (company_id, service_type_id, (ville, tranche), clé de tri, ligne)
+        self._offres_par_entreprise = {}  # company_id -> {catalog_id, ...}
+        self._visible_jusqu_au = {}       # company_id -> 'YYYY-MM-DD' (fin d'abonnement), None si non vérifiée
+        self._cases = {}                  # service_type_id -> {(ville, tranche): [(-score, -catalog_id, ligne), ...] triée}
+        self._texte = InvertedIndex()     # recherche plein texte : mot -> offres
+
+    def invalidate(self):
+        """Oublie tout : le catalogue sera relu à la prochaine recherche (ex: après changement de base)."""
+        with self._lock:
+            self._vider()
+
+    # ---------- Recherches ----------
+
+    def service_types(self):
+        """Catégories de services (CompanyDAO.get_service_types les garde déjà en cache, voir utils/cache.py)."""
+        return self.company_dao.get_service_types()
+
+    def companies_for_service(self, service_type_id, ville=None, tranche=None, limit=None, rayon_km=None, plus_proches=None):
+        """
+        Mêmes lignes, dans le même ordre, que CompanyDAO.get_companies_by_service (entreprises vérifiées,
+        abonnement actif, de la mieux classée à la moins bien classée), au plus 'limit' si demandé.
+        Filtres optionnels : ville, tranche de prix (voir price_band).
+        Autour de la ville (si elle est donnée) : rayon_km (offres à moins de rayon_km) et/ou plus_proches
+        (les k offres les plus proches). Les offres sont alors triées par distance, puis par classement,
+        et chaque ligne reçoit 'distance_km'.
+        Chaque ligne est une copie : l'appelant peut la modifier sans abîmer l'index.
+        """
+        with self._lock:
+            if not self._charger_si_besoin():
+                return []
+            cases = self._cases.get(service_type_id, {})
+            if ville and (rayon_km is not None or plus_proches):
+                nombre = min((n for n in (limit, plus_proches) if n), default=None)
+                return self._par_distance(cases, ville, tranche, rayon_km, nombre)
+            ville_cherchee = _cle_ville(ville) if ville else None
+            choisies = [
+                offres for (v, t), offres in cases.items()
+                if (ville_cherchee is None or v == ville_cherchee) and (tranche is None or t == tranche)
+            ]
+            aujourd_hui = date.today().isoformat()
+            visibles = self._visible_jusqu_au
+            # Chaque case est déjà triée par classement : on les fusionne sans tout retrier,
+            # et on s'arrête dès qu'on a les 'limit' premières offres visibles
+            resultats = []
+            for _, _, ligne in heapq.merge(*choisies):
+                if (visibles.get(ligne['id']) or '') >= aujourd_hui:
+                    resultats.append(dict(ligne))
+                    if len(resultats) == limit:
+                        break
+            return resultats
+
+    def search(self, texte, limit=20, ville=None, rayon_km=None, plus_proches=None):
+        """
+        Recherche plein texte ("onduleur SMA", "Kärcher", nom d'entreprise...) parmi les offres visibles.
+        Retourne au plus 'limit' lignes (mêmes colonnes que companies_for_service, plus 'pertinence'),
+        de la plus pertinente à la moins pertinente. Filtre optionnel par ville.
+        Autour de la ville : rayon_km et/ou plus_proches, comme companies_for_service ; les offres trouvées
+        sont alors triées par distance ('distance_km'), puis par pertinence.
+        """
+        with self._lock:
+            if not self._charger_si_besoin():
+                return []
+            aujourd_hui = date.today().isoformat()
+            ville_cherchee = _cle_ville(ville) if ville else None
+            autour = bool(ville) and (rayon_km is not None or plus_proches)
+            if autour:
+                km_par_ville = self._distances_des_villes(ville, {v for cases in self._cases.values() for v, _ in cases})
+                rayon = np.inf if rayon_km is None else rayon_km
+
+            def visible(catalog_id):
+                company_id, _, (ville_offre, _), _, _ = self._offres[catalog_id]
+                if (self._visible_jusqu_au.get(company_id) or '') < aujourd_hui:
+                    return False
+                if autour:
+                    return km_par_ville[ville_offre] <= rayon
+                return ville_cherchee is None or ville_offre == ville_cherchee
+
+            if not autour:
+                resultats = self._texte.search(texte, limit, accepter=visible)
+                return [dict(self._offres[catalog_id][4], pertinence=round(score, 3)) for catalog_id, score in resultats]
+
+            # Toutes les offres pertinentes dans le rayon, puis les plus proches d'abord
+            resultats = self._texte.search(texte, len(self._offres), accepter=visible)
+            resultats.sort(key=lambda r: km_par_ville[self._offres[r[0]][2][0]])
+            nombre = min((n for n in (limit, plus_proches) if n), default=None)
+            return [dict(self._offres[catalog_id][4], pertinence=round(score, 3),
+                         distance_km=round(km_par_ville[self._offres[catalog_id][2][0]], 1))
+                    for catalog_id, score in resultats[:nombre]]
+
+    def _distances_des_villes(self, ville, villes):
+        """{ville d'une case: km depuis 'ville'} en un seul calcul NumPy (voir CityGazetteer.distances_to)."""
+        villes = list(villes)
+        return dict(zip(villes, self.gazetteer.distances_to(ville, villes).tolist()))
+
+    def _par_distance(self, cases, ville, tranche, rayon_km, nombre):
+        """Les 'nombre' premières offres visibles, ville par ville, de la plus proche à la plus lointaine."""
+        km_par_ville = self._distances_des_villes(ville, {v for v, _ in cases})
+        rayon = np.inf if rayon_km is None else rayon_km
+        choisies = sorted(
+            ((km_par_ville[v], offres) for (v, t), offres in cases.items()
+             if km_par_ville[v] <= rayon and (tranche is None or t == tranche)),
+            key=lambda case: case[0]
+        )
+        aujourd_hui = date.today().isoformat()
+        visibles = self._visible_jusqu_au
+        resultats = []
+        # Les villes à la même distance (ex: "Fes" et "Fès") sont fusionnées par classement
+        for km, groupe in groupby(choisies, key=lambda case: case[0]):
+            for _, _, ligne in heapq.merge(*(offres for _, offres in groupe)):
+                if (visibles.get(ligne['id']) or '') >= aujourd_hui:
+                    resultats.append(dict(ligne, distance_km=round(km, 1)))
+                    if len(resultats) == nombre:
+                        return resultats
+        return resultats
+
+    # ---------- Chargement et mises à jour ----------
+
+    def _charger_si_besoin(self):
+        """
+        Lit tout le catalogue au premier usage, puis le relit quand DELAI_RECHARGEMENT_S est écoulé.
+        Retourne False si la base est injoignable et que rien n'est encore en mémoire (on réessaiera).
+        """
+        self._verifier_base()
+        if self._charge and time.monotonic() < self._prochain_rechargement:
+            return True
+        lignes = self.company_dao.get_catalog_index_rows()
+        if lignes is None:
+            # Base injoignable : on garde la copie actuelle (s'il y en a une) jusqu'au prochain essai
+            self._prochain_rechargement = time.monotonic() + DELAI_RECHARGEMENT_S
+            return self._charge
+        base = self._base
+        self._vider()
+        self._base = base
+        for ligne in lignes:
+            self._ajouter(ligne)
+        self._charge = True
+        self._prochain_rechargement = time.monotonic() + DELAI_RECHARGEMENT_S
+        return True
+
+    def _verifier_base(self):
+        """Si le programme s'est branché sur une autre base (ex: benchmarks), l'index est oublié."""
+        base = self.company_dao.db.backend
+        if self._base is not base:
+            self._vider()
+            self._base = base
+
+    def _ajouter(self, ligne):
+        company_id, catalog_id = ligne['id'], ligne['catalog_id']
+        case = (_cle_ville(ligne['ville']), price_band(ligne['prix_base']))
+        # Même ordre que la requête SQL : ORDER BY score DESC, id DESC
+        tri = (-(ligne.get('score') or 0), -catalog_id)
+        insort(self._cases.setdefault(ligne['service_type_id'], {}).setdefault(case, []), tri + (ligne,))
+        self._offres[catalog_id] = (company_id, ligne['service_type_id'], case, tri, ligne)
+        self._texte.add(catalog_id, {champ: ligne.get(champ) for champ in POIDS_CHAMPS})
+        self._offres_par_entreprise.setdefault(company_id, set()).add(catalog_id)
+        expire = ligne.get('subscription_expires_at')
+        self._visible_jusqu_au[company_id] = str(expire)[:10] if ligne['is_verified'] and expire else None
+
+    def _retirer_offre(self, catalog_id):
+        place = self._offres.pop(catalog_id, None)
+        if place is None:
+            return
+        company_id, service_type_id, case, tri, _ = place
+        self._texte.remove(catalog_id)
+        offres = self._cases[service_type_id][case]
+        # (-score, -id) est unique : bisect_left tombe exactement sur l'offre
+        del offres[bisect_left(offres, tri)]
+        if not offres:
+            del self._cases[service_type_id][case]
+        self._offres_par_entreprise.get(company_id, set()).discard(catalog_id)
+
+    def _on_write(self, evenement, identifiant):
+        """Appelée par CompanyDAO après une écriture : on ne relit que ce qui a changé."""
+        with self._lock:
+            if not self._charge:
+                return   # Rien n'est encore en mémoire : le premier chargement lira l'état à jour
+
+            if evenement == 'all':
+                # Tout a été recalculé (scores, notes) : on relira tout à la prochaine recherche
+                self._vider()
+
+            elif evenement == 'company':
+                # Profil, validation, abonnement, offres ou scores : on relit toutes les offres de l'entreprise
+                lignes = self.company_dao.get_catalog_index_rows(company_id=identifiant)
+                if lignes is None:
+                    self._vider()   # Impossible de relire : on repartira de zéro à la prochaine recherche
+                    return
+                for catalog_id in list(self._offres_par_entreprise.pop(identifiant, ())):
+                    self._retirer_offre(catalog_id)
+                self._visible_jusqu_au.pop(identifiant, None)
+                for ligne in lignes:
+                    self._ajouter(ligne)
+
+            elif evenement == 'catalog':
+                self._retirer_offre(identifiant)
@@ -0,0 +1,252 @@
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+
+"""
+Recherche plein texte dans le catalogue (nom de l'entreprise, service, produits inclus, description de l'offre).
+C'est un "index inversé" en mémoire, comme à la fin d'un livre :
+    mot -> {offre: poids, ...}
+Pour chercher "onduleur SMA", on lit seulement les offres rangées sous "onduleur" et "sma",
+au lieu de parcourir tout le catalogue.
+  - Les mots sont découpés "à la française" : minuscules, sans accents (Kärcher = karcher,
+    déminéralisée = demineralisee), sans les petits mots (de, la, pour...), pluriels ramenés au singulier.
+  - Fautes de frappe tolérées : "ondulleur" trouve "onduleur" (1 faute jusqu'à 7 lettres, 2 au-delà).
+  - Le dernier mot tapé peut être un début de mot : "karch" trouve "karcher".
+  - Classement : un mot rare compte plus qu'un mot fréquent (IDF), un mot du nom de l'entreprise
+    ou des produits compte plus qu'un mot de la description, et une offre qui contient TOUS les
+    mots cherchés passe devant celles qui n'en contiennent qu'une partie.
+Un mot courant peut apparaître dans des dizaines de milliers d'offres : les scores sont donc
+additionnés avec NumPy (un tableau par mot), pas offre par offre en Python.
+L'index est tenu à jour par CatalogIndex (services/catalog_index.py) à chaque écriture.
+"""
+
+# Petits mots ignorés (ils sont partout et n'aident pas à trouver une offre)
+MOTS_VIDES = frozenset("""
+    a au aux avec ce ces d dans de des du en et l la le les leur par pour sur un une ou son sa ses
+    est sont qui que n ne pas plus tout tous toute toutes votre vos notre nos
+""".split())
+
+# Poids de chaque champ d'une offre
+POIDS_CHAMPS = {'nom_entreprise': 3.0, 'nom_service': 2.0, 'produits_inclus': 2.0, 'description_offre': 1.0}
+
+# Bonus (multiplicateurs) quand le mot trouvé n'est pas exactement celui tapé
+FACTEUR_PREFIXE = 0.8
+FACTEUR_FAUTE = (1.0, 0.6, 0.4)   # selon le nombre de fautes (0, 1 ou 2)
+
+_MOT = re.compile(r"[a-z0-9]+")
+
+
+def _sans_accents(texte):
+    if texte.isascii():
+        return texte.lower()
+    # NFKD sépare la lettre de son accent ("é" -> "e" + "´"), puis on retire les accents
+    decompose = unicodedata.normalize('NFKD', texte.casefold())
+    return ''.join(c for c in decompose if not unicodedata.combining(c))
+
+
+def _singulier(mot):
+    # Règle simple : panneaux -> panneau, câbles -> cable (les mots courts restent tels quels)
+    if len(mot) > 4 and mot[-1] in 'sx' and not mot[-2].isdigit():
+        return mot[:-1]
+    return mot
+
+
+def tokenize(texte):
+    """Découpe un texte en mots normalisés : "Onduleur SMA, Câbles DC 6mm²" -> ['onduleur', 'sma', 'cable', 'dc', '6mm2']."""
+    if not texte:
+        return []
+    return list(_tokens(texte))
+
+
+@lru_cache(maxsize=4096)
+def _tokens(texte):
+    # En cache : beaucoup d'offres partagent le même texte (listes de produits, noms de service)
+    return tuple(_singulier(m) for m in _MOT.findall(_sans_accents(texte)) if m not in MOTS_VIDES)
+
+
+def _suppressions(mot):
+    """Le mot privé d'une de ses lettres : "sma" -> {"ma", "sa", "sm"} (pour retrouver les fautes de frappe)."""
+    return {mot[:i] + mot[i + 1:] for i in range(len(mot))}
+
+
+def _fautes_max(mot):
+    if len(mot) < 4:
+        return 0
+    return 1 if len(mot) <= 7 else 2
+
+
+def _distance(a, b, limite):
+    """
+    Nombre de fautes (insertion, suppression, remplacement, deux lettres inversées) pour passer de a à b.
+    On s'arrête dès que la limite est dépassée (retourne limite + 1).
+    """
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    avant, ligne = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        courante = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cout = 0 if a[i - 1] == b[j - 1] else 1
+            courante[j] = min(ligne[j] + 1, courante[j - 1] + 1, ligne[j - 1] + cout)
+            if avant is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                courante[j] = min(courante[j], avant[j - 2] + 1)
+        if min(courante) > limite:
+            return limite + 1
+        avant, ligne = ligne, courante
+    return ligne[-1]
+
+
+class InvertedIndex:
+    """Index inversé : ajout, retrait et recherche classée de documents (ici : les offres, par catalog_id)."""
+
+    def __init__(self):
+        self._postings = {}      # mot -> {case: poids}
+        self._tableaux = {}      # mot -> (cases, poids) en tableaux NumPy, refaits quand le mot change
+        self._documents = {}     # doc_id -> (case, mots du document)
+        self._ids = []           # case -> doc_id (None si la case est libre)
+        self._cases_libres = []  # cases libérées par remove(), réutilisées par add()
+        self._variantes = {}     # mot privé d'une lettre -> {mots du vocabulaire}
+        self._vocabulaire = None # liste triée des mots (pour les débuts de mots), recalculée si besoin
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, doc_id, champs):
+        """Indexe un document : champs = {'nom_entreprise': "...", 'produits_inclus': "...", ...}."""
+        self.remove(doc_id)
+        poids = {}
+        for champ, texte in champs.items():
+            for mot in tokenize(texte):
+                poids[mot] = poids.get(mot, 0.0) + POIDS_CHAMPS.get(champ, 1.0)
+
+        # Chaque document occupe une "case" (sa position dans les tableaux de scores)
+        if self._cases_libres:
+            case = self._cases_libres.pop()
+            self._ids[case] = doc_id
+        else:
+            case = len(self._ids)
+            self._ids.append(doc_id)
+
+        for mot, p in poids.items():
+            docs = self._postings.get(mot)
+            if docs is None:
+                docs = self._postings[mot] = {}
+                self._nouveau_mot(mot)
+            # Saturation (comme BM25) : répéter un mot 10 fois ne rend pas l'offre 10 fois meilleure
+            docs[case] = p / (p + 1.0)
+            self._tableaux.pop(mot, None)
+        self._documents[doc_id] = (case, tuple(poids))
+
+    def remove(self, doc_id):
+        case, mots = self._documents.pop(doc_id, (None, ()))
+        if case is None:
+            return
+        for mot in mots:
+            docs = self._postings[mot]
+            del docs[case]
+            self._tableaux.pop(mot, None)
+            if not docs:
+                del self._postings[mot]
+                self._mot_disparu(mot)
+        self._ids[case] = None
+        self._cases_libres.append(case)
+
+    def _tableau(self, mot):
+        """Cases et poids d'un mot sous forme de tableaux NumPy (calculés une fois, puis gardés)."""
+        tableau = self._tableaux.get(mot)
+        if tableau is None:
+            docs = self._postings[mot]
+            tableau = (np.fromiter(docs.keys(), dtype=np.int64, count=len(docs)),
+                       np.fromiter(docs.values(), dtype=np.float64, count=len(docs)))
+            self._tableaux[mot] = tableau
+        return tableau
+
+    def _nouveau_mot(self, mot):
+        for variante in _suppressions(mot) | {mot}:
+            self._variantes.setdefault(variante, set()).add(mot)
+        self._vocabulaire = None
+
+    def _mot_disparu(self, mot):
+        for variante in _suppressions(mot) | {mot}:
+            mots = self._variantes.get(variante)
+            if mots is not None:
+                mots.discard(mot)
+                if not mots:
+                    del self._variantes[variante]
+        self._vocabulaire = None
+
+    def _mots_proches(self, mot, prefixe=False):
+        """
+        Mots du vocabulaire qui correspondent au mot tapé, avec leur facteur de score :
+        le mot exact, les mots à 1-2 fautes près, et (pour le dernier mot tapé) ceux qui commencent par lui.
+        Les fautes sont trouvées par "suppressions" : "ondulleur" privé d'un "l" = "onduleur".
+        """
+        proches = {}
+        if mot in self._postings:
+            proches[mot] = FACTEUR_FAUTE[0]
+
+        limite = _fautes_max(mot)
+        if limite:
+            candidats = set()
+            for variante in _suppressions(mot) | {mot}:
+                candidats |= self._variantes.get(variante, set())
+            for candidat in candidats - proches.keys():
+                fautes = _distance(mot, candidat, limite)
+                if fautes <= limite:
+                    proches[candidat] = FACTEUR_FAUTE[fautes]
+
+        if prefixe and len(mot) >= 3:
+            if self._vocabulaire is None:
+                self._vocabulaire = sorted(self._postings)
+            i = bisect_left(self._vocabulaire, mot)
+            while i < len(self._vocabulaire) and self._vocabulaire[i].startswith(mot):
+                proches.setdefault(self._vocabulaire[i], FACTEUR_PREFIXE)
+                i += 1
+        return proches
+
+    def search(self, texte, limit=20, accepter=None):
+        """
+        Retourne [(doc_id, score), ...] du meilleur au moins bon (au plus 'limit').
+        'accepter' (optionnel) : fonction doc_id -> bool pour écarter des documents (ex: offre non visible).
+        """
+        mots = list(dict.fromkeys(tokenize(texte)))
+        if not mots or not self._documents:
+            return []
+        total = len(self._documents)
+        scores = np.zeros(len(self._ids))
+        trouves = np.zeros(len(self._ids), dtype=np.int32)
+        for rang, mot in enumerate(mots):
+            # Pour chaque document, on garde le meilleur des mots proches (pas leur somme)
+            meilleur = np.zeros(len(self._ids))
+            for proche, facteur in self._mots_proches(mot, prefixe=(rang == len(mots) - 1)).items():
+                cases, poids = self._tableau(proche)
+                idf = math.log(1.0 + total / len(cases)) * facteur
+                meilleur[cases] = np.maximum(meilleur[cases], poids * idf)
+            scores += meilleur
+            trouves += meilleur > 0
+
+        # Une offre qui contient tous les mots cherchés passe devant (facteur de "couverture")
+        scores *= trouves / len(mots)
+        candidats = np.flatnonzero(scores)
+        # Les meilleurs d'abord (à score égal, l'ordre reste stable) ; on n'en trie qu'un petit nombre,
+        # sauf si 'accepter' en écarte trop (on trie alors tous les candidats)
+        for nb in (limit * 4, len(candidats)):
+            if nb < len(candidats):
+                premiers = candidats[np.argpartition(-scores[candidats], nb)[:nb]]
+            else:
+                premiers = candidats
+            premiers = premiers[np.lexsort((premiers, -scores[premiers]))]
+            resultats = []
+            for case in premiers.tolist():
+                doc_id = self._ids[case]
+                if accepter is None or accepter(doc_id):
+                    resultats.append((doc_id, float(scores[case])))
+                    if len(resultats) == limit:
+                        return resultats
+            if nb >= len(candidats):
+                return resultats
+        return resultats
@@ -1,5 +1,10 @@
+import numpy as np
+
 from DAO.company_dao import CompanyDAO
-from DAO.booking_dao import BookingDAO
+from DAO.booking_dao import BookingDAO, SlotAlreadyBookedError
+from services.catalog_index import CatalogIndex
+from services.gazetteer import CityGazetteer
+from services.pricing_strategy import PricingFactory
 from utils.logger import Logger
 
 """
@@ -10,77 +15,168 @@ vérifier des règles, envoyer des emails, etc.).
 Un Service utilise souvent plusieurs DAOs différents pour accomplir sa mission.
 """
 
+def _champ(item, nom):
+    """Attribut d'un CatalogItem, ou clé d'une ligne du catalogue (dictionnaire)."""
+    return item[nom] if isinstance(item, dict) else getattr(item, nom)
+
+
+def _service_type_id(item):
+    """Type de service d'une offre (None si on ne le connaît pas : seules les règles "toutes catégories" s'appliquent)."""
+    if isinstance(item, dict):
+        return item.get('service_type_id')
+    return item.service_type.id if item.service_type else None
+
+
 class CatalogService:
     def __init__(self):
         # Le Service a besoin de parler aux tables 'companies' et 'bookings'
         self.company_dao = CompanyDAO()
         self.booking_dao = BookingDAO()
+        # Index du catalogue en mémoire (partagé) : la navigation ne relance pas les jointures SQL
+        self.catalog_index = CatalogIndex()
         self.logger = Logger()  # Pour garder une trace de tout ce qui se passe
 
     def get_service_types(self):
         """Récupère toutes les grandes catégories de services disponibles."""
-        types = self.company_dao.get_service_types()
+        types = self.catalog_index.service_types()
         self.logger.log_info(f"Catégories de services récupérées : {len(types)}")
         return types
 
-    def list_companies(self, ville=None):
-        """Liste les entreprises vérifiées (avec filtre optionnel par ville)."""
-        companies = self.company_dao.get_all_companies(ville)
-        self.logger.log_info(f"Recherche Entreprises (Ville={ville}): {len(companies)} trouvées.")
+    def list_companies(self, ville=None, rayon_km=None, plus_proches=None):
+        """
+        Liste les entreprises vérifiées (avec filtre optionnel par ville).
+        Avec rayon_km et/ou plus_proches : les entreprises autour de la ville, de la plus proche
+        à la plus lointaine (attribut distance_km), au lieu de la seule ville exacte.
+        """
+        if not ville or (rayon_km is None and not plus_proches):
+            companies = self.company_dao.get_all_companies(ville)
+        else:
+            companies = self.company_dao.get_all_companies()
+            # Toutes les distances d'un coup (NumPy), puis tri stable : à distance égale, l'ordre SQL est gardé
+            km = CityGazetteer().distances_to(ville, [c.ville for c in companies])
+            ordre = np.argsort(km, kind='stable')
+            ordre = ordre[km[ordre] <= (np.inf if rayon_km is None else rayon_km)][:plus_proches]
+            companies = [companies[i] for i in ordre.tolist()]
+            for company, distance in zip(companies, km[ordre].tolist()):
+                company.distance_km = round(distance, 1)
+        self.logger.log_info(f"Recherche Entreprises (Ville={ville}, Rayon={rayon_km}): {len(companies)} trouvées.")
         return companies
 
-    def get_companies_for_service(self, service_type_id):
-        """Trouve quelles entreprises proposent un service précis (ex: Nettoyage)."""
-        results = self.company_dao.get_companies_by_service(service_type_id)
-        self.logger.log_info(f"Entreprises pour le service {service_type_id}: {len(results)} trouvées.")
+    def get_companies_for_service(self, service_type_id, ville=None, tranche=None, limit=None, rayon_km=None, plus_proches=None):
+        """
+        Trouve quelles entreprises proposent un service précis (ex: Nettoyage), de la mieux classée
+        à la moins bien classée (forfait, avis, prix, interventions réussies : voir models.company.offer_score).
+        Filtres optionnels : ville et tranche de prix (voir catalog_index.price_band), nombre maximum d'offres.
+        Avec rayon_km (ex: 30 km autour de Salé, Rabat comprise) et/ou plus_proches (les k plus proches) :
+        de la plus proche à la plus lointaine, puis par classement (clé 'distance_km').
+        """
+        results = self.catalog_index.companies_for_service(service_type_id, ville, tranche, limit, rayon_km, plus_proches)
+        self.logger.log_info(f"Entreprises pour le service {service_type_id} (Ville={ville}, Rayon={rayon_km}, Tranche={tranche}): {len(results)} trouvées.")
+        return results
+
+    def search_offers(self, texte, ville=None, limit=20, rayon_km=None, plus_proches=None):
+        """
+        Recherche plein texte dans les offres (produits, description, nom d'entreprise ou de service),
+        sans accents ni majuscules et avec fautes de frappe tolérées. Classées de la plus pertinente à la moins pertinente
+        (ou, autour d'une ville avec rayon_km / plus_proches, de la plus proche à la plus lointaine).
+        """
+        results = self.catalog_index.search(texte, limit, ville, rayon_km, plus_proches)
+        self.logger.log_info(f"Recherche '{texte}' (Ville={ville}, Rayon={rayon_km}): {len(results)} offres trouvées.")
         return results
 
     def get_company_catalog(self, company_id):
         """Récupère toutes les offres d'une entreprise spécifique."""
         return self.company_dao.get_catalog(company_id)
 
-    def calculate_price(self, item, quantite, user_ville=None):
+    def calculate_price(self, item, quantite, user_ville=None, jour=None):
         """
         Calcule le prix final pour le client.
         C'est typiquement le genre de logique "métier" qui va dans un Service.
+        'item' : un CatalogItem ou une ligne du catalogue (dictionnaire, ex: une carte de la CLI).
+        'jour' : date de l'intervention si on la connaît (certaines règles de prix n'ont qu'une période).
         """
         # Prix de base + (Prix unitaire * Quantité)
-        base = item.prix_base + (item.prix_par_unite * quantite)
+        base = _champ(item, 'prix_base') + (_champ(item, 'prix_par_unite') * quantite)
         
-        # On utilise le design pattern Strategy pour appliquer la TVA ou des taxes locales
-        from services.pricing_strategy import PricingFactory
+        # On utilise le design pattern Strategy pour appliquer la TVA ou des taxes locales :
+        # la règle de prix dépend de la ville, du type de service, de la quantité et de la date
         # Si la ville n'est pas précisée, on envoie une chaîne vide ("")
         ville_choisie = user_ville if user_ville is not None else ""
         
-        strategy = PricingFactory.get_strategy(ville_choisie)
+        strategy = PricingFactory.get_strategy(ville_choisie, _service_type_id(item), quantite, jour)
         final_price = strategy.calculate_price(base)
         
         # On retourne le prix final ET une petite description de la taxe appliquée (ex: "TVA 20%")
         return final_price, strategy.get_description()
 
-    def create_booking_request(self, client_id, company_id, service_type_id, catalog_id, quantite, description, prix_total, rdv_date, rdv_heure, mode_paiement='ONLINE'):
+    def quote_matrix(self, items, quantites, villes, jour=None):
+        """
+        Tous les devis d'un coup, pour les simulations de l'admin et les comparaisons :
+        chaque offre x chaque quantité x chaque ville, en tableaux NumPy (pas de boucle par devis).
+        Retourne (prix, descriptions) : prix[i, q, v] = calculate_price(items[i], quantites[q], villes[v], jour)[0],
+        à l'identique, et descriptions[v] = la ou les règles de prix appliquées dans villes[v] (séparées par " / ").
+        """
+        prix_base = np.fromiter((_champ(item, 'prix_base') for item in items), dtype=np.float64, count=len(items))
+        prix_unite = np.fromiter((_champ(item, 'prix_par_unite') for item in items), dtype=np.float64, count=len(items))
+        # (offres, 1) et (1, quantités) -> matrice (offres, quantités) des prix avant la règle de la ville
+        base = prix_base[:, None] + prix_unite[:, None] * np.asarray(quantites, dtype=np.float64)[None, :]
+
+        # La règle ne dépend pas de l'offre elle-même, seulement de son type de service :
+        # on ne la cherche qu'une fois par (type de service, quantité, ville)
+        numeros = {}
+        services = np.fromiter((numeros.setdefault(_service_type_id(item), len(numeros)) for item in items),
+                               dtype=np.intp, count=len(items))
+        multiplicateurs = np.empty((len(numeros), len(quantites), len(villes)))
+        supplements = np.empty_like(multiplicateurs)
+        descriptions = [[] for _ in villes]
+        for service_type_id, s in numeros.items():
+            for q, quantite in enumerate(quantites):
+                for v, ville in enumerate(villes):
+                    strategy = PricingFactory.get_strategy(ville if ville is not None else "", service_type_id, quantite, jour)
+                    multiplicateurs[s, q, v] = strategy.multiplicateur
+                    supplements[s, q, v] = strategy.supplement
+                    if strategy.get_description() not in descriptions[v]:
+                        descriptions[v].append(strategy.get_description())
+
+        # prix = base x multiplicateur + supplément, pour toute la matrice (offres, quantités, villes) d'un coup
+        prix = base[:, :, None] * multiplicateurs[services] + supplements[services]
+        return prix, [" / ".join(noms) for noms in descriptions]
+
+    def create_booking_request(self, client_id, company_id, service_type_id, catalog_id, quantite, description, prix_total, rdv_date, rdv_heure, mode_paiement='ONLINE', creneaux=None):
         """
         Crée la réservation dans la base de données.
+        'creneaux' : toutes les heures occupées par l'intervention (voir availability_service.occupied_slots).
         Si le paiement est En Ligne, on simule le paiement direct et on passe le statut à PAYE.
+        Les deux écritures forment une seule transaction : un seul COMMIT, et si le paiement
+        échoue, la réservation n'est pas gardée à moitié créée.
+        Si un autre client a pris le créneau entre-temps, SlotAlreadyBookedError est relayée
+        à l'appelant (pour proposer un autre créneau).
         """
-        # 1. On demande au DAO de créer la réservation
-        booking_id = self.booking_dao.create_booking(
-            client_id, company_id, service_type_id, catalog_id,
-            quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement
-        )
-        
-        # 2. Logique métier : Si la création a réussi
-        if booking_id:
-            self.logger.log_info(f" Réservation #{booking_id} créée - Client {client_id}, Prix {prix_total} DH, RDV {rdv_date} {rdv_heure}, Paiement {mode_paiement}")
-            
-            # Si le client paie en ligne, on SIMULE le paiement réussi et on met le statut à 'PAYEE'
-            if mode_paiement == 'ONLINE':
-                self.booking_dao.update_status(booking_id, 'PAYEE')
-                self.logger.log_info(f" Paiement en ligne simulé pour la réservation #{booking_id}")
-                
-            return booking_id, prix_total
-            
-        # 3. Si échec
-        self.logger.log_error(f" Échec de la création de la réservation pour le Client {client_id}.")
-        return None, 0
+        try:
+            with self.booking_dao.db.transaction():
+                # 1. On demande au DAO de créer la réservation
+                booking_id = self.booking_dao.create_booking(
+                    client_id, company_id, service_type_id, catalog_id,
+                    quantite, prix_total, description, rdv_date, rdv_heure, mode_paiement, creneaux
+                )
+                if not booking_id:
+                    raise RuntimeError("insertion de la réservation refusée")
+
+                # 2. Logique métier : si le client paie en ligne, on SIMULE le paiement réussi
+                # et on met le statut à 'PAYEE' (dans la même transaction)
+                if mode_paiement == 'ONLINE' and not self.booking_dao.update_status(booking_id, 'PAYEE'):
+                    raise RuntimeError("passage au statut PAYEE impossible")
+
+        except SlotAlreadyBookedError:
+            self.logger.log_warning(f" Créneau {rdv_date} {rdv_heure} déjà pris (Entreprise {company_id}) - Client {client_id}")
+            raise
+
+        except Exception as erreur:
+            # 3. Si échec : rien n'a été validé dans la base
+            self.logger.log_error(f" Échec de la création de la réservation pour le Client {client_id} : {erreur}")
+            return None, 0
 
+        self.logger.log_info(f" Réservation #{booking_id} créée - Client {client_id}, Prix {prix_total} DH, RDV {rdv_date} {rdv_heure}, Paiement {mode_paiement}")
+        if mode_paiement == 'ONLINE':
+            self.logger.log_info(f" Paiement en ligne simulé pour la réservation #{booking_id}")
+        return booking_id, prix_total
@@ -0,0 +1,35 @@
+import asyncio
+
+from DAO.async_booking_dao import AsyncBookingDAO
+from DAO.async_subscription_dao import AsyncSubscriptionDAO
+from DAO.async_user_dao import AsyncUserDAO
+
+"""
+Service du Tableau de Bord Administrateur (version asynchrone).
+Les trois requêtes du dashboard (statistiques des réservations, revenus des abonnements,
+liste des utilisateurs) ne dépendent pas les unes des autres : on les lance EN MÊME TEMPS
+avec asyncio.gather, chacune sur sa propre connexion du pool. Le temps total devient
+celui de la requête la plus lente, et non plus la somme des trois.
+"""
+
+class AsyncDashboardService:
+    def __init__(self):
+        self.booking_dao = AsyncBookingDAO()
+        self.subscription_dao = AsyncSubscriptionDAO()
+        self.user_dao = AsyncUserDAO()
+
+    async def get_dashboard_data(self):
+        """Retourne un dictionnaire avec les mêmes chiffres que l'écran admin_dashboard."""
+        stats, sub_rev, users = await asyncio.gather(
+            self.booking_dao.get_stats(),
+            self.subscription_dao.get_subscription_revenue(),
+            self.user_dao.get_all_users(),
+        )
+
+        return {
+            'stats': stats or {},
+            'sub_rev': sub_rev,
+            'total_rev': sum(r['revenu_mensuel'] for r in sub_rev) if sub_rev else 0,
+            'nb_clients': sum(1 for u in users if u['role'] == 'CLIENT'),
+            'nb_entreprises': sum(1 for u in users if u['role'] == 'ENTREPRISE'),
+        }
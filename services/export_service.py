@@ -0,0 +1,118 @@
+import csv
+import os
+import time
+from datetime import date, datetime
+
+from DAO.booking_dao import BookingDAO, COLONNES_EXPORT
+from utils.logger import Logger
+
+"""
+Service d'Export du registre des réservations (comptabilité), en CSV ou en Parquet.
+Les lignes arrivent de la base par paquets (BookingDAO.iter_bookings_export, curseur non bufferisé)
+et chaque paquet est écrit dans le fichier avant de lire le suivant : on ne garde jamais plus
+d'un paquet en mémoire, que la table contienne mille ou dix millions de réservations.
+Le fichier est d'abord écrit sous le nom "<fichier>.part", puis renommé à la fin :
+un export interrompu ne laisse donc jamais un fichier incomplet sous le nom attendu.
+Le format Parquet demande la bibliothèque optionnelle pyarrow (pip install pyarrow).
+"""
+
+FORMATS = ('csv', 'parquet')
+
+# Colonnes numériques (les autres, dates comprises, sont exportées en texte : "2024-05-14 10:30:00")
+COLONNES_ENTIERES = ('id', 'client_id', 'company_id', 'service_type_id', 'quantite')
+COLONNES_DECIMALES = ('prix_total',)
+
+
+def _texte(valeur):
+    """Date, heure ou texte -> chaîne identique quel que soit le moteur (MySQL ou SQLite)."""
+    if valeur is None:
+        return None
+    if isinstance(valeur, datetime):
+        return valeur.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valeur, date):
+        return valeur.strftime('%Y-%m-%d')
+    return str(valeur)
+
+
+class BookingExportService:
+    def __init__(self, booking_dao=None):
+        self.booking_dao = booking_dao or BookingDAO()
+        self.logger = Logger()
+
+    def export(self, output_path, format='csv', chunk_size=5000, date_from=None, date_to=None,
+               statut=None, company_id=None, progression=None):
+        """
+        Exporte les réservations (filtres optionnels) dans 'output_path'.
+        'progression' (optionnel) est appelée après chaque paquet avec (lignes écrites, lignes/s).
+        Retourne {'lignes', 'paquets', 'duree_s', 'par_seconde', 'fichier'} ou None en cas d'échec.
+        """
+        if format not in FORMATS:
+            print(f" Format inconnu : {format} (formats possibles : {', '.join(FORMATS)})")
+            return None
+
+        paquets = self.booking_dao.iter_bookings_export(date_from, date_to, statut, company_id, chunk_size)
+        stats = {'lignes': 0, 'paquets': 0, 'fichier': output_path}
+        debut = time.perf_counter()
+
+        def suivre(rows):
+            """Compte les lignes de chaque paquet écrit et prévient l'appelant (indicateur de progression)."""
+            for rows_paquet in rows:
+                yield rows_paquet
+                stats['lignes'] += len(rows_paquet)
+                stats['paquets'] += 1
+                if progression:
+                    duree = time.perf_counter() - debut
+                    progression(stats['lignes'], stats['lignes'] / duree if duree else 0.0)
+
+        temporaire = output_path + ".part"
+        try:
+            if format == 'csv':
+                self._ecrire_csv(temporaire, suivre(paquets))
+            else:
+                self._ecrire_parquet(temporaire, suivre(paquets))
+            os.replace(temporaire, output_path)
+        except ImportError:
+            print(" Export Parquet impossible : la bibliothèque pyarrow n'est pas installée (pip install pyarrow).")
+            return None
+        except Exception as e:
+            print(f" Erreur pendant l'export : {e}")
+            self.logger.log_error(f" Export des réservations interrompu après {stats['lignes']} lignes : {e}")
+            return None
+        finally:
+            paquets.close()
+            if os.path.exists(temporaire):
+                os.remove(temporaire)
+
+        stats['duree_s'] = time.perf_counter() - debut
+        stats['par_seconde'] = stats['lignes'] / stats['duree_s'] if stats['duree_s'] else 0.0
+        self.logger.log_info(
+            f"Export {format} de {stats['lignes']} réservations vers {output_path} "
+            f"({stats['par_seconde']:.0f} lignes/s)"
+        )
+        return stats
+
+    def _ecrire_csv(self, path, paquets):
+        # utf-8-sig : Excel reconnaît les accents (é, è...) à l'ouverture du fichier
+        with open(path, 'w', newline='', encoding='utf-8-sig') as fichier:
+            writer = csv.writer(fichier, delimiter=';')
+            writer.writerow(COLONNES_EXPORT)
+            for rows in paquets:
+                writer.writerows([[_texte(r[c]) for c in COLONNES_EXPORT] for r in rows])
+
+    def _ecrire_parquet(self, path, paquets):
+        # Import ici : pyarrow n'est nécessaire que pour ce format
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            (c, pa.int64() if c in COLONNES_ENTIERES else pa.float64() if c in COLONNES_DECIMALES else pa.string())
+            for c in COLONNES_EXPORT
+        ])
+        # Chaque paquet devient un "row group" du fichier Parquet : écrit puis oublié
+        with pq.ParquetWriter(path, schema) as writer:
+            for rows in paquets:
+                colonnes = {
+                    c: [r[c] if c in COLONNES_ENTIERES or c in COLONNES_DECIMALES else _texte(r[c]) for r in rows]
+                    for c in COLONNES_EXPORT
+                }
+                writer.write_table(pa.Table.from_pydict(colonnes, schema=schema))
@@ -0,0 +1,154 @@
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+"""
+Annuaire des villes marocaines (coordonnées GPS) et distances entre elles.
+Avant, un client ne voyait que les entreprises de SA ville (comparaison exacte de 'ville') :
+un client de Salé ne voyait pas une entreprise de Rabat, à 4 km.
+Ici, chaque ville connue a sa latitude / longitude, et on calcule UNE fois (au premier usage)
+la matrice de toutes les distances ville -> ville, "à vol d'oiseau" (formule de haversine),
+en une seule opération NumPy sur des tableaux (pas de double boucle Python).
+Chercher "les entreprises à moins de 30 km de Salé" revient ensuite à lire une ligne de la matrice.
+Les noms sont comparés sans accents ni majuscules, avec quelques alias courants :
+"Fes" = "Fès", "casa" = "Casablanca", "Tangier" = "Tanger".
+"""
+
+RAYON_TERRE_KM = 6371.0
+
+# (nom officiel, latitude, longitude, autres noms courants)
+VILLES_MAROC = (
+    ("Casablanca", 33.5731, -7.5898, ("casa", "dar el beida")),
+    ("Rabat", 34.0209, -6.8416, ()),
+    ("Salé", 34.0331, -6.7985, ("sala",)),
+    ("Témara", 33.9287, -6.9063, ()),
+    ("Kénitra", 34.2610, -6.5802, ()),
+    ("Mohammédia", 33.6866, -7.3830, ("mohammadia",)),
+    ("El Jadida", 33.2316, -8.5007, ("jadida",)),
+    ("Settat", 33.0010, -7.6166, ()),
+    ("Berrechid", 33.2655, -7.5875, ()),
+    ("Khouribga", 32.8811, -6.9063, ()),
+    ("Béni Mellal", 32.3373, -6.3498, ()),
+    ("Khénifra", 32.9350, -5.6680, ()),
+    ("Marrakech", 31.6295, -7.9811, ("marrakesh",)),
+    ("Safi", 32.2994, -9.2372, ()),
+    ("Essaouira", 31.5085, -9.7595, ()),
+    ("Agadir", 30.4278, -9.5981, ()),
+    ("Inezgane", 30.3558, -9.5381, ()),
+    ("Taroudant", 30.4703, -8.8770, ()),
+    ("Tiznit", 29.6974, -9.7316, ()),
+    ("Guelmim", 28.9870, -10.0574, ()),
+    ("Laâyoune", 27.1253, -13.1625, ("el aaiun",)),
+    ("Dakhla", 23.6848, -15.9580, ()),
+    ("Ouarzazate", 30.9189, -6.8934, ()),
+    ("Errachidia", 31.9314, -4.4244, ()),
+    ("Fès", 34.0181, -5.0078, ("fez",)),
+    ("Meknès", 33.8935, -5.5473, ()),
+    ("Ifrane", 33.5228, -5.1106, ()),
+    ("Taza", 34.2100, -4.0100, ()),
+    ("Sidi Kacem", 34.2260, -5.7070, ()),
+    ("Sidi Slimane", 34.2600, -5.9200, ()),
+    ("Khémisset", 33.8240, -6.0660, ()),
+    ("Oujda", 34.6814, -1.9086, ()),
+    ("Berkane", 34.9200, -2.3200, ()),
+    ("Nador", 35.1681, -2.9335, ()),
+    ("Al Hoceïma", 35.2517, -3.9372, ("hoceima",)),
+    ("Tétouan", 35.5785, -5.3684, ("tetuan",)),
+    ("Tanger", 35.7595, -5.8340, ("tangier", "tangiers", "tanja")),
+    ("Larache", 35.1932, -6.1557, ()),
+    ("Ksar El Kébir", 35.0017, -5.9050, ()),
+    ("Chefchaouen", 35.1688, -5.2636, ("chaouen",)),
+)
+
+_SEPARATEURS = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=4096)
+def city_key(ville):
+    """Clé de comparaison d'un nom de ville : "  Béni-Mellal " -> "beni mellal"."""
+    decompose = unicodedata.normalize('NFKD', (ville or '').casefold())
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return _SEPARATEURS.sub(' ', sans_accents).strip()
+
+
+def haversine_matrix(latitudes, longitudes):
+    """
+    Distances (km) entre tous les points deux à deux, calculées d'un coup avec NumPy :
+    les tableaux (n,) sont "étirés" en (n, 1) et (1, n), ce qui donne directement une matrice (n, n).
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class CityGazetteer:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        """Singleton : l'annuaire et sa matrice ne sont construits qu'une fois."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(CityGazetteer, cls).__new__(cls)
+                    instance._construire()
+                    cls._instance = instance
+        return cls._instance
+
+    def _construire(self):
+        self.noms = [nom for nom, _, _, _ in VILLES_MAROC]
+        self._index = {}   # clé (nom ou alias sans accents) -> numéro de la ville
+        for i, (nom, _, _, alias) in enumerate(VILLES_MAROC):
+            for variante in (nom,) + alias:
+                self._index[city_key(variante)] = i
+        self._distances = haversine_matrix([v[1] for v in VILLES_MAROC], [v[2] for v in VILLES_MAROC])
+        # Lecture seule : personne ne peut modifier la matrice partagée par erreur
+        self._distances.setflags(write=False)
+
+    def find(self, ville):
+        """Numéro de la ville dans l'annuaire, ou None si elle est inconnue."""
+        return self._index.get(city_key(ville))
+
+    def canonical(self, ville):
+        """Nom officiel de la ville ("fes" -> "Fès"), ou None si elle est inconnue."""
+        i = self.find(ville)
+        return None if i is None else self.noms[i]
+
+    def distance_km(self, ville_a, ville_b):
+        """Distance entre deux villes (km), 0 pour la même ville, None si l'une est inconnue."""
+        km = float(self.distances_to(ville_a, [ville_b])[0])
+        return None if np.isinf(km) else km
+
+    def distances_to(self, ville, villes):
+        """
+        Distances (km) de 'ville' à chaque ville de la liste 'villes', en un tableau NumPy.
+        Une ville inconnue de l'annuaire est à une distance infinie (np.inf), sauf si elle porte
+        le même nom que 'ville' (distance 0) : on retrouve alors l'ancienne comparaison exacte.
+        """
+        cles = [city_key(v) for v in villes]
+        depart = self._index.get(city_key(ville))
+        if depart is None:
+            km = np.full(len(cles), np.inf)
+        else:
+            numeros = np.fromiter((self._index.get(c, -1) for c in cles), dtype=np.intp, count=len(cles))
+            km = self._distances[depart][numeros]
+            km[numeros < 0] = np.inf
+        meme_nom = np.fromiter((c == city_key(ville) for c in cles), dtype=bool, count=len(cles))
+        km[meme_nom] = 0.0
+        return km
+
+    def nearby(self, ville, rayon_km):
+        """Villes de l'annuaire à moins de rayon_km de 'ville' : [(nom, km), ...] de la plus proche à la plus loin."""
+        depart = self.find(ville)
+        if depart is None:
+            return []
+        ligne = self._distances[depart]
+        proches = np.flatnonzero(ligne <= rayon_km)
+        proches = proches[np.argsort(ligne[proches], kind='stable')]
+        return [(self.noms[i], round(float(ligne[i]), 1)) for i in proches.tolist()]
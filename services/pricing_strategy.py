@@ -1,22 +1,41 @@
+import threading
+import time
 from abc import ABC, abstractmethod
+from datetime import date
+import numpy as np
+
+from DAO.company_dao import CompanyDAO
+from DAO.pricing_rule_dao import PricingRuleDAO, REGLES_PAR_DEFAUT
 
 """
 Le Design Pattern "Strategy" (Stratégie).
 Imagine qu'on ait besoin de calculer le prix final différemment selon la ville
 (Rabat a une TVA de 20%, Casa a un frais de déplacement fixe, etc.).
 Au lieu de faire un gigantesque "if ville == 'Rabat' elif ville == 'Casa' elif...",
-on crée une "Stratégie" (une classe) par ville.
-Ça respecte le principe OCP (Open/Closed Principle) : on peut ajouter de nouvelles villes
+chaque règle de prix est une "Stratégie" (un objet) avec la même interface.
+Ça respecte le principe OCP (Open/Closed Principle) : on peut ajouter de nouvelles règles
 sans jamais modifier le code existant !
+Les règles ne sont plus écrites en dur dans des classes : ce sont des lignes de la table 'pricing_rules'
+(ville, catégorie de service, quantité minimum, période -> prix x multiplicateur + supplément),
+voir DAO/pricing_rule_dao.py. Le moteur (PricingRulesEngine) les "compile" une fois dans un dictionnaire :
+trouver la règle d'un devis ne coûte ensuite que quelques lectures de dictionnaire, quel que soit le nombre
+de règles. Il relit la table toutes les DELAI_RECHARGEMENT_S secondes (et tout de suite après une
+modification faite par ce programme) : une nouvelle règle s'applique sans redémarrer l'application.
+Chaque stratégie sait aussi calculer des milliers de prix d'un coup (calculate_prices, sur un tableau NumPy) :
+c'est ce qu'utilise CatalogService.quote_matrix pour les simulations (offres x quantités x villes).
 """
 
+# Secondes entre deux relectures de la table pricing_rules (modifications faites par un autre programme)
+DELAI_RECHARGEMENT_S = 30
+
+
 class PricingStrategy(ABC):
     """
     Ceci est l'"Interface" ou le "Moule" de nos stratégies.
-    Toute classe qui veut être une stratégie de prix DOIT obligatoirement 
+    Toute classe qui veut être une stratégie de prix DOIT obligatoirement
     implémenter ces deux méthodes (@abstractmethod).
     """
-    
+
     @abstractmethod
     def calculate_price(self, base_price: float) -> float:
         # Calcule le prix final à partir du prix de base
@@ -27,53 +46,167 @@ class PricingStrategy(ABC):
         # Retourne une petite explication texte (ex: "+50 DH frais de route")
         pass
 
+    def calculate_prices(self, base_prices: np.ndarray) -> np.ndarray:
+        """
+        Même calcul que calculate_price, sur tout un tableau de prix de base.
+        Par défaut, prix par prix (toujours juste) ; les stratégies ci-dessous font la même opération
+        directement sur le tableau NumPy, ce qui est des centaines de fois plus rapide.
+        """
+        base_prices = np.asarray(base_prices, dtype=np.float64)
+        prix = [self.calculate_price(p) for p in base_prices.ravel().tolist()]
+        return np.asarray(prix, dtype=np.float64).reshape(base_prices.shape)
+
 class StandardPricingStrategy(PricingStrategy):
-    """Stratégie par défaut (pas de taxe ni de frais supplémentaires)."""
-    
+    """Stratégie par défaut (pas de taxe ni de frais supplémentaires) : aucune règle ne s'applique."""
+    multiplicateur = 1.0
+    supplement = 0.0
+
     def calculate_price(self, base_price: float) -> float:
         return base_price
 
+    def calculate_prices(self, base_prices: np.ndarray) -> np.ndarray:
+        return np.array(base_prices, dtype=np.float64)
+
     def get_description(self) -> str:
         return "Tarif Standard (Sans frais supp.)"
 
-class RabatPricingStrategy(PricingStrategy):
-    """Stratégie pour Rabat : on ajoute 20% de TVA au prix de base."""
-    
-    def calculate_price(self, base_price: float) -> float:
-        # base_price * 1.20 ajoute 20%
-        return base_price * 1.20 
+class RulePricingStrategy(PricingStrategy):
+    """
+    Stratégie d'une règle de la table pricing_rules : prix de base x multiplicateur + supplément.
+      ex: Rabat      -> x 1.20 + 0   (TVA 20 %)
+          Casablanca -> x 1.0  + 50  (déplacement)
+    Multiplier par 1.0 et ajouter 0 ne change pas un prix : les anciens tarifs sont retrouvés au centime près.
+    """
 
-    def get_description(self) -> str:
-        return "Tarif Rabat (TVA 20% incluse)"
+    def __init__(self, regle):
+        self.rule_id = regle['id']
+        self.nom = regle['nom']
+        self.multiplicateur = float(regle['multiplicateur'])
+        self.supplement = float(regle['supplement'])
 
-class CasablancaPricingStrategy(PricingStrategy):
-    """Stratégie pour Casablanca : frais fixe de 50 DH pour le déplacement."""
-    
     def calculate_price(self, base_price: float) -> float:
-        return base_price + 50 
+        return base_price * self.multiplicateur + self.supplement
+
+    def calculate_prices(self, base_prices: np.ndarray) -> np.ndarray:
+        # Même opération (et même arrondi) que calculate_price, sur tout le tableau
+        return np.asarray(base_prices, dtype=np.float64) * self.multiplicateur + self.supplement
 
     def get_description(self) -> str:
-        return "Tarif Casa (+50 DH Déplacement)"
+        return self.nom
+
+
+def _cle_ville(ville):
+    # Même comparaison que les anciennes stratégies : " RABAT " = "rabat", mais "Râbat", "Rabat." ou
+    # "dar el beida" ne sont PAS Rabat / Casablanca (pas d'alias ni d'accents de l'annuaire des villes :
+    # le tarif d'un devis ne change pas). "casa" a sa propre règle (voir REGLES_PAR_DEFAUT).
+    if not ville or not str(ville).strip():
+        return None
+    return str(ville).lower().strip()
+
+
+def _jour_iso(jour):
+    """Date d'un devis ou d'une règle -> 'YYYY-MM-DD' (None reste None)."""
+    return None if jour is None else str(jour)[:10]
+
+
+class PricingRulesEngine:
+    _instance = None
+    _instance_lock = threading.Lock()
+    _standard = StandardPricingStrategy()
+
+    def __new__(cls):
+        """Singleton : les règles sont compilées une fois pour tout le programme."""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(PricingRulesEngine, cls).__new__(cls)
+                    instance._lock = threading.Lock()
+                    # Tant que la table n'a pas été lue (base injoignable, migration pas encore faite),
+                    # on applique les anciens tarifs Rabat / Casablanca
+                    instance._lignes = None
+                    instance._table = instance._compiler(REGLES_PAR_DEFAUT)
+                    instance._prochain_controle = 0.0
+                    PricingRuleDAO.add_listener(instance.invalidate)
+                    CompanyDAO.add_listener(instance._on_catalog_write)
+                    cls._instance = instance
+        return cls._instance
+
+    def invalidate(self):
+        """Relit et recompile les règles au prochain devis (appelée après chaque modification de règle)."""
+        self._lignes = None
+        self._prochain_controle = 0.0
+
+    def _on_catalog_write(self, evenement, identifiant):
+        # Une nouvelle catégorie de service peut être visée par des règles "par catégorie"
+        if evenement == 'service_types':
+            self.invalidate()
+
+    def strategy_for(self, ville, service_type_id=None, quantite=1, jour=None):
+        """
+        Stratégie (règle) à appliquer à un devis. La règle la plus précise l'emporte :
+          1. ville + catégorie du service, 2. ville, 3. catégorie, 4. toutes villes et catégories ;
+        puis, à même niveau, le plus grand palier de quantité atteint, une règle datée avant une règle
+        permanente, la plus grande priorité, et enfin la plus ancienne.
+        Sans règle applicable : StandardPricingStrategy. 'jour' (date du devis) vaut aujourd'hui par défaut.
+        """
+        if time.monotonic() >= self._prochain_controle:
+            self._recharger()
+        table = self._table
+        ville = _cle_ville(ville)
+        jour = _jour_iso(jour)
+        for cle in ((ville, service_type_id), (ville, None), (None, service_type_id), (None, None)):
+            for quantite_min, debut, fin, strategie in table.get(cle, ()):
+                if quantite < quantite_min:
+                    continue
+                if debut is not None or fin is not None:
+                    # La date n'est calculée que si une règle datée est candidate
+                    jour = jour or date.today().isoformat()
+                    if (debut is not None and jour < debut) or (fin is not None and jour > fin):
+                        continue
+                return strategie
+        return self._standard
+
+    def _recharger(self):
+        with self._lock:
+            if time.monotonic() < self._prochain_controle:
+                return   # Un autre thread vient de le faire
+            self._prochain_controle = time.monotonic() + DELAI_RECHARGEMENT_S
+            lignes = PricingRuleDAO().get_rules()
+            if lignes is None or lignes == self._lignes:
+                return   # Table illisible (on garde les règles actuelles) ou inchangée
+            self._table = self._compiler(lignes)
+            self._lignes = lignes
+
+    def _compiler(self, regles):
+        """
+        Range les règles dans un dictionnaire (clé de ville, service_type_id) -> [règles, dans l'ordre d'essai].
+        Une règle "par catégorie" est recopiée sous chaque type de service de cette catégorie.
+        """
+        categories = {}
+        if any(regle['category'] for regle in regles):
+            for service in CompanyDAO().get_service_types():
+                categories.setdefault(service.category, []).append(service.id)
+
+        candidates = {}
+        for regle in regles:
+            strategie = RulePricingStrategy(regle)
+            ville = _cle_ville(regle['ville'])
+            services = categories.get(regle['category'], []) if regle['category'] else [None]
+            debut, fin = _jour_iso(regle['date_debut']), _jour_iso(regle['date_fin'])
+            ordre = (-(regle['quantite_min'] or 1), debut is None and fin is None, -(regle['priorite'] or 0), regle['id'])
+            for service_type_id in services:
+                candidates.setdefault((ville, service_type_id), []).append((ordre, (regle['quantite_min'] or 1, debut, fin, strategie)))
+        return {cle: tuple(entree for _, entree in sorted(liste, key=lambda e: e[0])) for cle, liste in candidates.items()}
+
 
 class PricingFactory:
     """
     Le Design Pattern "Factory" (Usine).
     Comme pour les Utilisateurs (UserFactory), on utilise une usine pour
-    décider automatiquement quelle Stratégie instancier en fonction du nom de la ville.
+    décider automatiquement quelle Stratégie appliquer : c'est le moteur de règles qui la choisit
+    (la ville, et si on les connaît le type de service, la quantité et la date du devis).
     """
-    
-    @staticmethod
-    def get_strategy(ville: str) -> PricingStrategy:
-        # On nettoie la chaîne (minuscules, on enlève les espaces autour) pour éviter les erreurs
-        ville_propre = ville.lower().strip()
-        
-        if ville_propre == "rabat":
-            return RabatPricingStrategy()
-            
-        elif ville_propre == "casablanca" or ville_propre == "casa":
-            return CasablancaPricingStrategy()
-            
-        else:
-            # Si on ne connaît pas la ville (ou si elle est vide), on retourne la stratégie standard
-            return StandardPricingStrategy()
 
+    @staticmethod
+    def get_strategy(ville: str, service_type_id=None, quantite=1, jour=None) -> PricingStrategy:
+        return PricingRulesEngine().strategy_for(ville, service_type_id, quantite, jour)
@@ -0,0 +1,118 @@
+import time
+
+from DAO.booking_dao import BookingDAO
+from DAO.company_dao import CompanyDAO
+from DAO.sweeper_dao import SweeperDAO
+from utils.logger import Logger
+
+"""
+Service de Nettoyage ("sweeper") lancé périodiquement en arrière-plan (voir utils/sweeper.py).
+Trois tâches :
+  - 'stale_bookings'    : les réservations restées EN_ATTENTE après la date du RDV passent à ANNULEE
+                          (et leur créneau est libéré) ;
+  - 'expired_companies' : les entreprises dont l'abonnement est dépassé sont marquées is_expired ;
+  - 'offer_scores'      : le score de classement des offres est recalculé, entreprise par entreprise
+                          (la fenêtre des interventions récentes avance et les prix moyens bougent,
+                          même sans nouvel avis ni nouvelle réservation).
+Le travail est découpé en petits lots (200 lignes par défaut) : chaque lot est UNE courte transaction
+(les modifications + la progression), les verrous ne sont donc jamais gardés longtemps et
+une petite pause entre deux lots laisse passer les requêtes des utilisateurs.
+La progression (dernier ID traité) est enregistrée à chaque lot : après un arrêt, on reprend là.
+"""
+
+
+class SweeperService:
+    def __init__(self, booking_dao=None, company_dao=None, sweeper_dao=None):
+        self.booking_dao = booking_dao or BookingDAO()
+        self.company_dao = company_dao or CompanyDAO()
+        self.sweeper_dao = sweeper_dao or SweeperDAO()
+        self.logger = Logger()
+
+    def sweep_stale_bookings(self, chunk_size=200, pause_s=0.05, max_chunks=None):
+        """Annule, lot par lot, les réservations EN_ATTENTE dont la date est passée."""
+        def traiter(ids):
+            resultats = self.booking_dao.cancel_stale_bookings(ids)
+            if any(message.startswith("Erreur") for ok, message in resultats.values() if not ok):
+                raise RuntimeError("échec de l'annulation du lot")
+            # Une réservation confirmée ou payée entre la lecture et l'UPDATE n'est pas touchée (ni comptée)
+            return sum(1 for ok, _ in resultats.values() if ok)
+
+        return self._balayer('stale_bookings', self.booking_dao.get_stale_booking_ids, traiter,
+                             chunk_size, pause_s, max_chunks)
+
+    def sweep_expired_companies(self, chunk_size=200, pause_s=0.05, max_chunks=None):
+        """Marque, lot par lot, les entreprises dont l'abonnement a expiré."""
+        def traiter(ids):
+            nombre = self.company_dao.flag_expired_companies(ids)
+            if nombre is None:
+                raise RuntimeError("échec du marquage du lot")
+            return nombre
+
+        return self._balayer('expired_companies', self.company_dao.get_expired_company_ids, traiter,
+                             chunk_size, pause_s, max_chunks)
+
+    def sweep_offer_scores(self, chunk_size=200, pause_s=0.05, max_chunks=None):
+        """Recalcule, lot d'entreprises par lot, le score de classement de toutes les offres."""
+        def traiter(ids):
+            nombre = self.company_dao.refresh_scores(ids)
+            if nombre is None:
+                raise RuntimeError("échec du calcul des scores du lot")
+            return nombre
+
+        return self._balayer('offer_scores', self.company_dao.get_company_ids, traiter,
+                             chunk_size, pause_s, max_chunks)
+
+    def run_once(self, chunk_size=200, pause_s=0.05, max_chunks=None):
+        """Lance un balayage complet des trois tâches et renvoie leurs rapports."""
+        return [
+            self.sweep_stale_bookings(chunk_size, pause_s, max_chunks),
+            self.sweep_expired_companies(chunk_size, pause_s, max_chunks),
+            self.sweep_offer_scores(chunk_size, pause_s, max_chunks),
+        ]
+
+    def _balayer(self, job, lire_ids, traiter, chunk_size, pause_s, max_chunks):
+        """
+        Boucle commune aux tâches : lire un lot d'IDs après le dernier traité, le traiter et
+        enregistrer la progression dans la même transaction, puis recommencer jusqu'à la fin
+        (ou jusqu'à max_chunks lots : le balayage suivant reprendra au même endroit).
+        Retourne un rapport {'job', 'rows', 'chunks', 'duree_s', 'rows_per_s', 'max_lot_ms', 'termine', 'erreur'}
+        (duree_s compte aussi les pauses ; max_lot_ms = plus longue transaction, donc plus long verrou).
+        """
+        progression = self.sweeper_dao.get_progress(job)
+        dernier_id = progression['last_id'] if progression else 0
+        rapport = {'job': job, 'rows': 0, 'chunks': 0, 'max_lot_ms': 0.0, 'termine': False, 'erreur': None, 'reprise_apres_id': dernier_id}
+        debut = time.perf_counter()
+
+        while max_chunks is None or rapport['chunks'] < max_chunks:
+            ids = lire_ids(dernier_id, chunk_size)
+            termine = len(ids) < chunk_size
+            debut_lot = time.perf_counter()
+            try:
+                # Les modifications du lot et sa progression sont validées ensemble (un seul COMMIT)
+                with self.sweeper_dao.db.transaction():
+                    nombre = traiter(ids) if ids else 0
+                    if not self.sweeper_dao.save_progress(job, ids[-1] if ids else dernier_id, nombre, pass_done=termine):
+                        raise RuntimeError("progression non enregistrée")
+            except Exception as erreur:
+                rapport['erreur'] = str(erreur)
+                self.logger.log_error(f" Balayage {job} interrompu après l'ID {dernier_id} : {erreur}")
+                break
+
+            rapport['max_lot_ms'] = max(rapport['max_lot_ms'], (time.perf_counter() - debut_lot) * 1000)
+            rapport['rows'] += nombre
+            rapport['chunks'] += 1
+            if termine:
+                rapport['termine'] = True
+                break
+            dernier_id = ids[-1]
+            if pause_s:
+                time.sleep(pause_s)
+
+        rapport['duree_s'] = time.perf_counter() - debut
+        rapport['rows_per_s'] = rapport['rows'] / rapport['duree_s'] if rapport['duree_s'] else 0.0
+        self.logger.log_info(
+            f"Balayage {job} : {rapport['rows']} lignes en {rapport['chunks']} lots, "
+            f"{rapport['duree_s']:.2f} s ({rapport['rows_per_s']:.0f} lignes/s)"
+            + ("" if rapport['termine'] else f", reprise après l'ID {dernier_id}")
+        )
+        return rapport
@@ -0,0 +1,137 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+"""
+Cache en mémoire pour les lectures de DAO qui changent rarement (catégories de services, forfaits).
+Sans cache, ces petites tables étaient relues dans MySQL à chaque affichage de menu.
+
+    class CompanyDAO:
+        @cached(ttl=300, maxsize=8)
+        def get_service_types(self): ...
+
+Chaque résultat est gardé au plus 'ttl' secondes (TTL = "time to live", durée de vie), et au plus
+'maxsize' résultats par méthode : au-delà, on oublie celui qui n'a pas servi depuis le plus longtemps
+(LRU = "least recently used"). Une méthode qui MODIFIE ces données invalide l'entrée concernée :
+
+    self.get_service_types.invalidate()          # l'appel sans argument
+    self.get_plan_by_id.invalidate(plan_id)      # seulement l'entrée de ce forfait
+
+Les compteurs (hits = trouvé dans le cache, misses = requête SQL) de tous les caches sont
+disponibles avec cache_stats(), pour la surveillance.
+"""
+
+# Tous les caches créés par @cached, par nom ("CompanyDAO.get_service_types"), pour cache_stats()
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class TTLCache:
+    """Dictionnaire borné et thread-safe : chaque entrée expire après 'ttl' secondes, la plus ancienne part en premier."""
+
+    def __init__(self, name, ttl, maxsize):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entrees = OrderedDict()    # clé -> (date d'expiration, valeur), de la moins récemment utilisée à la plus récente
+        self._lock = threading.Lock()
+        self._source = None
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, cle):
+        """Retourne (True, valeur) si la clé est en cache et pas expirée, sinon (False, None)."""
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                if entree[0] > time.monotonic():
+                    self._entrees.move_to_end(cle)   # utilisée à l'instant : passe en fin de file
+                    self.hits += 1
+                    return True, entree[1]
+                del self._entrees[cle]
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, cle, valeur):
+        with self._lock:
+            self._entrees[cle] = (time.monotonic() + self.ttl, valeur)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.maxsize:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, cle):
+        with self._lock:
+            if self._entrees.pop(cle, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entrees)
+            self._entrees.clear()
+
+    def check_source(self, source):
+        """Si le programme s'est branché sur une autre base, les résultats gardés ne sont plus valables."""
+        if source is not self._source:
+            with self._lock:
+                self._entrees.clear()
+                self._source = source
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entrees), 'maxsize': self.maxsize, 'ttl_s': self.ttl,
+                'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions, 'expirations': self.expirations, 'invalidations': self.invalidations,
+            }
+
+
+def _cle(args, kwargs):
+    return args + tuple(sorted(kwargs.items())) if kwargs else args
+
+
+def _copie(valeur):
+    # Une liste (ou un dictionnaire) rendu par le cache est copié : l'appelant peut le trier ou le modifier sans abîmer le cache
+    if isinstance(valeur, dict):
+        return dict(valeur)
+    return list(valeur) if isinstance(valeur, list) else valeur
+
+
+def cached(ttl=300.0, maxsize=128):
+    """
+    Décorateur pour une méthode de lecture de DAO (les arguments, hors 'self', forment la clé).
+    Les résultats vides (None ou []) ne sont pas gardés : c'est aussi ce que renvoie un DAO
+    quand la base est injoignable, et on ne veut pas garder une erreur pendant 'ttl' secondes.
+    """
+    def decorateur(methode):
+        cache = TTLCache(methode.__qualname__, ttl, maxsize)
+        with _caches_lock:
+            _caches[cache.name] = cache
+
+        @functools.wraps(methode)
+        def wrapper(self, *args, **kwargs):
+            db = getattr(self, 'db', None)
+            cache.check_source(getattr(db, 'backend', None))
+            cle = _cle(args, kwargs)
+            trouve, valeur = cache.get(cle)
+            if not trouve:
+                valeur = methode(self, *args, **kwargs)
+                if valeur:
+                    cache.put(cle, valeur)
+            return _copie(valeur)
+
+        # Invalidation précise (mêmes arguments que l'appel) ou complète
+        wrapper.invalidate = lambda *args, **kwargs: cache.invalidate(_cle(args, kwargs))
+        wrapper.invalidate_all = cache.clear
+        wrapper.cache = cache
+        return wrapper
+    return decorateur
+
+
+def cache_stats():
+    """Compteurs de tous les caches : {'CompanyDAO.get_service_types': {'hits', 'misses', 'hit_rate', ...}, ...}"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -1,6 +1,6 @@
 import os
 from Config.database import DatabaseConnection
-import mysql.connector
+from utils.migrate_db import run_migrations
 
 """
 Script d'Initialisation de la Base de Données.
@@ -10,6 +10,9 @@ C'est comme un "Reset D'Usine" pour notre application.
 """
 
 def init_db(host, user, password, database):
+    # Le driver MySQL n'est importé que pour ce mode (la version SQLite n'en a pas besoin)
+    import mysql.connector
+
     # 1. On se connecte à MySQL SANS spécifier de base de données.
     # Pourquoi ? Parce qu'on veut pouvoir créer la base de données si elle n'existe pas encore !
     try:
@@ -61,12 +64,60 @@ def init_db(host, user, password, database):
         
     except Exception as erreur:
         print(f"Erreur lors de l'initialisation des tables : {erreur}")
+        return
         
     finally:
         cursor.close()
 
+    # 5. On applique les migrations (index, nouvelles colonnes...) par-dessus le schéma de base
+    run_migrations(db)
+
+def init_sqlite_db(path=':memory:'):
+    """
+    Même "Reset d'Usine", mais pour une base SQLite (fichier ou ':memory:').
+    Pas de serveur à installer : pratique pour les tests et les benchmarks.
+    """
+    # Pour un fichier, "détruire la base" = supprimer le fichier (et ses fichiers WAL)
+    if path != ':memory:':
+        for fichier in (path, path + '-wal', path + '-shm'):
+            if os.path.exists(fichier):
+                os.remove(fichier)
+
+    db = DatabaseConnection()
+    db.connect_sqlite(path)
+    conn = db.get_connection()
+
+    if not conn:
+        print(" Impossible d'initialiser la DB SQLite : pas de connexion.")
+        return
+
+    if create_sqlite_schema(conn):
+        run_migrations(db)
+
+
+def create_sqlite_schema(conn):
+    """Crée toutes les tables SQLite (traduction de Schema.sql) sur la connexion donnée."""
+    schema_path = os.path.join(os.path.dirname(__file__), '../database/Schema_sqlite.sql')
+
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        schema = f.read()
+
+    try:
+        # SQLite sait exécuter tout le script d'un coup
+        conn.executescript(schema)
+        conn.commit()
+        print("Base de données SQLite initialisée avec succès (Toutes les tables ont été créées).")
+        return True
+    except Exception as erreur:
+        print(f"Erreur lors de l'initialisation des tables SQLite : {erreur}")
+        return False
+
+
 # Ce bloc s'exécute uniquement si on lance directement ce fichier (ex: `python db_init.py`)
 if __name__ == "__main__":
     from Config.settings import Config
-    init_db(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME)
+    if getattr(Config, 'DB_BACKEND', 'mysql') == 'sqlite':
+        init_sqlite_db(getattr(Config, 'DB_SQLITE_PATH', 'optivolt.db'))
+    else:
+        init_db(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME)
 
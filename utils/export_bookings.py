@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from Config.database import DatabaseConnection
+from services.export_service import BookingExportService, FORMATS
+
+"""
+Export du registre des réservations pour la comptabilité (CSV ou Parquet), sans passer par la CLI.
+Les lignes sont lues et écrites par paquets : la mémoire utilisée reste la même quelle que soit
+la taille de la table. Un indicateur affiche les lignes écrites et le débit (lignes/s).
+
+Lancement : python3 main.py export-bookings reservations.csv [--from 2024-01-01] [--to 2024-12-31]
+                                            [--statut TERMINEE] [--company 3] [--chunk 5000]
+       (ou : python3 -m utils.export_bookings ...)
+Le format est déduit de l'extension (.csv ou .parquet), ou imposé avec --format.
+"""
+
+STATUTS = ('EN_ATTENTE', 'PAYEE', 'CONFIRMEE', 'REFUSEE', 'TERMINEE', 'ANNULEE', 'ANNULEE_CLIENT')
+
+
+def _date(texte):
+    try:
+        return datetime.strptime(texte, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date invalide : {texte} (format attendu : YYYY-MM-DD)")
+
+
+def _afficher_progression(lignes, par_seconde):
+    # \r : on réécrit la même ligne du terminal à chaque paquet
+    print(f"\r {lignes} lignes écrites ({par_seconde:.0f} lignes/s)", end="", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py export-bookings", description="Export des réservations (CSV / Parquet)")
+    parser.add_argument("output", help="fichier à produire (.csv ou .parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="format du fichier (par défaut : selon l'extension)")
+    parser.add_argument("--from", dest="date_from", type=_date, help="demandes faites à partir de cette date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=_date, help="demandes faites jusqu'à cette date incluse (YYYY-MM-DD)")
+    parser.add_argument("--statut", choices=STATUTS, help="seulement les réservations dans ce statut")
+    parser.add_argument("--company", type=int, help="seulement les réservations de cette entreprise (ID)")
+    parser.add_argument("--chunk", type=int, default=5000, help="lignes lues et écrites par paquet")
+    args = parser.parse_args(argv)
+
+    format = args.format or ('parquet' if os.path.splitext(args.output)[1].lower() == '.parquet' else 'csv')
+    if args.date_from and args.date_to and args.date_from > args.date_to:
+        print(" La date de début est après la date de fin.")
+        return 1
+
+    from Config.settings import Config
+    db = DatabaseConnection()
+    db.connect_from_config(Config)
+
+    stats = BookingExportService().export(
+        args.output, format, chunk_size=max(1, args.chunk), date_from=args.date_from, date_to=args.date_to,
+        statut=args.statut, company_id=args.company, progression=_afficher_progression
+    )
+    print()
+    db.close()
+    if not stats:
+        return 1
+    print(f" {stats['lignes']} réservations exportées en {stats['duree_s']:.2f} s ({stats['par_seconde']:.0f} lignes/s)")
+    print(f" Fichier : {stats['fichier']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+
+from Config.database import DatabaseConnection
+from services.booking_import_service import BookingImportService
+
+"""
+Import en masse de réservations depuis un fichier JSONL (sans passer par la CLI interactive).
+Le format des lignes et les contrôles effectués sont décrits dans services/booking_import_service.py.
+
+Lancement : python3 main.py ingest-bookings reservations.jsonl [-o resultats.jsonl] [--chunk 500]
+       (ou : python3 -m utils.ingest_bookings reservations.jsonl ...)
+Par défaut, les résultats sont écrits à côté du fichier d'entrée : reservations.results.jsonl
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py ingest-bookings", description="Import en masse de réservations (JSONL)")
+    parser.add_argument("input", help="fichier JSONL des réservations à importer")
+    parser.add_argument("-o", "--output", help="fichier JSONL des résultats (un par ligne)")
+    parser.add_argument("--chunk", type=int, default=500, help="nombre de lignes par lot / transaction")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f" Fichier introuvable : {args.input}")
+        return 1
+    output = args.output or os.path.splitext(args.input)[0] + ".results.jsonl"
+
+    from Config.settings import Config
+    db = DatabaseConnection()
+    db.connect_from_config(Config)
+
+    stats = BookingImportService().import_file(args.input, output, chunk_size=max(1, args.chunk))
+    print(f" {stats['lues']} lignes lues en {stats['duree_s']:.2f} s ({stats['par_seconde']:.0f} lignes/s)")
+    print(f"   Importées : {stats['importees']} | Rejetées : {stats['rejetees']} | Déjà importées : {stats['deja_importees']}")
+    print(f" Résultats détaillés : {output}")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 
 """
 Un 'Logger' sert à garder une trace (un journal) de tout ce qui se passe 
@@ -11,6 +12,8 @@ seul et unique journal ouvert dans notre programme.
 class Logger:
     # Attribut de classe qui va stocker notre unique instance
     _instance = None
+    # Verrou pour que deux threads ne configurent pas le journal en même temps
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         """
@@ -19,10 +22,16 @@ class Logger:
         S'il existe déjà, on le retourne directement.
         """
         if cls._instance is None:
-            cls._instance = super(Logger, cls).__new__(cls)
-            
-            # Une fois l'instance créée pour la 1ère fois, on configure ses options
-            cls._instance._initialize()
+            # Double vérification sous verrou (plusieurs sessions peuvent démarrer en parallèle)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(Logger, cls).__new__(cls)
+
+                    # Une fois l'instance créée pour la 1ère fois, on configure ses options
+                    instance._initialize()
+
+                    # On ne publie l'instance qu'une fois configurée
+                    cls._instance = instance
             
         return cls._instance
 
@@ -1,54 +1,224 @@
+import sys
 from Config.database import DatabaseConnection
-from Config.settings import Config
+from DAO.booking_dao import COLONNES_RESUME
+from DAO.company_dao import COLONNES_NOTES_CARTE, JOINTURES_NOTES
+from utils.migrations import MIGRATIONS
 
 """
 Script de Migration de la Base de Données.
 Une "Migration" sert à modifier la structure d'une base de données EXISTANTE sans perdre les données
-(ex: rajouter une colonne dans une table).
-Ici, ce vieux script ajoutait la colonne 'is_available' aux utilisateurs.
+(ex: rajouter une colonne ou un index dans une table).
+Les migrations sont décrites dans utils/migrations.py et numérotées (version 1, 2, 3...).
+La table 'schema_migrations' garde la liste des versions déjà appliquées : relancer ce script
+n'applique que les nouvelles migrations, dans l'ordre.
+
+Lancement : python3 -m utils.migrate_db [--check]
+(--check : vérifie avec EXPLAIN que chaque requête fréquente utilise bien son index)
+"""
+
+VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
 """
 
-def migrate():
+# Clé primaire (company_id, rdv_date, rdv_heure) de booking_slots : son nom dépend du moteur
+INDEX_CRENEAUX = {'mysql': 'PRIMARY', 'sqlite': 'sqlite_autoindex_booking_slots_1'}
+
+# Requêtes fréquentes des DAOs (avec des paramètres d'exemple) et l'index qu'elles doivent utiliser
+# (un nom, ou un dictionnaire {'mysql': ..., 'sqlite': ...} quand il diffère d'un moteur à l'autre)
+HOT_QUERIES = [
+    ("BookingDAO.get_booked_slots", INDEX_CRENEAUX, """
+        SELECT rdv_heure FROM booking_slots
+        WHERE company_id = %s AND rdv_date = %s
+    """, (1, '2030-01-01')),
+    ("BookingDAO.get_booked_slots_range", INDEX_CRENEAUX, """
+        SELECT rdv_date, rdv_heure FROM booking_slots
+        WHERE company_id = %s AND rdv_date BETWEEN %s AND %s
+    """, (1, '2030-01-01', '2030-01-21')),
+    ("BookingDAO.get_client_bookings", "idx_bookings_client_date", f"""
+        SELECT {COLONNES_RESUME}, c.nom_entreprise, s.nom_service
+        FROM bookings b
+        JOIN companies c ON b.company_id = c.id
+        JOIN service_types s ON b.service_type_id = s.id
+        WHERE b.client_id = %s
+        ORDER BY b.date_demande DESC
+    """, (1,)),
+    ("BookingDAO.get_client_bookings_page", "idx_bookings_client_date", f"""
+        SELECT {COLONNES_RESUME}, c.nom_entreprise, s.nom_service
+        FROM bookings b
+        JOIN companies c ON b.company_id = c.id
+        JOIN service_types s ON b.service_type_id = s.id
+        WHERE b.client_id = %s AND b.date_demande <= %s AND (b.date_demande < %s OR b.id < %s)
+        ORDER BY b.date_demande DESC, b.id DESC LIMIT %s
+    """, (1, '2030-01-01 10:00:00', '2030-01-01 10:00:00', 100, 11)),
+    ("BookingDAO.get_company_bookings_page", "idx_bookings_company_demande", f"""
+        SELECT {COLONNES_RESUME}, u.nom as client_nom, s.nom_service
+        FROM bookings b
+        JOIN users u ON b.client_id = u.id
+        JOIN service_types s ON b.service_type_id = s.id
+        WHERE b.company_id = %s AND b.date_demande <= %s AND (b.date_demande < %s OR b.id < %s)
+        ORDER BY b.date_demande DESC, b.id DESC LIMIT %s
+    """, (1, '2030-01-01 10:00:00', '2030-01-01 10:00:00', 100, 11)),
+    ("BookingDAO.get_all_bookings_page", "idx_bookings_demande", f"""
+        SELECT {COLONNES_RESUME}, u.nom as client_nom, c.nom_entreprise, s.nom_service
+        FROM bookings b
+        JOIN users u ON b.client_id = u.id
+        JOIN companies c ON b.company_id = c.id
+        JOIN service_types s ON b.service_type_id = s.id
+        WHERE b.date_demande <= %s AND (b.date_demande < %s OR b.id < %s)
+        ORDER BY b.date_demande DESC, b.id DESC LIMIT %s
+    """, ('2030-01-01 10:00:00', '2030-01-01 10:00:00', 100, 21)),
+    ("CompanyDAO.get_companies_by_service", "idx_catalog_service_score", f"""
+        SELECT c.*, cat.id as catalog_id, cat.prix_base, cat.score, {COLONNES_NOTES_CARTE}
+        FROM companies c
+        JOIN catalog cat ON c.id = cat.company_id
+        LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+        {JOINTURES_NOTES}
+        WHERE cat.service_type_id = %s
+          AND c.is_verified = TRUE
+          AND c.subscription_expires_at >= CURDATE()
+        ORDER BY cat.score DESC, cat.id DESC LIMIT %s
+    """, (1, 20)),
+    ("BookingDAO.add_review", "idx_reviews_booking_unique", """
+        SELECT id FROM reviews WHERE booking_id = %s
+    """, (1,)),
+    ("CompanyDAO.get_all_companies", "idx_companies_verified_expiry", """
+        SELECT c.*, sp.nom as plan_nom, sp.prix_mensuel
+        FROM companies c
+        LEFT JOIN subscription_plans sp ON c.subscription_plan_id = sp.id
+        WHERE c.is_verified = TRUE AND c.subscription_expires_at >= CURDATE()
+    """, ()),
+    ("BookingDAO.get_stale_booking_ids", "idx_bookings_statut_id", """
+        SELECT id FROM bookings
+        WHERE statut = 'EN_ATTENTE' AND id > %s AND rdv_date < CURDATE()
+        ORDER BY id LIMIT %s
+    """, (0, 200)),
+    ("UserDAO.find_by_login", "idx_users_telephone", """
+        SELECT * FROM users WHERE email = %s OR telephone = %s
+    """, ('client@optivolt.ma', '0600000000')),
+]
+
+
+def run_migrations(db=None):
+    """
+    Applique, dans l'ordre, les migrations qui ne sont pas encore dans 'schema_migrations'.
+    Chaque migration est enregistrée dans la même transaction que ses étapes.
+    (Attention : en MySQL, un CREATE/ALTER valide automatiquement la transaction en cours ;
+    c'est pour cela que chaque étape vérifie d'abord si elle a déjà été faite.)
+    On s'arrête à la première erreur pour ne jamais appliquer la migration N+1 sans la N.
+    Retourne la liste des versions appliquées, ou None en cas d'échec (même si d'autres sont passées avant).
+    """
+    db = db or DatabaseConnection()
+    appliquees = []
+    echec = None
+
+    with db.borrow() as connection:
+        if not connection:
+            print(" Impossible de migrer : pas de connexion.")
+            return None
+
+        cursor = connection.cursor()
+        try:
+            cursor.execute(VERSION_TABLE_SQL)
+            db.commit(connection)
+
+            cursor.execute("SELECT version FROM schema_migrations")
+            deja_faites = {row[0] for row in cursor.fetchall()}
+
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                if migration.version in deja_faites:
+                    continue
+                with db.transaction():
+                    migration.apply(cursor, db.dialect)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                        (migration.version, migration.description)
+                    )
+                appliquees.append(migration.version)
+                print(f" Migration {migration.version:03d} appliquée : {migration.description}")
+
+        except Exception as erreur:
+            echec = erreur
+            print(f"Erreur lors de la migration : {erreur}")
+
+        finally:
+            cursor.close()
+
+    if echec is not None:
+        # Surtout pas "déjà à jour" : la base est restée à la dernière migration réussie
+        print(f" ÉCHEC : migration interrompue ({len(appliquees)} appliquée(s) avant l'erreur), la base n'est PAS à jour.")
+        return None
+    if not appliquees:
+        print(" Base de données déjà à jour, aucune migration à appliquer.")
+    return appliquees
+
+
+def _index_utilise(plan, index, dialect):
+    """Cherche le nom de l'index dans le plan d'exécution renvoyé par EXPLAIN."""
+    if dialect == 'sqlite':
+        # EXPLAIN QUERY PLAN -> colonne 'detail', ex: "SEARCH bookings USING INDEX idx_... (company_id=?)"
+        return any(index in str(ligne['detail']) for ligne in plan)
+    # EXPLAIN MySQL -> colonne 'key' = index réellement choisi (possible_keys = simples candidats)
+    # (avec un "index merge", key contient plusieurs noms séparés par des virgules)
+    return any(index in str(ligne.get('key') or '') for ligne in plan)
+
+
+def check_indexes(db=None):
+    """
+    Lance EXPLAIN sur chaque requête de HOT_QUERIES et vérifie que l'index attendu est utilisé.
+    Retourne une liste de (requête, index, utilisé ?, plan résumé).
+    """
+    db = db or DatabaseConnection()
+    resultats = []
+    prefixe = "EXPLAIN QUERY PLAN " if db.dialect == 'sqlite' else "EXPLAIN "
+
+    with db.borrow() as connection:
+        if not connection:
+            print(" Impossible de vérifier les index : pas de connexion.")
+            return resultats
+
+        cursor = connection.cursor(dictionary=True)
+        try:
+            for nom, index, sql, params in HOT_QUERIES:
+                if isinstance(index, dict):
+                    index = index[db.dialect]
+                cursor.execute(prefixe + sql, params)
+                plan = cursor.fetchall()
+                if db.dialect == 'sqlite':
+                    resume = " | ".join(str(ligne['detail']) for ligne in plan)
+                else:
+                    resume = " | ".join(f"{ligne.get('table')}:{ligne.get('key')}" for ligne in plan)
+                resultats.append((nom, index, _index_utilise(plan, index, db.dialect), resume))
+        except Exception as erreur:
+            print(f"Erreur lors de la vérification des index : {erreur}")
+        finally:
+            cursor.close()
+
+    return resultats
+
+
+def migrate(check=False):
     print(" Migration de la base de données (Vérification de structure)...")
+    from Config.settings import Config
     db = DatabaseConnection()
-    # On se connecte à la DB avec les paramètres configurés
-    db.connect(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME)
-    
-    conn = db.get_connection()
-    if not conn: 
-        return
-    
-    cursor = conn.cursor()
-    try:
-        # En MySQL, "information_schema.COLUMNS" est une table cachée qui contient la liste 
-        # de TOUTES les colonnes de TOUTES les tables. On s'en sert pour faire une vérification.
-        # On vérifie si la colonne "is_available" existe déjà dans la table "users".
-        check_query = """
-            SELECT count(*) 
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = %s 
-              AND TABLE_NAME = 'users' 
-              AND COLUMN_NAME = 'is_available'
-        """
-        cursor.execute(check_query, (Config.DB_NAME,))
-        colonne_existante = cursor.fetchone()[0]
-        
-        # Si le compte est de 0, la colonne n'existe pas encore.
-        if colonne_existante == 0:
-            print("Ajout de la colonne 'is_available' dans la table users...")
-            # On utilise "ALTER TABLE" pour modifier une table existante en rajoutant la colonne
-            cursor.execute("ALTER TABLE users ADD COLUMN is_available BOOLEAN DEFAULT TRUE")
-            conn.commit()
-            print("Migration réussie.")
-        else:
-            print(" La colonne 'is_available' est déjà présente, aucune modification requise.")
-            
-    except Exception as erreur:
-        print(f"Erreur lors de la migration : {erreur}")
-        
-    finally:
-        cursor.close()
+    # On se connecte à la DB avec les paramètres configurés (MySQL ou SQLite)
+    db.connect_from_config(Config)
 
-if __name__ == "__main__":
-    migrate()
+    # Une migration ratée : code de sortie 1, et pas de vérification des index sur un schéma incomplet
+    if run_migrations(db) is None:
+        sys.exit(1)
 
+    if check:
+        resultats = check_indexes(db)
+        for nom, index, ok, resume in resultats:
+            print(f" [{'OK' if ok else 'KO'}] {nom:<36} {index:<34} {resume}")
+        if not resultats or not all(ok for _, _, ok, _ in resultats):
+            print(" Au moins une requête fréquente n'utilise pas son index.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate(check='--check' in sys.argv)
@@ -0,0 +1,449 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Union
+
+"""
+Liste ORDONNÉE des migrations de la base de données (appliquées par utils/migrate_db.py).
+Règles :
+  - on n'efface et ne modifie JAMAIS une migration déjà publiée : on en ajoute une nouvelle à la fin ;
+  - chaque migration a un numéro de version unique et croissant ;
+  - une étape ("step") est soit une requête SQL commune aux deux moteurs, soit un dictionnaire
+    {'mysql': ..., 'sqlite': ...}, soit une fonction step(cursor, dialect) pour les cas particuliers.
+Les fonctions add_column(), create_index() et drop_index() vérifient d'abord si l'élément existe (ou non) :
+rejouer une migration sur une base déjà à jour ne casse donc rien (idempotence).
+"""
+
+
+def add_column(table, column, definition):
+    """Étape qui ajoute une colonne seulement si elle n'existe pas encore."""
+    def step(cursor, dialect):
+        if dialect == 'sqlite':
+            cursor.execute(f"PRAGMA table_info({table})")
+            existe = any(row[1] == column for row in cursor.fetchall())
+        else:
+            # "information_schema.COLUMNS" est une table cachée de MySQL qui liste toutes les colonnes
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+            """, (table, column))
+            existe = cursor.fetchone()[0] > 0
+
+        if not existe:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def create_index(name, table, columns, unique=False):
+    """Étape qui crée un index secondaire (UNIQUE si demandé) seulement s'il n'existe pas encore."""
+    colonnes = ", ".join(columns)
+    genre = "UNIQUE INDEX" if unique else "INDEX"
+
+    def step(cursor, dialect):
+        if dialect == 'sqlite':
+            cursor.execute(f"CREATE {genre} IF NOT EXISTS {name} ON {table} ({colonnes})")
+            return
+        # MySQL n'accepte pas "CREATE INDEX IF NOT EXISTS" : on vérifie dans information_schema
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, name))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE {genre} {name} ON {table} ({colonnes})")
+    return step
+
+
+def drop_index(name, table):
+    """Étape qui supprime un index secondaire seulement s'il existe encore."""
+    def step(cursor, dialect):
+        if dialect == 'sqlite':
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            return
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, name))
+        if cursor.fetchone()[0] > 0:
+            cursor.execute(f"DROP INDEX {name} ON {table}")
+    return step
+
+
+def _remplir_duree_heures(cursor, dialect):
+    """Calcule catalog.duree_heures des offres existantes à partir du texte libre duree_estimee."""
+    from models.company import parse_duree_heures
+    cursor.execute("SELECT id, duree_estimee FROM catalog WHERE duree_heures IS NULL")
+    lignes = cursor.fetchall()
+    if lignes:
+        cursor.executemany("UPDATE catalog SET duree_heures = %s WHERE id = %s",
+                           [(parse_duree_heures(duree), catalog_id) for catalog_id, duree in lignes])
+
+
+def _booking_slots_multi_heures(cursor, dialect):
+    """
+    booking_slots avait UNIQUE (booking_id) : une réservation = une seule heure.
+    On retire cette contrainte (une intervention de 3 h réclame 3 lignes) et on la remplace par
+    un index simple sur booking_id (libérer les créneaux d'une réservation reste rapide).
+    """
+    if dialect == 'sqlite':
+        # PRAGMA index_list -> (seq, name, unique, origin, partial)
+        cursor.execute("PRAGMA index_list(booking_slots)")
+        uniques = [row[1] for row in cursor.fetchall() if row[2]]
+        colonnes = []
+        for nom in uniques:
+            cursor.execute(f"PRAGMA index_info({nom})")
+            colonnes.append([row[2] for row in cursor.fetchall()])
+        if ['booking_id'] in colonnes:
+            # SQLite ne sait pas supprimer une contrainte : on recrée la table sans elle
+            cursor.execute("""
+                CREATE TABLE booking_slots_new (
+                    company_id INT NOT NULL,
+                    rdv_date DATE NOT NULL,
+                    rdv_heure VARCHAR(10) NOT NULL,
+                    booking_id INT NOT NULL,
+                    PRIMARY KEY (company_id, rdv_date, rdv_heure),
+                    FOREIGN KEY (booking_id) REFERENCES bookings (id) ON DELETE CASCADE
+                )
+            """)
+            cursor.execute("INSERT INTO booking_slots_new SELECT company_id, rdv_date, rdv_heure, booking_id FROM booking_slots")
+            cursor.execute("DROP TABLE booking_slots")
+            cursor.execute("ALTER TABLE booking_slots_new RENAME TO booking_slots")
+        create_index('idx_booking_slots_booking', 'booking_slots', ['booking_id'])(cursor, dialect)
+        return
+
+    # MySQL : l'index simple d'abord (la clé étrangère a toujours besoin d'un index sur booking_id)
+    create_index('idx_booking_slots_booking', 'booking_slots', ['booking_id'])(cursor, dialect)
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'booking_slots'
+          AND COLUMN_NAME = 'booking_id' AND NON_UNIQUE = 0
+    """)
+    for (nom,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE booking_slots DROP INDEX {nom}")
+
+
+def _etendre_creneaux_existants(cursor, dialect):
+    """
+    Les réservations à venir ne réclamaient que la première heure de l'intervention :
+    on réclame aussi les suivantes. Une heure déjà prise par une autre réservation lui reste
+    (INSERT ... IGNORE) : ce chevauchement existait déjà avant la migration.
+    """
+    from services.availability_service import occupied_slots
+    cursor.execute("""
+        SELECT b.id, b.company_id, b.rdv_date, b.rdv_heure, cat.duree_heures, c.horaire_debut, c.horaire_fin, c.jours_travail
+        FROM booking_slots bs
+        JOIN bookings b ON b.id = bs.booking_id
+        JOIN catalog cat ON cat.id = b.catalog_id
+        JOIN companies c ON c.id = b.company_id
+        WHERE cat.duree_heures > 1 AND b.rdv_date >= CURDATE()
+    """)
+    lignes = []
+    for booking_id, company_id, rdv_date, rdv_heure, duree, h_debut, h_fin, jours in cursor.fetchall():
+        entreprise = {'horaire_debut': h_debut, 'horaire_fin': h_fin, 'jours_travail': jours}
+        # La première heure est déjà dans booking_slots
+        for jour, heure in occupied_slots(entreprise, rdv_date, rdv_heure, duree)[1:]:
+            lignes.append((company_id, jour, heure, booking_id))
+    if lignes:
+        inserer = "INSERT IGNORE INTO" if dialect == 'mysql' else "INSERT OR IGNORE INTO"
+        cursor.executemany(f"{inserer} booking_slots (company_id, rdv_date, rdv_heure, booking_id) VALUES (%s, %s, %s, %s)", lignes)
+
+
+def _calculer_scores(cursor, dialect):
+    """
+    Score de classement de toutes les offres existantes (voir DAO.company_dao.compute_offer_scores).
+    Les scores lisent les notes dans company_ratings : sur une base qui n'a pas encore la migration 9,
+    ils sont calculés par celle-ci (_remplir_notes), une fois les compteurs remplis.
+    """
+    from DAO.company_dao import compute_offer_scores
+    if dialect == 'sqlite':
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'company_ratings'")
+    else:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'company_ratings'
+        """)
+    if cursor.fetchone()[0] > 0:
+        compute_offer_scores(cursor)
+
+
+def _remplir_notes(cursor, dialect):
+    """
+    Compteurs de notes à partir des avis déjà en base (voir DAO.booking_dao.rebuild_rating_aggregates),
+    puis scores de classement : compute_offer_scores lit les notes dans ces compteurs.
+    """
+    from DAO.booking_dao import rebuild_rating_aggregates
+    from DAO.company_dao import compute_offer_scores
+    rebuild_rating_aggregates(cursor)
+    compute_offer_scores(cursor)
+
+
+def _supprimer_avis_en_double(cursor, dialect):
+    """
+    Avant UNIQUE (booking_id), deux envois simultanés pouvaient enregistrer deux avis pour la même
+    intervention : on garde le premier, puis on recalcule les compteurs et les scores des entreprises concernées.
+    """
+    from DAO.booking_dao import rebuild_rating_aggregates
+    from DAO.company_dao import compute_offer_scores
+    cursor.execute("""
+        SELECT r.id, b.company_id FROM reviews r
+        JOIN bookings b ON b.id = r.booking_id
+        WHERE r.id > (SELECT MIN(r2.id) FROM reviews r2 WHERE r2.booking_id = r.booking_id)
+    """)
+    doublons = cursor.fetchall()
+    if not doublons:
+        return
+    cursor.executemany("DELETE FROM reviews WHERE id = %s", [(review_id,) for review_id, _ in doublons])
+    entreprises = sorted({company_id for _, company_id in doublons})
+    rebuild_rating_aggregates(cursor, entreprises)
+    compute_offer_scores(cursor, entreprises)
+
+
+# Colonnes de pricing_rules (la clé primaire auto-incrémentée s'écrit différemment selon le moteur)
+_COLONNES_REGLES_PRIX = """nom VARCHAR(100) NOT NULL,
+            ville VARCHAR(100) NULL,
+            category VARCHAR(50) NULL,
+            quantite_min INT NOT NULL DEFAULT 1,
+            date_debut DATE NULL,
+            date_fin DATE NULL,
+            multiplicateur DOUBLE NOT NULL DEFAULT 1,
+            supplement DOUBLE NOT NULL DEFAULT 0,
+            priorite INT NOT NULL DEFAULT 0,
+            is_active BOOLEAN NOT NULL DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"""
+
+
+def _regles_de_prix_initiales(cursor, dialect):
+    """Les anciennes stratégies Rabat / Casablanca deviennent les premières règles (si la table est vide)."""
+    from DAO.pricing_rule_dao import REGLES_PAR_DEFAUT, insert_rules
+    cursor.execute("SELECT COUNT(*) FROM pricing_rules")
+    if cursor.fetchone()[0] == 0:
+        insert_rules(cursor, REGLES_PAR_DEFAUT)
+
+
+def _regle_casa(cursor, dialect):
+    """
+    Le moteur de prix compare les villes comme les anciennes stratégies (orthographe exacte) :
+    "casa" a besoin de sa propre règle, copiée de la règle Casablanca créée par la migration 10
+    (même libellé, mêmes montants, même état actif / inactif), si elle n'existe pas déjà.
+    """
+    cursor.execute("""
+        INSERT INTO pricing_rules (nom, ville, category, quantite_min, date_debut, date_fin,
+                                   multiplicateur, supplement, priorite, is_active)
+        SELECT nom, 'casa', category, quantite_min, date_debut, date_fin, multiplicateur, supplement, priorite, is_active
+        FROM pricing_rules
+        WHERE nom = %s AND ville = 'Casablanca'
+          AND NOT EXISTS (SELECT 1 FROM pricing_rules WHERE LOWER(ville) = 'casa')
+    """, ("Tarif Casa (+50 DH Déplacement)",))
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    steps: List[Union[str, dict, Callable]] = field(default_factory=list)
+
+    def apply(self, cursor, dialect):
+        """Exécute les étapes dans l'ordre, avec la variante SQL du moteur utilisé."""
+        for step in self.steps:
+            if callable(step):
+                step(cursor, dialect)
+                continue
+            requetes = step.get(dialect, []) if isinstance(step, dict) else step
+            if isinstance(requetes, str):
+                requetes = [requetes]
+            for requete in requetes:
+                cursor.execute(requete)
+
+
+MIGRATIONS = [
+    # Ancien contenu de migrate_db.py : la colonne de disponibilité des utilisateurs
+    Migration(1, "Colonne users.is_available", [
+        add_column('users', 'is_available', 'BOOLEAN DEFAULT TRUE'),
+    ]),
+
+    # Index des requêtes les plus fréquentes (voir HOT_QUERIES dans migrate_db.py)
+    Migration(2, "Index des requêtes fréquentes (créneaux, historique client, catalogue, annuaire, login)", [
+        # get_booked_slots : WHERE company_id = ? AND rdv_date = ? AND statut NOT IN (...)
+        # rdv_heure est ajoutée en dernier pour que l'index "couvre" la requête (pas besoin de lire la table)
+        create_index('idx_bookings_company_date_statut', 'bookings', ['company_id', 'rdv_date', 'statut', 'rdv_heure']),
+        # get_client_bookings : WHERE client_id = ? ORDER BY date_demande DESC (évite le tri)
+        create_index('idx_bookings_client_date', 'bookings', ['client_id', 'date_demande']),
+        # get_companies_by_service : WHERE cat.service_type_id = ? puis jointure sur l'entreprise
+        create_index('idx_catalog_service_type', 'catalog', ['service_type_id', 'company_id']),
+        # get_all_companies / get_companies_by_service : entreprises vérifiées avec abonnement actif
+        create_index('idx_companies_verified_expiry', 'companies', ['is_verified', 'subscription_expires_at']),
+        # find_by_login : WHERE email = ? OR telephone = ? (l'email a déjà son index UNIQUE)
+        create_index('idx_users_telephone', 'users', ['telephone']),
+    ]),
+
+    # Réservation atomique des créneaux : la clé primaire interdit deux réservations actives
+    # sur le même (entreprise, date, heure). Les réservations existantes sont recopiées
+    # (en cas de doublon déjà présent, la plus ancienne garde le créneau).
+    Migration(3, "Table booking_slots (un créneau = une seule réservation active)", [
+        """
+        CREATE TABLE IF NOT EXISTS booking_slots (
+            company_id INT NOT NULL,
+            rdv_date DATE NOT NULL,
+            rdv_heure VARCHAR(10) NOT NULL,
+            booking_id INT NOT NULL,
+            PRIMARY KEY (company_id, rdv_date, rdv_heure),
+            UNIQUE (booking_id),
+            FOREIGN KEY (booking_id) REFERENCES bookings (id) ON DELETE CASCADE
+        )
+        """,
+        {
+            'mysql': """
+                INSERT IGNORE INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id)
+                SELECT company_id, rdv_date, rdv_heure, MIN(id) FROM bookings
+                WHERE rdv_date IS NOT NULL AND rdv_heure IS NOT NULL
+                  AND statut NOT IN ('REFUSEE', 'ANNULEE', 'ANNULEE_CLIENT')
+                GROUP BY company_id, rdv_date, rdv_heure
+            """,
+            'sqlite': """
+                INSERT OR IGNORE INTO booking_slots (company_id, rdv_date, rdv_heure, booking_id)
+                SELECT company_id, rdv_date, rdv_heure, MIN(id) FROM bookings
+                WHERE rdv_date IS NOT NULL AND rdv_heure IS NOT NULL
+                  AND statut NOT IN ('REFUSEE', 'ANNULEE', 'ANNULEE_CLIENT')
+                GROUP BY company_id, rdv_date, rdv_heure
+            """,
+        },
+    ]),
+
+    # Import en masse (utils/ingest_bookings.py) : chaque ligne importée garde sa référence.
+    # L'index UNIQUE empêche d'importer deux fois la même ligne (relancer un fichier est sans danger)
+    # et permet de retrouver les IDs des réservations insérées par executemany.
+    Migration(4, "Colonne bookings.import_ref (référence unique des réservations importées)", [
+        add_column('bookings', 'import_ref', 'VARCHAR(64) NULL'),
+        create_index('idx_bookings_import_ref', 'bookings', ['import_ref'], unique=True),
+    ]),
+
+    # Nettoyage en tâche de fond (utils/sweeper.py) : drapeau "abonnement expiré" posé par le balayage,
+    # table de progression (pour reprendre où on s'était arrêté) et index pour trouver vite
+    # les réservations EN_ATTENTE dans l'ordre des IDs.
+    Migration(5, "Balayage périodique : companies.is_expired, table sweeper_progress, index (statut, id)", [
+        add_column('companies', 'is_expired', 'BOOLEAN DEFAULT FALSE'),
+        """
+        CREATE TABLE IF NOT EXISTS sweeper_progress (
+            job VARCHAR(50) PRIMARY KEY,
+            last_id INT NOT NULL DEFAULT 0,
+            rows_total INT NOT NULL DEFAULT 0,
+            passes INT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        {
+            'mysql': "INSERT IGNORE INTO sweeper_progress (job) VALUES ('stale_bookings'), ('expired_companies')",
+            'sqlite': "INSERT OR IGNORE INTO sweeper_progress (job) VALUES ('stale_bookings'), ('expired_companies')",
+        },
+        create_index('idx_bookings_statut_id', 'bookings', ['statut', 'id']),
+    ]),
+
+    # Pagination par curseur (keyset) des historiques : ORDER BY date_demande DESC, id DESC
+    # doit être lu directement dans l'index, sans tri ni OFFSET
+    Migration(6, "Index de pagination (date_demande, id) des historiques de réservations", [
+        create_index('idx_bookings_company_demande', 'bookings', ['company_id', 'date_demande', 'id']),
+        create_index('idx_bookings_demande', 'bookings', ['date_demande', 'id']),
+    ]),
+
+    # Interventions de plusieurs heures ("3h", "½ journée", "2 jours") : durée normalisée en heures
+    # dans le catalogue, et booking_slots accepte plusieurs heures (lignes) pour une même réservation
+    Migration(7, "Durée des interventions : catalog.duree_heures, une ligne de booking_slots par heure occupée", [
+        add_column('catalog', 'duree_heures', 'INT NULL'),
+        _remplir_duree_heures,
+        _booking_slots_multi_heures,
+        _etendre_creneaux_existants,
+    ]),
+
+    # Classement du marketplace : score stocké par offre (forfait, avis, prix, interventions réussies),
+    # recalculé à chaque avis / intervention finie / abonnement. L'index (service_type_id, score) donne
+    # directement les offres d'un service dans l'ordre du classement : ORDER BY score LIMIT k sans tri.
+    # La tâche 'offer_scores' du balayage périodique recalcule régulièrement tous les scores
+    # (la fenêtre des 90 derniers jours avance, les prix moyens bougent).
+    Migration(8, "Classement des offres : catalog.score, index (service_type_id, score), index reviews.booking_id", [
+        add_column('catalog', 'score', 'FLOAT NOT NULL DEFAULT 0'),
+        create_index('idx_catalog_service_score', 'catalog', ['service_type_id', 'score']),
+        # Avis d'une réservation (add_review) et moyenne des avis par entreprise (jointure sur bookings)
+        create_index('idx_reviews_booking', 'reviews', ['booking_id']),
+        _calculer_scores,
+        {
+            'mysql': "INSERT IGNORE INTO sweeper_progress (job) VALUES ('offer_scores')",
+            'sqlite': "INSERT OR IGNORE INTO sweeper_progress (job) VALUES ('offer_scores')",
+        },
+    ]),
+
+    # Notes des avis sur les cartes du catalogue : compteurs (nombre, somme, histogramme 1 à 5 étoiles)
+    # par entreprise et par offre, mis à jour dans la transaction de chaque avis (BookingDAO.add_review)
+    # au lieu d'un AVG() sur tous les avis à chaque carte affichée
+    Migration(9, "Compteurs de notes : tables company_ratings et catalog_ratings", [
+        """
+        CREATE TABLE IF NOT EXISTS company_ratings (
+            company_id INT PRIMARY KEY,
+            nb_avis INT NOT NULL DEFAULT 0,
+            somme_notes INT NOT NULL DEFAULT 0,
+            note_1 INT NOT NULL DEFAULT 0,
+            note_2 INT NOT NULL DEFAULT 0,
+            note_3 INT NOT NULL DEFAULT 0,
+            note_4 INT NOT NULL DEFAULT 0,
+            note_5 INT NOT NULL DEFAULT 0,
+            FOREIGN KEY (company_id) REFERENCES companies (id) ON DELETE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS catalog_ratings (
+            catalog_id INT PRIMARY KEY,
+            company_id INT NOT NULL,
+            nb_avis INT NOT NULL DEFAULT 0,
+            somme_notes INT NOT NULL DEFAULT 0,
+            note_1 INT NOT NULL DEFAULT 0,
+            note_2 INT NOT NULL DEFAULT 0,
+            note_3 INT NOT NULL DEFAULT 0,
+            note_4 INT NOT NULL DEFAULT 0,
+            note_5 INT NOT NULL DEFAULT 0,
+            FOREIGN KEY (catalog_id) REFERENCES catalog (id) ON DELETE CASCADE
+        )
+        """,
+        # Rattrapage d'une entreprise (rebuild_ratings --company) : DELETE ... WHERE company_id IN (...)
+        create_index('idx_catalog_ratings_company', 'catalog_ratings', ['company_id']),
+        _remplir_notes,
+    ]),
+
+    # Règles de prix en base (ville, catégorie de service, quantité minimum, période) au lieu des
+    # stratégies écrites en dur : services/pricing_strategy.py les compile et les recharge à chaud.
+    # DOUBLE (et pas FLOAT, simple précision en MySQL) : 1.20 doit donner exactement les mêmes prix qu'avant
+    Migration(10, "Règles de prix : table pricing_rules (Rabat et Casablanca deviennent des règles)", [
+        {
+            'mysql': f"""
+        CREATE TABLE IF NOT EXISTS pricing_rules (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            {_COLONNES_REGLES_PRIX}
+        )
+        """,
+            'sqlite': f"""
+        CREATE TABLE IF NOT EXISTS pricing_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            {_COLONNES_REGLES_PRIX}
+        )
+        """,
+        },
+        _regles_de_prix_initiales,
+    ]),
+
+    # Un seul avis par intervention, garanti par la base : la vérification de BookingDAO.add_review
+    # (SELECT puis INSERT) laissait passer deux envois simultanés, comptés deux fois dans les notes.
+    # L'index unique remplace l'index simple de la migration 8 (même colonne).
+    Migration(11, "Avis : UNIQUE (reviews.booking_id), un seul avis par intervention", [
+        _supprimer_avis_en_double,
+        create_index('idx_reviews_booking_unique', 'reviews', ['booking_id'], unique=True),
+        drop_index('idx_reviews_booking', 'reviews'),
+    ]),
+
+    # Les créneaux pris sont lus dans booking_slots (migration 3) : plus aucune requête ne cherche
+    # dans bookings par (company_id, rdv_date, statut), l'index de la migration 2 ne faisait que ralentir
+    # chaque écriture. La clé étrangère company_id reste couverte par idx_bookings_company_demande (migration 6).
+    Migration(12, "Suppression de l'index bookings (company_id, rdv_date, statut, rdv_heure), remplacé par booking_slots", [
+        drop_index('idx_bookings_company_date_statut', 'bookings'),
+    ]),
+
+    # Les villes des règles de prix sont comparées comme avant la migration 10 (sans l'annuaire des villes) :
+    # l'alias "casa" de l'ancienne stratégie Casablanca devient une règle à part entière
+    Migration(13, "Règles de prix : règle 'casa' (même tarif que Casablanca, comme l'ancienne stratégie)", [
+        _regle_casa,
+    ]),
+]
@@ -0,0 +1,259 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+"""
+Instrumentation des requêtes SQL (activée depuis la configuration : DB_INSTRUMENTATION = True).
+On "enveloppe" la connexion prêtée par DatabaseConnection.borrow() : chaque cursor.execute()
+est chronométré, et on compte les lignes et les octets lus par les fetch*().
+Les mesures sont rangées par méthode de DAO (ex: "BookingDAO.get_booked_slots") sous forme
+d'histogramme de latence. Les requêtes plus lentes que le seuil (DB_SLOW_QUERY_MS) sont écrites
+dans logs/slow_queries.log, avec leurs paramètres masqués (pas d'email ni de mot de passe dans les logs).
+Quand l'instrumentation est désactivée, rien de tout cela n'est exécuté.
+"""
+
+# Bornes (en millisecondes) des cases de l'histogramme de latence
+BORNES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _caller_name():
+    """
+    Retrouve la méthode de DAO (ou de service) qui a lancé la requête, ex: "UserDAO.find_by_login".
+    On remonte quelques "frames" de la pile d'appels jusqu'à sortir de ce module.
+    """
+    frame = sys._getframe(2)
+    profondeur = 0
+    while frame is not None and profondeur < 6:
+        module = frame.f_globals.get('__name__', '')
+        if module != __name__ and not module.startswith('contextlib'):
+            instance = frame.f_locals.get('self')
+            if instance is not None:
+                return f"{type(instance).__name__}.{frame.f_code.co_name}"
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+        profondeur += 1
+    return "inconnu"
+
+
+def redact_params(params):
+    """Remplace chaque paramètre par son type (et sa taille pour les textes) : ('a@b.ma', 3) -> ('<str:6>', '<int>')."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {cle: _masquer(valeur) for cle, valeur in params.items()}
+    return tuple(_masquer(valeur) for valeur in params)
+
+
+def _masquer(valeur):
+    if valeur is None:
+        return None
+    if isinstance(valeur, (str, bytes)):
+        return f"<{type(valeur).__name__}:{len(valeur)}>"
+    return f"<{type(valeur).__name__}>"
+
+
+def _taille_ligne(row):
+    """Estimation (peu coûteuse) du nombre d'octets d'une ligne : longueur des textes, 8 octets sinon."""
+    valeurs = row.values() if isinstance(row, dict) else row
+    return sum(len(v) if isinstance(v, (str, bytes, bytearray)) else 8 for v in valeurs if v is not None)
+
+
+class MethodStats:
+    """Statistiques cumulées d'une méthode de DAO."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        # Une case par borne + une case "au-delà de la dernière borne"
+        self.histogram = [0] * (len(BORNES_MS) + 1)
+
+    def add(self, duree_ms, rows, octets):
+        self.calls += 1
+        self.total_ms += duree_ms
+        self.max_ms = max(self.max_ms, duree_ms)
+        self.rows += rows
+        self.bytes += octets
+        for i, borne in enumerate(BORNES_MS):
+            if duree_ms <= borne:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def percentile(self, p):
+        """Percentile approché (borne haute de la case de l'histogramme)."""
+        if not self.calls:
+            return 0.0
+        seuil = self.calls * p / 100
+        cumul = 0
+        for i, nombre in enumerate(self.histogram):
+            cumul += nombre
+            if cumul >= seuil:
+                return min(float(BORNES_MS[i]), self.max_ms) if i < len(BORNES_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'avg_ms': self.total_ms / self.calls if self.calls else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'max_ms': self.max_ms,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'histogram': dict(zip([f"<={b}ms" for b in BORNES_MS] + [f">{BORNES_MS[-1]}ms"], self.histogram)),
+        }
+
+
+class QueryInstrumentation:
+    """
+    Collecteur partagé par toutes les connexions instrumentées.
+    Un verrou protège les compteurs (plusieurs threads peuvent exécuter des requêtes en même temps).
+    """
+
+    def __init__(self, slow_query_ms=200.0, slow_log_path=None):
+        self.slow_query_ms = slow_query_ms
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.slow_logger = self._slow_logger(slow_log_path)
+
+    def _slow_logger(self, chemin):
+        """Journal séparé pour les requêtes lentes (logs/slow_queries.log par défaut)."""
+        logger = logging.getLogger("OptiVoltSlowQueries")
+        logger.setLevel(logging.WARNING)
+        # Les requêtes lentes ne doivent pas remonter dans optivolt.log
+        logger.propagate = False
+        if not logger.handlers:
+            chemin = chemin or os.path.join(os.path.dirname(__file__), '../logs/slow_queries.log')
+            handler = logging.FileHandler(chemin)
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+            logger.addHandler(handler)
+        return logger
+
+    def wrap(self, connection):
+        """Enveloppe une connexion (MySQL ou SQLite) pour que ses curseurs soient mesurés."""
+        if connection is None or isinstance(connection, InstrumentedConnection):
+            return connection
+        return InstrumentedConnection(connection, self)
+
+    def record(self, methode, sql, params, duree_ms, rows, octets):
+        with self._lock:
+            stats = self._stats.get(methode)
+            if stats is None:
+                stats = self._stats[methode] = MethodStats()
+            stats.add(duree_ms, rows, octets)
+
+        if duree_ms >= self.slow_query_ms:
+            requete = re.sub(r'\s+', ' ', sql).strip()
+            self.slow_logger.warning(
+                f"{duree_ms:.1f} ms | {methode} | {requete} | params={redact_params(params)} | rows={rows}"
+            )
+
+    def get_report(self):
+        """Statistiques par méthode de DAO, de la plus coûteuse (temps total) à la moins coûteuse."""
+        with self._lock:
+            lignes = [(methode, stats.to_dict(), stats.total_ms) for methode, stats in self._stats.items()]
+        lignes.sort(key=lambda ligne: ligne[2], reverse=True)
+        return {methode: stats for methode, stats, _ in lignes}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+class InstrumentedConnection:
+    """Se comporte comme la vraie connexion, mais renvoie des curseurs instrumentés."""
+
+    def __init__(self, connection, instrumentation):
+        self._connection = connection
+        self._instrumentation = instrumentation
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._instrumentation)
+
+    def __getattr__(self, nom):
+        # commit, rollback, is_connected, in_transaction... : on délègue à la vraie connexion
+        return getattr(self._connection, nom)
+
+
+class InstrumentedCursor:
+    """
+    Chronomètre chaque execute() ET les fetch*() qui suivent : une "mesure" commence à execute()
+    et se termine au prochain execute() ou à close(). C'est elle qu'on enregistre.
+    """
+
+    def __init__(self, cursor, instrumentation):
+        self._cursor = cursor
+        self._instrumentation = instrumentation
+        self._mesure = None
+
+    def _demarrer(self, sql, params):
+        self._terminer()
+        self._mesure = [_caller_name(), sql, params, 0.0, 0, 0]
+
+    def _terminer(self):
+        if self._mesure is not None:
+            methode, sql, params, duree, rows, octets = self._mesure
+            self._mesure = None
+            self._instrumentation.record(methode, sql, params, duree * 1000, rows, octets)
+
+    def _chrono(self, debut, lignes=()):
+        if self._mesure is not None:
+            self._mesure[3] += time.perf_counter() - debut
+            self._mesure[4] += len(lignes)
+            if lignes:
+                # Estimation : taille de la 1ère ligne x nombre de lignes (mesurer chaque ligne coûterait trop cher)
+                self._mesure[5] += _taille_ligne(lignes[0]) * len(lignes)
+
+    def execute(self, sql, params=None):
+        self._demarrer(sql, params)
+        debut = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._chrono(debut)
+
+    def executemany(self, sql, seq_params):
+        self._demarrer(sql, None)
+        debut = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params)
+        finally:
+            self._chrono(debut)
+
+    def fetchone(self):
+        debut = time.perf_counter()
+        ligne = self._cursor.fetchone()
+        self._chrono(debut, (ligne,) if ligne is not None else ())
+        return ligne
+
+    def fetchmany(self, size=1):
+        debut = time.perf_counter()
+        lignes = self._cursor.fetchmany(size)
+        self._chrono(debut, lignes)
+        return lignes
+
+    def fetchall(self):
+        debut = time.perf_counter()
+        lignes = self._cursor.fetchall()
+        self._chrono(debut, lignes)
+        return lignes
+
+    def __iter__(self):
+        ligne = self.fetchone()
+        while ligne is not None:
+            yield ligne
+            ligne = self.fetchone()
+
+    def close(self):
+        self._terminer()
+        return self._cursor.close()
+
+    def __getattr__(self, nom):
+        # lastrowid, rowcount, description... : on délègue au vrai curseur
+        return getattr(self._cursor, nom)
@@ -0,0 +1,38 @@
+import argparse
+import sys
+import time
+
+from Config.database import DatabaseConnection
+from DAO.booking_dao import BookingDAO
+
+"""
+Recalcul des compteurs de notes (company_ratings, catalog_ratings) à partir de la table reviews.
+Les compteurs sont tenus à jour à chaque avis (BookingDAO.add_review) ; ce rattrapage sert après
+un import d'avis fait directement en SQL, une restauration de sauvegarde, ou pour vérifier les compteurs.
+
+Lancement : python3 main.py rebuild-ratings [--company 3 --company 7]
+       (ou : python3 -m utils.rebuild_ratings ...)
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py rebuild-ratings", description="Recalcul des compteurs de notes des avis")
+    parser.add_argument("--company", type=int, action="append", help="seulement cette entreprise (ID, option répétable)")
+    args = parser.parse_args(argv)
+
+    from Config.settings import Config
+    db = DatabaseConnection()
+    db.connect_from_config(Config)
+
+    debut = time.perf_counter()
+    resultat = BookingDAO().rebuild_ratings(args.company)
+    db.close()
+    if resultat is None:
+        return 1
+    entreprises, offres = resultat
+    print(f" Notes recalculées en {time.perf_counter() - debut:.2f} s : {entreprises} entreprises et {offres} offres notées.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
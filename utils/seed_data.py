@@ -37,7 +37,7 @@ def seed_data():
     
     # 1. Connexion à la base
     db = DatabaseConnection()
-    db.connect(Config.DB_HOST, Config.DB_USER, Config.DB_PASSWORD, Config.DB_NAME)
+    db.connect_from_config(Config)
     
     # Initialisation de nos outils pour interagir avec la base
     user_dao = UserDAO()
@@ -82,44 +82,46 @@ def seed_data():
         ville = random.choice(villes)
         plan = random.choice(plans) # L'entreprise prend un abonnement au hasard
 
-        # Étape A: Créer le compte Utilisateur de l'entreprise
-        company_user = UserFactory.create_user("ENTREPRISE", nom, email, "1234", fake.phone_number(), ville=ville, adresse=fake.address())
-        created_user = user_dao.create(company_user)
+        # Les étapes A, B et C forment une seule transaction (un seul COMMIT par entreprise)
+        with db.transaction():
+            # Étape A: Créer le compte Utilisateur de l'entreprise
+            company_user = UserFactory.create_user("ENTREPRISE", nom, email, "1234", fake.phone_number(), ville=ville, adresse=fake.address())
+            created_user = user_dao.create(company_user)
         
-        if created_user:
-            # Étape B: Créer le profil Entreprise avec son abonnement
-            comp = Company(
-                user_id=created_user.id,
-                nom_entreprise=nom,
-                description=fake.catch_phrase(),
-                ville=ville,
-                contact_phone=fake.phone_number(),
-                contact_email=email,
-                is_verified=True,
-                subscription_plan_id=plan.id
-            )
-            created_comp = company_dao.create_company(comp)
+            if created_user:
+                # Étape B: Créer le profil Entreprise avec son abonnement
+                comp = Company(
+                    user_id=created_user.id,
+                    nom_entreprise=nom,
+                    description=fake.catch_phrase(),
+                    ville=ville,
+                    contact_phone=fake.phone_number(),
+                    contact_email=email,
+                    is_verified=True,
+                    subscription_plan_id=plan.id
+                )
+                created_comp = company_dao.create_company(comp)
             
-            if created_comp:
-                # Étape C: Ajouter des offres au catalogue de l'entreprise
-                # Plus le plan est cher, plus on peut avoir d'offres
-                nb_services = random.randint(2, min(4, plan.max_services))
-                for _ in range(nb_services):
-                    st = random.choice(service_types)
-                    item = CatalogItem(
-                        company_id=created_comp.id,
-                        service_type=st,
-                        prix_base=random.randint(100, 800),
-                        prix_par_unite=random.randint(15, 80),
-                        unite_nom="panneau",
-                        description_offre=fake.sentence(),
-                        produits_inclus=random.choice(PRODUITS),
-                        duree_estimee=random.choice(DUREES)
-                    )
-                    # On insère le service fictif dans la base
-                    company_dao.add_service_to_catalog(item)
+                if created_comp:
+                    # Étape C: Ajouter des offres au catalogue de l'entreprise
+                    # Plus le plan est cher, plus on peut avoir d'offres
+                    nb_services = random.randint(2, min(4, plan.max_services))
+                    for _ in range(nb_services):
+                        st = random.choice(service_types)
+                        item = CatalogItem(
+                            company_id=created_comp.id,
+                            service_type=st,
+                            prix_base=random.randint(100, 800),
+                            prix_par_unite=random.randint(15, 80),
+                            unite_nom="panneau",
+                            description_offre=fake.sentence(),
+                            produits_inclus=random.choice(PRODUITS),
+                            duree_estimee=random.choice(DUREES)
+                        )
+                        # On insère le service fictif dans la base
+                        company_dao.add_service_to_catalog(item)
                     
-                companies_created += 1
+                    companies_created += 1
     
     print(f"{companies_created} Entreprises factices créées avec catalogues et abonnements.")
     logger.log_info(f"Seed: {companies_created} entreprises créées.")
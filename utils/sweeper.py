@@ -0,0 +1,54 @@
+import argparse
+import sys
+import time
+
+from Config.database import DatabaseConnection
+from services.sweeper_service import SweeperService
+
+"""
+Processus de nettoyage périodique (voir services/sweeper_service.py).
+Lancement :
+  python3 -m utils.sweeper              -> un balayage puis arrêt (idéal dans une tâche cron)
+  python3 -m utils.sweeper --loop       -> tourne en continu, un balayage toutes les SWEEPER_INTERVAL_S secondes
+Exemple cron (toutes les 10 minutes) :
+  */10 * * * * cd /chemin/optivolt && python3 -m utils.sweeper
+Réglages (Config/settings.py) : SWEEPER_CHUNK_SIZE (200), SWEEPER_PAUSE_MS (50), SWEEPER_INTERVAL_S (600).
+"""
+
+
+def afficher(rapports):
+    for r in rapports:
+        etat = "terminé" if r['termine'] else (f"ERREUR : {r['erreur']}" if r['erreur'] else "à suivre")
+        print(f" {r['job']:<18} | {r['rows']:>7} lignes | {r['chunks']:>4} lots | {r['duree_s']:>7.2f} s | {r['rows_per_s']:>8.0f} lignes/s | lot max {r['max_lot_ms']:.0f} ms | {etat}")
+
+
+def main(argv=None):
+    from Config.settings import Config
+    parser = argparse.ArgumentParser(description="Nettoyage périodique (réservations périmées, abonnements expirés, scores de classement)")
+    parser.add_argument("--loop", action="store_true", help="tourner en continu")
+    parser.add_argument("--interval", type=float, default=getattr(Config, 'SWEEPER_INTERVAL_S', 600), help="secondes entre deux balayages (--loop)")
+    parser.add_argument("--chunk", type=int, default=getattr(Config, 'SWEEPER_CHUNK_SIZE', 200), help="lignes par lot / transaction")
+    parser.add_argument("--max-chunks", type=int, default=None, help="nombre maximum de lots par tâche et par balayage")
+    args = parser.parse_args(argv)
+    pause_s = getattr(Config, 'SWEEPER_PAUSE_MS', 50) / 1000
+
+    db = DatabaseConnection()
+    db.connect_from_config(Config)
+    sweeper = SweeperService()
+
+    try:
+        while True:
+            afficher(sweeper.run_once(max(1, args.chunk), pause_s, args.max_chunks))
+            if not args.loop:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        # La progression est enregistrée à chaque lot : rien n'est perdu
+        print(" Arrêt demandé.")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())